@@ -6,7 +6,15 @@ SIH25208 SAIL Bokaro Steel Plant Logistics Optimization System.
 __version__ = "1.0.0"
 __author__ = "SAIL Bokaro AI Team"
 
-from .main import app
-from .config import settings
-
 __all__ = ['app', 'settings']
+
+
+def __getattr__(name):
+    # Lazy so that importing a submodule (e.g. a job worker) does not build the API
+    if name == 'app':
+        from .main import app
+        return app
+    if name == 'settings':
+        from .config import settings
+        return settings
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -5,13 +5,16 @@ Handles PostgreSQL connections and queries
 
 import os
 import logging
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Any
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
 
 from sqlalchemy import create_engine, text, pool
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import SQLAlchemyError
 
+from .services.query_cache import get_query_cache
+from .utils.metrics import instrument_engine
+
 logger = logging.getLogger(__name__)
 
 # Configuration
@@ -21,6 +24,8 @@ DATABASE_URL = os.getenv(
 )
 DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
 DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+DB_PARTITION_MONTHS_AHEAD = int(os.getenv('DB_PARTITION_MONTHS_AHEAD', '3'))
+DB_RETENTION_MONTHS = int(os.getenv('DB_RETENTION_MONTHS', '24'))  # 0 keeps every partition attached
 USE_CSV_MODE = os.getenv('USE_CSV_MODE', 'false').lower() == 'true'
 
 # Database status
@@ -38,6 +43,7 @@ try:
         connect_args={'connect_timeout': 10},
     )
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    instrument_engine(engine)
     logger.info("✓ Database engine created successfully")
 except Exception as e:
     logger.error(f"✗ Failed to create database engine: {e}")
@@ -74,9 +80,149 @@ def test_connection() -> bool:
         return False
 
 
+# ============================================================================
+# Statements (built once, shared with the async helpers in db_async)
+# ============================================================================
+
+ORDERS_BY_DESTINATION_SQL = text("""
+    SELECT
+        order_id,
+        order_date,
+        material_type,
+        quantity_tonnes,
+        destination,
+        priority,
+        loading_point,
+        status
+    FROM orders
+    WHERE destination = :destination
+        AND order_date = :date
+        AND status = :status
+    ORDER BY priority DESC, order_date ASC
+""")
+
+LATEST_INVENTORY_SQL = text("""
+    SELECT
+        stockyard,
+        material_type,
+        quantity_tonnes,
+        safety_stock_tonnes,
+        available_tonnes,
+        stock_status,
+        as_of
+    FROM mv_latest_inventory
+    WHERE stockyard = :stockyard
+    ORDER BY stock_status DESC, material_type ASC
+""")
+
+LP_THROUGHPUT_SQL = text("""
+    SELECT
+        loading_point,
+        ts,
+        throughput_tonnes,
+        utilization_percent
+    FROM lp_throughput
+    WHERE loading_point = :loading_point
+        AND ts >= :start_time
+        AND ts <= :end_time
+    ORDER BY ts DESC
+""")
+
+RECENT_RAKE_ARRIVALS_SQL = text("""
+    SELECT
+        rake_id,
+        yard,
+        arrival_time,
+        wagons_count,
+        capacity_tonnes,
+        status
+    FROM rake_arrivals
+    WHERE yard = :yard
+        AND arrival_time >= :start_time
+    ORDER BY arrival_time DESC
+""")
+
+DAILY_FORECAST_SUMMARY_SQL = text("""
+    SELECT
+        order_date,
+        destination,
+        material_type,
+        total_demand_tonnes,
+        order_count,
+        high_priority_ratio
+    FROM mv_daily_forecast_summary
+    WHERE destination = :destination
+        AND order_date = :date
+    ORDER BY total_demand_tonnes DESC
+""")
+
+ROUTE_CONGESTION_SQL = text("""
+    SELECT
+        route_id,
+        date,
+        congestion_level,
+        avg_delay_hours,
+        traffic_factor
+    FROM route_congestion
+    WHERE route_id = :route_id
+        AND date = :date
+""")
+
+INSERT_DISPATCH_SQL = text("""
+    INSERT INTO dispatch_history (
+        dispatch_date, rake_id, truck_id, order_id,
+        destination, tonnes_dispatched, estimated_cost,
+        estimated_delay_hours, transport_mode, status
+    ) VALUES (
+        :dispatch_date, :rake_id, :truck_id, :order_id,
+        :destination, :tonnes_dispatched, :estimated_cost,
+        :estimated_delay_hours, :transport_mode, :status
+    )
+    RETURNING dispatch_id
+""")
+
+MATERIALIZED_VIEWS = ('mv_latest_inventory', 'mv_daily_forecast_summary', 'mv_lp_daily_stats')
+
+# Monthly range-partitioned tables and their partition keys (db/schema.sql)
+PARTITIONED_TABLES = {
+    'rake_arrivals': 'arrival_time',
+    'lp_throughput': 'ts',
+    'route_congestion': 'date',
+    'dispatch_history': 'dispatch_date',
+}
+
+CREATE_PARTITIONS_SQL = text("SELECT create_monthly_partitions(:parent, :from_date, :to_date)")
+
+ARCHIVE_PARTITIONS_SQL = text("SELECT archive_old_partitions(:parent, :keep_months)")
+
+HEALTH_PING_SQL = text("SELECT 1")
+
+PUBLIC_TABLE_COUNT_SQL = text("""
+    SELECT COUNT(*) FROM information_schema.tables
+    WHERE table_schema = 'public'
+""")
+
+
 # ============================================================================
 # Query Functions
 # ============================================================================
+# Inventory, forecast summary, route congestion and rake arrival lookups are
+# read through the query cache; dispatch inserts and view refreshes
+# invalidate it.
+
+# Cached lookups whose results a new dispatch changes
+DISPATCH_INVALIDATES = ('inventory', 'rake_arrivals')
+
+
+def _fetch_all(statement, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    with engine.connect() as conn:
+        return [dict(row._mapping) for row in conn.execute(statement, params).fetchall()]
+
+
+def _fetch_one(statement, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    with engine.connect() as conn:
+        row = conn.execute(statement, params).fetchone()
+        return dict(row._mapping) if row else None
 
 
 def get_orders_by_destination(
@@ -104,24 +250,7 @@ def get_orders_by_destination(
 
     try:
         with engine.connect() as conn:
-            query = text("""
-                SELECT
-                    order_id,
-                    order_date,
-                    material_type,
-                    quantity_tonnes,
-                    destination,
-                    priority,
-                    loading_point,
-                    status
-                FROM orders
-                WHERE destination = :destination
-                    AND order_date = :date
-                    AND status = :status
-                ORDER BY priority DESC, order_date ASC
-            """)
-
-            result = conn.execute(query, {
+            result = conn.execute(ORDERS_BY_DESTINATION_SQL, {
                 'destination': destination,
                 'date': date,
                 'status': status,
@@ -150,24 +279,10 @@ def get_latest_inventory(stockyard: str) -> List[Dict[str, Any]]:
         return []
 
     try:
-        with engine.connect() as conn:
-            query = text("""
-                SELECT
-                    stockyard,
-                    material_type,
-                    quantity_tonnes,
-                    safety_stock_tonnes,
-                    available_tonnes,
-                    stock_status,
-                    as_of
-                FROM mv_latest_inventory
-                WHERE stockyard = :stockyard
-                ORDER BY stock_status DESC, material_type ASC
-            """)
-
-            result = conn.execute(query, {'stockyard': stockyard})
-            rows = result.fetchall()
-            return [dict(row._mapping) for row in rows]
+        return get_query_cache().get_or_load(
+            'inventory', (stockyard,),
+            lambda: _fetch_all(LATEST_INVENTORY_SQL, {'stockyard': stockyard})
+        )
 
     except SQLAlchemyError as e:
         logger.error(f"Error fetching inventory: {e}")
@@ -201,20 +316,7 @@ def get_lp_throughput(
 
     try:
         with engine.connect() as conn:
-            query = text("""
-                SELECT
-                    loading_point,
-                    ts,
-                    throughput_tonnes,
-                    utilization_percent
-                FROM lp_throughput
-                WHERE loading_point = :loading_point
-                    AND ts >= :start_time
-                    AND ts <= :end_time
-                ORDER BY ts DESC
-            """)
-
-            result = conn.execute(query, {
+            result = conn.execute(LP_THROUGHPUT_SQL, {
                 'loading_point': loading_point,
                 'start_time': start_time,
                 'end_time': date,
@@ -246,31 +348,14 @@ def get_recent_rake_arrivals(
         logger.warning("Database not available, using CSV mode")
         return []
 
-    start_time = datetime.now() - timedelta(days=days)
-
     try:
-        with engine.connect() as conn:
-            query = text("""
-                SELECT
-                    rake_id,
-                    yard,
-                    arrival_time,
-                    wagons_count,
-                    capacity_tonnes,
-                    status
-                FROM rake_arrivals
-                WHERE yard = :yard
-                    AND arrival_time >= :start_time
-                ORDER BY arrival_time DESC
-            """)
-
-            result = conn.execute(query, {
+        return get_query_cache().get_or_load(
+            'rake_arrivals', (yard, days),
+            lambda: _fetch_all(RECENT_RAKE_ARRIVALS_SQL, {
                 'yard': yard,
-                'start_time': start_time,
+                'start_time': datetime.now() - timedelta(days=days),
             })
-
-            rows = result.fetchall()
-            return [dict(row._mapping) for row in rows]
+        )
 
     except SQLAlchemyError as e:
         logger.error(f"Error fetching rake arrivals: {e}")
@@ -299,28 +384,13 @@ def get_daily_forecast_summary(
         date = datetime.now().date()
 
     try:
-        with engine.connect() as conn:
-            query = text("""
-                SELECT
-                    order_date,
-                    destination,
-                    material_type,
-                    total_demand_tonnes,
-                    order_count,
-                    high_priority_ratio
-                FROM mv_daily_forecast_summary
-                WHERE destination = :destination
-                    AND order_date = :date
-                ORDER BY total_demand_tonnes DESC
-            """)
-
-            result = conn.execute(query, {
+        return get_query_cache().get_or_load(
+            'forecast_summary', (destination, date),
+            lambda: _fetch_all(DAILY_FORECAST_SUMMARY_SQL, {
                 'destination': destination,
                 'date': date,
             })
-
-            rows = result.fetchall()
-            return [dict(row._mapping) for row in rows]
+        )
 
     except SQLAlchemyError as e:
         logger.error(f"Error fetching forecast summary: {e}")
@@ -347,28 +417,18 @@ def get_route_congestion(
 
     if date is None:
         date = datetime.now().date()
+    elif isinstance(date, datetime):
+        # Compared as a DATE the lookup prunes to a single monthly partition
+        date = date.date()
 
     try:
-        with engine.connect() as conn:
-            query = text("""
-                SELECT
-                    route_id,
-                    date,
-                    congestion_level,
-                    avg_delay_hours,
-                    traffic_factor
-                FROM route_congestion
-                WHERE route_id = :route_id
-                    AND date = :date
-            """)
-
-            result = conn.execute(query, {
+        return get_query_cache().get_or_load(
+            'route_congestion', (route_id, date),
+            lambda: _fetch_one(ROUTE_CONGESTION_SQL, {
                 'route_id': route_id,
                 'date': date,
             })
-
-            row = result.fetchone()
-            return dict(row._mapping) if row else None
+        )
 
     except SQLAlchemyError as e:
         logger.error(f"Error fetching route congestion: {e}")
@@ -393,24 +453,13 @@ def insert_dispatch_record(
 
     try:
         with engine.connect() as conn:
-            query = text("""
-                INSERT INTO dispatch_history (
-                    dispatch_date, rake_id, truck_id, order_id,
-                    destination, tonnes_dispatched, estimated_cost,
-                    estimated_delay_hours, transport_mode, status
-                ) VALUES (
-                    :dispatch_date, :rake_id, :truck_id, :order_id,
-                    :destination, :tonnes_dispatched, :estimated_cost,
-                    :estimated_delay_hours, :transport_mode, :status
-                )
-                RETURNING dispatch_id
-            """)
-
-            result = conn.execute(query, dispatch_data)
+            result = conn.execute(INSERT_DISPATCH_SQL, dispatch_data)
             dispatch_id = result.scalar()
             conn.commit()
 
             logger.info(f"✓ Dispatch record inserted: {dispatch_id}")
+            get_query_cache().invalidate(DISPATCH_INVALIDATES)
+            _notify_dispatch_inserted(dispatch_data)
             return dispatch_id
 
     except SQLAlchemyError as e:
@@ -418,6 +467,138 @@ def insert_dispatch_record(
         return None
 
 
+def refresh_materialized_views() -> bool:
+    """
+    Refresh the materialized views and invalidate every cached lookup
+    
+    Returns:
+        True if all views were refreshed
+    """
+    if engine is None:
+        logger.warning("Database not available, cannot refresh views")
+        return False
+
+    try:
+        with engine.connect() as conn:
+            for view in MATERIALIZED_VIEWS:
+                conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"))
+            conn.commit()
+        logger.info(f"✓ Refreshed {', '.join(MATERIALIZED_VIEWS)}")
+        return True
+
+    except SQLAlchemyError as e:
+        logger.error(f"Error refreshing materialized views: {e}")
+        return False
+
+    finally:
+        # Views may be partly refreshed even on error
+        get_query_cache().invalidate()
+
+
+# Called with every inserted dispatch row; services register here rather than db importing them
+_dispatch_listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+
+def on_dispatch_inserted(listener: Callable[[Dict[str, Any]], None]) -> Callable[[Dict[str, Any]], None]:
+    """Register ``listener`` to receive each inserted dispatch; usable as a decorator"""
+    _dispatch_listeners.append(listener)
+    return listener
+
+
+def _notify_dispatch_inserted(dispatch_data: Dict[str, Any]) -> None:
+    """Pass an inserted dispatch to the listeners; never fails the insert"""
+    for listener in list(_dispatch_listeners):
+        try:
+            listener(dispatch_data)
+        except Exception as e:
+            logger.warning(f"Dispatch listener {listener.__name__} failed: {e}")
+
+
+# ============================================================================
+# Partition Maintenance
+# ============================================================================
+
+
+def add_months(day: date, months: int) -> date:
+    """First day of the month ``months`` after the month of ``day``"""
+    month_index = day.year * 12 + day.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def ensure_partitions(
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    tables: Optional[List[str]] = None
+) -> Dict[str, int]:
+    """
+    Create the monthly partitions covering a date range
+    
+    Args:
+        from_date: First day to cover (defaults to this month)
+        to_date: Last day to cover (defaults to DB_PARTITION_MONTHS_AHEAD months ahead)
+        tables: Partitioned tables (defaults to all)
+    
+    Returns:
+        Partitions created per table
+    """
+    if engine is None:
+        logger.warning("Database not available, cannot create partitions")
+        return {}
+
+    today = datetime.now().date()
+    from_date = from_date or today.replace(day=1)
+    to_date = to_date or add_months(today, DB_PARTITION_MONTHS_AHEAD)
+    created = {}
+    with engine.connect() as conn:
+        for table in tables or PARTITIONED_TABLES:
+            created[table] = conn.execute(CREATE_PARTITIONS_SQL, {
+                'parent': table,
+                'from_date': from_date,
+                'to_date': to_date,
+            }).scalar() or 0
+        conn.commit()
+    return created
+
+
+def archive_old_partitions(keep_months: Optional[int] = None) -> Dict[str, List[str]]:
+    """
+    Detach monthly partitions older than ``keep_months`` into the archive schema
+    
+    Returns:
+        Archived partition names per table
+    """
+    keep_months = DB_RETENTION_MONTHS if keep_months is None else keep_months
+    if engine is None or keep_months <= 0:
+        return {}
+
+    archived = {}
+    with engine.connect() as conn:
+        for table in PARTITIONED_TABLES:
+            rows = conn.execute(ARCHIVE_PARTITIONS_SQL, {'parent': table, 'keep_months': keep_months})
+            archived[table] = [row[0] for row in rows.fetchall()]
+        conn.commit()
+    return archived
+
+
+def run_partition_maintenance() -> Dict[str, Any]:
+    """Scheduled job: create upcoming monthly partitions and archive expired ones"""
+    if engine is None:
+        return {'status': 'skipped', 'reason': 'Database not available'}
+
+    try:
+        created = ensure_partitions()
+        archived = archive_old_partitions()
+    except SQLAlchemyError as e:
+        logger.error(f"Partition maintenance failed: {e}")
+        return {'status': 'failed', 'error': str(e)}
+
+    logger.info(
+        f"✓ Partition maintenance: {sum(created.values())} created, "
+        f"{sum(len(names) for names in archived.values())} archived"
+    )
+    return {'status': 'success', 'created': created, 'archived': archived}
+
+
 # ============================================================================
 # Health Check
 # ============================================================================
@@ -442,14 +623,11 @@ def health_check() -> Dict[str, Any]:
     try:
         with engine.connect() as conn:
             # Test connection
-            conn.execute(text("SELECT 1"))
+            conn.execute(HEALTH_PING_SQL)
             status['connected'] = True
 
             # Count tables
-            result = conn.execute(text("""
-                SELECT COUNT(*) FROM information_schema.tables
-                WHERE table_schema = 'public'
-            """))
+            result = conn.execute(PUBLIC_TABLE_COUNT_SQL)
             status['tables'] = result.scalar()
             status['database'] = 'healthy'
 
@@ -0,0 +1,368 @@
+"""
+Asynchronous database access for SAIL Bokaro
+Runs queries without blocking the event loop.
+
+The async engine talks to PostgreSQL through asyncpg (SQLite through
+aiosqlite for local runs). asyncpg prepares every statement on first use
+and SQLAlchemy keeps the prepared statements per connection, so the
+module-level statements here and in ``db`` are parsed and planned once per
+pooled connection. Without an async driver installed, queries run on the
+sync engine of ``db`` in worker threads instead.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql.elements import TextClause
+
+from . import db
+from .services.query_cache import get_query_cache
+from .utils.metrics import instrument_engine, pool_stats
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+DB_STATEMENT_CACHE_SIZE = int(os.getenv('DB_STATEMENT_CACHE_SIZE', '256'))
+DB_STREAM_BATCH_ROWS = int(os.getenv('DB_STREAM_BATCH_ROWS', '1000'))
+
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+class DatabaseUnavailable(RuntimeError):
+    """Neither the async nor the sync engine could be created"""
+
+
+def async_url(url: str):
+    """``url`` with its dialect's async driver, e.g. postgresql+asyncpg"""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver for {parsed.get_backend_name()}")
+    parsed = parsed.set(drivername=driver)
+    if driver == 'postgresql+asyncpg':
+        parsed = parsed.update_query_dict({'prepared_statement_cache_size': str(DB_STATEMENT_CACHE_SIZE)})
+    return parsed
+
+
+def _create_async_engine():
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = async_url(db.DATABASE_URL)
+    if url.get_backend_name() == 'sqlite':
+        return create_async_engine(url, echo=False)
+    return create_async_engine(
+        url,
+        pool_size=db.DB_POOL_SIZE,
+        max_overflow=db.DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        echo=False,
+        connect_args={'timeout': 10},
+    )
+
+
+# Create engine
+try:
+    async_engine = _create_async_engine()
+    instrument_engine(async_engine.sync_engine, name="async")
+    logger.info("✓ Async database engine created successfully")
+except Exception as e:
+    logger.warning(f"Async database engine unavailable ({e}); queries will run on the sync engine in threads")
+    async_engine = None
+
+
+def available() -> bool:
+    """Whether any engine can serve queries"""
+    return async_engine is not None or db.engine is not None
+
+
+async def close_async_db():
+    """Close the async engine's pooled connections"""
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
+def pool_status() -> Dict[str, Any]:
+    """Connection counts of the async and sync pools"""
+    status = {'driver': 'async' if async_engine is not None else 'thread'}
+    if async_engine is not None:
+        status['async'] = pool_stats(async_engine.sync_engine.pool)
+    if db.engine is not None:
+        status['sync'] = pool_stats(db.engine.pool)
+    return status
+
+
+# ============================================================================
+# Execution
+# ============================================================================
+
+
+def _rows(result) -> List[Dict[str, Any]]:
+    return [dict(row._mapping) for row in result.fetchall()]
+
+
+def _first(result) -> Optional[Dict[str, Any]]:
+    row = result.fetchone()
+    return dict(row._mapping) if row else None
+
+
+def _scalar(result) -> Any:
+    return result.scalar()
+
+
+def _execute_sync(statement: TextClause, params: Dict[str, Any], consume: Callable, commit: bool):
+    with db.engine.connect() as conn:
+        value = consume(conn.execute(statement, params))
+        if commit:
+            conn.commit()
+        return value
+
+
+async def _execute(statement: TextClause, params: Optional[Dict[str, Any]], consume: Callable, commit: bool = False):
+    params = params or {}
+    if async_engine is not None:
+        async with async_engine.connect() as conn:
+            value = consume(await conn.execute(statement, params))
+            if commit:
+                await conn.commit()
+            return value
+    if db.engine is None:
+        raise DatabaseUnavailable("Database engine not initialized")
+    return await asyncio.to_thread(_execute_sync, statement, params, consume, commit)
+
+
+async def fetch_all(statement: TextClause, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """All rows of ``statement`` as dictionaries"""
+    return await _execute(statement, params, _rows)
+
+
+async def fetch_one(statement: TextClause, params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """First row of ``statement`` as a dictionary, or None"""
+    return await _execute(statement, params, _first)
+
+
+async def scalar(statement: TextClause, params: Optional[Dict[str, Any]] = None) -> Any:
+    """First column of the first row of ``statement``"""
+    return await _execute(statement, params, _scalar)
+
+
+_STREAM_END = object()
+
+
+async def stream_rows(
+    statement: TextClause,
+    params: Optional[Dict[str, Any]] = None,
+    batch_size: Optional[int] = None,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Rows of ``statement`` in batches of ``batch_size`` (default
+    ``DB_STREAM_BATCH_ROWS``) read from a server-side cursor, so memory
+    stays constant however many rows match.
+
+    Without an async engine a worker thread reads the sync cursor and hands
+    batches over through a queue of two, which blocks the thread while the
+    consumer is behind.
+    """
+    params = params or {}
+    batch_size = batch_size or DB_STREAM_BATCH_ROWS
+    if async_engine is not None:
+        async with async_engine.connect() as conn:
+            result = await conn.stream(statement.execution_options(yield_per=batch_size), params)
+            async for partition in result.partitions(batch_size):
+                yield [dict(row._mapping) for row in partition]
+        return
+
+    if db.engine is None:
+        raise DatabaseUnavailable("Database engine not initialized")
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+    stop = threading.Event()
+
+    def put(item) -> None:
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    def produce() -> None:
+        try:
+            with db.engine.connect() as conn:
+                result = conn.execution_options(stream_results=True, max_row_buffer=batch_size).execute(
+                    statement, params
+                )
+                for partition in result.partitions(batch_size):
+                    if stop.is_set():
+                        return
+                    put([dict(row._mapping) for row in partition])
+            put(_STREAM_END)
+        except Exception as e:
+            if not stop.is_set():
+                put(e)
+
+    producer = loop.run_in_executor(None, produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is _STREAM_END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Unblock a producer waiting on a full queue, then let it finish
+        stop.set()
+        while not producer.done():
+            while not queue.empty():
+                queue.get_nowait()
+            await asyncio.sleep(0.01)
+
+
+@lru_cache(maxsize=128)
+def select_recent(
+    table: str,
+    filters: Tuple[str, ...] = (),
+    after: bool = False,
+    limit: bool = True,
+    date_column: str = 'date',
+    id_column: str = 'id',
+) -> TextClause:
+    """
+    Cached ``SELECT *`` of ``table`` since ``:start_date``, newest first
+    (ties broken by ``id_column``), with ``column = :column`` for each of
+    ``filters``. ``after`` continues below the keyset
+    ``(:cursor_date, :cursor_id)``; ``limit`` adds ``LIMIT :limit``.
+
+    One statement per combination, so each is prepared only once.
+    """
+    query = f"SELECT * FROM {table} WHERE {date_column} >= :start_date"
+    for column in filters:
+        query += f" AND {column} = :{column}"
+    if after:
+        query += f" AND ({date_column}, {id_column}) < (:cursor_date, :cursor_id)"
+    query += f" ORDER BY {date_column} DESC, {id_column} DESC"
+    if limit:
+        query += " LIMIT :limit"
+    return text(query)
+
+
+# ============================================================================
+# Query Functions (async counterparts of those in db)
+# ============================================================================
+
+
+async def get_orders_by_destination(
+    destination: str,
+    date: Optional[datetime] = None,
+    status: str = 'PENDING'
+) -> List[Dict[str, Any]]:
+    """Orders for a destination on a date (defaults to today) with a status"""
+    try:
+        return await fetch_all(db.ORDERS_BY_DESTINATION_SQL, {
+            'destination': destination,
+            'date': date or datetime.now().date(),
+            'status': status,
+        })
+    except (SQLAlchemyError, DatabaseUnavailable) as e:
+        logger.error(f"Error fetching orders: {e}")
+        return []
+
+
+async def get_latest_inventory(stockyard: str) -> List[Dict[str, Any]]:
+    """Latest inventory of a stockyard"""
+    try:
+        return await get_query_cache().get_or_load_async(
+            'inventory', (stockyard,),
+            lambda: fetch_all(db.LATEST_INVENTORY_SQL, {'stockyard': stockyard})
+        )
+    except (SQLAlchemyError, DatabaseUnavailable) as e:
+        logger.error(f"Error fetching inventory: {e}")
+        return []
+
+
+async def get_lp_throughput(
+    loading_point: str,
+    date: Optional[datetime] = None,
+    hours: int = 24
+) -> List[Dict[str, Any]]:
+    """Loading point throughput over the ``hours`` up to ``date`` (defaults to now)"""
+    end_time = date or datetime.now()
+    try:
+        return await fetch_all(db.LP_THROUGHPUT_SQL, {
+            'loading_point': loading_point,
+            'start_time': end_time - timedelta(hours=hours),
+            'end_time': end_time,
+        })
+    except (SQLAlchemyError, DatabaseUnavailable) as e:
+        logger.error(f"Error fetching LP throughput: {e}")
+        return []
+
+
+async def get_recent_rake_arrivals(yard: str, days: int = 7) -> List[Dict[str, Any]]:
+    """Rake arrivals at a yard over the last ``days``"""
+    try:
+        return await get_query_cache().get_or_load_async(
+            'rake_arrivals', (yard, days),
+            lambda: fetch_all(db.RECENT_RAKE_ARRIVALS_SQL, {
+                'yard': yard,
+                'start_time': datetime.now() - timedelta(days=days),
+            })
+        )
+    except (SQLAlchemyError, DatabaseUnavailable) as e:
+        logger.error(f"Error fetching rake arrivals: {e}")
+        return []
+
+
+async def get_daily_forecast_summary(
+    destination: str,
+    date: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """Daily forecast summary for a destination on a date (defaults to today)"""
+    date = date or datetime.now().date()
+    try:
+        return await get_query_cache().get_or_load_async(
+            'forecast_summary', (destination, date),
+            lambda: fetch_all(db.DAILY_FORECAST_SUMMARY_SQL, {'destination': destination, 'date': date})
+        )
+    except (SQLAlchemyError, DatabaseUnavailable) as e:
+        logger.error(f"Error fetching forecast summary: {e}")
+        return []
+
+
+async def get_route_congestion(
+    route_id: str,
+    date: Optional[datetime] = None
+) -> Optional[Dict[str, Any]]:
+    """Congestion of a route on a date (defaults to today), or None"""
+    date = date or datetime.now().date()
+    if isinstance(date, datetime):
+        date = date.date()
+    try:
+        return await get_query_cache().get_or_load_async(
+            'route_congestion', (route_id, date),
+            lambda: fetch_one(db.ROUTE_CONGESTION_SQL, {'route_id': route_id, 'date': date})
+        )
+    except (SQLAlchemyError, DatabaseUnavailable) as e:
+        logger.error(f"Error fetching route congestion: {e}")
+        return None
+
+
+async def insert_dispatch_record(dispatch_data: Dict[str, Any]) -> Optional[int]:
+    """Insert a dispatch record; returns its ID or None on error"""
+    try:
+        dispatch_id = await _execute(db.INSERT_DISPATCH_SQL, dispatch_data, _scalar, commit=True)
+    except (SQLAlchemyError, DatabaseUnavailable) as e:
+        logger.error(f"Error inserting dispatch record: {e}")
+        return None
+
+    logger.info(f"✓ Dispatch record inserted: {dispatch_id}")
+    get_query_cache().invalidate(db.DISPATCH_INVALIDATES)
+    db._notify_dispatch_inserted(dispatch_data)
+    return dispatch_id
@@ -5,37 +5,33 @@ SIH25208 SAIL Bokaro Steel Plant Logistics Optimization System.
 
 from fastapi import FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from datetime import datetime
 import sys
+import time
 from pathlib import Path
 
+_IMPORT_STARTED = time.perf_counter()
+
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.config import settings
 from app.utils import app_logger
-from app.routers import forecast, delay, throughput, cost, mode, optimize, meta
-from app.routers import blockchain, ai_forecast, advanced_optimization, visualization, scenario_analysis, advanced_models
-from app.routers import ml_routes, database, rake_formation, monte_carlo, decision_support, analytics, compliance, ml_models, auto_optimizer, auto_alerts, confidence, auto_report, live_progress, live_data, policy_execution, feedback_loop, sap_connector, model_registry, realtime_delay, data_import_pipeline, rake_optimizer
+from app.utils.lazy_routers import LazyRouterRegistry, LazyRouterMiddleware
+from app.utils.metrics import PROMETHEUS_CONTENT_TYPE, RequestMetricsMiddleware, metrics_collector
 from app.schemas import BaseResponse
 
-# ML Training Scheduler
+from app.services.job_scheduler import get_job_scheduler, start_job_scheduler, stop_job_scheduler
+
+# ML Training history (training itself runs in the job scheduler's worker process)
 try:
-    from ml.automated_training_scheduler import start_scheduler, get_scheduler_status, trigger_manual_training, get_training_history
+    from ml.automated_training_scheduler import get_training_status as get_trainer_status, get_training_history
     SCHEDULER_AVAILABLE = True
 except ImportError:
     SCHEDULER_AVAILABLE = False
     app_logger.warning("ML Training Scheduler not available")
 
-# Rake Formation Scheduler
-try:
-    from app.services.rake_scheduler import start_scheduler as start_rake_scheduler, stop_scheduler as stop_rake_scheduler
-    RAKE_SCHEDULER_AVAILABLE = True
-except ImportError:
-    RAKE_SCHEDULER_AVAILABLE = False
-    app_logger.warning("Rake Formation Scheduler not available")
-
 # Create FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
@@ -63,84 +59,103 @@ app.add_middleware(
 # ROUTERS
 # ============================================================================
 
-app.include_router(forecast.router)
-app.include_router(delay.router)
-app.include_router(throughput.router)
-app.include_router(cost.router)
-app.include_router(mode.router)
-app.include_router(optimize.router)
-app.include_router(meta.router)
+# Router modules are imported on the first request under their prefix
+# (settings.LAZY_ROUTERS); registration order is the include order.
+router_registry = LazyRouterRegistry(app)
+
+router_registry.register("forecast", "/predict")
+router_registry.register("delay", "/predict")
+router_registry.register("throughput", "/predict")
+router_registry.register("cost", "/predict")
+router_registry.register("mode", "/predict")
+router_registry.register("optimize", "/optimize")
+router_registry.register("meta", "/meta")
 
 # Advanced features routers
-app.include_router(blockchain.router)
-app.include_router(ai_forecast.router)
-app.include_router(advanced_optimization.router)
-app.include_router(visualization.router)
-app.include_router(scenario_analysis.router)
-app.include_router(advanced_models.router)
+router_registry.register("blockchain", "/blockchain")
+router_registry.register("ai_forecast", "/forecast")
+router_registry.register("advanced_optimization", "/optimize")
+router_registry.register("visualization", "/visualization")
+router_registry.register("scenario_analysis", "/scenario")
+router_registry.register("advanced_models", "/predict")
 
 # ML Infrastructure routers
-app.include_router(ml_routes.router)
+router_registry.register("ml_routes", "/api/ml")
 
 # All 17 ML Models routers
-app.include_router(ml_models.router)
+router_registry.register("ml_models", "/api/ml-models")
 
 # Auto-Optimizer routers (Phase 1)
-app.include_router(auto_optimizer.router)
+router_registry.register("auto_optimizer", "/api/auto-optimizer")
 
 # Auto-Alerts routers (Phase 1)
-app.include_router(auto_alerts.router)
+router_registry.register("auto_alerts", "/api/auto-alerts")
 
 # Confidence Indicators routers (Phase 1)
-app.include_router(confidence.router)
+router_registry.register("confidence", "/api/confidence")
 
 # Auto-Report & Email routers (Phase 1)
-app.include_router(auto_report.router)
+router_registry.register("auto_report", "/api/auto-report")
 
 # Live Progress routers (Phase 1)
-app.include_router(live_progress.router)
+router_registry.register("live_progress", "/api/live-progress")
 
 # Live Data routers (Phase 2)
-app.include_router(live_data.router)
+router_registry.register("live_data", "/api/live-data")
 
 # Policy Execution routers (Phase 2)
-app.include_router(policy_execution.router)
+router_registry.register("policy_execution", "/api/policies")
 
 # Feedback Loop routers (Phase 2)
-app.include_router(feedback_loop.router)
+router_registry.register("feedback_loop", "/api/feedback")
 
 # SAP Connector routers (Phase 3)
-app.include_router(sap_connector.router)
+router_registry.register("sap_connector", "/api/sap")
 
 # Model Registry routers (Phase 3)
-app.include_router(model_registry.router)
+router_registry.register("model_registry", "/api/models")
 
 # Real-Time Delay routers (Phase 3)
-app.include_router(realtime_delay.router)
+router_registry.register("realtime_delay", "/api/tracking")
 
 # Database routers
-app.include_router(database.router)
+router_registry.register("database", "/api/database")
 
 # Rake Formation routers
-app.include_router(rake_formation.router)
+router_registry.register("rake_formation", "/api/rake-formation")
 
 # Global Rake & Transport Optimizer routers
-app.include_router(rake_optimizer.router)
+router_registry.register("rake_optimizer", "/api/rake-optimizer")
 
 # Monte Carlo Simulation routers
-app.include_router(monte_carlo.router)
+router_registry.register("monte_carlo", "/api/monte-carlo")
 
 # Decision Support routers
-app.include_router(decision_support.router)
+router_registry.register("decision_support", "/api/decision-support")
 
 # Analytics routers
-app.include_router(analytics.router)
+router_registry.register("analytics", "/api/analytics")
 
 # Compliance routers
-app.include_router(compliance.router)
+router_registry.register("compliance", "/api/compliance")
 
 # Data Import Pipeline routers
-app.include_router(data_import_pipeline.router)
+router_registry.register("data_import_pipeline", "/api/data-import")
+
+if settings.LAZY_ROUTERS:
+    app.add_middleware(LazyRouterMiddleware, registry=router_registry)
+else:
+    router_registry.load_all()
+
+# Outermost, so request timings include lazy router loading
+app.add_middleware(RequestMetricsMiddleware)
+
+def _openapi_with_all_routers():
+    """OpenAPI schema covering every router, loading the remaining ones first."""
+    router_registry.load_all()
+    return FastAPI.openapi(app)
+
+app.openapi = _openapi_with_all_routers
 
 # ============================================================================
 # ROOT ENDPOINTS
@@ -211,11 +226,6 @@ async def api_info():
                     "GET /api/rake-formation/plans",
                     "GET /api/rake-formation/health",
                 ],
-                "rake_scheduler": [
-                    "GET /api/rake-formation/scheduler/status",
-                    "POST /api/rake-formation/scheduler/trigger",
-                    "GET /api/rake-formation/scheduler/history",
-                ] if RAKE_SCHEDULER_AVAILABLE else [],
                 "monte_carlo_simulation": [
                     "POST /api/monte-carlo/simulate",
                     "POST /api/monte-carlo/sensitivity",
@@ -226,6 +236,25 @@ async def api_info():
         }
     )
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint (all workers when METRICS_MULTIPROC_DIR is set)."""
+    return PlainTextResponse(metrics_collector.get_prometheus_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.get("/api/import-times", response_model=BaseResponse)
+async def import_times():
+    """Startup import cost and per-router lazy load times."""
+    return BaseResponse(
+        status="success",
+        timestamp=datetime.utcnow(),
+        message="Router import times",
+        data={
+            "lazy_routers": settings.LAZY_ROUTERS,
+            "main_import_seconds": round(MAIN_IMPORT_SECONDS, 4),
+            **router_registry.report(),
+        }
+    )
+
 # ============================================================================
 # ML TRAINING SCHEDULER ENDPOINTS
 # ============================================================================
@@ -242,7 +271,15 @@ async def get_training_status():
         )
     
     try:
-        status = get_scheduler_status()
+        scheduler_status = get_job_scheduler().get_status()
+        training_job = next(job for job in scheduler_status['jobs'] if job['name'] == 'ml_training')
+        status = {
+            'scheduler_active': scheduler_status['leader'] is not None,
+            'training_time': settings.ML_TRAINING_TIME,
+            'trainer_status': get_trainer_status(),
+            'next_run': training_job['next_run'],
+            **scheduler_status,
+        }
         return BaseResponse(
             status="success",
             timestamp=datetime.utcnow(),
@@ -259,8 +296,8 @@ async def get_training_status():
         )
 
 @app.post("/ml/training/trigger", response_model=BaseResponse)
-async def trigger_training():
-    """Manually trigger ML model training."""
+async def trigger_training(job: str = "ml_training"):
+    """Queue a manual run of ML model training (or another scheduled job)."""
     if not SCHEDULER_AVAILABLE:
         return BaseResponse(
             status="error",
@@ -270,13 +307,15 @@ async def trigger_training():
         )
     
     try:
-        result = trigger_manual_training()
+        run = get_job_scheduler().trigger(job)
         return BaseResponse(
-            status="success" if result.get('status') == 'success' else "error",
+            status="success",
             timestamp=datetime.utcnow(),
-            message="Manual training triggered",
-            data=result
+            message=f"Manual {job} run queued",
+            data=run
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         app_logger.error(f"Error triggering training: {e}")
         return BaseResponse(
@@ -357,26 +396,29 @@ async def startup_event():
     app_logger.info(f"Debug mode: {settings.DEBUG}")
     app_logger.info(f"Models directory: {settings.MODELS_DIR}")
     
-    # Start ML Training Scheduler
-    if SCHEDULER_AVAILABLE:
-        try:
-            start_scheduler()
-            app_logger.info("✓ ML Training Scheduler started successfully")
-        except Exception as e:
-            app_logger.error(f"Failed to start ML Training Scheduler: {e}")
+    # Registers the dispatch rollup listener before any dispatch can be inserted;
+    # the services that would otherwise import it load lazily
+    from app.services import rollup_store  # noqa: F401
     
-    # Start Rake Formation Scheduler
-    if RAKE_SCHEDULER_AVAILABLE:
+    # Start the job scheduler loop; only the worker holding the lock runs jobs
+    if settings.SCHEDULER_MODE == "embedded":
         try:
-            start_rake_scheduler()
-            app_logger.info("✓ Rake Formation Scheduler started successfully")
+            start_job_scheduler()
+            app_logger.info("✓ Job Scheduler started (leader-elected)")
         except Exception as e:
-            app_logger.error(f"Failed to start Rake Formation Scheduler: {e}")
+            app_logger.error(f"Failed to start Job Scheduler: {e}")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Shutdown event."""
     app_logger.info(f"Shutting down {settings.APP_NAME}")
+    stop_job_scheduler()
+    # Only loaded once a database route has been served
+    db_async = sys.modules.get("app.db_async")
+    if db_async is not None:
+        await db_async.close_async_db()
+
+MAIN_IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
 
 # ============================================================================
 # MAIN
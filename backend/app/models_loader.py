@@ -12,6 +12,7 @@ import pandas as pd
 import numpy as np
 from .config import settings
 from .utils import app_logger
+from .utils.metrics import metrics_collector
 
 # Import real ML models
 try:
@@ -103,19 +104,21 @@ class ModelsLoader:
                     else:
                         app_logger.warning(f"⚠️  Model file not found: {model_path}. Will use mock model for {old_name}")
                         self._models[old_name] = MockModel(old_name)
+                        metrics_collector.set_model_status(old_name, False, "Model file not found")
                         continue
                 
-                # Load real model
-                with open(model_path, 'rb') as f:
-                    model = pickle.load(f)
+                # Load real model (joblib reads both compressed and plain pickles)
+                model = joblib.load(model_path)
                 
                 self._models[old_name] = model
                 app_logger.info(f"✅ Loaded REAL model {real_name} from {model_path}")
+                metrics_collector.set_model_status(old_name, True)
                 
             except Exception as e:
                 error_msg = f"Failed to load {old_name}: {str(e)}. Using mock model."
                 app_logger.warning(error_msg)
                 self._models[old_name] = MockModel(old_name)
+                metrics_collector.set_model_status(old_name, False, error_msg)
     
     def get_model(self, model_name: str):
         """Get a loaded model by name."""
@@ -151,6 +154,7 @@ models_loader = ModelsLoader()
 # INFERENCE FUNCTIONS
 # ============================================================================
 
+@metrics_collector.timed('model_inference_seconds', model='demand')
 def predict_demand(material_type: str, destination: str, quantity_tonnes: float, priority: str) -> Dict[str, Any]:
     """
     Predict demand using the demand forecasting model.
@@ -187,6 +191,7 @@ def predict_demand(material_type: str, destination: str, quantity_tonnes: float,
         app_logger.error(f"Demand prediction error: {str(e)}")
         raise
 
+@metrics_collector.timed('model_inference_seconds', model='rake_availability')
 def predict_rake_availability(date: str, destination: str, material_type: str) -> Dict[str, Any]:
     """Predict rake availability."""
     try:
@@ -210,6 +215,7 @@ def predict_rake_availability(date: str, destination: str, material_type: str) -
         app_logger.error(f"Rake availability prediction error: {str(e)}")
         raise
 
+@metrics_collector.timed('model_inference_seconds', model='delay')
 def predict_delay(route: str, tonnes_dispatched: float, material_type: str, weather: Optional[str] = None) -> Dict[str, Any]:
     """Predict delay (both classifier and regressor)."""
     try:
@@ -239,6 +245,7 @@ def predict_delay(route: str, tonnes_dispatched: float, material_type: str, weat
         app_logger.error(f"Delay prediction error: {str(e)}")
         raise
 
+@metrics_collector.timed('model_inference_seconds', model='throughput')
 def predict_throughput(loading_point: str, material_type: str, equipment_count: int, shift: str) -> Dict[str, Any]:
     """Predict loading point throughput."""
     try:
@@ -263,6 +270,7 @@ def predict_throughput(loading_point: str, material_type: str, equipment_count:
         app_logger.error(f"Throughput prediction error: {str(e)}")
         raise
 
+@metrics_collector.timed('model_inference_seconds', model='cost')
 def predict_cost(route: str, tonnes_dispatched: float, delay_hours: float, material_type: str) -> Dict[str, Any]:
     """Predict dispatch cost."""
     try:
@@ -288,6 +296,7 @@ def predict_cost(route: str, tonnes_dispatched: float, delay_hours: float, mater
         app_logger.error(f"Cost prediction error: {str(e)}")
         raise
 
+@metrics_collector.timed('model_inference_seconds', model='mode_classifier')
 def predict_transport_mode(quantity_tonnes: float, distance_km: float, priority: str, destination: str, material_type: str) -> Dict[str, Any]:
     """Predict optimal transport mode (RAIL vs ROAD)."""
     try:
@@ -3,6 +3,8 @@ Optimizer package - OR-Tools based rake formation and dispatch optimization.
 """
 
 from .solver import RakeFormationOptimizer
+from .decomposition import DecompositionSolver, quality_gap_report
+from .lns import LNSOptimizer
 from .utils import (
     calculate_rail_cost,
     calculate_road_cost,
@@ -13,6 +15,9 @@ from .utils import (
 
 __all__ = [
     'RakeFormationOptimizer',
+    'DecompositionSolver',
+    'quality_gap_report',
+    'LNSOptimizer',
     'calculate_rail_cost',
     'calculate_road_cost',
     'calculate_partial_rake_penalty',
@@ -0,0 +1,479 @@
+"""
+Decomposition solver for order books too large for one CP-SAT model.
+SIH25208 SAIL Bokaro Steel Plant Logistics Optimization System.
+
+Orders are partitioned by loading point, destination and material; a
+partition larger than ``max_partition_orders`` is split further by due date.
+The fleet is shared out by tonnage (rakes by rail-sized tonnage, trucks by
+all tonnage) and every partition is solved by its own
+RakeFormationOptimizer, in parallel. A master step then merges the plans:
+it renumbers rakes and trucks, caps loads above rake/truck capacity, and
+spends the rakes and trucks partitions left unused on the demand other
+partitions could not serve, most urgent partitions first.
+"""
+
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+import os
+
+from .solver import RakeFormationOptimizer
+from .utils import (
+    calculate_rail_cost,
+    calculate_road_cost,
+    get_distance_to_destination,
+    MAX_WAGONS,
+    MIN_WAGONS,
+    RAKE_CAPACITY_TONNES,
+    RAKE_MIN_TONNES,
+    TRUCK_CAPACITY_TONNES,
+    WAGON_CAPACITY_TONNES,
+)
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_RANK = {'HIGH': 0, 'MEDIUM': 1, 'LOW': 2}
+
+
+@dataclass
+class Partition:
+    """Orders planned together, with their share of the fleet"""
+    key: Tuple[str, str, str]  # (loading_point, destination, material_type)
+    chunk: int
+    orders: List[Dict[str, Any]]
+    indexes: List[int]  # Positions of the orders in the full order book
+    rakes: int = 0
+    trucks: int = 0
+    plan: Dict[str, Any] = field(default_factory=dict)
+    seconds: float = 0.0
+
+    @property
+    def name(self) -> str:
+        return '/'.join(self.key) + (f'#{self.chunk}' if self.chunk else '')
+
+    @property
+    def tonnes(self) -> float:
+        return sum(o.get('quantity_tonnes', 0) for o in self.orders)
+
+    @property
+    def rail_tonnes(self) -> float:
+        return sum(t for t in (o.get('quantity_tonnes', 0) for o in self.orders) if t >= RAKE_MIN_TONNES)
+
+    @property
+    def urgency(self) -> Tuple[int, str]:
+        return min(
+            (PRIORITY_RANK.get(o.get('priority', 'MEDIUM'), 1), o.get('due_date') or '9999-12-31')
+            for o in self.orders
+        )
+
+
+def partition_orders(orders: List[Dict[str, Any]], max_partition_orders: int) -> List[Partition]:
+    """Group orders by (loading point, destination, material), splitting
+    oversized groups into chunks of consecutive due dates."""
+    groups: Dict[Tuple[str, str, str], List[int]] = {}
+    for idx, order in enumerate(orders):
+        key = (
+            str(order.get('loading_point') or 'ANY'),
+            str(order.get('destination', 'Kolkata')),
+            str(order.get('material_type', 'Mixed')),
+        )
+        groups.setdefault(key, []).append(idx)
+
+    partitions = []
+    for key in sorted(groups):
+        indexes = sorted(
+            groups[key],
+            key=lambda i: (orders[i].get('due_date') or '9999-12-31',
+                           PRIORITY_RANK.get(orders[i].get('priority', 'MEDIUM'), 1))
+        )
+        for chunk, start in enumerate(range(0, len(indexes), max_partition_orders)):
+            chunk_indexes = indexes[start:start + max_partition_orders]
+            partitions.append(Partition(key, chunk, [orders[i] for i in chunk_indexes], chunk_indexes))
+    return partitions
+
+
+def allocate(total: int, weights: List[float]) -> List[int]:
+    """Split ``total`` units in proportion to ``weights`` (largest remainder)"""
+    weight_sum = sum(weights)
+    if total <= 0 or weight_sum <= 0:
+        return [0] * len(weights)
+    quotas = [total * w / weight_sum for w in weights]
+    shares = [int(q) for q in quotas]
+    by_remainder = sorted(range(len(weights)), key=lambda i: quotas[i] - shares[i], reverse=True)
+    for i in by_remainder[:total - sum(shares)]:
+        shares[i] += 1
+    return shares
+
+
+def plan_summary(rakes: List[Dict[str, Any]], trucks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Plan summary in the shape RakeFormationOptimizer returns"""
+    total_cost = sum(r['estimated_cost'] for r in rakes) + sum(t['estimated_cost'] for t in trucks)
+    total_tonnage = sum(r['tonnes'] for r in rakes) + sum(t['tonnes'] for t in trucks)
+    return {
+        'total_cost': total_cost,
+        'total_tonnage': total_tonnage,
+        'rail_vs_road_ratio': len(rakes) / max(1, len(trucks)),
+        'total_rakes': len(rakes),
+        'total_trucks': len(trucks),
+        'estimated_completion_days': (total_tonnage / 1000) * 0.5,
+    }
+
+
+class DecompositionSolver:
+    """Partition / parallel solve / master repair around RakeFormationOptimizer."""
+
+    def __init__(
+        self,
+        time_limit_seconds: float = 20,
+        random_seed: int = 42,
+        max_partition_orders: int = 100,
+        max_workers: Optional[int] = None,
+        optimizer_factory: Optional[Callable[[float, int], Any]] = None,
+    ):
+        """
+        Initialize decomposition solver.
+
+        Args:
+            time_limit_seconds: Wall-clock budget shared by all subproblems
+            random_seed: Random seed passed to every subproblem
+            max_partition_orders: Largest subproblem handed to one optimizer
+            max_workers: Subproblems solved in parallel (default: CPU count)
+            optimizer_factory: ``(time_limit, seed) -> optimizer`` for subproblems
+        """
+        self.time_limit_seconds = time_limit_seconds
+        self.random_seed = random_seed
+        self.max_partition_orders = max(1, max_partition_orders)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.optimizer_factory = optimizer_factory or (
+            lambda limit, seed: RakeFormationOptimizer(time_limit_seconds=limit, random_seed=seed)
+        )
+
+    def solve(
+        self,
+        input_json: Dict[str, Any],
+        on_improvement: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Plan the order book by decomposition.
+
+        The plan's ``summary['fallback']`` is set when any subproblem fell
+        back to a greedy or LNS plan after its full model failed, or raised.
+
+        Args:
+            input_json: Optimizer input (orders, fleet, ML predictions, cost parameters)
+            on_improvement: Called with each new LNS incumbent of a subproblem;
+                the event names the ``partition`` and its objective covers
+                that subproblem only
+
+        Returns:
+            Dispatch plan with a ``decomposition`` report per subproblem
+        """
+        start_time = time.time()
+        orders = input_json.get('orders', [])
+        available_rakes = input_json.get('available_rakes', 5)
+        available_trucks = input_json.get('available_trucks', 20)
+        ml_predictions = input_json.get('ml_predictions', {})
+
+        partitions = partition_orders(orders, self.max_partition_orders)
+        if not partitions:
+            return RakeFormationOptimizer()._empty_plan()
+
+        for partition, rakes in zip(partitions, allocate(available_rakes, [p.rail_tonnes for p in partitions])):
+            partition.rakes = rakes
+        for partition, trucks in zip(partitions, allocate(available_trucks, [p.tonnes for p in partitions])):
+            partition.trucks = trucks
+
+        workers = min(self.max_workers, len(partitions))
+        # Subproblems run in ceil(n / workers) waves within the overall budget
+        waves = math.ceil(len(partitions) / workers)
+        sub_limit = self.time_limit_seconds / waves
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='decomposition') as pool:
+            list(pool.map(lambda p: self._solve_partition(p, input_json, sub_limit, on_improvement), partitions))
+
+        rakes, trucks, report = self._master(partitions, available_rakes, available_trucks, ml_predictions)
+        summary = plan_summary(rakes, trucks)
+        summary['fallback'] = any(
+            p.plan.get('solver_status') == 'ERROR' or p.plan.get('summary', {}).get('fallback', False)
+            for p in partitions
+        )
+        elapsed = time.time() - start_time
+
+        statuses: Dict[str, int] = {}
+        for partition in partitions:
+            status = partition.plan.get('solver_status', 'UNKNOWN')
+            statuses[status] = statuses.get(status, 0) + 1
+        report.update({
+            'partitions': len(partitions),
+            'workers': workers,
+            'subproblem_time_limit_seconds': sub_limit,
+            'subproblem_statuses': statuses,
+            'demand_tonnes': sum(p.tonnes for p in partitions),
+            'subproblems': [
+                {
+                    'partition': p.name,
+                    'orders': len(p.orders),
+                    'tonnes': p.tonnes,
+                    'rakes_allocated': p.rakes,
+                    'trucks_allocated': p.trucks,
+                    'solver_status': p.plan.get('solver_status', 'UNKNOWN'),
+                    'seconds': round(p.seconds, 4),
+                }
+                for p in partitions
+            ],
+        })
+        logger.info(
+            f"Decomposed {len(orders)} orders into {len(partitions)} subproblems "
+            f"({workers} workers) in {elapsed:.2f}s"
+        )
+
+        return {
+            'rakes': rakes,
+            'trucks': trucks,
+            'summary': summary,
+            'solver_status': 'DECOMPOSED',
+            'solver_time_seconds': elapsed,
+            'objective_value': summary['total_cost'],
+            'decomposition': report,
+        }
+
+    def _solve_partition(
+        self,
+        partition: Partition,
+        input_json: Dict[str, Any],
+        time_limit: float,
+        on_improvement: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> None:
+        started = time.perf_counter()
+        ml_predictions = {
+            k: v for k, v in input_json.get('ml_predictions', {}).items() if not k.startswith('mode_order_')
+        }
+        # Per-order predictions are keyed by position in the order book
+        for sub_idx, idx in enumerate(partition.indexes):
+            mode = input_json.get('ml_predictions', {}).get(f'mode_order_{idx}')
+            if mode is not None:
+                ml_predictions[f'mode_order_{sub_idx}'] = mode
+
+        sub_input = dict(
+            input_json,
+            orders=partition.orders,
+            available_rakes=partition.rakes,
+            available_trucks=partition.trucks,
+            ml_predictions=ml_predictions,
+        )
+        try:
+            optimizer = self.optimizer_factory(time_limit, self.random_seed)
+            if on_improvement is None:
+                partition.plan = optimizer.solve(sub_input)
+            else:
+                partition.plan = optimizer.solve(
+                    sub_input, on_improvement=lambda event: on_improvement({'partition': partition.name, **event})
+                )
+        except Exception as e:
+            logger.error(f"Subproblem {partition.name} failed: {e}")
+            partition.plan = {'rakes': [], 'trucks': [], 'solver_status': 'ERROR'}
+        partition.seconds = time.perf_counter() - started
+
+    # ========================================================================
+    # MASTER STEP
+    # ========================================================================
+
+    def _master(
+        self,
+        partitions: List[Partition],
+        available_rakes: int,
+        available_trucks: int,
+        ml_predictions: Dict[str, Any],
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Dict[str, Any]]:
+        """Merge subproblem plans, repair capacity, reallocate spare fleet"""
+        rakes: List[Dict[str, Any]] = []
+        trucks: List[Dict[str, Any]] = []
+        served: Dict[int, float] = {}
+        repaired = 0
+
+        for i, partition in enumerate(partitions):
+            for rake in partition.plan.get('rakes', []):
+                rake = dict(rake, partition=partition.name)
+                if rake['tonnes'] > RAKE_CAPACITY_TONNES:
+                    rake['estimated_cost'] *= RAKE_CAPACITY_TONNES / rake['tonnes']
+                    rake['tonnes'], rake['wagons'] = RAKE_CAPACITY_TONNES, MAX_WAGONS
+                    repaired += 1
+                rakes.append(rake)
+            for truck in partition.plan.get('trucks', []):
+                truck = dict(truck, partition=partition.name)
+                if truck['tonnes'] > TRUCK_CAPACITY_TONNES:
+                    truck['estimated_cost'] *= TRUCK_CAPACITY_TONNES / truck['tonnes']
+                    truck['tonnes'] = TRUCK_CAPACITY_TONNES
+                    repaired += 1
+                trucks.append(truck)
+
+        # Subproblems never see more than their share, but a shared fleet must hold globally
+        dropped = 0
+        for vehicles, limit in ((rakes, available_rakes), (trucks, available_trucks)):
+            if len(vehicles) > limit:
+                vehicles.sort(key=lambda v: v['tonnes'], reverse=True)
+                dropped += len(vehicles) - limit
+                del vehicles[limit:]
+
+        index_of = {p.name: i for i, p in enumerate(partitions)}
+        for vehicle in rakes + trucks:
+            i = index_of[vehicle['partition']]
+            served[i] = served.get(i, 0) + vehicle['tonnes']
+        residual = {i: p.tonnes - served.get(i, 0) for i, p in enumerate(partitions)}
+        urgent_first = sorted(range(len(partitions)), key=lambda i: partitions[i].urgency)
+
+        spare_rakes = available_rakes - len(rakes)
+        reallocated_rakes = 0
+        for i in urgent_first:
+            while spare_rakes and residual[i] >= RAKE_MIN_TONNES:
+                tonnes = min(residual[i], RAKE_CAPACITY_TONNES)
+                rakes.append(self._rake(partitions[i], tonnes, ml_predictions))
+                residual[i] -= tonnes
+                spare_rakes -= 1
+                reallocated_rakes += 1
+
+        spare_trucks = available_trucks - len(trucks)
+        reallocated_trucks = 0
+        for i in urgent_first:
+            while spare_trucks and residual[i] > 0:
+                tonnes = min(residual[i], TRUCK_CAPACITY_TONNES)
+                trucks.append(self._truck(partitions[i], tonnes, ml_predictions))
+                residual[i] -= tonnes
+                spare_trucks -= 1
+                reallocated_trucks += 1
+
+        for n, rake in enumerate(rakes, 1):
+            rake['rake_id'] = f'RAKE_{n:03d}'
+        for n, truck in enumerate(trucks, 1):
+            truck['truck_id'] = f'TRUCK_{n:03d}'
+
+        report = {
+            'repaired_loads': repaired,
+            'dropped_vehicles': dropped,
+            'reallocated_rakes': reallocated_rakes,
+            'reallocated_trucks': reallocated_trucks,
+            'unserved_tonnes': sum(max(0, r) for r in residual.values()),
+        }
+        return rakes, trucks, report
+
+    @staticmethod
+    def _rake(partition: Partition, tonnes: float, ml_predictions: Dict[str, Any]) -> Dict[str, Any]:
+        _, destination, material_type = partition.key
+        wagons = min(MAX_WAGONS, max(MIN_WAGONS, math.ceil(tonnes / WAGON_CAPACITY_TONNES)))
+        return {
+            'rake_id': '',
+            'destination': destination,
+            'material_type': material_type,
+            'tonnes': tonnes,
+            'wagons': wagons,
+            'estimated_cost': calculate_rail_cost(
+                tonnes, wagons, destination, demurrage_hours=ml_predictions.get('demurrage_hours', 0.5)
+            ),
+            'estimated_delay_hours': ml_predictions.get(f'delay_{destination}', 2.0),
+            'partition': partition.name,
+        }
+
+    @staticmethod
+    def _truck(partition: Partition, tonnes: float, ml_predictions: Dict[str, Any]) -> Dict[str, Any]:
+        _, destination, material_type = partition.key
+        return {
+            'truck_id': '',
+            'destination': destination,
+            'material_type': material_type,
+            'tonnes': tonnes,
+            'estimated_cost': calculate_road_cost(
+                tonnes, get_distance_to_destination(destination), truck_cost_per_km_per_tonne=30
+            ),
+            'estimated_delay_hours': ml_predictions.get(f'delay_{destination}', 1.5),
+            'partition': partition.name,
+        }
+
+
+# ============================================================================
+# QUALITY GAP
+# ============================================================================
+
+def _plan_metrics(plan: Dict[str, Any], demand: float, seconds: float) -> Dict[str, Any]:
+    summary = plan.get('summary', {})
+    tonnage = summary.get('total_tonnage', 0)
+    cost = summary.get('total_cost', 0)
+    return {
+        'solver_status': plan.get('solver_status'),
+        'total_cost': cost,
+        'total_tonnage': tonnage,
+        'coverage': tonnage / demand if demand else None,
+        'cost_per_tonne': cost / tonnage if tonnage else None,
+        'seconds': round(seconds, 4),
+    }
+
+
+def _gap_pct(value: Optional[float], reference: Optional[float]) -> Optional[float]:
+    if value is None or not reference:
+        return None
+    return round((value - reference) / reference * 100, 3)
+
+
+def quality_gap_report(
+    instances: List[Dict[str, Any]],
+    time_limit_seconds: float = 20,
+    random_seed: int = 42,
+    max_partition_orders: int = 100,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Plan each (small) instance monolithically and by decomposition and
+    report the gaps. Positive ``cost_per_tonne_gap_pct`` means the
+    decomposed plan is dearer per tonne; negative ``coverage_gap_pct``
+    means it ships less of the demand.
+
+    Args:
+        instances: Optimizer inputs small enough for one CP-SAT model
+        time_limit_seconds: Budget of each solve
+        random_seed: Seed of each solve
+        max_partition_orders: Largest subproblem of the decomposed solve
+        max_workers: Parallel subproblem solves
+
+    Returns:
+        Per-instance metrics and gaps, with mean and worst gaps
+    """
+    monolithic = RakeFormationOptimizer(time_limit_seconds=time_limit_seconds, random_seed=random_seed)
+    decomposed = DecompositionSolver(
+        time_limit_seconds=time_limit_seconds,
+        random_seed=random_seed,
+        max_partition_orders=max_partition_orders,
+        max_workers=max_workers,
+    )
+
+    rows = []
+    for n, instance in enumerate(instances):
+        demand = sum(o.get('quantity_tonnes', 0) for o in instance.get('orders', []))
+        started = time.perf_counter()
+        mono = _plan_metrics(monolithic.solve(instance), demand, time.perf_counter() - started)
+        started = time.perf_counter()
+        plan = decomposed.solve(instance)
+        deco = _plan_metrics(plan, demand, time.perf_counter() - started)
+        rows.append({
+            'instance': n,
+            'orders': len(instance.get('orders', [])),
+            'partitions': plan.get('decomposition', {}).get('partitions', 0),
+            'monolithic': mono,
+            'decomposed': deco,
+            'cost_per_tonne_gap_pct': _gap_pct(deco['cost_per_tonne'], mono['cost_per_tonne']),
+            'coverage_gap_pct': _gap_pct(deco['coverage'], mono['coverage']),
+        })
+
+    def aggregate(key: str, worst: Callable) -> Dict[str, Optional[float]]:
+        values = [r[key] for r in rows if r[key] is not None]
+        return {
+            'mean': round(sum(values) / len(values), 3) if values else None,
+            'worst': worst(values) if values else None,
+        }
+
+    return {
+        'instances': len(rows),
+        'cost_per_tonne_gap_pct': aggregate('cost_per_tonne_gap_pct', max),
+        'coverage_gap_pct': aggregate('coverage_gap_pct', min),
+        'runs': rows,
+    }
@@ -0,0 +1,454 @@
+"""
+Large Neighborhood Search over dispatch plans.
+SIH25208 SAIL Bokaro Steel Plant Logistics Optimization System.
+
+An anytime improver for instances the full CP-SAT model cannot solve in
+time. A plan is a set of vehicle loads: every rake and truck carries
+tonnes of orders bound for one destination. Starting from the greedy plan,
+each iteration frees a neighborhood (all orders of a destination, the
+orders on a few rakes, or a due-date window), together with the vehicles
+carrying them and some idle ones, and re-optimizes it with a small CP-SAT
+model seeded with the current loads. The rest of the plan stays fixed, so
+the incumbent is a feasible hint of every sub-model and the plan can only
+get better.
+
+Plans are scored by dispatch cost (rail freight and demurrage, road cost
+by destination distance) plus a per-tonne penalty for unshipped demand,
+weighted by order priority.
+"""
+
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import logging
+
+from ortools.sat.python import cp_model
+
+from .utils import (
+    calculate_rail_cost,
+    calculate_road_cost,
+    get_distance_to_destination,
+    MAX_WAGONS,
+    MIN_WAGONS,
+    RAKE_CAPACITY_TONNES,
+    RAKE_MIN_TONNES,
+    TRUCK_CAPACITY_TONNES,
+    WAGON_CAPACITY_TONNES,
+)
+
+logger = logging.getLogger(__name__)
+
+NEIGHBORHOODS = ('destination', 'rakes', 'due_window')
+
+UNSERVED_PENALTY_PER_TONNE = 10000  # Above the dearest road tonne, so demand is shipped when possible
+COST_SCALE = 100  # CP-SAT coefficients are integers; costs are kept to the paisa
+
+
+@dataclass
+class Vehicle:
+    """A rake or truck and the tonnes of each order it carries"""
+    vehicle_id: str
+    mode: str  # 'RAIL' or 'ROAD'
+    capacity: int
+    destination: Optional[str] = None
+    loads: Dict[int, int] = field(default_factory=dict)  # order index -> tonnes
+
+    @property
+    def tonnes(self) -> int:
+        return sum(self.loads.values())
+
+
+class LNSOptimizer:
+    """Anytime LNS improving a dispatch plan within a time budget."""
+
+    def __init__(
+        self,
+        orders: List[Dict[str, Any]],
+        available_rakes: int,
+        available_trucks: int,
+        ml_predictions: Optional[Dict[str, Any]] = None,
+        cost_params: Optional[Dict[str, Any]] = None,
+        random_seed: int = 42,
+        max_free_orders: int = 40,
+        max_free_vehicles: int = 40,
+        sub_time_limit_seconds: float = 1.0,
+        max_stall_iterations: int = 30,
+    ):
+        """
+        Initialize LNS.
+
+        Args:
+            orders: Orders to plan
+            available_rakes: Rakes in the fleet
+            available_trucks: Trucks in the fleet
+            ml_predictions: ML predictions (delays, demurrage hours)
+            cost_params: Cost parameters (rates, distances, priority weights)
+            random_seed: Seed of neighborhood choice and sub-model solves
+            max_free_orders: Most orders freed by one neighborhood
+            max_free_vehicles: Most idle vehicles added to one neighborhood
+            sub_time_limit_seconds: Time limit of one sub-model solve
+            max_stall_iterations: Stop after this many iterations without improvement
+        """
+        self.orders = orders
+        self.available_rakes = available_rakes
+        self.available_trucks = available_trucks
+        self.ml_predictions = ml_predictions or {}
+        self.cost_params = cost_params or {}
+        self.random_seed = random_seed
+        self.max_free_orders = max_free_orders
+        self.max_free_vehicles = max_free_vehicles
+        self.sub_time_limit_seconds = sub_time_limit_seconds
+        self.max_stall_iterations = max_stall_iterations
+        self.rng = random.Random(random_seed)
+
+        self.quantity = [int(round(o.get('quantity_tonnes', 0) or 0)) for o in orders]
+        self.destination = [str(o.get('destination', 'Kolkata')) for o in orders]
+        self.due_order = sorted(range(len(orders)), key=lambda i: orders[i].get('due_date') or '9999-12-31')
+
+        weights = {
+            'HIGH': self.cost_params.get('sla_priority_weight_high', 2.0),
+            'MEDIUM': self.cost_params.get('sla_priority_weight_medium', 1.0),
+            'LOW': self.cost_params.get('sla_priority_weight_low', 0.5),
+        }
+        penalty = self.cost_params.get('unserved_penalty_per_tonne', UNSERVED_PENALTY_PER_TONNE)
+        self.unserved_penalty = [
+            penalty * weights.get(str(o.get('priority', 'MEDIUM')).upper(), weights['MEDIUM']) for o in orders
+        ]
+
+        self.freight_rate = self.cost_params.get('freight_rate_per_tonne', 500)
+        self.demurrage_rate = self.cost_params.get('demurrage_rate_per_wagon_per_hour', 100)
+        self.demurrage_hours = float(self.ml_predictions.get('demurrage_hours', 0.5))
+        self.truck_rate = self.cost_params.get('truck_cost_per_km_per_tonne', 30)
+
+    # ========================================================================
+    # PLAN COSTS
+    # ========================================================================
+
+    def distance(self, destination: str) -> float:
+        return self.cost_params.get(f'distance_{destination}') or get_distance_to_destination(destination)
+
+    @staticmethod
+    def wagons(tonnes: int) -> int:
+        return min(MAX_WAGONS, max(MIN_WAGONS, math.ceil(tonnes / WAGON_CAPACITY_TONNES)))
+
+    def vehicle_cost(self, vehicle: Vehicle) -> float:
+        tonnes = vehicle.tonnes
+        if tonnes <= 0:
+            return 0.0
+        if vehicle.mode == 'RAIL':
+            return calculate_rail_cost(
+                tonnes,
+                self.wagons(tonnes),
+                vehicle.destination,
+                freight_rate_per_tonne=self.freight_rate,
+                demurrage_hours=self.demurrage_hours,
+                demurrage_rate_per_wagon_per_hour=self.demurrage_rate,
+            )
+        return calculate_road_cost(
+            tonnes, self.distance(vehicle.destination), truck_cost_per_km_per_tonne=self.truck_rate
+        )
+
+    def served(self, vehicles: List[Vehicle]) -> List[int]:
+        served = [0] * len(self.orders)
+        for vehicle in vehicles:
+            for idx, tonnes in vehicle.loads.items():
+                served[idx] += tonnes
+        return served
+
+    def objective(self, vehicles: List[Vehicle]) -> float:
+        """Dispatch cost plus the priority-weighted penalty of unshipped tonnes"""
+        served = self.served(vehicles)
+        unserved = sum(
+            (q - s) * p for q, s, p in zip(self.quantity, served, self.unserved_penalty)
+        )
+        return sum(self.vehicle_cost(v) for v in vehicles) + unserved
+
+    # ========================================================================
+    # PLAN CONVERSION
+    # ========================================================================
+
+    def from_plan(self, plan: Dict[str, Any]) -> List[Vehicle]:
+        """Vehicles of a plan whose rakes and trucks name the ``order_id`` they
+        carry (as the greedy plan does). Loads over a vehicle's capacity or an
+        order's quantity are cut back."""
+        vehicles = self.empty_fleet()
+        by_id = {v.vehicle_id: v for v in vehicles}
+        indexes_of: Dict[Any, List[int]] = {}
+        for idx, order in enumerate(self.orders):
+            indexes_of.setdefault(order.get('order_id'), []).append(idx)
+        remaining = list(self.quantity)
+
+        for entry in plan.get('rakes', []) + plan.get('trucks', []):
+            vehicle = by_id.get(entry.get('rake_id') or entry.get('truck_id'))
+            candidates = indexes_of.get(entry.get('order_id'), [])
+            idx = next((i for i in candidates if remaining[i] > 0), None)
+            if vehicle is None or idx is None or vehicle.loads:
+                continue
+            tonnes = min(int(entry.get('tonnes', 0)), vehicle.capacity, remaining[idx])
+            if tonnes <= 0 or (vehicle.mode == 'RAIL' and tonnes < RAKE_MIN_TONNES):
+                continue
+            vehicle.destination = self.destination[idx]
+            vehicle.loads[idx] = tonnes
+            remaining[idx] -= tonnes
+        return vehicles
+
+    def empty_fleet(self) -> List[Vehicle]:
+        return (
+            [Vehicle(f'RAKE_{i+1:03d}', 'RAIL', RAKE_CAPACITY_TONNES) for i in range(self.available_rakes)]
+            + [Vehicle(f'TRUCK_{i+1:03d}', 'ROAD', TRUCK_CAPACITY_TONNES) for i in range(self.available_trucks)]
+        )
+
+    def to_plan(self, vehicles: List[Vehicle]) -> Dict[str, Any]:
+        """Plan in the shape RakeFormationOptimizer returns"""
+        rakes = []
+        trucks = []
+        for vehicle in vehicles:
+            if vehicle.tonnes <= 0:
+                continue
+            first = min(vehicle.loads)
+            entry = {
+                'destination': vehicle.destination,
+                'material_type': self.orders[first].get('material_type', 'Mixed'),
+                'tonnes': vehicle.tonnes,
+                'estimated_cost': self.vehicle_cost(vehicle),
+                'order_ids': [self.orders[i].get('order_id') for i in sorted(vehicle.loads)],
+            }
+            delay = self.ml_predictions.get(f'delay_{vehicle.vehicle_id}')
+            if vehicle.mode == 'RAIL':
+                if delay is None:
+                    delay = self.ml_predictions.get(f'delay_{vehicle.destination}', 2.0)
+                rakes.append({'rake_id': vehicle.vehicle_id, **entry, 'wagons': self.wagons(vehicle.tonnes),
+                              'estimated_delay_hours': delay})
+            else:
+                if delay is None:
+                    delay = self.ml_predictions.get(f'delay_{vehicle.destination}', 1.5)
+                trucks.append({'truck_id': vehicle.vehicle_id, **entry, 'estimated_delay_hours': delay})
+
+        total_cost = sum(r['estimated_cost'] for r in rakes) + sum(t['estimated_cost'] for t in trucks)
+        total_tonnage = sum(r['tonnes'] for r in rakes) + sum(t['tonnes'] for t in trucks)
+        summary = {
+            'total_cost': total_cost,
+            'total_tonnage': total_tonnage,
+            'rail_vs_road_ratio': len(rakes) / max(1, len(trucks)),
+            'total_rakes': len(rakes),
+            'total_trucks': len(trucks),
+            'estimated_completion_days': (total_tonnage / 1000) * 0.5,
+        }
+        return {'rakes': rakes, 'trucks': trucks, 'summary': summary}
+
+    # ========================================================================
+    # SEARCH
+    # ========================================================================
+
+    def run(
+        self,
+        initial_plan: Dict[str, Any],
+        time_limit_seconds: float,
+        on_improvement: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Improve ``initial_plan`` until the time limit, a proven optimum or
+        ``max_stall_iterations`` iterations without improvement.
+
+        Args:
+            initial_plan: Starting plan (e.g. the greedy fallback)
+            time_limit_seconds: Wall-clock budget
+            on_improvement: Called with an event dict for every new incumbent
+
+        Returns:
+            Best plan, with an ``lns`` entry describing the search
+        """
+        started = time.perf_counter()
+        deadline = started + time_limit_seconds
+        best = self.from_plan(initial_plan)
+        best_objective = initial_objective = self.objective(best)
+
+        stats = {
+            'initial_objective': initial_objective,
+            'iterations': 0,
+            'improvements': 0,
+            'neighborhoods': {kind: {'tried': 0, 'improved': 0} for kind in NEIGHBORHOODS + ('all',)},
+            'stopped': 'time_limit',
+        }
+        small = len(self.orders) <= self.max_free_orders and len(best) <= self.max_free_vehicles
+        stall = 0
+
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            if stall >= self.max_stall_iterations:
+                stats['stopped'] = 'stalled'
+                break
+
+            kind = 'all' if small else NEIGHBORHOODS[stats['iterations'] % len(NEIGHBORHOODS)]
+            free_orders = self._neighborhood(kind, best)
+            stats['iterations'] += 1
+            stats['neighborhoods'][kind]['tried'] += 1
+
+            candidate, optimal = self._reoptimize(best, free_orders, min(self.sub_time_limit_seconds, remaining))
+            if candidate is not None:
+                objective = self.objective(candidate)
+                if objective < best_objective - 1e-6:
+                    best, best_objective = candidate, objective
+                    stall = 0
+                    stats['improvements'] += 1
+                    stats['neighborhoods'][kind]['improved'] += 1
+                    if on_improvement is not None:
+                        on_improvement({
+                            'iteration': stats['iterations'],
+                            'neighborhood': kind,
+                            'objective': best_objective,
+                            'unserved_tonnes': sum(self.quantity) - sum(self.served(best)),
+                            'elapsed_seconds': round(time.perf_counter() - started, 4),
+                        })
+                else:
+                    stall += 1
+            else:
+                stall += 1
+
+            if kind == 'all' and optimal:
+                # The sub-model was the whole problem
+                stats['stopped'] = 'optimal'
+                break
+
+        stats['best_objective'] = best_objective
+        stats['unserved_tonnes'] = sum(self.quantity) - sum(self.served(best))
+        stats['seconds'] = round(time.perf_counter() - started, 4)
+        logger.info(
+            f"LNS: {stats['iterations']} iterations, {stats['improvements']} improvements, "
+            f"objective {initial_objective:.0f} -> {best_objective:.0f} ({stats['stopped']})"
+        )
+
+        plan = self.to_plan(best)
+        plan['lns'] = stats
+        return plan
+
+    def _neighborhood(self, kind: str, vehicles: List[Vehicle]) -> Set[int]:
+        if kind == 'all':
+            return set(range(len(self.orders)))
+
+        if kind == 'rakes':
+            used = [v for v in vehicles if v.mode == 'RAIL' and v.loads]
+            if used:
+                chosen = self.rng.sample(used, min(len(used), self.rng.randint(2, 3)))
+                free = {i for v in chosen for i in v.loads}
+                served = self.served(vehicles)
+                destinations = {v.destination for v in chosen}
+                # Room for the rakes to take on unshipped orders of their destinations
+                pending = [
+                    i for i in range(len(self.orders))
+                    if served[i] < self.quantity[i] and self.destination[i] in destinations and i not in free
+                ]
+                self.rng.shuffle(pending)
+                return free | set(pending[:max(0, self.max_free_orders - len(free))])
+            kind = 'destination'
+
+        if kind == 'destination':
+            destination = self.rng.choice(sorted(set(self.destination)))
+            candidates = [i for i in range(len(self.orders)) if self.destination[i] == destination]
+        else:
+            size = min(self.max_free_orders, len(self.orders))
+            start = self.rng.randint(0, len(self.orders) - size)
+            candidates = self.due_order[start:start + size]
+
+        if len(candidates) > self.max_free_orders:
+            candidates = self.rng.sample(candidates, self.max_free_orders)
+        return set(candidates)
+
+    def _reoptimize(
+        self,
+        vehicles: List[Vehicle],
+        free_orders: Set[int],
+        time_limit: float,
+    ) -> Tuple[Optional[List[Vehicle]], bool]:
+        """Re-plan ``free_orders`` over their vehicles and some idle ones.
+        Returns the new vehicle list (None if no solution) and whether the
+        sub-model was solved to optimality."""
+        carriers = [v for v in vehicles if any(i in free_orders for i in v.loads)]
+        idle = [v for v in vehicles if not v.loads]
+        self.rng.shuffle(idle)
+        idle_rakes = [v for v in idle if v.mode == 'RAIL'][:max(1, self.max_free_vehicles // 3)]
+        idle_trucks = [v for v in idle if v.mode == 'ROAD'][:self.max_free_vehicles - len(idle_rakes)]
+        free_vehicles = carriers + idle_rakes + idle_trucks
+        if not free_vehicles or not free_orders:
+            return None, False
+
+        model = cp_model.CpModel()
+        orders = sorted(free_orders)
+        objective = []
+        x: Dict[Tuple[int, int], Any] = {}
+
+        for v_idx, vehicle in enumerate(free_vehicles):
+            fixed = {i: t for i, t in vehicle.loads.items() if i not in free_orders}
+            fixed_tonnes = sum(fixed.values())
+            destinations = sorted({self.destination[i] for i in orders} | ({vehicle.destination} if fixed else set()))
+            y = {d: model.NewBoolVar(f'v{v_idx}_to_{d}') for d in destinations}
+            model.Add(sum(y.values()) <= 1)
+            if fixed:
+                model.Add(y[vehicle.destination] == 1)
+
+            load_by_destination = {d: [] for d in destinations}
+            for i in orders:
+                var = model.NewIntVar(0, min(self.quantity[i], vehicle.capacity), f'x_{i}_{v_idx}')
+                model.Add(var <= vehicle.capacity * y[self.destination[i]])
+                x[i, v_idx] = var
+                load_by_destination[self.destination[i]].append(var)
+                model.AddHint(var, vehicle.loads.get(i, 0))
+            for d, var in y.items():
+                model.AddHint(var, 1 if vehicle.loads and vehicle.destination == d else 0)
+
+            total = sum(sum(loads) for loads in load_by_destination.values()) + fixed_tonnes
+            model.Add(total <= vehicle.capacity)
+            if vehicle.mode == 'RAIL':
+                model.Add(total >= RAKE_MIN_TONNES * sum(y.values()))
+
+            for d, loads in load_by_destination.items():
+                load = sum(loads) + (fixed_tonnes if fixed and d == vehicle.destination else 0)
+                surcharge = 1.1 if 'Haldia' in d else 1.0
+                if vehicle.mode == 'RAIL':
+                    wagons = model.NewIntVar(0, MAX_WAGONS, f'v{v_idx}_{d}_wagons')
+                    model.Add(wagons >= MIN_WAGONS * y[d])
+                    model.Add(wagons <= MAX_WAGONS * y[d])
+                    model.Add(load <= WAGON_CAPACITY_TONNES * wagons)
+                    model.AddHint(wagons, self.wagons(vehicle.tonnes) if vehicle.loads and vehicle.destination == d else 0)
+                    per_tonne = self.freight_rate * surcharge
+                    per_wagon = self.demurrage_hours * self.demurrage_rate * surcharge
+                    objective.append(int(round(per_tonne * COST_SCALE)) * load)
+                    objective.append(int(round(per_wagon * COST_SCALE)) * wagons)
+                else:
+                    per_tonne = self.distance(d) * self.truck_rate
+                    objective.append(int(round(per_tonne * COST_SCALE)) * load)
+
+        for i in orders:
+            shipped = sum(x[i, v_idx] for v_idx in range(len(free_vehicles)))
+            model.Add(shipped <= self.quantity[i])
+            objective.append(-int(round(self.unserved_penalty[i] * COST_SCALE)) * shipped)
+
+        model.Minimize(sum(objective))
+
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = max(time_limit, 0.01)
+        solver.parameters.random_seed = self.random_seed
+        solver.parameters.num_workers = 1
+        status = solver.Solve(model)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return None, False
+
+        replaced = {}
+        for v_idx, vehicle in enumerate(free_vehicles):
+            loads = {i: t for i, t in vehicle.loads.items() if i not in free_orders}
+            for i in orders:
+                tonnes = solver.Value(x[i, v_idx])
+                if tonnes > 0:
+                    loads[i] = tonnes
+            destination = None
+            if loads:
+                destination = self.destination[next(iter(loads))]
+            replaced[vehicle.vehicle_id] = Vehicle(
+                vehicle.vehicle_id, vehicle.mode, vehicle.capacity, destination, loads
+            )
+        candidate = [replaced.get(v.vehicle_id, v) for v in vehicles]
+        return candidate, status == cp_model.OPTIMAL
@@ -7,7 +7,7 @@ import json
 import time
 import random
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from ortools.sat.python import cp_model
 import logging
 
@@ -21,6 +21,7 @@ from .constraints import (
     add_loading_time_constraints,
     add_multi_destination_constraints,
 )
+from .lns import LNSOptimizer
 from .objective import build_objective_function
 from .utils import (
     calculate_loading_time_slots,
@@ -33,34 +34,59 @@ from .utils import (
 
 logger = logging.getLogger(__name__)
 
+LNS_MIN_SECONDS = 0.05  # Less time than this cannot solve a single LNS sub-model
+
 class RakeFormationOptimizer:
     """CP-SAT based optimizer for rake formation and dispatch."""
     
-    def __init__(self, time_limit_seconds: int = 20, random_seed: int = 42):
+    def __init__(
+        self,
+        time_limit_seconds: int = 20,
+        random_seed: int = 42,
+        anytime: bool = True,
+        lns_order_threshold: int = 50,
+    ):
         """
         Initialize optimizer.
         
         Args:
             time_limit_seconds: Solver time limit
             random_seed: Random seed for reproducibility
+            anytime: Improve the greedy fallback by LNS for the rest of the time limit
+            lns_order_threshold: Order count from which the full model is skipped for LNS
         """
         self.time_limit_seconds = time_limit_seconds
         self.random_seed = random_seed
+        self.anytime = anytime
+        self.lns_order_threshold = lns_order_threshold
         self.last_solution = None
         self.solver_status = None
     
-    def solve(self, input_json: Dict[str, Any]) -> Dict[str, Any]:
+    def solve(
+        self,
+        input_json: Dict[str, Any],
+        on_improvement: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
         """
         Solve the rake formation and dispatch problem.
         
+        Large instances (``lns_order_threshold`` orders or more) go straight
+        to the anytime LNS; smaller ones try the full model first and fall
+        back to greedy + LNS for the remaining time. Plans from that
+        fallback, or plain greedy plans, have ``summary['fallback']`` set.
+        
         Args:
             input_json: Input JSON with orders, inventory, available resources
+            on_improvement: Called with each new LNS incumbent
         
         Returns:
             Optimized dispatch plan
         """
         start_time = time.time()
         
+        if self.anytime and len(input_json.get('orders', [])) >= self.lns_order_threshold:
+            return self._anytime_fallback(input_json, start_time, on_improvement, fallback=False)
+        
         try:
             # Extract input data
             orders = input_json.get('orders', [])
@@ -107,19 +133,55 @@ class RakeFormationOptimizer:
                 solution['solver_status'] = 'OPTIMAL' if status == cp_model.OPTIMAL else 'FEASIBLE'
                 solution['solver_time_seconds'] = elapsed
                 solution['objective_value'] = solver.ObjectiveValue()
+                solution['summary']['fallback'] = False
                 return solution
             else:
                 logger.warning(f"Solver status: {status}. Running greedy fallback.")
-                return self._greedy_fallback(orders, available_rakes, available_trucks, ml_predictions)
+                return self._anytime_fallback(input_json, start_time, on_improvement)
         
         except Exception as e:
             logger.error(f"Solver error: {str(e)}. Running greedy fallback.")
-            return self._greedy_fallback(
-                input_json.get('orders', []),
-                input_json.get('available_rakes', 5),
-                input_json.get('available_trucks', 20),
-                input_json.get('ml_predictions', {})
-            )
+            return self._anytime_fallback(input_json, start_time, on_improvement)
+    
+    def _anytime_fallback(
+        self,
+        input_json: Dict[str, Any],
+        start_time: float,
+        on_improvement: Optional[Callable[[Dict[str, Any]], None]] = None,
+        fallback: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        Greedy plan, improved by LNS until the time limit when anytime mode is on.
+        
+        ``fallback`` is False when LNS is the chosen solver rather than a
+        stand-in for a full model that failed; a plain greedy plan is always
+        a fallback.
+        """
+        orders = input_json.get('orders', [])
+        available_rakes = input_json.get('available_rakes', 5)
+        available_trucks = input_json.get('available_trucks', 20)
+        ml_predictions = input_json.get('ml_predictions', {})
+        
+        greedy = self._greedy_fallback(orders, available_rakes, available_trucks, ml_predictions)
+        remaining = self.time_limit_seconds - (time.time() - start_time)
+        if not self.anytime or not orders or remaining < LNS_MIN_SECONDS:
+            greedy['summary']['fallback'] = True
+            return greedy
+        
+        lns = LNSOptimizer(
+            orders,
+            available_rakes,
+            available_trucks,
+            ml_predictions=ml_predictions,
+            cost_params=input_json.get('cost_parameters', {}),
+            random_seed=self.random_seed,
+        )
+        solution = lns.run(greedy, remaining, on_improvement)
+        solution['solver_status'] = 'LNS'
+        solution['solver_time_seconds'] = time.time() - start_time
+        solution['objective_value'] = solution['lns']['best_objective']
+        solution['summary']['fallback'] = fallback
+        return solution
     
     def _build_variables(
         self,
@@ -359,11 +421,13 @@ class RakeFormationOptimizer:
             if rake_idx < available_rakes and tonnes >= 500:
                 wagons = 58 if tonnes <= 3654 else 59
                 delay = ml_predictions.get(f'delay_RAKE_{rake_idx+1:03d}', 2.0)
-                cost = calculate_rail_cost(tonnes, wagons, 'Kolkata', demurrage_hours=ml_predictions.get('demurrage_hours', 0.5))
+                destination = order.get('destination', 'Kolkata')
+                cost = calculate_rail_cost(tonnes, wagons, destination, demurrage_hours=ml_predictions.get('demurrage_hours', 0.5))
                 
                 rakes.append({
                     'rake_id': f'RAKE_{rake_idx+1:03d}',
-                    'destination': order.get('destination', 'Kolkata'),
+                    'order_id': order.get('order_id'),
+                    'destination': destination,
                     'material_type': order.get('material_type', 'Mixed'),
                     'tonnes': tonnes,
                     'wagons': wagons,
@@ -376,11 +440,13 @@ class RakeFormationOptimizer:
             elif truck_idx < available_trucks:
                 truck_tonnes = min(tonnes, 22)
                 delay = ml_predictions.get(f'delay_TRUCK_{truck_idx+1:03d}', 1.5)
-                cost = calculate_road_cost(truck_tonnes, 200, truck_cost_per_km_per_tonne=30)
+                destination = order.get('destination', 'Kolkata')
+                cost = calculate_road_cost(truck_tonnes, get_distance_to_destination(destination), truck_cost_per_km_per_tonne=30)
                 
                 trucks.append({
                     'truck_id': f'TRUCK_{truck_idx+1:03d}',
-                    'destination': order.get('destination', 'Kolkata'),
+                    'order_id': order.get('order_id'),
+                    'destination': destination,
                     'material_type': order.get('material_type', 'Mixed'),
                     'tonnes': truck_tonnes,
                     'estimated_cost': cost,
@@ -13,6 +13,17 @@ import math
 SLOT_DURATION_MINUTES = 15  # 15-minute time slots
 SLOTS_PER_DAY = 24 * 60 // SLOT_DURATION_MINUTES  # 96 slots per day
 
+# ============================================================================
+# VEHICLE CAPACITIES
+# ============================================================================
+
+WAGON_CAPACITY_TONNES = 63
+MIN_WAGONS = 58
+MAX_WAGONS = 59
+RAKE_CAPACITY_TONNES = MAX_WAGONS * WAGON_CAPACITY_TONNES
+TRUCK_CAPACITY_TONNES = 22
+RAKE_MIN_TONNES = 500  # Smallest load worth a rake
+
 def datetime_to_slot(dt: datetime) -> int:
     """Convert datetime to time slot number (0-95 for a day)."""
     minutes_since_midnight = dt.hour * 60 + dt.minute
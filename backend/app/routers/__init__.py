@@ -1,10 +1,10 @@
 """
 API routers package.
-"""
 
-from . import forecast, delay, throughput, cost, mode, optimize, meta
-from . import blockchain, ai_forecast, advanced_optimization, visualization, scenario_analysis, advanced_models
-from . import ml_routes, database, rake_formation, monte_carlo, decision_support, analytics, compliance, rake_optimizer
+Router modules are imported on demand (see app.utils.lazy_routers), so this
+package deliberately does not import them; ``from app.routers import x`` still
+works because Python imports the submodule.
+"""
 
 __all__ = [
     'forecast', 'delay', 'throughput', 'cost', 'mode', 'optimize', 'meta',
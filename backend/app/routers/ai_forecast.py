@@ -8,7 +8,9 @@ from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
 
+from ..config import settings
 from ..services.demand_forecast_service import demand_forecast_service
+from ..services.global_forecast_service import global_forecast_service
 from ..utils import app_logger
 
 router = APIRouter(prefix="/forecast", tags=["AI Forecasting"])
@@ -122,14 +124,36 @@ async def get_forecast_accuracy(material: str):
 
 
 @router.get("/demand/all-materials")
-async def forecast_all_materials(periods: Optional[int] = 30):
+async def forecast_all_materials(periods: Optional[int] = 30, backend: Optional[str] = None):
     """
     Generate forecasts for all materials.
     
     - **periods**: Number of days to forecast
+    - **backend**: "prophet" (one model per material) or "global" (one ridge
+      model over every material x destination series, with per-destination
+      forecasts); defaults to DEMAND_FORECAST_BACKEND
     """
+    backend = backend or settings.DEMAND_FORECAST_BACKEND
+    if backend not in ('prophet', 'global'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown forecast backend '{backend}' (expected 'prophet' or 'global')"
+        )
+    if not periods or periods < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="periods must be a positive number of days"
+        )
+    
     try:
-        materials = ['HR_Coils', 'CR_Coils', 'Plates', 'Wire_Rods', 'TMT_Bars', 'Pig_Iron', 'Billets']
+        materials = settings.MATERIALS
+        
+        if backend == 'global':
+            return {
+                'status': 'success',
+                'data': global_forecast_service.forecast_all(periods, materials),
+                'timestamp': datetime.utcnow().isoformat()
+            }
         
         forecasts = []
         for material in materials:
@@ -139,11 +163,17 @@ async def forecast_all_materials(periods: Optional[int] = 30):
         return {
             'status': 'success',
             'data': {
+                'backend': 'prophet',
                 'total_materials': len(materials),
                 'forecasts': forecasts
             },
             'timestamp': datetime.utcnow().isoformat()
         }
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         app_logger.error(f"Multi-material forecast error: {str(e)}")
         raise HTTPException(
@@ -181,6 +211,13 @@ async def get_forecast_comparison():
                     'accuracy': 'Very High',
                     'computation_time': 'Slow'
                 },
+                {
+                    'name': 'Global Ridge',
+                    'description': 'One ridge model over every material x destination series (Fourier seasonality, trend, lags)',
+                    'advantages': ['Forecasts hundreds of series at once', 'Destination-level forecasts', 'Direct multi-horizon'],
+                    'accuracy': 'Medium-High',
+                    'computation_time': 'Very Fast'
+                },
                 {
                     'name': 'Exponential Smoothing',
                     'description': 'Simple smoothing technique',
@@ -9,6 +9,8 @@ from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 import json
 
+from app.services.rollup_store import RollupStore, get_rollup_store
+
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
 
 
@@ -78,8 +80,40 @@ class AnalyticsResponse(BaseModel):
 
 
 # Helper Functions
-def generate_kpi_metrics() -> KPIResponse:
-    """Generate KPI metrics"""
+def generate_kpi_metrics(rollups: Optional[RollupStore] = None) -> KPIResponse:
+    """Generate KPI metrics
+
+    On-time delivery, cost per tonne and rake utilization come from the
+    dispatch/optimizer rollups over the last 30 days (trend against the 30
+    days before) once there is data for them; the rest are baseline figures.
+    """
+    kpis = _baseline_kpi_metrics()
+
+    rollups = rollups or get_rollup_store()
+    now = datetime.now()
+    current = rollups.summarize("daily", now - timedelta(days=29), now)
+    previous = rollups.summarize("daily", now - timedelta(days=59), now - timedelta(days=30))
+
+    def rollup_kpi(name: str, key: str, scale: float, target: float, unit: str) -> Optional[KPIMetric]:
+        if current[key] is None:
+            return None
+        value = round(current[key] * scale, 2)
+        before = previous[key] * scale if previous[key] is not None else value
+        trend = "up" if value > before else "down" if value < before else "stable"
+        return KPIMetric(name=name, value=value, target=target, variance=round(value - target, 2),
+                         trend=trend, unit=unit)
+
+    for field, metric in (
+        ("onTimeDelivery", rollup_kpi("On-Time Delivery", "on_time_rate", 100.0, 95, "%")),
+        ("costPerTonne", rollup_kpi("Cost per Tonne", "cost_per_tonne", 1.0, 85, "₹")),
+        ("rakeUtilization", rollup_kpi("Rake Utilization", "wagon_utilization", 100.0, 85, "%")),
+    ):
+        if metric is not None:
+            setattr(kpis, field, metric)
+    return kpis
+
+
+def _baseline_kpi_metrics() -> KPIResponse:
     return KPIResponse(
         onTimeDelivery=KPIMetric(
             name="On-Time Delivery",
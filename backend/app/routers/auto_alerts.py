@@ -65,16 +65,20 @@ class AutoAlertsStatus(BaseModel):
 # ============================================================================
 
 @router.post("/analyze")
-async def analyze_plan(plan: Dict[str, Any], background_tasks: BackgroundTasks):
+async def analyze_plan(plan: Dict[str, Any], background_tasks: BackgroundTasks, incremental: bool = False):
     """
     Analyze plan and detect alerts
     Returns list of alerts with suggested mitigations
+    
+    With incremental=true, a new version of an already analyzed plan (same
+    id) only has its changed orders re-checked and only returns alerts that
+    changed since the previous version.
     """
     try:
         logger.info(f"Analyzing plan {plan.get('id')} for alerts...")
         
         # Analyze plan
-        alerts = auto_alerts.analyze_plan(plan)
+        alerts = auto_alerts.analyze_plan(plan, incremental=incremental)
         
         # Count by severity
         critical = len([a for a in alerts if a.severity == "critical"])
@@ -179,8 +183,7 @@ async def get_alerts(plan_id: Optional[str] = None, severity: Optional[str] = No
 async def get_alert(alert_id: str):
     """Get specific alert details"""
     try:
-        alerts = auto_alerts.get_alerts()
-        alert = next((a for a in alerts if a['id'] == alert_id), None)
+        alert = auto_alerts.get_alert(alert_id)
         
         if not alert:
             raise HTTPException(status_code=404, detail="Alert not found")
@@ -235,34 +238,15 @@ async def get_stats():
     """Get auto-alerts statistics"""
     try:
         status = auto_alerts.get_status()
-        alerts = auto_alerts.get_alerts()
-        
-        # Count by severity
-        critical = len([a for a in alerts if a['severity'] == 'critical'])
-        high = len([a for a in alerts if a['severity'] == 'high'])
-        medium = len([a for a in alerts if a['severity'] == 'medium'])
-        low = len([a for a in alerts if a['severity'] == 'low'])
-        info = len([a for a in alerts if a['severity'] == 'info'])
-        
-        # Count by type
-        by_type = {}
-        for alert in alerts:
-            alert_type = alert['type']
-            by_type[alert_type] = by_type.get(alert_type, 0) + 1
+        counts = auto_alerts.get_alert_counts()
         
         return {
             "total_alerts": status['total_alerts'],
             "active_alerts": status['active_alerts'],
             "mitigated_alerts": status['mitigated_alerts'],
             "mitigations_applied": status['mitigations_applied'],
-            "by_severity": {
-                "critical": critical,
-                "high": high,
-                "medium": medium,
-                "low": low,
-                "info": info
-            },
-            "by_type": by_type,
+            "by_severity": counts['by_severity'],
+            "by_type": counts['by_type'],
             "timestamp": datetime.now().isoformat()
         }
     
@@ -325,8 +309,7 @@ async def get_alerts_by_severity(severity: str):
 async def get_recommendations(alert_id: str):
     """Get mitigation recommendations for an alert"""
     try:
-        alerts = auto_alerts.get_alerts()
-        alert = next((a for a in alerts if a['id'] == alert_id), None)
+        alert = auto_alerts.get_alert(alert_id)
         
         if not alert:
             raise HTTPException(status_code=404, detail="Alert not found")
@@ -354,8 +337,7 @@ async def get_recommendations(alert_id: str):
 async def apply_best_mitigation(alert_id: str):
     """Apply the best mitigation strategy for an alert"""
     try:
-        alerts = auto_alerts.get_alerts()
-        alert = next((a for a in alerts if a['id'] == alert_id), None)
+        alert = auto_alerts.get_alert(alert_id)
         
         if not alert:
             raise HTTPException(status_code=404, detail="Alert not found")
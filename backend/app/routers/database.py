@@ -1,20 +1,272 @@
 """
 Database Router
 Provides endpoints for accessing historical data from PostgreSQL
+
+Handlers await the async access layer in app.db_async; queries that do not
+depend on each other run concurrently on separate pooled connections.
+
+The record lists page by keyset on (date, id): each page carries an opaque
+``next_cursor`` to pass back as ``cursor``, so deep pages cost the same as
+the first. ``format=ndjson`` or ``format=csv`` streams every matching row
+from a server-side cursor instead.
+
+The shipment summary and the analytics endpoints are served from the DuckDB
+snapshot engine while its snapshot is fresh, keeping dashboard scans off
+the transactional database; ``source`` in the response tells which one
+answered.
 """
 
-from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+import asyncio
+import base64
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 from fastapi import APIRouter, Query, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy import text
 
-from app.db import get_db, engine
+from app import db_async
 from app.schemas import BaseResponse
+from app.services.analytics_engine import get_analytics_engine
+from app.services.query_cache import get_query_cache
 from app.utils import app_logger
 
 router = APIRouter(prefix="/api/database", tags=["database"])
 
 
+# ============================================================================
+# STATEMENTS
+# ============================================================================
+
+SHIPMENT_SUMMARY_SQL = text("""
+    SELECT
+        COUNT(*) as total_shipments,
+        AVG(delay_days) as avg_delay,
+        AVG(cost_per_tonne) as avg_cost,
+        AVG(risk_score) as avg_risk,
+        CAST(SUM(CASE WHEN status = 'on-time' THEN 1 ELSE 0 END) AS FLOAT) / COUNT(*) * 100 as on_time_percentage,
+        SUM(tonnage) as total_tonnage
+    FROM historical_shipments
+    WHERE date >= :start_date
+""")
+
+SHIPMENT_MATERIALS_SQL = text("""
+    SELECT material, COUNT(*) as count, AVG(delay_days) as avg_delay
+    FROM historical_shipments
+    WHERE date >= :start_date
+    GROUP BY material
+    ORDER BY count DESC
+""")
+
+SHIPMENT_ROUTES_SQL = text("""
+    SELECT route, COUNT(*) as count, AVG(delay_days) as avg_delay
+    FROM historical_shipments
+    WHERE date >= :start_date
+    GROUP BY route
+    ORDER BY count DESC
+""")
+
+DISPATCH_SUMMARY_SQL = text("""
+    SELECT
+        COUNT(*) as total_dispatches,
+        AVG(quality_score) as avg_quality,
+        AVG(satisfaction_score) as avg_satisfaction,
+        AVG(delay_days) as avg_delay,
+        AVG(total_cost) as avg_cost,
+        SUM(tonnage) as total_tonnage
+    FROM historical_dispatches
+    WHERE date >= :start_date
+""")
+
+DISPATCH_STATUSES_SQL = text("""
+    SELECT status, COUNT(*) as count
+    FROM historical_dispatches
+    WHERE date >= :start_date
+    GROUP BY status
+    ORDER BY count DESC
+""")
+
+DISPATCH_ROUTES_SQL = text("""
+    SELECT route, COUNT(*) as count, AVG(quality_score) as avg_quality,
+           AVG(satisfaction_score) as avg_satisfaction
+    FROM historical_dispatches
+    WHERE date >= :start_date
+    GROUP BY route
+    ORDER BY count DESC
+""")
+
+MATERIAL_ANALYTICS_SQL = text("""
+    SELECT
+        material,
+        COUNT(*) as total_shipments,
+        AVG(delay_days) as avg_delay,
+        AVG(cost_per_tonne) as avg_cost,
+        AVG(risk_score) as avg_risk,
+        SUM(tonnage) as total_tonnage,
+        thickness,
+        width,
+        length
+    FROM historical_shipments
+    WHERE date >= :start_date
+    GROUP BY material, thickness, width, length
+    ORDER BY total_shipments DESC
+""")
+
+ROUTE_SHIPMENT_ANALYTICS_SQL = text("""
+    SELECT
+        route,
+        COUNT(*) as total_shipments,
+        AVG(delay_days) as avg_delay,
+        AVG(cost_per_tonne) as avg_cost,
+        AVG(risk_score) as avg_risk,
+        SUM(tonnage) as total_tonnage
+    FROM historical_shipments
+    WHERE date >= :start_date
+    GROUP BY route
+    ORDER BY total_shipments DESC
+""")
+
+ROUTE_DISPATCH_ANALYTICS_SQL = text("""
+    SELECT
+        route,
+        COUNT(*) as total_dispatches,
+        AVG(quality_score) as avg_quality,
+        AVG(satisfaction_score) as avg_satisfaction,
+        AVG(delay_days) as avg_delay
+    FROM historical_dispatches
+    WHERE date >= :start_date
+    GROUP BY route
+    ORDER BY total_dispatches DESC
+""")
+
+RECORD_COUNT_SQL = {
+    name: text(f"SELECT COUNT(*) FROM historical_{name}")
+    for name in ('shipments', 'decisions', 'dispatches')
+}
+
+
+EXPORT_MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+FORMAT_QUERY = Query("json", pattern="^(json|ndjson|csv)$")
+
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    """Opaque continuation token of the (date, id) keyset of ``row``"""
+    row_date = row['date']
+    keyset = [row_date.isoformat() if hasattr(row_date, 'isoformat') else str(row_date), row['id']]
+    return base64.urlsafe_b64encode(json.dumps(keyset).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """(date, id) keyset of a continuation token; 400 if it was not issued here"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        row_date, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(row_date), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _recent_query(
+    table: str, days: int, cursor: Optional[str], filters: Dict[str, Any], limit: Optional[int] = None
+):
+    """Statement and parameters selecting ``table`` below ``cursor``, newest first"""
+    filters = {column: value for column, value in filters.items() if value}
+    params = {'start_date': datetime.now() - timedelta(days=days), **filters}
+    if cursor:
+        params['cursor_date'], params['cursor_id'] = decode_cursor(cursor)
+    if limit is not None:
+        params['limit'] = limit
+    statement = db_async.select_recent(table, tuple(filters), after=bool(cursor), limit=limit is not None)
+    return statement, params
+
+
+async def _select_page(table: str, days: int, limit: int, cursor: Optional[str], **filters) -> Dict[str, Any]:
+    """
+    One page of ``table`` from the last ``days`` matching the given filters.
+    Reads one row past ``limit`` to tell whether another page follows.
+    """
+    statement, params = _recent_query(table, days, cursor, filters, limit + 1)
+    rows = await db_async.fetch_all(statement, params)
+    items = rows[:limit]
+    return {
+        'items': items,
+        'count': len(items),
+        'next_cursor': encode_cursor(items[-1]) if len(rows) > limit else None,
+    }
+
+
+def _export_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+async def _export_chunks(statement, params: Dict[str, Any], format: str) -> AsyncIterator[str]:
+    """Rows serialized one streamed batch at a time"""
+    columns = None
+    try:
+        async for batch in db_async.stream_rows(statement, params):
+            if format == 'ndjson':
+                yield ''.join(json.dumps(row, default=_export_value) + '\n' for row in batch)
+                continue
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if columns is None:
+                columns = list(batch[0])
+                writer.writerow(columns)
+            for row in batch:
+                writer.writerow([
+                    json.dumps(row[c], default=_export_value) if isinstance(row[c], (dict, list)) else row[c]
+                    for c in columns
+                ])
+            yield buffer.getvalue()
+    except Exception as e:
+        # Headers are already sent; the truncated body is all that is left to signal
+        app_logger.error(f"Export stream failed: {e}")
+
+
+def _export(table: str, days: int, cursor: Optional[str], format: str, **filters) -> StreamingResponse:
+    """Every row of ``table`` from the last ``days`` below ``cursor``, streamed as ``format``"""
+    if not db_async.available():
+        raise HTTPException(status_code=503, detail="Database not available")
+    statement, params = _recent_query(table, days, cursor, filters)
+    return StreamingResponse(
+        _export_chunks(statement, params, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={'Content-Disposition': f'attachment; filename="{table}.{format}"'}
+    )
+
+
+def _mock_page(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {'items': items, 'count': len(items), 'next_cursor': None}
+
+
+async def _from_snapshot(tables: Tuple[str, ...], compute) -> Optional[Any]:
+    """``compute(engine)`` on the analytics snapshot, or None to query the database"""
+    engine = get_analytics_engine()
+    if not engine.is_fresh(tables):
+        return None
+    try:
+        return await asyncio.to_thread(compute, engine)
+    except Exception as e:
+        app_logger.warning(f"Analytics snapshot query failed: {e}, using database")
+        return None
+
+
+def _breakdown(rows: List[Dict[str, Any]], key: str) -> List[Dict[str, Any]]:
+    """Snapshot rollup rows in the shape of the summary breakdown queries"""
+    return [{key: row[key], 'count': row['total_shipments'], 'avg_delay': row['avg_delay']} for row in rows]
+
+
 # ============================================================================
 # HISTORICAL SHIPMENTS ENDPOINTS
 # ============================================================================
@@ -24,7 +276,9 @@ async def get_shipments(
     route: Optional[str] = Query(None),
     material: Optional[str] = Query(None),
     days: int = Query(30, ge=1, le=365),
-    limit: int = Query(100, ge=1, le=1000)
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    format: str = FORMAT_QUERY
 ):
     """
     Get historical shipment data
@@ -33,58 +287,42 @@ async def get_shipments(
     - route: Filter by route (optional)
     - material: Filter by material (optional)
     - days: Number of days to look back (default: 30)
-    - limit: Maximum records to return (default: 100, max: 1000)
+    - limit: Maximum records per page (default: 100, max: 1000)
+    - cursor: next_cursor of the previous page (optional)
+    - format: json pages, or ndjson/csv to stream every matching record
     """
+    if cursor:
+        decode_cursor(cursor)
+    if format != "json":
+        return _export('historical_shipments', days, cursor, format, route=route, material=material)
+
     try:
-        if engine is None:
+        if not db_async.available():
             return BaseResponse(
                 status="warning",
                 timestamp=datetime.utcnow(),
                 message="Database not available, using mock data",
-                data=_get_mock_shipments(route, material, limit)
+                data=_mock_page(_get_mock_shipments(route, material, limit))
             )
         
         try:
-            with engine.connect() as conn:
-                query = "SELECT * FROM historical_shipments WHERE 1=1"
-                params = {}
-                
-                # Add date filter
-                start_date = datetime.now() - timedelta(days=days)
-                query += " AND date >= :start_date"
-                params['start_date'] = start_date
-                
-                # Add optional filters
-                if route:
-                    query += " AND route = :route"
-                    params['route'] = route
-                
-                if material:
-                    query += " AND material = :material"
-                    params['material'] = material
-                
-                # Order and limit
-                query += " ORDER BY date DESC LIMIT :limit"
-                params['limit'] = limit
-                
-                result = conn.execute(text(query), params)
-                rows = result.fetchall()
-                
-                data = [dict(row._mapping) for row in rows]
+            data = await _select_page(
+                'historical_shipments', days, limit, cursor, route=route, material=material
+            )
                 
-                return BaseResponse(
-                    status="success",
-                    timestamp=datetime.utcnow(),
-                    message=f"Retrieved {len(data)} shipment records",
-                    data=data
-                )
+            return BaseResponse(
+                status="success",
+                timestamp=datetime.utcnow(),
+                message=f"Retrieved {data['count']} shipment records",
+                data=data
+            )
         except Exception as db_error:
             app_logger.warning(f"Database query failed: {db_error}, using mock data")
             return BaseResponse(
                 status="warning",
                 timestamp=datetime.utcnow(),
                 message="Database unavailable, using mock data",
-                data=_get_mock_shipments(route, material, limit)
+                data=_mock_page(_get_mock_shipments(route, material, limit))
             )
     
     except Exception as e:
@@ -93,7 +331,7 @@ async def get_shipments(
             status="warning",
             timestamp=datetime.utcnow(),
             message="Using mock data due to error",
-            data=_get_mock_shipments(route, material, limit)
+            data=_mock_page(_get_mock_shipments(route, material, limit))
         )
 
 
@@ -112,7 +350,21 @@ async def get_shipments_summary(
     - Route breakdown
     """
     try:
-        if engine is None:
+        rollup = await _from_snapshot(('historical_shipments',), lambda engine: engine.shipment_rollup(days))
+        if rollup is not None:
+            return BaseResponse(
+                status="success",
+                timestamp=datetime.utcnow(),
+                message="Shipment summary statistics",
+                data={
+                    'summary': rollup['summary'],
+                    'materials': _breakdown(rollup['materials'], 'material'),
+                    'routes': _breakdown(rollup['routes'], 'route'),
+                    'source': 'snapshot'
+                }
+            )
+
+        if not db_async.available():
             return BaseResponse(
                 status="warning",
                 timestamp=datetime.utcnow(),
@@ -121,59 +373,24 @@ async def get_shipments_summary(
             )
         
         try:
-            with engine.connect() as conn:
-                start_date = datetime.now() - timedelta(days=days)
-                
-                # Get summary stats
-                query = text("""
-                    SELECT
-                        COUNT(*) as total_shipments,
-                        AVG(delay_days) as avg_delay,
-                        AVG(cost_per_tonne) as avg_cost,
-                        AVG(risk_score) as avg_risk,
-                        SUM(CASE WHEN status = 'on-time' THEN 1 ELSE 0 END)::float / COUNT(*) * 100 as on_time_percentage,
-                        SUM(tonnage) as total_tonnage
-                    FROM historical_shipments
-                    WHERE date >= :start_date
-                """)
-                
-                result = conn.execute(query, {'start_date': start_date})
-                summary = dict(result.fetchone()._mapping)
-                
-                # Get material breakdown
-                material_query = text("""
-                    SELECT material, COUNT(*) as count, AVG(delay_days) as avg_delay
-                    FROM historical_shipments
-                    WHERE date >= :start_date
-                    GROUP BY material
-                    ORDER BY count DESC
-                """)
-                
-                material_result = conn.execute(material_query, {'start_date': start_date})
-                materials = [dict(row._mapping) for row in material_result.fetchall()]
-                
-                # Get route breakdown
-                route_query = text("""
-                    SELECT route, COUNT(*) as count, AVG(delay_days) as avg_delay
-                    FROM historical_shipments
-                    WHERE date >= :start_date
-                    GROUP BY route
-                    ORDER BY count DESC
-                """)
-                
-                route_result = conn.execute(route_query, {'start_date': start_date})
-                routes = [dict(row._mapping) for row in route_result.fetchall()]
+            params = {'start_date': datetime.now() - timedelta(days=days)}
+            summary, materials, routes = await asyncio.gather(
+                db_async.fetch_one(SHIPMENT_SUMMARY_SQL, params),
+                db_async.fetch_all(SHIPMENT_MATERIALS_SQL, params),
+                db_async.fetch_all(SHIPMENT_ROUTES_SQL, params),
+            )
                 
-                return BaseResponse(
-                    status="success",
-                    timestamp=datetime.utcnow(),
-                    message="Shipment summary statistics",
-                    data={
-                        'summary': summary,
-                        'materials': materials,
-                        'routes': routes
-                    }
-                )
+            return BaseResponse(
+                status="success",
+                timestamp=datetime.utcnow(),
+                message="Shipment summary statistics",
+                data={
+                    'summary': summary,
+                    'materials': materials,
+                    'routes': routes,
+                    'source': 'database'
+                }
+            )
         except Exception as db_error:
             app_logger.warning(f"Database query failed: {db_error}, using mock data")
             return BaseResponse(
@@ -201,7 +418,9 @@ async def get_shipments_summary(
 async def get_decisions(
     scenario: Optional[str] = Query(None),
     days: int = Query(30, ge=1, le=365),
-    limit: int = Query(100, ge=1, le=1000)
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    format: str = FORMAT_QUERY
 ):
     """
     Get historical decision data
@@ -209,42 +428,27 @@ async def get_decisions(
     Query Parameters:
     - scenario: Filter by scenario (optional)
     - days: Number of days to look back (default: 30)
-    - limit: Maximum records to return (default: 100, max: 1000)
+    - limit: Maximum records per page (default: 100, max: 1000)
+    - cursor: next_cursor of the previous page (optional)
+    - format: json pages, or ndjson/csv to stream every matching record
     """
     try:
-        if engine is None:
+        if format != "json":
+            return _export('historical_decisions', days, cursor, format, scenario=scenario)
+        if not db_async.available():
             raise HTTPException(status_code=503, detail="Database not available")
         
-        with engine.connect() as conn:
-            query = "SELECT * FROM historical_decisions WHERE 1=1"
-            params = {}
-            
-            # Add date filter
-            start_date = datetime.now() - timedelta(days=days)
-            query += " AND date >= :start_date"
-            params['start_date'] = start_date
-            
-            # Add optional filters
-            if scenario:
-                query += " AND scenario = :scenario"
-                params['scenario'] = scenario
-            
-            # Order and limit
-            query += " ORDER BY date DESC LIMIT :limit"
-            params['limit'] = limit
-            
-            result = conn.execute(text(query), params)
-            rows = result.fetchall()
-            
-            data = [dict(row._mapping) for row in rows]
+        data = await _select_page('historical_decisions', days, limit, cursor, scenario=scenario)
             
-            return BaseResponse(
-                status="success",
-                timestamp=datetime.utcnow(),
-                message=f"Retrieved {len(data)} decision records",
-                data=data
-            )
+        return BaseResponse(
+            status="success",
+            timestamp=datetime.utcnow(),
+            message=f"Retrieved {data['count']} decision records",
+            data=data
+        )
     
+    except HTTPException:
+        raise
     except Exception as e:
         app_logger.error(f"Error fetching decisions: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -260,7 +464,9 @@ async def get_dispatches(
     material: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
     days: int = Query(30, ge=1, le=365),
-    limit: int = Query(100, ge=1, le=1000)
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    format: str = FORMAT_QUERY
 ):
     """
     Get historical dispatch data
@@ -270,50 +476,28 @@ async def get_dispatches(
     - material: Filter by material (optional)
     - status: Filter by status (optional)
     - days: Number of days to look back (default: 30)
-    - limit: Maximum records to return (default: 100, max: 1000)
+    - limit: Maximum records per page (default: 100, max: 1000)
+    - cursor: next_cursor of the previous page (optional)
+    - format: json pages, or ndjson/csv to stream every matching record
     """
     try:
-        if engine is None:
+        filters = {'route': route, 'material': material, 'status': status}
+        if format != "json":
+            return _export('historical_dispatches', days, cursor, format, **filters)
+        if not db_async.available():
             raise HTTPException(status_code=503, detail="Database not available")
         
-        with engine.connect() as conn:
-            query = "SELECT * FROM historical_dispatches WHERE 1=1"
-            params = {}
-            
-            # Add date filter
-            start_date = datetime.now() - timedelta(days=days)
-            query += " AND date >= :start_date"
-            params['start_date'] = start_date
-            
-            # Add optional filters
-            if route:
-                query += " AND route = :route"
-                params['route'] = route
-            
-            if material:
-                query += " AND material = :material"
-                params['material'] = material
+        data = await _select_page('historical_dispatches', days, limit, cursor, **filters)
             
-            if status:
-                query += " AND status = :status"
-                params['status'] = status
-            
-            # Order and limit
-            query += " ORDER BY date DESC LIMIT :limit"
-            params['limit'] = limit
-            
-            result = conn.execute(text(query), params)
-            rows = result.fetchall()
-            
-            data = [dict(row._mapping) for row in rows]
-            
-            return BaseResponse(
-                status="success",
-                timestamp=datetime.utcnow(),
-                message=f"Retrieved {len(data)} dispatch records",
-                data=data
-            )
+        return BaseResponse(
+            status="success",
+            timestamp=datetime.utcnow(),
+            message=f"Retrieved {data['count']} dispatch records",
+            data=data
+        )
     
+    except HTTPException:
+        raise
     except Exception as e:
         app_logger.error(f"Error fetching dispatches: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -334,63 +518,26 @@ async def get_dispatches_summary(
     - Route performance
     """
     try:
-        if engine is None:
+        if not db_async.available():
             raise HTTPException(status_code=503, detail="Database not available")
         
-        with engine.connect() as conn:
-            start_date = datetime.now() - timedelta(days=days)
-            
-            # Get summary stats
-            query = text("""
-                SELECT
-                    COUNT(*) as total_dispatches,
-                    AVG(quality_score) as avg_quality,
-                    AVG(satisfaction_score) as avg_satisfaction,
-                    AVG(delay_days) as avg_delay,
-                    AVG(total_cost) as avg_cost,
-                    SUM(tonnage) as total_tonnage
-                FROM historical_dispatches
-                WHERE date >= :start_date
-            """)
-            
-            result = conn.execute(query, {'start_date': start_date})
-            summary = dict(result.fetchone()._mapping)
-            
-            # Get status breakdown
-            status_query = text("""
-                SELECT status, COUNT(*) as count
-                FROM historical_dispatches
-                WHERE date >= :start_date
-                GROUP BY status
-                ORDER BY count DESC
-            """)
-            
-            status_result = conn.execute(status_query, {'start_date': start_date})
-            statuses = [dict(row._mapping) for row in status_result.fetchall()]
-            
-            # Get route performance
-            route_query = text("""
-                SELECT route, COUNT(*) as count, AVG(quality_score) as avg_quality,
-                       AVG(satisfaction_score) as avg_satisfaction
-                FROM historical_dispatches
-                WHERE date >= :start_date
-                GROUP BY route
-                ORDER BY count DESC
-            """)
-            
-            route_result = conn.execute(route_query, {'start_date': start_date})
-            routes = [dict(row._mapping) for row in route_result.fetchall()]
+        params = {'start_date': datetime.now() - timedelta(days=days)}
+        summary, statuses, routes = await asyncio.gather(
+            db_async.fetch_one(DISPATCH_SUMMARY_SQL, params),
+            db_async.fetch_all(DISPATCH_STATUSES_SQL, params),
+            db_async.fetch_all(DISPATCH_ROUTES_SQL, params),
+        )
             
-            return BaseResponse(
-                status="success",
-                timestamp=datetime.utcnow(),
-                message="Dispatch summary statistics",
-                data={
-                    'summary': summary,
-                    'statuses': statuses,
-                    'routes': routes
-                }
-            )
+        return BaseResponse(
+            status="success",
+            timestamp=datetime.utcnow(),
+            message="Dispatch summary statistics",
+            data={
+                'summary': summary,
+                'statuses': statuses,
+                'routes': routes
+            }
+        )
     
     except Exception as e:
         app_logger.error(f"Error fetching dispatch summary: {e}")
@@ -415,39 +562,31 @@ async def get_material_analytics(
     - Quality metrics
     """
     try:
-        if engine is None:
-            raise HTTPException(status_code=503, detail="Database not available")
-        
-        with engine.connect() as conn:
-            start_date = datetime.now() - timedelta(days=days)
-            
-            query = text("""
-                SELECT
-                    material,
-                    COUNT(*) as total_shipments,
-                    AVG(delay_days) as avg_delay,
-                    AVG(cost_per_tonne) as avg_cost,
-                    AVG(risk_score) as avg_risk,
-                    SUM(tonnage) as total_tonnage,
-                    thickness,
-                    width,
-                    length
-                FROM historical_shipments
-                WHERE date >= :start_date
-                GROUP BY material, thickness, width, length
-                ORDER BY total_shipments DESC
-            """)
-            
-            result = conn.execute(query, {'start_date': start_date})
-            data = [dict(row._mapping) for row in result.fetchall()]
-            
+        rollup = await _from_snapshot(('historical_shipments',), lambda engine: engine.shipment_rollup(days))
+        if rollup is not None:
             return BaseResponse(
                 status="success",
                 timestamp=datetime.utcnow(),
                 message="Material analytics",
-                data=data
+                data={'materials': rollup['material_specs'], 'source': 'snapshot'}
             )
+
+        if not db_async.available():
+            raise HTTPException(status_code=503, detail="Database not available")
+        
+        data = await db_async.fetch_all(
+            MATERIAL_ANALYTICS_SQL, {'start_date': datetime.now() - timedelta(days=days)}
+        )
+            
+        return BaseResponse(
+            status="success",
+            timestamp=datetime.utcnow(),
+            message="Material analytics",
+            data={'materials': data, 'source': 'database'}
+        )
     
+    except HTTPException:
+        raise
     except Exception as e:
         app_logger.error(f"Error fetching material analytics: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -467,57 +606,45 @@ async def get_route_analytics(
     - Risk assessment
     """
     try:
-        if engine is None:
-            raise HTTPException(status_code=503, detail="Database not available")
-        
-        with engine.connect() as conn:
-            start_date = datetime.now() - timedelta(days=days)
-            
-            # Shipment analytics
-            shipment_query = text("""
-                SELECT
-                    route,
-                    COUNT(*) as total_shipments,
-                    AVG(delay_days) as avg_delay,
-                    AVG(cost_per_tonne) as avg_cost,
-                    AVG(risk_score) as avg_risk,
-                    SUM(tonnage) as total_tonnage
-                FROM historical_shipments
-                WHERE date >= :start_date
-                GROUP BY route
-                ORDER BY total_shipments DESC
-            """)
-            
-            shipment_result = conn.execute(shipment_query, {'start_date': start_date})
-            shipments = [dict(row._mapping) for row in shipment_result.fetchall()]
-            
-            # Dispatch analytics
-            dispatch_query = text("""
-                SELECT
-                    route,
-                    COUNT(*) as total_dispatches,
-                    AVG(quality_score) as avg_quality,
-                    AVG(satisfaction_score) as avg_satisfaction,
-                    AVG(delay_days) as avg_delay
-                FROM historical_dispatches
-                WHERE date >= :start_date
-                GROUP BY route
-                ORDER BY total_dispatches DESC
-            """)
-            
-            dispatch_result = conn.execute(dispatch_query, {'start_date': start_date})
-            dispatches = [dict(row._mapping) for row in dispatch_result.fetchall()]
-            
+        snapshot = await _from_snapshot(
+            ('historical_shipments', 'historical_dispatches'),
+            lambda engine: (engine.shipment_rollup(days)['routes'], engine.dispatch_routes(days))
+        )
+        if snapshot is not None:
+            shipments, dispatches = snapshot
             return BaseResponse(
                 status="success",
                 timestamp=datetime.utcnow(),
                 message="Route analytics",
                 data={
                     'shipments': shipments,
-                    'dispatches': dispatches
+                    'dispatches': dispatches,
+                    'source': 'snapshot'
                 }
             )
+
+        if not db_async.available():
+            raise HTTPException(status_code=503, detail="Database not available")
+        
+        params = {'start_date': datetime.now() - timedelta(days=days)}
+        shipments, dispatches = await asyncio.gather(
+            db_async.fetch_all(ROUTE_SHIPMENT_ANALYTICS_SQL, params),
+            db_async.fetch_all(ROUTE_DISPATCH_ANALYTICS_SQL, params),
+        )
+            
+        return BaseResponse(
+            status="success",
+            timestamp=datetime.utcnow(),
+            message="Route analytics",
+            data={
+                'shipments': shipments,
+                'dispatches': dispatches,
+                'source': 'database'
+            }
+        )
     
+    except HTTPException:
+        raise
     except Exception as e:
         app_logger.error(f"Error fetching route analytics: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -592,6 +719,38 @@ def _get_mock_summary():
     }
 
 
+# ============================================================================
+# QUERY CACHE
+# ============================================================================
+
+@router.get("/cache/stats", response_model=BaseResponse)
+async def query_cache_stats():
+    """
+    Hit rates of the cached inventory, forecast summary, route congestion
+    and rake arrival lookups
+    """
+    return BaseResponse(
+        status="success",
+        timestamp=datetime.utcnow(),
+        message="Query cache statistics",
+        data=get_query_cache().stats()
+    )
+
+
+@router.get("/analytics/snapshot", response_model=BaseResponse)
+async def analytics_snapshot_status():
+    """
+    Age and row counts of the Parquet snapshot the analytics endpoints
+    are served from
+    """
+    return BaseResponse(
+        status="success",
+        timestamp=datetime.utcnow(),
+        message="Analytics snapshot status",
+        data=get_analytics_engine().status()
+    )
+
+
 # ============================================================================
 # HEALTH CHECK
 # ============================================================================
@@ -602,7 +761,7 @@ async def database_health():
     Check database health and connectivity
     """
     try:
-        if engine is None:
+        if not db_async.available():
             return BaseResponse(
                 status="warning",
                 timestamp=datetime.utcnow(),
@@ -611,35 +770,30 @@ async def database_health():
             )
         
         try:
-            with engine.connect() as conn:
-                conn.execute(text("SELECT 1"))
+            await db_async.scalar(text("SELECT 1"))
                 
-                try:
-                    # Try to count records
-                    shipment_count = conn.execute(text("SELECT COUNT(*) FROM historical_shipments")).scalar() or 0
-                    decision_count = conn.execute(text("SELECT COUNT(*) FROM historical_decisions")).scalar() or 0
-                    dispatch_count = conn.execute(text("SELECT COUNT(*) FROM historical_dispatches")).scalar() or 0
-                except:
-                    # Tables don't exist yet
-                    shipment_count = 0
-                    decision_count = 0
-                    dispatch_count = 0
+            # Count records concurrently; tables that don't exist yet count as 0
+            counts = await asyncio.gather(
+                *(db_async.scalar(statement) for statement in RECORD_COUNT_SQL.values()),
+                return_exceptions=True
+            )
+            records = {
+                name: 0 if isinstance(count, Exception) else count or 0
+                for name, count in zip(RECORD_COUNT_SQL, counts)
+            }
+            total = sum(records.values())
                 
-                return BaseResponse(
-                    status="success",
-                    timestamp=datetime.utcnow(),
-                    message="Database is healthy" if (shipment_count + decision_count + dispatch_count) > 0 else "Database connected but no data yet",
-                    data={
-                        "connected": True,
-                        "mode": "database",
-                        "records": {
-                            "shipments": shipment_count,
-                            "decisions": decision_count,
-                            "dispatches": dispatch_count,
-                            "total": shipment_count + decision_count + dispatch_count
-                        }
-                    }
-                )
+            return BaseResponse(
+                status="success",
+                timestamp=datetime.utcnow(),
+                message="Database is healthy" if total > 0 else "Database connected but no data yet",
+                data={
+                    "connected": True,
+                    "mode": "database",
+                    "records": {**records, "total": total},
+                    "pool": db_async.pool_status()
+                }
+            )
         except Exception as db_error:
             app_logger.warning(f"Database connection failed: {db_error}, will use mock data")
             return BaseResponse(
@@ -166,30 +166,25 @@ class DecisionResponse(BaseModel):
 
 # Helper functions
 
-def calculate_distance(from_coords: Dict, to_coords: Dict) -> float:
-    """Calculate distance using Haversine formula"""
-    from math import radians, cos, sin, asin, sqrt
-
-    lat1, lon1 = from_coords.get("lat", 0), from_coords.get("lng", 0)
-    lat2, lon2 = to_coords.get("lat", 0), to_coords.get("lng", 0)
-
-    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-    dlon = lon2 - lon1
-    dlat = lat2 - lat1
-    a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
-    c = 2 * asin(sqrt(a))
-    r = 6371
-    return c * r
+def route_distances(routes: List[RouteInfo]) -> Dict[tuple, float]:
+    """Shortest route distance (km) by (stockyard, destination)"""
+    distances = {}
+    for route in routes:
+        key = (route.fromLocation, route.toLocation)
+        distances[key] = min(route.distance, distances.get(key, route.distance))
+    return distances
 
 
 def allocate_stock_to_orders(
     orders: List[OrderInfo],
     stockyards: List[StockyardInfo],
+    routes: List[RouteInfo],
     constraints: ConstraintsInfo,
 ) -> tuple[List[StockAllocationResult], List[str]]:
-    """Allocate orders to stockyards"""
+    """Allocate orders to stockyards with a route to their destination"""
     allocations = []
     unallocated = []
+    distances = route_distances(routes)
 
     # Sort orders by priority
     priority_map = {"urgent": 4, "high": 3, "medium": 2, "low": 1}
@@ -209,8 +204,10 @@ def allocate_stock_to_orders(
                 (m for m in sy.materials if m.materialId == order.materialId),
                 None,
             )
+            distance = distances.get((sy.stockyardId, order.destination))
+            if distance is None:
+                continue
             if material and material.quantity - material.reserved >= order.quantity:
-                distance = calculate_distance(sy.coordinates, order.destination)
                 score = (
                     (material.quantity - material.reserved) / order.quantity * 0.35
                     + (100 - distance / 10) * 0.3
@@ -446,7 +443,7 @@ async def generate_decision(request: DecisionRequest):
 
         # Step 1: Allocate stock
         allocations, unallocated = allocate_stock_to_orders(
-            request.orders, request.stockyards, request.constraints
+            request.orders, request.stockyards, request.routes, request.constraints
         )
 
         if not allocations:
@@ -115,6 +115,51 @@ async def get_stream(source_type: str, limit: int = 100):
         logger.error(f"Get stream error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/vehicles/nearby")
+async def get_vehicles_nearby(lat: Optional[float] = None, lon: Optional[float] = None,
+                              radius_km: float = 10, site: Optional[str] = None,
+                              limit: Optional[int] = None):
+    """Get vehicles near a point or a known site (e.g. site=haldia)"""
+    try:
+        vehicles = live_data_service.get_vehicles_nearby(lat, lon, radius_km, site, limit)
+        return {
+            'total': len(vehicles),
+            'radius_km': radius_km,
+            'vehicles': vehicles,
+            'timestamp': datetime.now().isoformat()
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Vehicles nearby error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/vehicles/bbox")
+async def get_vehicles_in_bbox(min_lat: Optional[float] = None, min_lon: Optional[float] = None,
+                               max_lat: Optional[float] = None, max_lon: Optional[float] = None,
+                               corridor: Optional[str] = None, limit: Optional[int] = None):
+    """Get vehicles inside a bounding box or a route corridor (e.g. corridor=bokaro-haldia)"""
+    try:
+        vehicles = live_data_service.get_vehicles_in_bbox(min_lat, min_lon, max_lat, max_lon, corridor, limit)
+        return {
+            'total': len(vehicles),
+            'vehicles': vehicles,
+            'timestamp': datetime.now().isoformat()
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Vehicles bbox error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/vehicles/{vehicle_id}")
+async def get_vehicle_position(vehicle_id: str):
+    """Get the latest known position of a vehicle"""
+    position = live_data_service.get_vehicle_position(vehicle_id)
+    if not position:
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    return position
+
 @router.get("/status")
 async def get_status():
     """Get live data service status"""
@@ -3,14 +3,16 @@ Metadata and health check endpoints.
 """
 
 from fastapi import APIRouter, status, HTTPException, Header
+from fastapi.responses import PlainTextResponse
 from datetime import datetime
 from typing import Optional
 from ..schemas import HealthCheckResponse, MetadataResponse, BaseResponse
 from ..models_loader import models_loader
 from ..config import settings
 from ..utils import app_logger
-from ..utils.metrics import metrics_collector
+from ..utils.metrics import PROMETHEUS_CONTENT_TYPE, metrics_collector
 from ..utils.model_registry import model_registry
+from ..services.result_cache import get_result_cache
 
 router = APIRouter(prefix="/meta", tags=["Metadata"])
 
@@ -139,7 +141,7 @@ async def get_prometheus_metrics():
     """
     Get metrics in Prometheus text format.
     """
-    return metrics_collector.get_prometheus_metrics()
+    return PlainTextResponse(metrics_collector.get_prometheus_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
 
 @router.post("/reload-models", response_model=MetadataResponse)
 async def reload_models(x_api_token: Optional[str] = Header(None)):
@@ -171,12 +173,16 @@ async def reload_models(x_api_token: Optional[str] = Header(None)):
         
         results = model_registry.reload_models(model_paths)
         
+        # Plans computed with the previous models must not be served again
+        cache_entries_removed = get_result_cache().invalidate()
+        
         return MetadataResponse(
             status="success",
             timestamp=datetime.utcnow(),
             data={
                 'reload_results': results,
-                'registry_status': model_registry.get_status()
+                'registry_status': model_registry.get_status(),
+                'result_cache_entries_removed': cache_entries_removed,
             }
         )
     except Exception as e:
@@ -3,7 +3,7 @@ ML Routes - Connect ML infrastructure to website
 Safe integration without breaking existing functionality
 """
 
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Request
 from sqlalchemy.orm import Session
 from typing import Dict, List, Optional
 import logging
@@ -165,6 +165,62 @@ async def predict_demand(
             "timestamp": datetime.utcnow().isoformat()
         }
 
+@router.post("/predict/{model_name}/batch")
+async def predict_batch(
+    model_name: str,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """Score many inputs in one call.
+
+    Accepts a JSON list of records, ``{"records": [...]}``, ``{"columns":
+    {feature: [values]}}``, or an Arrow IPC stream body
+    (``application/vnd.apache.arrow.stream``).
+    """
+    try:
+        from ml.model_serving import ModelServer
+        from ml.model_training import ModelTrainer
+        
+        inputs = await _read_batch_inputs(request)
+        
+        trainer = ModelTrainer(db)
+        server = ModelServer(db, trainer)
+        result = server.batch_predict(model_name, inputs)
+        
+        return {
+            "status": "success",
+            "data": result,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in batch prediction for {model_name}: {str(e)}")
+        return {
+            "status": "error",
+            "message": str(e),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+async def _read_batch_inputs(request: Request):
+    """Decode a batch prediction body into records, columns or an Arrow table"""
+    content_type = request.headers.get("content-type", "")
+    if "arrow" in content_type:
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ValueError("Arrow input requires pyarrow to be installed")
+        return pa.ipc.open_stream(await request.body()).read_all()
+    
+    payload = await request.json()
+    if isinstance(payload, list):
+        return payload
+    if isinstance(payload, dict) and isinstance(payload.get("records"), list):
+        return payload["records"]
+    if isinstance(payload, dict) and isinstance(payload.get("columns"), dict):
+        return payload["columns"]
+    raise ValueError("Expected a list of records, {'records': [...]} or {'columns': {...}}")
+
 # ============================================================================
 # OPTIMIZATION ENDPOINTS
 # ============================================================================
@@ -3,10 +3,14 @@ Optimization endpoints - OR-Tools solver integration.
 """
 
 from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
 from datetime import datetime
+import asyncio
+import json
 from typing import Dict, Any
 from ..schemas import OptimizationRequest, OptimizationResponse
-from ..services import optimize_service
+from ..services.optimize_service import optimize_service
+from ..services.result_cache import get_result_cache
 from ..utils import app_logger
 
 router = APIRouter(prefix="/optimize", tags=["Optimization"])
@@ -33,11 +37,8 @@ async def optimize_dispatch(request: OptimizationRequest):
         
         app_logger.info(f"Optimization request: {len(request_dict.get('orders', []))} orders")
         
-        # Build optimizer input with ML predictions
-        optimizer_input = optimize_service.build_optimizer_input(request_dict)
-        
-        # Run optimizer
-        solution = optimize_service.run_optimizer(optimizer_input)
+        # Build optimizer input with ML predictions and run optimizer (cached per order book)
+        solution = optimize_service.plan(request_dict)
         
         # Format response
         return OptimizationResponse(
@@ -58,3 +59,68 @@ async def optimize_dispatch(request: OptimizationRequest):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Optimization failed: {str(e)}"
         )
+
+@router.post("/dispatch/stream")
+async def optimize_dispatch_stream(request: OptimizationRequest):
+    """
+    Optimize a dispatch plan, streaming the anytime search as NDJSON.
+    
+    Each line is an event: ``improvement`` for every better plan the LNS
+    finds (objective, unshipped tonnes, elapsed seconds), then one ``plan``
+    with the final dispatch plan, or ``error``. Decomposed order books
+    stream the improvements of each subproblem, tagged with its
+    ``partition``. Results are not cached.
+    """
+    request_dict = request.dict()
+    app_logger.info(f"Streaming optimization request: {len(request_dict.get('orders', []))} orders")
+    
+    async def events():
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        def publish(event: Dict[str, Any]) -> None:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+        
+        def solve() -> None:
+            try:
+                optimizer_input = optimize_service.build_optimizer_input(request_dict)
+                solution = optimize_service.run_optimizer(
+                    optimizer_input,
+                    on_improvement=lambda event: publish({"event": "improvement", **event}),
+                )
+                publish({
+                    "event": "plan",
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "data": {
+                        "rakes": solution.get('rakes', []),
+                        "trucks": solution.get('trucks', []),
+                        "summary": solution.get('summary', {}),
+                        "solver_status": solution.get('solver_status', 'UNKNOWN'),
+                        "solver_time_seconds": solution.get('solver_time_seconds', 0),
+                        "objective_value": solution.get('objective_value', 0),
+                    },
+                })
+            except Exception as e:
+                app_logger.error(f"Optimization error: {str(e)}")
+                publish({"event": "error", "detail": f"Optimization failed: {str(e)}"})
+        
+        worker = asyncio.create_task(asyncio.to_thread(solve))
+        while True:
+            event = await queue.get()
+            yield json.dumps(event, default=str) + "\n"
+            if event["event"] != "improvement":
+                break
+        await worker
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@router.get("/cache/stats")
+async def optimizer_cache_stats():
+    """
+    Hit/miss statistics of the optimizer result cache.
+    """
+    return {
+        "status": "success",
+        "timestamp": datetime.utcnow().isoformat(),
+        "data": get_result_cache().stats(),
+    }
@@ -4,13 +4,19 @@ Feature 2: Real-time database integration
 """
 
 from fastapi import APIRouter, Query, HTTPException
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Optional, List, Literal
 from datetime import datetime, timedelta
 from sqlalchemy import select, and_
+import asyncio
 import logging
+import time
 
 from app.db import engine
 from app.schemas import BaseResponse
+from rake_opt import Product, optimize_loading
+from rake_opt.config import DEFAULT_TEMPLATES
+from rake_opt.scenario2_plan import search_templates
 
 logger = logging.getLogger(__name__)
 
@@ -331,6 +337,76 @@ async def get_plans(
             data=[]
         )
 
+# ============================================================================
+# ENDPOINTS: Loading Optimisation
+# ============================================================================
+
+class LoadingRequest(BaseModel):
+    """Products to load, optionally on a fixed rake template."""
+
+    products: List[Product]
+    templateId: Optional[str] = Field(None, description="Rake template; omit to pick the best template")
+    mode: Literal["heuristic", "exact", "hybrid"] = Field(
+        "hybrid",
+        description="heuristic: first-fit decreasing + local search only; "
+                    "exact: CP-SAT only; hybrid: CP-SAT warm-started from the heuristic",
+    )
+    allowUnassigned: bool = True
+    maxTimeSec: float = Field(10.0, gt=0, le=120)
+
+@router.post("/loading", response_model=BaseResponse)
+async def optimize_rake_loading(request: LoadingRequest):
+    """Plan product-to-wagon-slot loading for a rake"""
+    if request.templateId is not None and request.templateId not in DEFAULT_TEMPLATES:
+        raise HTTPException(status_code=404, detail=f"Unknown rake template {request.templateId}")
+
+    def solve():
+        if request.templateId is not None:
+            template = DEFAULT_TEMPLATES[request.templateId]
+            plan = optimize_loading(
+                request.products,
+                template,
+                allow_unassigned=request.allowUnassigned,
+                max_time_sec=request.maxTimeSec,
+                mode=request.mode,
+            )
+            return plan, template
+        result = search_templates(
+            request.products,
+            allow_unassigned=request.allowUnassigned,
+            max_time_sec=request.maxTimeSec,
+            mode=request.mode,
+        )
+        return result.plan, result.template
+
+    try:
+        start = time.perf_counter()
+        # The solver runs for up to maxTimeSec; keep it off the event loop
+        plan, template = await asyncio.to_thread(solve)
+        solve_ms = (time.perf_counter() - start) * 1000.0
+    except (ValueError, RuntimeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error optimizing rake loading: {e}")
+        return BaseResponse(
+            status="error",
+            timestamp=datetime.utcnow(),
+            message=f"Error optimizing rake loading: {str(e)}",
+            data={}
+        )
+
+    return BaseResponse(
+        status="success",
+        timestamp=datetime.utcnow(),
+        message=f"Loaded {len(plan.assignments)} of {len(request.products)} products on {template.id}",
+        data={
+            "mode": request.mode,
+            "templateId": template.id,
+            "solveMs": round(solve_ms, 2),
+            "plan": plan.model_dump(),
+        }
+    )
+
 # ============================================================================
 # ENDPOINTS: Health Check
 # ============================================================================
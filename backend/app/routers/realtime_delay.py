@@ -8,13 +8,54 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 import logging
 
-from app.services.realtime_delay_service import RealtimeDelayService
+from app.services.realtime_delay_service import RealtimeDelayService, ShipmentTracking, ShipmentStatus
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/tracking", tags=["tracking"])
 
 delay_service = RealtimeDelayService()
 
+class ShipmentRequest(BaseModel):
+    shipment_id: str
+    origin: str
+    destination: str
+    expected_delivery: datetime
+    tonnage: float
+    status: ShipmentStatus = ShipmentStatus.IN_TRANSIT
+
+@router.post("/shipments")
+async def register_shipments(shipments: List[ShipmentRequest]):
+    """Register or replace shipments in bulk"""
+    try:
+        records = []
+        for request in shipments:
+            tracking = ShipmentTracking(
+                request.shipment_id,
+                request.origin,
+                request.destination,
+                request.expected_delivery,
+                request.tonnage
+            )
+            tracking.status = request.status
+            records.append(tracking)
+        
+        return {
+            'registered': delay_service.add_shipments(records),
+            'timestamp': datetime.now().isoformat()
+        }
+    except Exception as e:
+        logger.error(f"Register shipments error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/sweep")
+async def sweep_delays():
+    """Flag delayed and at-risk shipments now"""
+    try:
+        return delay_service.sweep_delays()
+    except Exception as e:
+        logger.error(f"Sweep error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/track")
 async def track_shipment(shipment_id: str, lat: float, lon: float, location_name: str):
     """Track shipment location"""
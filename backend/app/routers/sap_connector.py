@@ -89,7 +89,7 @@ async def sync_suppliers():
 async def full_sync():
     """Full sync with SAP"""
     try:
-        result = sap_service.full_sync()
+        result = await sap_service.full_sync_async()
         return result
     except Exception as e:
         logger.error(f"Full sync error: {e}")
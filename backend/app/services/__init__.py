@@ -2,12 +2,27 @@
 Services package - Business logic layer.
 """
 
-from .inference_service import inference_service, InferenceService
-from .optimize_service import optimize_service, OptimizeService
-
 __all__ = [
     'inference_service',
     'InferenceService',
     'optimize_service',
     'OptimizeService',
 ]
+
+# Resolved on first access: inference_service unpickles every model at import
+_EXPORTS = {
+    'inference_service': 'inference_service',
+    'InferenceService': 'inference_service',
+    'optimize_service': 'optimize_service',
+    'OptimizeService': 'optimize_service',
+}
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        from importlib import import_module
+        value = getattr(import_module(f".{_EXPORTS[name]}", __name__), name)
+        # Importing the submodule bound its module object under the same name
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
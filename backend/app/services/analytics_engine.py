@@ -0,0 +1,345 @@
+"""
+Analytics Engine
+Embedded DuckDB over Parquet snapshots of the history tables.
+
+The dashboard aggregations (/database/shipments/summary,
+/analytics/materials, /analytics/routes) scan whole history tables; run on
+the transactional database they compete with dispatch writes. The snapshot
+job copies the history tables to Parquet, reading each from a server-side
+cursor in chunks, publishes the snapshot by atomically replacing a
+manifest and keeps the last few for readers still scanning them.
+
+Reads go through an in-memory DuckDB connection over the Parquet files.
+Every shipment aggregation the dashboards need comes out of one
+GROUPING SETS pass, memoized per snapshot. The database router serves
+analytics from here while the snapshot is younger than
+ANALYTICS_MAX_STALENESS_SECONDS and from PostgreSQL otherwise.
+
+Run a snapshot by hand with:
+    python -m app.services.job_scheduler run analytics_snapshot
+"""
+
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+
+import pandas as pd
+from sqlalchemy import inspect, text
+from sqlalchemy.types import Boolean, Date, DateTime, Integer, Interval, Numeric, Time
+
+from .. import db
+from ..config import settings
+
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    duckdb = None
+    DUCKDB_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+SNAPSHOT_TABLES = ('historical_shipments', 'historical_dispatches')
+MANIFEST_NAME = "manifest.json"
+
+# (), (material), (route) and (material, spec) in a single scan
+SHIPMENT_ROLLUP_SQL = """
+    SELECT
+        material, route, thickness, width, length,
+        GROUPING(material) AS g_material,
+        GROUPING(route) AS g_route,
+        GROUPING(thickness) AS g_spec,
+        COUNT(*) AS total_shipments,
+        AVG(delay_days) AS avg_delay,
+        AVG(cost_per_tonne) AS avg_cost,
+        AVG(risk_score) AS avg_risk,
+        SUM(CASE WHEN status = 'on-time' THEN 1 ELSE 0 END) * 100.0 / NULLIF(COUNT(*), 0) AS on_time_percentage,
+        SUM(tonnage) AS total_tonnage
+    FROM read_parquet({path})
+    WHERE date >= ?
+    GROUP BY GROUPING SETS ((), (material), (route), (material, thickness, width, length))
+    ORDER BY total_shipments DESC
+"""
+
+DISPATCH_ROUTES_SQL = """
+    SELECT
+        route,
+        COUNT(*) AS total_dispatches,
+        AVG(quality_score) AS avg_quality,
+        AVG(satisfaction_score) AS avg_satisfaction,
+        AVG(delay_days) AS avg_delay
+    FROM read_parquet({path})
+    WHERE date >= ?
+    GROUP BY route
+    ORDER BY total_dispatches DESC
+"""
+
+_MEASURES = ('total_shipments', 'avg_delay', 'avg_cost', 'avg_risk', 'total_tonnage')
+
+
+def _quote(path: Path) -> str:
+    return "'" + str(path).replace("'", "''") + "'"
+
+
+def _duckdb_type(column_type) -> str:
+    """DuckDB type for a reflected SQLAlchemy column type; text when unknown"""
+    if isinstance(column_type, Boolean):
+        return "BOOLEAN"
+    if isinstance(column_type, DateTime):
+        return "TIMESTAMPTZ" if column_type.timezone else "TIMESTAMP"
+    if isinstance(column_type, Date):
+        return "DATE"
+    if isinstance(column_type, Time):
+        return "TIME"
+    if isinstance(column_type, Interval):
+        return "INTERVAL"
+    if isinstance(column_type, Integer):
+        return "BIGINT"
+    if isinstance(column_type, Numeric):
+        return "DOUBLE"
+    return "VARCHAR"
+
+
+class AnalyticsEngine:
+    """
+    DuckDB queries over the snapshots published in ``snapshot_dir``.
+    Snapshots older than ``max_staleness_seconds`` are not served.
+    """
+
+    def __init__(
+        self,
+        snapshot_dir: Optional[Path] = None,
+        max_staleness_seconds: Optional[float] = None,
+        keep: Optional[int] = None,
+        chunk_rows: Optional[int] = None,
+        enabled: Optional[bool] = None,
+    ):
+        self.snapshot_dir = Path(snapshot_dir or settings.ANALYTICS_SNAPSHOT_DIR)
+        self.max_staleness_seconds = (
+            settings.ANALYTICS_MAX_STALENESS_SECONDS if max_staleness_seconds is None else max_staleness_seconds
+        )
+        self.keep = keep or settings.ANALYTICS_SNAPSHOT_KEEP
+        self.chunk_rows = chunk_rows or settings.ANALYTICS_SNAPSHOT_CHUNK_ROWS
+        self.enabled = (settings.ANALYTICS_ENABLED if enabled is None else enabled) and DUCKDB_AVAILABLE
+        self._conn = None
+        self._lock = threading.Lock()
+        self._manifest: Optional[Dict[str, Any]] = None
+        self._manifest_mtime = None
+        self._results: "OrderedDict[Tuple, Any]" = OrderedDict()
+
+    # ========================================================================
+    # SNAPSHOTS
+    # ========================================================================
+
+    def manifest(self) -> Optional[Dict[str, Any]]:
+        """The published snapshot, re-read when another process replaces it"""
+        path = self.snapshot_dir / MANIFEST_NAME
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            if mtime != self._manifest_mtime:
+                self._manifest = json.loads(path.read_text())
+                self._manifest_mtime = mtime
+            return self._manifest
+
+    def snapshot_age(self) -> Optional[float]:
+        """Seconds since the published snapshot was taken"""
+        manifest = self.manifest()
+        if manifest is None:
+            return None
+        return time.time() - manifest['taken_at']
+
+    def is_fresh(self, tables: Iterable[str]) -> bool:
+        """Whether analytics over ``tables`` may be served from the snapshot"""
+        if not self.enabled:
+            return False
+        manifest = self.manifest()
+        if manifest is None or time.time() - manifest['taken_at'] > self.max_staleness_seconds:
+            return False
+        return all(manifest['tables'].get(table, {}).get('rows') for table in tables)
+
+    def take_snapshot(self, tables: Iterable[str] = SNAPSHOT_TABLES) -> Dict[str, Any]:
+        """Copy ``tables`` to a new snapshot and publish it"""
+        if db.engine is None:
+            raise RuntimeError("Database engine not initialized")
+
+        taken_at = time.time()
+        snapshot_id = datetime.utcfromtimestamp(taken_at).strftime("%Y%m%dT%H%M%S%f")
+        building = self.snapshot_dir / f".{snapshot_id}.tmp"
+        building.mkdir(parents=True)
+        try:
+            # An on-disk build database lets DuckDB spill instead of holding whole tables
+            build = duckdb.connect(str(building / "build.duckdb"))
+            try:
+                counts = {
+                    table: self._copy_table(build, table, building / f"{table}.parquet")
+                    for table in tables
+                }
+            finally:
+                build.close()
+            (building / "build.duckdb").unlink(missing_ok=True)
+            os.rename(building, self.snapshot_dir / snapshot_id)
+        except Exception:
+            shutil.rmtree(building, ignore_errors=True)
+            raise
+
+        manifest = {
+            'snapshot_id': snapshot_id,
+            'taken_at': taken_at,
+            'tables': {
+                table: {'path': str(self.snapshot_dir / snapshot_id / f"{table}.parquet"), 'rows': rows}
+                for table, rows in counts.items()
+            },
+        }
+        staged = self.snapshot_dir / f".{MANIFEST_NAME}.tmp"
+        staged.write_text(json.dumps(manifest, indent=2))
+        os.replace(staged, self.snapshot_dir / MANIFEST_NAME)
+        self._prune(snapshot_id)
+        return manifest
+
+    def _copy_table(self, build, table: str, path: Path) -> int:
+        """Stream ``table`` into the build database and write it to ``path``; returns the row count"""
+        rows = 0
+        with db.engine.connect() as conn:
+            # Types come from the source table: inferring them from a chunk
+            # turns a column that is all NULL there into INTEGER
+            columns = inspect(conn).get_columns(table)
+            definitions = ', '.join(f'"{c["name"]}" {_duckdb_type(c["type"])}' for c in columns)
+            build.execute(f"CREATE TABLE {table} ({definitions})")
+            select = ', '.join(f'"{c["name"]}"' for c in columns)
+            result = conn.execution_options(stream_results=True, max_row_buffer=self.chunk_rows).execute(
+                text(f"SELECT {select} FROM {table}")
+            )
+            names = list(result.keys())
+            for partition in result.partitions(self.chunk_rows):
+                build.register('chunk', pd.DataFrame.from_records(partition, columns=names))
+                build.execute(f"INSERT INTO {table} SELECT * FROM chunk")
+                build.unregister('chunk')
+                rows += len(partition)
+        if rows:
+            build.execute(f"COPY {table} TO {_quote(path)} (FORMAT PARQUET, COMPRESSION ZSTD)")
+        return rows
+
+    def _prune(self, current: str) -> None:
+        """Delete all but the newest ``keep`` snapshots"""
+        snapshots = sorted(
+            p for p in self.snapshot_dir.iterdir() if p.is_dir() and not p.name.startswith('.')
+        )
+        for stale in [p for p in snapshots[:-self.keep] if p.name != current]:
+            shutil.rmtree(stale, ignore_errors=True)
+
+    # ========================================================================
+    # QUERIES
+    # ========================================================================
+
+    def _query(self, sql: str, table: str, params: List[Any]) -> List[Dict[str, Any]]:
+        manifest = self.manifest()
+        with self._lock:
+            if self._conn is None:
+                self._conn = duckdb.connect(":memory:")
+            cursor = self._conn.cursor()  # One connection per call; cursors are not shared across threads
+        try:
+            cursor.execute(sql.format(path=_quote(Path(manifest['tables'][table]['path']))), params)
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    def _memoized(self, name: str, days: int, compute):
+        """Result of ``compute(start_date)``, computed once per snapshot"""
+        key = (self.manifest()['snapshot_id'], name, days)
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+        value = compute(datetime.now() - timedelta(days=days))
+        with self._lock:
+            self._results[key] = value
+            while len(self._results) > 32:
+                self._results.popitem(last=False)
+        return value
+
+    def shipment_rollup(self, days: int) -> Dict[str, Any]:
+        """
+        Shipment summary plus breakdowns by material, route and material
+        specification over the last ``days``
+        """
+        def compute(start_date: datetime) -> Dict[str, Any]:
+            rollup = {'summary': None, 'materials': [], 'routes': [], 'material_specs': []}
+            for row in self._query(SHIPMENT_ROLLUP_SQL, 'historical_shipments', [start_date]):
+                measures = {name: row[name] for name in _MEASURES}
+                if row['g_material'] and row['g_route']:
+                    rollup['summary'] = {**measures, 'on_time_percentage': row['on_time_percentage']}
+                elif row['g_route'] and row['g_spec']:
+                    rollup['materials'].append({'material': row['material'], **measures})
+                elif row['g_material']:
+                    rollup['routes'].append({'route': row['route'], **measures})
+                else:
+                    rollup['material_specs'].append({
+                        'material': row['material'], **measures,
+                        'thickness': row['thickness'], 'width': row['width'], 'length': row['length'],
+                    })
+            return rollup
+
+        return self._memoized('shipments', days, compute)
+
+    def dispatch_routes(self, days: int) -> List[Dict[str, Any]]:
+        """Dispatch quality by route over the last ``days``"""
+        return self._memoized(
+            'dispatch_routes', days,
+            lambda start_date: self._query(DISPATCH_ROUTES_SQL, 'historical_dispatches', [start_date])
+        )
+
+    def status(self) -> Dict[str, Any]:
+        manifest = self.manifest()
+        return {
+            'enabled': self.enabled,
+            'duckdb_available': DUCKDB_AVAILABLE,
+            'snapshot_id': manifest['snapshot_id'] if manifest else None,
+            'age_seconds': self.snapshot_age(),
+            'max_staleness_seconds': self.max_staleness_seconds,
+            'fresh': self.is_fresh(SNAPSHOT_TABLES),
+            'tables': {t: info['rows'] for t, info in manifest['tables'].items()} if manifest else {},
+        }
+
+
+_analytics_engine: Optional[AnalyticsEngine] = None
+_analytics_engine_lock = threading.Lock()
+
+
+def get_analytics_engine() -> AnalyticsEngine:
+    global _analytics_engine
+    with _analytics_engine_lock:
+        if _analytics_engine is None:
+            _analytics_engine = AnalyticsEngine()
+        return _analytics_engine
+
+
+def run_snapshot_job() -> Dict[str, Any]:
+    """Scheduled job: publish a fresh Parquet snapshot of the history tables"""
+    engine = get_analytics_engine()
+    if not engine.enabled:
+        reason = "DuckDB not installed" if not DUCKDB_AVAILABLE else "Analytics snapshots disabled"
+        return {'status': 'skipped', 'reason': reason}
+    if db.engine is None:
+        return {'status': 'skipped', 'reason': 'Database not available'}
+
+    try:
+        manifest = engine.take_snapshot()
+    except Exception as e:
+        logger.error(f"Analytics snapshot failed: {e}")
+        return {'status': 'failed', 'error': str(e)}
+
+    rows = {table: info['rows'] for table, info in manifest['tables'].items()}
+    logger.info(f"✓ Analytics snapshot {manifest['snapshot_id']}: {rows}")
+    return {'status': 'success', 'snapshot_id': manifest['snapshot_id'], 'rows': rows}
@@ -3,13 +3,22 @@ Auto-Alerts & Mitigation Service - Phase 1 Feature 2
 Detects issues in plans and suggests automatic mitigations
 """
 
-from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 from enum import Enum
+import itertools
 import logging
 
+import numpy as np
+
+from ..utils.history import create_history
+
 logger = logging.getLogger(__name__)
 
+# Keeps ids unique when many alerts are created within one millisecond
+_id_sequence = itertools.count(1)
+
 class AlertSeverity(str, Enum):
     CRITICAL = "critical"
     HIGH = "high"
@@ -43,9 +52,12 @@ class MitigationStrategy(str, Enum):
 
 class Alert:
     """Alert object"""
+    __slots__ = ('id', 'type', 'severity', 'message', 'plan_id', 'affected_orders',
+                 'data', 'created_at', 'status', 'mitigations')
+    
     def __init__(self, alert_type: AlertType, severity: AlertSeverity, message: str, 
                  plan_id: str, affected_orders: List[str], data: Dict = None):
-        self.id = f"ALERT-{int(datetime.now().timestamp() * 1000)}"
+        self.id = f"ALERT-{int(datetime.now().timestamp() * 1000)}-{next(_id_sequence)}"
         self.type = alert_type
         self.severity = severity
         self.message = message
@@ -75,7 +87,7 @@ class Mitigation:
     def __init__(self, strategy: MitigationStrategy, description: str, 
                  cost_impact: float = 0, time_impact: float = 0, 
                  effectiveness: float = 0.8):
-        self.id = f"MIT-{int(datetime.now().timestamp() * 1000)}"
+        self.id = f"MIT-{int(datetime.now().timestamp() * 1000)}-{next(_id_sequence)}"
         self.strategy = strategy
         self.description = description
         self.cost_impact = cost_impact  # ₹ impact
@@ -94,62 +106,203 @@ class Mitigation:
             'status': self.status
         }
 
+# ============================================================================
+# COLUMNAR PLAN VIEW
+# ============================================================================
+
+DEMAND_THRESHOLD_T = 5000
+DELAY_PROBABILITY_THRESHOLD = 0.3
+COST_PER_TONNE_THRESHOLD = 60
+RAKES_THRESHOLD = 3
+RISK_FACTORS_THRESHOLD = 2
+DESTINATION_ORDERS_THRESHOLD = 2
+VEHICLES_THRESHOLD = 5
+WEATHER_RISK = 0.15  # Simulated probability of weather issues
+WEATHER_RISK_THRESHOLD = 0.1
+AFFECTED_ORDERS_LIMIT = 3
+PLAN_SNAPSHOT_LIMIT = 32  # Plans remembered for incremental analysis
+
+# Allocation fields read into columns, first present name wins
+_ALLOCATION_FIELDS = {
+    'tonnage': ('tonnage', 'tonnes', 'quantity_tonnes'),
+    'delay_probability': ('delay_probability',),
+    'cost': ('cost', 'estimated_cost'),
+    'capacity': ('capacity_tonnes', 'capacity'),
+    'due': ('due_date',),
+    'eta': ('eta', 'estimated_arrival'),
+}
+
+
+def _first(alloc: Dict, names) -> Any:
+    for name in names:
+        value = alloc.get(name)
+        if value is not None:
+            return value
+    return None
+
+
+def _number(value: Any) -> Optional[float]:
+    """The value as a float; None when it is not a number"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _timestamp(value: Any) -> Optional[float]:
+    """POSIX timestamp of a datetime or ISO string; None when it is not a date"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return None
+
+
+def _allocation_row(alloc: Dict) -> Tuple:
+    """
+    Hashable (destination, tonnage, delay probability, cost, capacity, due,
+    eta) of one allocation. Unparseable values count as missing.
+    """
+    values = {name: _first(alloc, names) for name, names in _ALLOCATION_FIELDS.items()}
+    return (
+        alloc.get('destination'),
+        _number(values['tonnage']),
+        _number(values['delay_probability']),
+        _number(values['cost']),
+        _number(values['capacity']),
+        _timestamp(values['due']),
+        _timestamp(values['eta']),
+    )
+
+
+class PlanColumns:
+    """
+    NumPy columns over allocation rows, one element per allocation.
+    Missing values are NaN, so every predicate on them is False.
+    """
+    __slots__ = ('tonnage', 'delay_probability', 'cost', 'capacity', 'due', 'eta')
+
+    def __init__(self, rows: List[Tuple]):
+        numeric = np.array([row[1:] for row in rows], dtype=float).reshape(len(rows), 6)
+        (self.tonnage, self.delay_probability, self.cost,
+         self.capacity, self.due, self.eta) = numeric.T
+
+    def __len__(self) -> int:
+        return len(self.tonnage)
+
+
+# Row-local checks: each flags the orders it applies to
+ORDER_PREDICATES: Dict[AlertType, Callable[[PlanColumns], np.ndarray]] = {
+    AlertType.DELAY_RISK: lambda c: (c.delay_probability > DELAY_PROBABILITY_THRESHOLD) | (c.eta > c.due),
+    AlertType.COST_OVERRUN: lambda c: c.cost > COST_PER_TONNE_THRESHOLD * c.tonnage,
+    AlertType.CAPACITY_EXCEEDED: lambda c: c.tonnage > c.capacity,
+}
+
+# (strategy, description, cost impact ₹, time impact h, effectiveness) per alert type
+MITIGATIONS: Dict[AlertType, List[Tuple[MitigationStrategy, str, float, float, float]]] = {
+    AlertType.STOCK_LOW: [
+        (MitigationStrategy.INCREASE_STOCK, "Increase stock procurement from suppliers", 50000, 2, 0.9),
+        (MitigationStrategy.SPLIT_SHIPMENT, "Split shipment into multiple smaller rakes", 25000, 1, 0.7),
+    ],
+    AlertType.DELAY_RISK: [
+        (MitigationStrategy.EXPEDITE_DELIVERY, "Use express route for faster delivery", 75000, -4, 0.95),
+        (MitigationStrategy.CHANGE_ROUTE, "Switch to alternative route with better conditions", -25000, -2, 0.8),
+    ],
+    AlertType.COST_OVERRUN: [
+        (MitigationStrategy.CHANGE_ROUTE, "Use cheaper route to reduce costs", -37500, 2, 0.85),
+        (MitigationStrategy.REDUCE_LOAD, "Reduce load per vehicle to optimize costs", -25000, 1, 0.7),
+    ],
+    AlertType.CAPACITY_EXCEEDED: [
+        (MitigationStrategy.SPLIT_SHIPMENT, "Split into multiple shipments to reduce per-shipment load", 50000, 1, 0.9),
+        (MitigationStrategy.CHANGE_VEHICLE, "Use larger capacity vehicles", 25000, 0, 0.8),
+    ],
+    AlertType.QUALITY_RISK: [
+        (MitigationStrategy.INCREASE_BUFFER, "Add quality buffer/inspection checkpoints", 15000, 0.5, 0.85),
+    ],
+    AlertType.SCHEDULE_CONFLICT: [
+        (MitigationStrategy.ADJUST_SCHEDULE, "Consolidate orders and adjust delivery schedule", -25000, 1, 0.9),
+    ],
+    AlertType.WEATHER_RISK: [
+        (MitigationStrategy.INCREASE_BUFFER, "Add weather buffer time to schedule", 0, 2, 0.8),
+        (MitigationStrategy.CHANGE_ROUTE, "Use weather-resistant route", 50000, -1, 0.9),
+    ],
+    AlertType.VEHICLE_UNAVAILABLE: [
+        (MitigationStrategy.FIND_ALTERNATIVE, "Arrange alternative vehicles from partner fleet", 30000, 0, 0.85),
+    ],
+}
+
+
+class _PlanSnapshot:
+    """
+    What incremental analysis remembers of the previous version of a plan.
+    Rows are keyed by (order_id, occurrence) since an order may be split
+    over several allocations.
+    """
+    __slots__ = ('rows', 'flagged', 'destinations', 'signatures')
+
+    def __init__(self):
+        self.rows: Dict[Tuple[Any, int], Tuple] = {}
+        self.flagged: Dict[AlertType, Set[Tuple[Any, int]]] = {t: set() for t in ORDER_PREDICATES}
+        self.destinations: Counter = Counter()
+        self.signatures: Set[Tuple] = set()
+
+
 class AutoAlertsService:
     """Service for automatic alerts and mitigation"""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.alerts_history = []
+        self.alerts_history = create_history('alerts', indexes={
+            'type': lambda a: a.type,
+            'severity': lambda a: a.severity,
+            'plan_id': lambda a: a.plan_id,
+        })
         self.mitigations_history = []
         self.alert_count = 0
         self.mitigations_applied = 0
+        self._snapshots: "OrderedDict[str, _PlanSnapshot]" = OrderedDict()
     
-    def analyze_plan(self, plan: Dict) -> List[Alert]:
+    def analyze_plan(self, plan: Dict, incremental: bool = False) -> List[Alert]:
         """
         Analyze plan and detect issues
         Returns list of alerts
-        """
-        alerts = []
         
+        Allocations are read once into PlanColumns and the per-order checks
+        (delay, cost, capacity) run as vectorized predicates over them;
+        the remaining checks use plan-level figures and per-destination
+        order counts.
+        
+        With ``incremental``, a plan already analyzed under the same id only
+        has its new or changed orders re-checked, and only alerts that
+        differ from the previous version are returned and stored.
+        """
         try:
-            # Check 1: Stock levels
-            stock_alerts = self._check_stock_levels(plan)
-            alerts.extend(stock_alerts)
-            
-            # Check 2: Delay risks
-            delay_alerts = self._check_delay_risks(plan)
-            alerts.extend(delay_alerts)
-            
-            # Check 3: Cost overruns
-            cost_alerts = self._check_cost_overruns(plan)
-            alerts.extend(cost_alerts)
+            plan_id = plan.get('id')
+            previous = self._snapshots.get(plan_id) if incremental else None
+            snapshot = self._update_snapshot(plan, previous)
             
-            # Check 4: Capacity issues
-            capacity_alerts = self._check_capacity_issues(plan)
-            alerts.extend(capacity_alerts)
+            alerts = self._plan_alerts(plan, snapshot)
+            signatures = {self._signature(a) for a in alerts}
+            if previous is not None:
+                alerts = [a for a in alerts if self._signature(a) not in previous.signatures]
+            snapshot.signatures = signatures
             
-            # Check 5: Quality risks
-            quality_alerts = self._check_quality_risks(plan)
-            alerts.extend(quality_alerts)
-            
-            # Check 6: Schedule conflicts
-            schedule_alerts = self._check_schedule_conflicts(plan)
-            alerts.extend(schedule_alerts)
-            
-            # Check 7: Weather risks
-            weather_alerts = self._check_weather_risks(plan)
-            alerts.extend(weather_alerts)
-            
-            # Check 8: Vehicle availability
-            vehicle_alerts = self._check_vehicle_availability(plan)
-            alerts.extend(vehicle_alerts)
+            if plan_id is not None:
+                self._snapshots[plan_id] = snapshot
+                self._snapshots.move_to_end(plan_id)
+                while len(self._snapshots) > PLAN_SNAPSHOT_LIMIT:
+                    self._snapshots.popitem(last=False)
             
             # Store alerts
             for alert in alerts:
+                alert.mitigations = self._suggest_mitigations(alert.type)
                 self.alerts_history.append(alert)
                 self.alert_count += 1
             
-            self.logger.info(f"✓ Analyzed plan {plan.get('id')}. Found {len(alerts)} alerts")
+            self.logger.info(f"✓ Analyzed plan {plan_id}. Found {len(alerts)} alerts")
             
             return alerts
         
@@ -157,360 +310,145 @@ class AutoAlertsService:
             self.logger.error(f"Error analyzing plan: {e}")
             raise
     
-    def _check_stock_levels(self, plan: Dict) -> List[Alert]:
-        """Check if stock levels are sufficient"""
-        alerts = []
-        predictions = plan.get('predictions', {})
-        demand = predictions.get('demand_forecast', {})
-        
-        # Check if demand is high
-        if demand.get('total_demand', 0) > 5000:
-            alert = Alert(
-                alert_type=AlertType.STOCK_LOW,
-                severity=AlertSeverity.HIGH,
-                message=f"High demand detected ({demand.get('total_demand')}T). Stock levels may be insufficient.",
-                plan_id=plan.get('id'),
-                affected_orders=self._get_affected_orders(plan),
-                data={'demand': demand.get('total_demand'), 'threshold': 5000}
-            )
-            alert.mitigations = self._suggest_mitigations_for_stock(plan)
-            alerts.append(alert)
-        
-        return alerts
+    def _update_snapshot(self, plan: Dict, previous: Optional[_PlanSnapshot]) -> _PlanSnapshot:
+        """Re-check new and changed orders against the order predicates"""
+        snapshot = _PlanSnapshot()
+        occurrences = Counter()
+        for alloc in plan.get('allocations', []):
+            order_id = alloc.get('order_id')
+            snapshot.rows[(order_id, occurrences[order_id])] = _allocation_row(alloc)
+            occurrences[order_id] += 1
+        snapshot.destinations = Counter(row[0] for row in snapshot.rows.values() if row[0])
+        
+        if previous is None:
+            changed = list(snapshot.rows)
+        else:
+            changed = [key for key, row in snapshot.rows.items() if previous.rows.get(key) != row]
+            for alert_type, flagged in previous.flagged.items():
+                snapshot.flagged[alert_type] = {
+                    key for key in flagged if previous.rows[key] == snapshot.rows.get(key)
+                }
+        
+        if changed:
+            columns = PlanColumns([snapshot.rows[key] for key in changed])
+            for alert_type, predicate in ORDER_PREDICATES.items():
+                snapshot.flagged[alert_type].update(changed[i] for i in np.flatnonzero(predicate(columns)))
+        return snapshot
     
-    def _check_delay_risks(self, plan: Dict) -> List[Alert]:
-        """Check for delay risks"""
-        alerts = []
+    def _plan_alerts(self, plan: Dict, snapshot: _PlanSnapshot) -> List[Alert]:
+        """Alerts of the eight checks, in check order"""
+        plan_id = plan.get('id')
+        keys = list(snapshot.rows)
+        first_orders = [order_id for order_id, _ in keys[:AFFECTED_ORDERS_LIMIT]]
         predictions = plan.get('predictions', {})
-        delay_forecast = predictions.get('delay_forecast', {})
-        
-        # Check if delay probability is high
-        avg_delay_prob = delay_forecast.get('avg_delay_probability', 0)
-        if avg_delay_prob > 0.3:
-            alert = Alert(
-                alert_type=AlertType.DELAY_RISK,
-                severity=AlertSeverity.HIGH,
-                message=f"High delay risk detected ({avg_delay_prob*100:.0f}% probability). Average delay: {delay_forecast.get('delays', [{}])[0].get('estimated_delay_hours', 0)}h",
-                plan_id=plan.get('id'),
-                affected_orders=self._get_affected_orders(plan),
-                data={'delay_probability': avg_delay_prob, 'threshold': 0.3}
-            )
-            alert.mitigations = self._suggest_mitigations_for_delay(plan)
-            alerts.append(alert)
-        
-        return alerts
-    
-    def _check_cost_overruns(self, plan: Dict) -> List[Alert]:
-        """Check for cost overruns"""
-        alerts = []
-        predictions = plan.get('predictions', {})
-        cost_forecast = predictions.get('cost_forecast', {})
-        
-        # Check if cost per tonne is high
-        avg_cost = cost_forecast.get('avg_cost_per_tonne', 0)
-        if avg_cost > 60:
-            alert = Alert(
-                alert_type=AlertType.COST_OVERRUN,
-                severity=AlertSeverity.MEDIUM,
-                message=f"Cost overrun detected. Average cost: ₹{avg_cost:.0f}/tonne (threshold: ₹60/tonne)",
-                plan_id=plan.get('id'),
-                affected_orders=self._get_affected_orders(plan),
-                data={'avg_cost': avg_cost, 'threshold': 60}
-            )
-            alert.mitigations = self._suggest_mitigations_for_cost(plan)
-            alerts.append(alert)
-        
-        return alerts
-    
-    def _check_capacity_issues(self, plan: Dict) -> List[Alert]:
-        """Check for capacity issues"""
         alerts = []
         
-        allocations = plan.get('allocations', [])
-        total_tonnage = plan.get('total_tonnage', 0)
-        rakes_needed = plan.get('rakes_needed', 0)
+        def flagged(alert_type: AlertType) -> List[str]:
+            # Distinct flagged orders in plan order, so the orders listed are stable
+            flags = snapshot.flagged[alert_type]
+            return list(dict.fromkeys(order_id for order_id, n in keys if (order_id, n) in flags)) if flags else []
         
-        # Check if rakes are sufficient
-        if rakes_needed > 3:
-            alert = Alert(
-                alert_type=AlertType.CAPACITY_EXCEEDED,
-                severity=AlertSeverity.MEDIUM,
-                message=f"High capacity requirement. {rakes_needed} rakes needed for {total_tonnage}T",
-                plan_id=plan.get('id'),
-                affected_orders=self._get_affected_orders(plan),
-                data={'rakes_needed': rakes_needed, 'tonnage': total_tonnage}
-            )
-            alert.mitigations = self._suggest_mitigations_for_capacity(plan)
-            alerts.append(alert)
+        def add(alert_type, severity, message, affected, data):
+            alerts.append(Alert(alert_type, severity, message, plan_id, affected, data))
         
-        return alerts
-    
-    def _check_quality_risks(self, plan: Dict) -> List[Alert]:
-        """Check for quality risks"""
-        alerts = []
-        predictions = plan.get('predictions', {})
+        # Check 1: Stock levels
+        total_demand = predictions.get('demand_forecast', {}).get('total_demand', 0)
+        if total_demand > DEMAND_THRESHOLD_T:
+            add(AlertType.STOCK_LOW, AlertSeverity.HIGH,
+                f"High demand detected ({total_demand}T). Stock levels may be insufficient.",
+                first_orders, {'demand': total_demand, 'threshold': DEMAND_THRESHOLD_T})
         
-        # Check if there are quality concerns
+        # Check 2: Delay risks
+        delay_forecast = predictions.get('delay_forecast', {})
+        avg_delay_prob = delay_forecast.get('avg_delay_probability', 0)
+        late = flagged(AlertType.DELAY_RISK)
+        if avg_delay_prob > DELAY_PROBABILITY_THRESHOLD:
+            delays = delay_forecast.get('delays') or [{}]
+            add(AlertType.DELAY_RISK, AlertSeverity.HIGH,
+                f"High delay risk detected ({avg_delay_prob*100:.0f}% probability). Average delay: {delays[0].get('estimated_delay_hours', 0)}h",
+                late[:AFFECTED_ORDERS_LIMIT] or first_orders,
+                {'delay_probability': avg_delay_prob, 'threshold': DELAY_PROBABILITY_THRESHOLD,
+                 'affected_count': len(late)})
+        elif late:
+            add(AlertType.DELAY_RISK, AlertSeverity.HIGH,
+                f"Delay risk on {len(late)} orders (delay probability above {DELAY_PROBABILITY_THRESHOLD*100:.0f}% or ETA after due date)",
+                late[:AFFECTED_ORDERS_LIMIT],
+                {'threshold': DELAY_PROBABILITY_THRESHOLD, 'affected_count': len(late)})
+        
+        # Check 3: Cost overruns
+        avg_cost = predictions.get('cost_forecast', {}).get('avg_cost_per_tonne', 0)
+        costly = flagged(AlertType.COST_OVERRUN)
+        if avg_cost > COST_PER_TONNE_THRESHOLD:
+            add(AlertType.COST_OVERRUN, AlertSeverity.MEDIUM,
+                f"Cost overrun detected. Average cost: ₹{avg_cost:.0f}/tonne (threshold: ₹{COST_PER_TONNE_THRESHOLD}/tonne)",
+                costly[:AFFECTED_ORDERS_LIMIT] or first_orders,
+                {'avg_cost': avg_cost, 'threshold': COST_PER_TONNE_THRESHOLD, 'affected_count': len(costly)})
+        elif costly:
+            add(AlertType.COST_OVERRUN, AlertSeverity.MEDIUM,
+                f"Cost overrun on {len(costly)} orders (above ₹{COST_PER_TONNE_THRESHOLD}/tonne)",
+                costly[:AFFECTED_ORDERS_LIMIT],
+                {'threshold': COST_PER_TONNE_THRESHOLD, 'affected_count': len(costly)})
+        
+        # Check 4: Capacity issues
+        rakes_needed = plan.get('rakes_needed', 0)
+        total_tonnage = plan.get('total_tonnage', 0)
+        overloaded = flagged(AlertType.CAPACITY_EXCEEDED)
+        if rakes_needed > RAKES_THRESHOLD:
+            add(AlertType.CAPACITY_EXCEEDED, AlertSeverity.MEDIUM,
+                f"High capacity requirement. {rakes_needed} rakes needed for {total_tonnage}T",
+                overloaded[:AFFECTED_ORDERS_LIMIT] or first_orders,
+                {'rakes_needed': rakes_needed, 'tonnage': total_tonnage, 'affected_count': len(overloaded)})
+        elif overloaded:
+            add(AlertType.CAPACITY_EXCEEDED, AlertSeverity.MEDIUM,
+                f"{len(overloaded)} orders exceed their allocated capacity",
+                overloaded[:AFFECTED_ORDERS_LIMIT],
+                {'affected_count': len(overloaded)})
+        
+        # Check 5: Quality risks
         risk_factors = predictions.get('risk_factors', [])
-        if len(risk_factors) > 2:
-            alert = Alert(
-                alert_type=AlertType.QUALITY_RISK,
-                severity=AlertSeverity.MEDIUM,
-                message=f"Quality risks identified: {', '.join(risk_factors[:2])}",
-                plan_id=plan.get('id'),
-                affected_orders=self._get_affected_orders(plan),
-                data={'risk_factors': risk_factors}
-            )
-            alert.mitigations = self._suggest_mitigations_for_quality(plan)
-            alerts.append(alert)
+        if len(risk_factors) > RISK_FACTORS_THRESHOLD:
+            add(AlertType.QUALITY_RISK, AlertSeverity.MEDIUM,
+                f"Quality risks identified: {', '.join(risk_factors[:2])}",
+                first_orders, {'risk_factors': risk_factors})
+        
+        # Check 6: Schedule conflicts (several orders to one destination)
+        for dest, count in snapshot.destinations.items():
+            if count > DESTINATION_ORDERS_THRESHOLD:
+                add(AlertType.SCHEDULE_CONFLICT, AlertSeverity.LOW,
+                    f"Multiple orders to {dest} ({count} orders). Consider consolidation.",
+                    first_orders, {'destination': dest, 'order_count': count})
+        
+        # Check 7: Weather risks
+        if WEATHER_RISK > WEATHER_RISK_THRESHOLD:
+            add(AlertType.WEATHER_RISK, AlertSeverity.MEDIUM,
+                f"Weather risk detected ({WEATHER_RISK*100:.0f}% probability). Monsoon season approaching.",
+                first_orders, {'weather_risk': WEATHER_RISK})
+        
+        # Check 8: Vehicle availability
+        vehicles = len(plan.get('allocations', []))
+        if vehicles > VEHICLES_THRESHOLD:
+            add(AlertType.VEHICLE_UNAVAILABLE, AlertSeverity.LOW,
+                f"High vehicle requirement. {vehicles} vehicles needed.",
+                first_orders, {'vehicles_needed': vehicles})
         
         return alerts
     
-    def _check_schedule_conflicts(self, plan: Dict) -> List[Alert]:
-        """Check for schedule conflicts"""
-        alerts = []
-        
-        allocations = plan.get('allocations', [])
-        
-        # Check if multiple orders have same destination
-        destinations = {}
-        for alloc in allocations:
-            dest = alloc.get('destination')
-            if dest:
-                destinations[dest] = destinations.get(dest, 0) + 1
-        
-        for dest, count in destinations.items():
-            if count > 2:
-                alert = Alert(
-                    alert_type=AlertType.SCHEDULE_CONFLICT,
-                    severity=AlertSeverity.LOW,
-                    message=f"Multiple orders to {dest} ({count} orders). Consider consolidation.",
-                    plan_id=plan.get('id'),
-                    affected_orders=self._get_affected_orders(plan),
-                    data={'destination': dest, 'order_count': count}
-                )
-                alert.mitigations = self._suggest_mitigations_for_schedule(plan)
-                alerts.append(alert)
-        
-        return alerts
-    
-    def _check_weather_risks(self, plan: Dict) -> List[Alert]:
-        """Check for weather risks"""
-        alerts = []
-        
-        # Simulate weather check
-        weather_risk = 0.15  # 15% chance of weather issues
-        
-        if weather_risk > 0.1:
-            alert = Alert(
-                alert_type=AlertType.WEATHER_RISK,
-                severity=AlertSeverity.MEDIUM,
-                message=f"Weather risk detected ({weather_risk*100:.0f}% probability). Monsoon season approaching.",
-                plan_id=plan.get('id'),
-                affected_orders=self._get_affected_orders(plan),
-                data={'weather_risk': weather_risk}
-            )
-            alert.mitigations = self._suggest_mitigations_for_weather(plan)
-            alerts.append(alert)
-        
-        return alerts
-    
-    def _check_vehicle_availability(self, plan: Dict) -> List[Alert]:
-        """Check for vehicle availability issues"""
-        alerts = []
-        
-        allocations = plan.get('allocations', [])
-        
-        # Check if vehicles are available
-        if len(allocations) > 5:
-            alert = Alert(
-                alert_type=AlertType.VEHICLE_UNAVAILABLE,
-                severity=AlertSeverity.LOW,
-                message=f"High vehicle requirement. {len(allocations)} vehicles needed.",
-                plan_id=plan.get('id'),
-                affected_orders=self._get_affected_orders(plan),
-                data={'vehicles_needed': len(allocations)}
-            )
-            alert.mitigations = self._suggest_mitigations_for_vehicles(plan)
-            alerts.append(alert)
-        
-        return alerts
-    
-    def _get_affected_orders(self, plan: Dict) -> List[str]:
-        """Get list of affected order IDs"""
-        allocations = plan.get('allocations', [])
-        return [alloc.get('order_id') for alloc in allocations[:3]]
-    
-    def _suggest_mitigations_for_stock(self, plan: Dict) -> List[Dict]:
-        """Suggest mitigations for stock issues"""
-        mitigations = []
-        
-        mit1 = Mitigation(
-            strategy=MitigationStrategy.INCREASE_STOCK,
-            description="Increase stock procurement from suppliers",
-            cost_impact=50000,
-            time_impact=2,
-            effectiveness=0.9
-        )
-        mitigations.append(mit1.to_dict())
-        
-        mit2 = Mitigation(
-            strategy=MitigationStrategy.SPLIT_SHIPMENT,
-            description="Split shipment into multiple smaller rakes",
-            cost_impact=25000,
-            time_impact=1,
-            effectiveness=0.7
-        )
-        mitigations.append(mit2.to_dict())
-        
-        return mitigations
-    
-    def _suggest_mitigations_for_delay(self, plan: Dict) -> List[Dict]:
-        """Suggest mitigations for delay risks"""
-        mitigations = []
-        
-        mit1 = Mitigation(
-            strategy=MitigationStrategy.EXPEDITE_DELIVERY,
-            description="Use express route for faster delivery",
-            cost_impact=75000,
-            time_impact=-4,
-            effectiveness=0.95
-        )
-        mitigations.append(mit1.to_dict())
-        
-        mit2 = Mitigation(
-            strategy=MitigationStrategy.CHANGE_ROUTE,
-            description="Switch to alternative route with better conditions",
-            cost_impact=-25000,
-            time_impact=-2,
-            effectiveness=0.8
-        )
-        mitigations.append(mit2.to_dict())
-        
-        return mitigations
+    @staticmethod
+    def _signature(alert: Alert) -> Tuple:
+        return (alert.type, alert.message, tuple(alert.affected_orders), alert.data.get('affected_count'))
     
-    def _suggest_mitigations_for_cost(self, plan: Dict) -> List[Dict]:
-        """Suggest mitigations for cost overruns"""
-        mitigations = []
-        
-        mit1 = Mitigation(
-            strategy=MitigationStrategy.CHANGE_ROUTE,
-            description="Use cheaper route to reduce costs",
-            cost_impact=-37500,
-            time_impact=2,
-            effectiveness=0.85
-        )
-        mitigations.append(mit1.to_dict())
-        
-        mit2 = Mitigation(
-            strategy=MitigationStrategy.REDUCE_LOAD,
-            description="Reduce load per vehicle to optimize costs",
-            cost_impact=-25000,
-            time_impact=1,
-            effectiveness=0.7
-        )
-        mitigations.append(mit2.to_dict())
-        
-        return mitigations
-    
-    def _suggest_mitigations_for_capacity(self, plan: Dict) -> List[Dict]:
-        """Suggest mitigations for capacity issues"""
-        mitigations = []
-        
-        mit1 = Mitigation(
-            strategy=MitigationStrategy.SPLIT_SHIPMENT,
-            description="Split into multiple shipments to reduce per-shipment load",
-            cost_impact=50000,
-            time_impact=1,
-            effectiveness=0.9
-        )
-        mitigations.append(mit1.to_dict())
-        
-        mit2 = Mitigation(
-            strategy=MitigationStrategy.CHANGE_VEHICLE,
-            description="Use larger capacity vehicles",
-            cost_impact=25000,
-            time_impact=0,
-            effectiveness=0.8
-        )
-        mitigations.append(mit2.to_dict())
-        
-        return mitigations
-    
-    def _suggest_mitigations_for_quality(self, plan: Dict) -> List[Dict]:
-        """Suggest mitigations for quality risks"""
-        mitigations = []
-        
-        mit1 = Mitigation(
-            strategy=MitigationStrategy.INCREASE_BUFFER,
-            description="Add quality buffer/inspection checkpoints",
-            cost_impact=15000,
-            time_impact=0.5,
-            effectiveness=0.85
-        )
-        mitigations.append(mit1.to_dict())
-        
-        return mitigations
-    
-    def _suggest_mitigations_for_schedule(self, plan: Dict) -> List[Dict]:
-        """Suggest mitigations for schedule conflicts"""
-        mitigations = []
-        
-        mit1 = Mitigation(
-            strategy=MitigationStrategy.ADJUST_SCHEDULE,
-            description="Consolidate orders and adjust delivery schedule",
-            cost_impact=-25000,
-            time_impact=1,
-            effectiveness=0.9
-        )
-        mitigations.append(mit1.to_dict())
-        
-        return mitigations
-    
-    def _suggest_mitigations_for_weather(self, plan: Dict) -> List[Dict]:
-        """Suggest mitigations for weather risks"""
-        mitigations = []
-        
-        mit1 = Mitigation(
-            strategy=MitigationStrategy.INCREASE_BUFFER,
-            description="Add weather buffer time to schedule",
-            cost_impact=0,
-            time_impact=2,
-            effectiveness=0.8
-        )
-        mitigations.append(mit1.to_dict())
-        
-        mit2 = Mitigation(
-            strategy=MitigationStrategy.CHANGE_ROUTE,
-            description="Use weather-resistant route",
-            cost_impact=50000,
-            time_impact=-1,
-            effectiveness=0.9
-        )
-        mitigations.append(mit2.to_dict())
-        
-        return mitigations
-    
-    def _suggest_mitigations_for_vehicles(self, plan: Dict) -> List[Dict]:
-        """Suggest mitigations for vehicle availability"""
-        mitigations = []
-        
-        mit1 = Mitigation(
-            strategy=MitigationStrategy.FIND_ALTERNATIVE,
-            description="Arrange alternative vehicles from partner fleet",
-            cost_impact=30000,
-            time_impact=0,
-            effectiveness=0.85
-        )
-        mitigations.append(mit1.to_dict())
-        
-        return mitigations
+    def _suggest_mitigations(self, alert_type: AlertType) -> List[Dict]:
+        """Suggested mitigations for an alert type"""
+        return [
+            Mitigation(strategy, description, cost_impact, time_impact, effectiveness).to_dict()
+            for strategy, description, cost_impact, time_impact, effectiveness in MITIGATIONS.get(alert_type, [])
+        ]
     
     def apply_mitigation(self, alert_id: str, mitigation_id: str) -> Dict:
         """Apply a mitigation strategy"""
         try:
             # Find alert and mitigation
-            alert = next((a for a in self.alerts_history if a.id == alert_id), None)
+            alert = self.alerts_history.get(alert_id)
             if not alert:
                 raise ValueError(f"Alert {alert_id} not found")
             
@@ -538,26 +476,33 @@ class AutoAlertsService:
     
     def get_alerts(self, plan_id: str = None, severity: AlertSeverity = None) -> List[Dict]:
         """Get alerts, optionally filtered by plan or severity"""
-        alerts = self.alerts_history
-        
-        if plan_id:
-            alerts = [a for a in alerts if a.plan_id == plan_id]
-        
-        if severity:
-            alerts = [a for a in alerts if a.severity == severity]
-        
+        alerts = self.alerts_history.recent(plan_id=plan_id or None, severity=severity or None)
         return [a.to_dict() for a in alerts]
     
+    def get_alert(self, alert_id: str) -> Optional[Dict]:
+        """Get one alert by id, including alerts already spilled from memory"""
+        return self.alerts_history.find_archived(alert_id)
+    
+    def get_alert_counts(self) -> Dict:
+        """Retained alerts per severity and per type, read from the history indexes"""
+        by_severity = {s.value: 0 for s in AlertSeverity}
+        for severity, count in self.alerts_history.counts('severity').items():
+            by_severity[AlertSeverity(severity).value] = count
+        by_type = {AlertType(t).value: count for t, count in self.alerts_history.counts('type').items()}
+        return {'by_severity': by_severity, 'by_type': by_type}
+    
     def get_status(self) -> Dict:
         """Get alerts service status"""
-        active_alerts = len([a for a in self.alerts_history if a.status == 'active'])
-        mitigated_alerts = len([a for a in self.alerts_history if a.status == 'mitigated'])
+        # Status changes after an alert is stored, so count over the retained window
+        active_alerts = sum(1 for a in self.alerts_history if a.status == 'active')
+        mitigated_alerts = sum(1 for a in self.alerts_history if a.status == 'mitigated')
         
         return {
             'status': 'running',
-            'total_alerts': len(self.alerts_history),
+            'total_alerts': self.alerts_history.total_appended,
             'active_alerts': active_alerts,
             'mitigated_alerts': mitigated_alerts,
             'mitigations_applied': self.mitigations_applied,
+            'history': self.alerts_history.stats(),
             'timestamp': datetime.now().isoformat()
         }
@@ -9,6 +9,9 @@ from enum import Enum
 import logging
 import json
 
+from .rollup_store import RollupStore, get_rollup_store, month_bounds
+from ..utils.history import create_history
+
 logger = logging.getLogger(__name__)
 
 class ReportType(str, Enum):
@@ -32,6 +35,8 @@ class EmailTemplate(str, Enum):
 
 class Report:
     """Report object"""
+    __slots__ = ('id', 'type', 'title', 'data', 'created_at', 'generated_by', 'status')
+    
     def __init__(self, report_type: ReportType, title: str, data: Dict):
         self.id = f"REPORT-{int(datetime.now().timestamp())}"
         self.type = report_type
@@ -54,6 +59,9 @@ class Report:
 
 class EmailNotification:
     """Email notification object"""
+    __slots__ = ('id', 'recipient', 'subject', 'template', 'data', 'report_id',
+                 'created_at', 'status', 'sent_at')
+    
     def __init__(self, recipient: str, subject: str, template: EmailTemplate, 
                  data: Dict, report_id: Optional[str] = None):
         self.id = f"EMAIL-{int(datetime.now().timestamp() * 1000)}"
@@ -82,10 +90,11 @@ class EmailNotification:
 class AutoReportService:
     """Service for automatic reports and emails"""
     
-    def __init__(self):
+    def __init__(self, rollups: Optional[RollupStore] = None):
         self.logger = logging.getLogger(__name__)
-        self.reports_history = []
-        self.emails_history = []
+        self.rollups = rollups or get_rollup_store()
+        self.reports_history = create_history('reports', indexes={'type': lambda r: r.type})
+        self.emails_history = create_history('emails', indexes={'template': lambda e: e.template})
         self.recipients = [
             'manager@company.com',
             'operations@company.com',
@@ -98,35 +107,10 @@ class AutoReportService:
             if date is None:
                 date = datetime.now()
             
-            # Collect data
-            data = {
-                'date': date.strftime('%Y-%m-%d'),
-                'optimizations': {
-                    'total': 5,
-                    'auto_published': 4,
-                    'pending_approval': 1,
-                    'cost_savings': 187500,
-                    'time_savings': 12.5
-                },
-                'alerts': {
-                    'total': 4,
-                    'critical': 0,
-                    'high': 2,
-                    'medium': 2,
-                    'low': 0,
-                    'mitigated': 1
-                },
-                'predictions': {
-                    'demand_forecast_confidence': 0.82,
-                    'delay_forecast_confidence': 0.75,
-                    'cost_forecast_confidence': 0.88
-                },
-                'performance': {
-                    'on_time_delivery': 0.96,
-                    'cost_efficiency': 0.89,
-                    'utilization': 0.92
-                }
-            }
+            data = {'date': date.strftime('%Y-%m-%d')}
+            data.update(self._period_data('daily', date, date))
+            data['hourly'] = self._series('hourly', datetime.combine(date.date(), datetime.min.time()),
+                                          datetime.combine(date.date(), datetime.max.time()))
             
             report = Report(
                 report_type=ReportType.DAILY,
@@ -151,41 +135,13 @@ class AutoReportService:
             
             week_end = week_start + timedelta(days=6)
             
-            # Collect data
-            data = {
-                'week': f"{week_start.strftime('%Y-%m-%d')} to {week_end.strftime('%Y-%m-%d')}",
-                'optimizations': {
-                    'total': 35,
-                    'auto_published': 28,
-                    'pending_approval': 7,
-                    'cost_savings': 1312500,
-                    'time_savings': 87.5
-                },
-                'alerts': {
-                    'total': 28,
-                    'critical': 0,
-                    'high': 8,
-                    'medium': 16,
-                    'low': 4,
-                    'mitigated': 22
-                },
-                'predictions': {
-                    'avg_demand_confidence': 0.81,
-                    'avg_delay_confidence': 0.74,
-                    'avg_cost_confidence': 0.87
-                },
-                'performance': {
-                    'on_time_delivery': 0.95,
-                    'cost_efficiency': 0.88,
-                    'utilization': 0.91,
-                    'improvement_vs_last_week': 0.03
-                },
-                'top_alerts': [
-                    'Stock Low (3 occurrences)',
-                    'Delay Risk (2 occurrences)',
-                    'Cost Overrun (2 occurrences)'
-                ]
-            }
+            data = {'week': f"{week_start.strftime('%Y-%m-%d')} to {week_end.strftime('%Y-%m-%d')}"}
+            data.update(self._period_data('daily', week_start, week_end))
+            data['daily'] = self._series('daily', week_start, week_end)
+            previous = self.rollups.summarize('daily', week_start - timedelta(days=7), week_start - timedelta(days=1))
+            data['performance']['improvement_vs_last_week'] = self._change(
+                data['performance']['on_time_delivery'], previous['on_time_rate']
+            )
             
             report = Report(
                 report_type=ReportType.WEEKLY,
@@ -210,41 +166,15 @@ class AutoReportService:
             if year is None:
                 year = datetime.now().year
             
-            # Collect data
-            data = {
-                'month': f"{year}-{month:02d}",
-                'optimizations': {
-                    'total': 150,
-                    'auto_published': 120,
-                    'pending_approval': 30,
-                    'cost_savings': 5625000,
-                    'time_savings': 375
-                },
-                'alerts': {
-                    'total': 120,
-                    'critical': 0,
-                    'high': 30,
-                    'medium': 70,
-                    'low': 20,
-                    'mitigated': 100
-                },
-                'predictions': {
-                    'avg_demand_confidence': 0.80,
-                    'avg_delay_confidence': 0.73,
-                    'avg_cost_confidence': 0.86
-                },
-                'performance': {
-                    'on_time_delivery': 0.94,
-                    'cost_efficiency': 0.87,
-                    'utilization': 0.90,
-                    'improvement_vs_last_month': 0.05
-                },
-                'roi': {
-                    'cost_savings': 5625000,
-                    'implementation_cost': 100000,
-                    'roi_percentage': 5525
-                }
-            }
+            month_start, month_end = month_bounds(year, month)
+            data = {'month': f"{year}-{month:02d}"}
+            data.update(self._period_data('monthly', month_start, month_start))
+            data['daily'] = self._series('daily', month_start, month_end)
+            previous_start, _ = month_bounds(*((year - 1, 12) if month == 1 else (year, month - 1)))
+            previous = self.rollups.summarize('monthly', previous_start, previous_start)
+            data['performance']['improvement_vs_last_month'] = self._change(
+                data['performance']['on_time_delivery'], previous['on_time_rate']
+            )
             
             report = Report(
                 report_type=ReportType.MONTHLY,
@@ -261,6 +191,69 @@ class AutoReportService:
             self.logger.error(f"Error generating monthly report: {e}")
             raise
     
+    def _period_data(self, grain: str, start: datetime, end: datetime) -> Dict:
+        """Report sections for one period, summed from the rollup buckets"""
+        summary = self.rollups.summarize(grain, start, end)
+        rail_tonnes = summary['by_mode'].get('rail', {}).get('dispatched_tonnes', 0.0)
+        
+        return {
+            'optimizations': {
+                'total': summary['optimizer_runs'],
+                'fallback_runs': summary['fallback_runs'],
+                'avg_solver_seconds': summary['avg_solver_seconds'],
+                'planned_rakes': summary['planned_rakes'],
+                'planned_trucks': summary['planned_trucks'],
+                'planned_tonnes': summary['planned_tonnes'],
+                'planned_cost': summary['planned_cost'],
+            },
+            'dispatch': {
+                'total': summary['dispatches'],
+                'tonnes': summary['dispatched_tonnes'],
+                'cost': summary['dispatch_cost'],
+                'cost_per_tonne': summary['cost_per_tonne'],
+                'avg_delay_hours': summary['avg_delay_hours'],
+            },
+            'performance': {
+                'on_time_delivery': summary['on_time_rate'],
+                'wagon_utilization': summary['wagon_utilization'],
+                'rail_share': rail_tonnes / summary['dispatched_tonnes'] if summary['dispatched_tonnes'] else None,
+            },
+            'routes': self._breakdown(summary['by_route']),
+            'materials': self._breakdown(summary['by_material']),
+            'modes': self._breakdown(summary['by_mode']),
+        }
+    
+    def _series(self, grain: str, start: datetime, end: datetime) -> List[Dict]:
+        return [
+            {
+                'bucket': b['bucket'],
+                'dispatches': b['dispatches'],
+                'tonnes': b['dispatched_tonnes'],
+                'cost': b['dispatch_cost'],
+                'on_time_delivery': b['on_time_rate'],
+            }
+            for b in self.rollups.series(grain, start, end)
+        ]
+    
+    @staticmethod
+    def _breakdown(groups: Dict[str, Dict]) -> Dict[str, Dict]:
+        return {
+            key: {
+                'dispatches': g['dispatches'],
+                'tonnes': g['dispatched_tonnes'],
+                'cost': g['dispatch_cost'],
+                'on_time_delivery': g['on_time_rate'],
+                'planned_tonnes': g['planned_tonnes'],
+            }
+            for key, g in sorted(groups.items(), key=lambda item: -item[1]['dispatched_tonnes'])
+        }
+    
+    @staticmethod
+    def _change(current: Optional[float], previous: Optional[float]) -> Optional[float]:
+        if current is None or previous is None:
+            return None
+        return round(current - previous, 4)
+    
     def send_daily_summary_email(self, report: Report) -> List[EmailNotification]:
         """Send daily summary email to all recipients"""
         try:
@@ -348,6 +341,13 @@ class AutoReportService:
     def get_report_html(self, report: Report) -> str:
         """Generate HTML version of report"""
         try:
+            optimizations = report.data.get('optimizations', {})
+            dispatch = report.data.get('dispatch', {})
+            performance = report.data.get('performance', {})
+            
+            def fmt(value: Optional[float], pattern: str) -> str:
+                return pattern.format(value) if value is not None else 'n/a'
+            
             html = f"""
             <html>
             <head>
@@ -367,28 +367,32 @@ class AutoReportService:
                 <div class="section">
                     <h2>Optimizations</h2>
                     <div class="metric">
-                        <div class="metric-label">Total</div>
-                        <div class="metric-value">{report.data.get('optimizations', {}).get('total', 0)}</div>
+                        <div class="metric-label">Runs</div>
+                        <div class="metric-value">{optimizations.get('total', 0)}</div>
                     </div>
                     <div class="metric">
-                        <div class="metric-label">Cost Savings</div>
-                        <div class="metric-value">₹{report.data.get('optimizations', {}).get('cost_savings', 0):,}</div>
+                        <div class="metric-label">Planned Tonnes</div>
+                        <div class="metric-value">{optimizations.get('planned_tonnes', 0):,.0f}</div>
                     </div>
                     <div class="metric">
-                        <div class="metric-label">Time Savings</div>
-                        <div class="metric-value">{report.data.get('optimizations', {}).get('time_savings', 0)}h</div>
+                        <div class="metric-label">Planned Cost</div>
+                        <div class="metric-value">₹{optimizations.get('planned_cost', 0):,.0f}</div>
                     </div>
                 </div>
                 
                 <div class="section">
-                    <h2>Alerts</h2>
+                    <h2>Dispatch</h2>
+                    <div class="metric">
+                        <div class="metric-label">Dispatches</div>
+                        <div class="metric-value">{dispatch.get('total', 0)}</div>
+                    </div>
                     <div class="metric">
-                        <div class="metric-label">Total</div>
-                        <div class="metric-value">{report.data.get('alerts', {}).get('total', 0)}</div>
+                        <div class="metric-label">Tonnes</div>
+                        <div class="metric-value">{dispatch.get('tonnes', 0):,.0f}</div>
                     </div>
                     <div class="metric">
-                        <div class="metric-label">Mitigated</div>
-                        <div class="metric-value">{report.data.get('alerts', {}).get('mitigated', 0)}</div>
+                        <div class="metric-label">Cost per Tonne</div>
+                        <div class="metric-value">{fmt(dispatch.get('cost_per_tonne'), '₹{:,.0f}')}</div>
                     </div>
                 </div>
                 
@@ -396,11 +400,11 @@ class AutoReportService:
                     <h2>Performance</h2>
                     <div class="metric">
                         <div class="metric-label">On-Time Delivery</div>
-                        <div class="metric-value">{report.data.get('performance', {}).get('on_time_delivery', 0)*100:.0f}%</div>
+                        <div class="metric-value">{fmt(performance.get('on_time_delivery'), '{:.0%}')}</div>
                     </div>
                     <div class="metric">
-                        <div class="metric-label">Cost Efficiency</div>
-                        <div class="metric-value">{report.data.get('performance', {}).get('cost_efficiency', 0)*100:.0f}%</div>
+                        <div class="metric-label">Wagon Utilization</div>
+                        <div class="metric-value">{fmt(performance.get('wagon_utilization'), '{:.0%}')}</div>
                     </div>
                 </div>
             </body>
@@ -416,18 +420,18 @@ class AutoReportService:
         """Get auto-report service status"""
         return {
             'status': 'running',
-            'total_reports': len(self.reports_history),
-            'total_emails': len(self.emails_history),
-            'pending_emails': len([e for e in self.emails_history if e.status == 'pending']),
-            'sent_emails': len([e for e in self.emails_history if e.status == 'sent']),
+            'total_reports': self.reports_history.total_appended,
+            'total_emails': self.emails_history.total_appended,
+            'pending_emails': sum(1 for e in self.emails_history if e.status == 'pending'),
+            'sent_emails': sum(1 for e in self.emails_history if e.status == 'sent'),
             'recipients': len(self.recipients),
             'timestamp': datetime.now().isoformat()
         }
     
     def get_all_reports(self, limit: int = 50) -> List[Dict]:
         """Get all reports"""
-        return [r.to_dict() for r in self.reports_history[-limit:]]
+        return [r.to_dict() for r in self.reports_history.recent(limit)]
     
     def get_all_emails(self, limit: int = 100) -> List[Dict]:
         """Get all emails"""
-        return [e.to_dict() for e in self.emails_history[-limit:]]
+        return [e.to_dict() for e in self.emails_history.recent(limit)]
@@ -9,6 +9,8 @@ from enum import Enum
 import logging
 import random
 
+from ..utils.history import create_history
+
 logger = logging.getLogger(__name__)
 
 class FeedbackType(str, Enum):
@@ -20,6 +22,9 @@ class FeedbackType(str, Enum):
 
 class Feedback:
     """Feedback object"""
+    __slots__ = ('id', 'type', 'reference_id', 'actual_value', 'predicted_value',
+                 'score', 'notes', 'created_at', 'processed')
+    
     def __init__(self, feedback_type: FeedbackType, reference_id: str, 
                  actual_value: Any, predicted_value: Any, score: float, notes: str = ""):
         self.id = f"FEEDBACK-{int(datetime.now().timestamp() * 1000)}"
@@ -37,7 +42,7 @@ class Feedback:
             'id': self.id,
             'type': self.type,
             'reference_id': self.reference_id,
-            'actual_value': actual_value,
+            'actual_value': self.actual_value,
             'predicted_value': self.predicted_value,
             'score': self.score,
             'notes': self.notes,
@@ -107,7 +112,7 @@ class FeedbackLoopService:
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.feedback_history = []
+        self.feedback_history = create_history('feedback', indexes={'type': lambda f: f.type})
         self.model_performance = {}
         self.retraining_jobs = []
         self.drift_threshold = 0.1  # 10% accuracy drop triggers retraining
@@ -232,12 +237,8 @@ class FeedbackLoopService:
     def get_feedback(self, feedback_type: Optional[FeedbackType] = None, 
                     limit: int = 100) -> List[Dict]:
         """Get feedback history"""
-        feedback = self.feedback_history
-        
-        if feedback_type:
-            feedback = [f for f in feedback if f.type == feedback_type]
-        
-        return [f.to_dict() for f in feedback[-limit:]]
+        feedback = self.feedback_history.recent(limit, type=feedback_type or None)
+        return [f.to_dict() for f in feedback]
     
     def get_model_performance(self, model_name: Optional[str] = None) -> List[Dict]:
         """Get model performance metrics"""
@@ -283,7 +284,7 @@ class FeedbackLoopService:
         
         return {
             'status': 'running',
-            'total_feedback': len(self.feedback_history),
+            'total_feedback': self.feedback_history.total_appended,
             'total_models': len(self.model_performance),
             'average_accuracy': avg_accuracy,
             'retraining_jobs': len(self.retraining_jobs),
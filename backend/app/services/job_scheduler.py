@@ -0,0 +1,623 @@
+"""
+Background Job Scheduler
+Single-leader scheduler for nightly model training and daily rake planning.
+
+Every API worker may call start_job_scheduler(), but only the process holding
+an exclusive lock on settings.SCHEDULER_LOCK_PATH schedules anything; the others
+retry the lock every SCHEDULER_POLL_SECONDS so a new leader takes over when the
+old one exits. The leader sleeps on an event until the next job is due and runs
+each job in a separate, re-niced Python process so training never competes with
+request handling; a thread per job waits on that process, so a long job does
+not hold up the others. Runs are recorded in a small SQLite table shared by all
+workers, which is what /ml/training/status reports. A new leader fails the runs
+whose worker process died with the previous one.
+
+Without advisory locks (Windows) no API worker leads; run the scheduler as its
+own process with SCHEDULER_MODE=external instead.
+
+Run standalone (SCHEDULER_MODE=external) with:
+    python -m app.services.job_scheduler
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import importlib
+import json
+import logging
+import os
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, only SCHEDULER_MODE=external leads
+    fcntl = None
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+class RunStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCESS = "success"
+    FAILED = "failed"
+
+@dataclass(frozen=True)
+class ScheduledJob:
+    """A job target ("module:function") with a daily or fixed-interval schedule"""
+    name: str
+    target: str
+    daily_at: Optional[str] = None
+    interval_seconds: Optional[int] = None
+    description: str = ""
+
+    @property
+    def schedule(self) -> str:
+        return f"daily at {self.daily_at}" if self.daily_at else f"every {self.interval_seconds}s"
+
+    def next_run_after(self, moment: datetime, last_run: Optional[datetime] = None) -> datetime:
+        """Next due time after ``moment``; interval jobs count from their last run"""
+        if self.daily_at:
+            hours, minutes = map(int, self.daily_at.split(':'))
+            candidate = moment.replace(hour=hours, minute=minutes, second=0, microsecond=0)
+            if candidate <= moment:
+                candidate += timedelta(days=1)
+            return candidate
+
+        interval = timedelta(seconds=self.interval_seconds)
+        if last_run is None or last_run + interval <= moment:
+            return moment + interval
+        return last_run + interval
+
+DEFAULT_JOBS: List[ScheduledJob] = [
+    ScheduledJob(
+        name="rake_planning",
+        target="app.services.rake_scheduler:run_planning_job",
+        daily_at=settings.RAKE_PLANNING_TIME,
+        description="Daily rake formation planning",
+    ),
+    ScheduledJob(
+        name="ml_training",
+        target="ml.automated_training_scheduler:run_training_job",
+        daily_at=settings.ML_TRAINING_TIME,
+        description="Nightly training of all ML models",
+    ),
+    ScheduledJob(
+        name="ml_performance_check",
+        target="ml.automated_training_scheduler:run_performance_check_job",
+        interval_seconds=3600,
+        description="Retrain when model accuracy drops below threshold",
+    ),
+    ScheduledJob(
+        name="rake_performance_check",
+        target="app.services.rake_scheduler:run_performance_check_job",
+        interval_seconds=3600,
+        description="Planning success-rate check",
+    ),
+    ScheduledJob(
+        name="partition_maintenance",
+        target="app.db:run_partition_maintenance",
+        daily_at=settings.DB_PARTITION_MAINTENANCE_TIME,
+        description="Create upcoming monthly partitions and archive expired ones",
+    ),
+    ScheduledJob(
+        name="analytics_snapshot",
+        target="app.services.analytics_engine:run_snapshot_job",
+        interval_seconds=settings.ANALYTICS_SNAPSHOT_INTERVAL_SECONDS,
+        description="Parquet snapshot of the history tables for dashboard analytics",
+    ),
+]
+
+class JobRunStore:
+    """
+    SQLite table of job runs shared by the leader, the job worker processes and
+    every API worker reading status. Manual triggers are queued rows that the
+    leader picks up on its next wake-up.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS job_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job TEXT NOT NULL,
+            trigger TEXT NOT NULL,
+            status TEXT NOT NULL,
+            queued_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            pid INTEGER,
+            host TEXT,
+            error TEXT,
+            result TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_job_runs_job ON job_runs (job, id);
+        CREATE INDEX IF NOT EXISTS idx_job_runs_status ON job_runs (status);
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self._SCHEMA)
+
+    def enqueue(self, job: str, trigger: str) -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO job_runs (job, trigger, status, queued_at) VALUES (?, ?, ?, ?)",
+                (job, trigger, RunStatus.QUEUED, time.time())
+            )
+        return cursor.lastrowid
+
+    def start(self, job: str, trigger: str, pid: Optional[int] = None) -> int:
+        """Record a run that starts now; never visible as queued"""
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO job_runs (job, trigger, status, queued_at, started_at, pid, host) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job, trigger, RunStatus.RUNNING, now, now, pid, socket.gethostname())
+            )
+        return cursor.lastrowid
+
+    def claim(self, run_id: int) -> bool:
+        """Move a queued run to running; False if another process claimed it first"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE job_runs SET status = ?, started_at = ?, host = ? WHERE id = ? AND status = ?",
+                (RunStatus.RUNNING, time.time(), socket.gethostname(), run_id, RunStatus.QUEUED)
+            )
+        return cursor.rowcount == 1
+
+    def fail_abandoned(self) -> List[int]:
+        """Fail running runs whose worker process is gone; returns their ids"""
+        host = socket.gethostname()
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT id, pid, host FROM job_runs WHERE status = ?", (RunStatus.RUNNING,)
+            ).fetchall()
+            abandoned = [
+                row['id'] for row in rows
+                if row['pid'] is None or row['host'] != host or not _pid_alive(row['pid'])
+            ]
+            for run_id in abandoned:
+                self._conn.execute(
+                    "UPDATE job_runs SET status = ?, finished_at = ?, error = ? WHERE id = ?",
+                    (RunStatus.FAILED, time.time(), "Abandoned: worker process is gone", run_id)
+                )
+        return abandoned
+
+    def queued(self) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM job_runs WHERE status = ? ORDER BY id", (RunStatus.QUEUED,)
+            ).fetchall()
+            return [self._to_dict(r) for r in rows]
+
+    def mark_running(self, run_id: int, pid: int):
+        """Record the worker of a run; a run that already finished keeps its outcome"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE job_runs SET status = ?, started_at = ?, pid = ?, host = ? "
+                "WHERE id = ? AND status IN (?, ?)",
+                (RunStatus.RUNNING, time.time(), pid, socket.gethostname(), run_id,
+                 RunStatus.QUEUED, RunStatus.RUNNING)
+            )
+
+    def finish(self, run_id: int, status: str, result: Any = None, error: Optional[str] = None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE job_runs SET status = ?, finished_at = ?, result = ?, error = ? WHERE id = ?",
+                (status, time.time(), json.dumps(result, default=str) if result is not None else None,
+                 error, run_id)
+            )
+
+    def get(self, run_id: int) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM job_runs WHERE id = ?", (run_id,)).fetchone()
+            return self._to_dict(row) if row else None
+
+    def recent(self, limit: int = 20, job: Optional[str] = None) -> List[Dict]:
+        """Most recent runs, newest first"""
+        with self._lock:
+            if job:
+                rows = self._conn.execute(
+                    "SELECT * FROM job_runs WHERE job = ? ORDER BY id DESC LIMIT ?", (job, limit)
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT * FROM job_runs ORDER BY id DESC LIMIT ?", (limit,)
+                ).fetchall()
+            return [self._to_dict(r) for r in rows]
+
+    def last_started(self) -> Dict[str, datetime]:
+        """Start time of the latest run of every job"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job, MAX(started_at) FROM job_runs WHERE started_at IS NOT NULL GROUP BY job"
+            ).fetchall()
+        return {job: datetime.fromtimestamp(started) for job, started in rows}
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        record = dict(row)
+        for key in ('queued_at', 'started_at', 'finished_at'):
+            if record[key] is not None:
+                record[key] = datetime.fromtimestamp(record[key]).isoformat()
+        if record['result']:
+            record['result'] = json.loads(record['result'])
+        started, finished = row['started_at'], row['finished_at']
+        record['duration_seconds'] = round(finished - started, 3) if started and finished else None
+        return record
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class JobScheduler:
+    """Leader-elected scheduler that runs jobs in a low-priority child process"""
+
+    def __init__(self, jobs: Optional[List[ScheduledJob]] = None,
+                 store: Optional[JobRunStore] = None,
+                 lock_path: Optional[Path] = None,
+                 poll_seconds: Optional[float] = None):
+        self.jobs: Dict[str, ScheduledJob] = {job.name: job for job in (jobs or DEFAULT_JOBS)}
+        self.store = store or JobRunStore(str(settings.SCHEDULER_DB_PATH))
+        self.lock_path = Path(lock_path or settings.SCHEDULER_LOCK_PATH)
+        self.poll_seconds = poll_seconds if poll_seconds is not None else settings.SCHEDULER_POLL_SECONDS
+
+        self.is_leader = False
+        self._lock_file = None
+        self._warned_no_lock = False
+        self._next_run: Dict[str, datetime] = {}
+        self._active: Dict[str, threading.Thread] = {}  # Job name -> thread waiting on its worker
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    # ========================================================================
+    # LEADER ELECTION
+    # ========================================================================
+
+    def try_acquire_leadership(self) -> bool:
+        """Take the scheduler lock without blocking; True if this process leads"""
+        if self.is_leader:
+            return True
+
+        if fcntl is None and settings.SCHEDULER_MODE != "external":
+            # Every worker would win an unlocked election
+            if not self._warned_no_lock:
+                logger.warning("No file locking on this platform; jobs only run with SCHEDULER_MODE=external")
+                self._warned_no_lock = True
+            return False
+
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.lock_path, 'a+')
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(json.dumps({
+            'pid': os.getpid(),
+            'host': socket.gethostname(),
+            'since': datetime.now().isoformat(),
+        }))
+        lock_file.flush()
+
+        self._lock_file = lock_file
+        self.is_leader = True
+        abandoned = self.store.fail_abandoned()
+        if abandoned:
+            logger.warning(f"Failed runs abandoned by the previous leader: {abandoned}")
+        self._next_run = self._initial_schedule(datetime.now())
+        logger.info(f"Job scheduler leadership acquired by pid {os.getpid()}")
+        return True
+
+    def release_leadership(self):
+        if self._lock_file is not None:
+            # Clear the leader record before anyone else can take the lock
+            self._lock_file.seek(0)
+            self._lock_file.truncate()
+            self._lock_file.flush()
+            if fcntl is not None:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+        self.is_leader = False
+
+    def _leader_info(self) -> Optional[Dict]:
+        """The live leader's record; None if nobody holds the lock"""
+        try:
+            with open(self.lock_path) as lock_file:
+                if not self.is_leader and fcntl is not None:
+                    # A crashed leader leaves its record behind but not its lock
+                    try:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH | fcntl.LOCK_NB)
+                    except OSError:
+                        pass
+                    else:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                        return None
+                return json.loads(lock_file.read() or 'null')
+        except (OSError, ValueError):
+            return None
+
+    # ========================================================================
+    # SCHEDULING LOOP
+    # ========================================================================
+
+    def _initial_schedule(self, now: datetime) -> Dict[str, datetime]:
+        last_started = self.store.last_started()
+        return {name: job.next_run_after(now, last_started.get(name)) for name, job in self.jobs.items()}
+
+    def run_pending(self, now: Optional[datetime] = None, wait: bool = False) -> List[Dict]:
+        """
+        Start queued manual triggers, then every job that is due, each in its
+        own thread; returns the started runs (finished ones with ``wait``).
+        A job still running from before is not started again until it ends.
+        """
+        now = now or datetime.now()
+        started: List[Tuple[int, threading.Thread]] = []
+
+        for run in self.store.queued():
+            job = self.jobs.get(run['job'])
+            if job is None:
+                self.store.finish(run['id'], RunStatus.FAILED, error=f"Unknown job: {run['job']}")
+            elif not self._busy(job.name) and self.store.claim(run['id']):
+                started.append((run['id'], self._dispatch(run['id'], job)))
+
+        for name, job in self.jobs.items():
+            if self._stopping:
+                break
+            if not self._busy(name) and self._next_run.get(name, now) <= now:
+                run_id = self.store.start(name, 'schedule')
+                started.append((run_id, self._dispatch(run_id, job)))
+                self._next_run[name] = job.next_run_after(now, now)
+
+        if wait:
+            for _, thread in started:
+                thread.join()
+        return [self.store.get(run_id) for run_id, _ in started]
+
+    def _busy(self, job_name: str) -> bool:
+        thread = self._active.get(job_name)
+        return thread is not None and thread.is_alive()
+
+    def _dispatch(self, run_id: int, job: ScheduledJob) -> threading.Thread:
+        thread = threading.Thread(
+            target=self._execute, args=(run_id, job), name=f"job-{job.name}", daemon=True
+        )
+        self._active[job.name] = thread
+        thread.start()
+        return thread
+
+    def seconds_until_next_run(self, now: Optional[datetime] = None) -> float:
+        """How long the leader can sleep; capped so queued triggers are seen"""
+        now = now or datetime.now()
+        if not self._next_run:
+            return self.poll_seconds
+        wait = (min(self._next_run.values()) - now).total_seconds()
+        return max(0.0, min(wait, self.poll_seconds))
+
+    def _run_forever(self):
+        logger.info("Job scheduler loop started")
+        while not self._stopping:
+            if not self.try_acquire_leadership():
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+                continue
+
+            try:
+                self.run_pending()
+            except Exception as e:
+                logger.error(f"Job scheduler iteration failed: {e}", exc_info=True)
+
+            self._wake.wait(self.seconds_until_next_run())
+            self._wake.clear()
+
+        self.release_leadership()
+        logger.info("Job scheduler loop stopped")
+
+    def start(self):
+        """Start the scheduler loop in a daemon thread"""
+        if self._thread is not None and self._thread.is_alive():
+            logger.warning("Job scheduler already running")
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run_forever, name="job-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    # ========================================================================
+    # EXECUTION
+    # ========================================================================
+
+    def _execute(self, run_id: int, job: ScheduledJob) -> Dict:
+        """Run one job in a child process and make sure its run row is closed"""
+        logger.info(f"Running job {job.name} (run {run_id})")
+        command = [sys.executable, '-m', 'app.services.job_scheduler', 'run', job.name,
+                   '--target', job.target, '--run-id', str(run_id), '--db-path', self.store.path]
+
+        try:
+            process = subprocess.Popen(command, cwd=str(settings.BACKEND_DIR))
+            self.store.mark_running(run_id, process.pid)
+            try:
+                returncode = process.wait(timeout=settings.SCHEDULER_JOB_TIMEOUT_SECONDS)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+                returncode = None
+
+            run = self.store.get(run_id)
+            if run['status'] in (RunStatus.QUEUED, RunStatus.RUNNING):
+                error = "Timed out" if returncode is None else f"Worker exited with code {returncode}"
+                self.store.finish(run_id, RunStatus.FAILED, error=error)
+                run = self.store.get(run_id)
+        except Exception as e:
+            logger.error(f"Job {job.name} (run {run_id}) could not be run: {e}", exc_info=True)
+            self.store.finish(run_id, RunStatus.FAILED, error=str(e))
+            run = self.store.get(run_id)
+        finally:
+            self._wake.set()  # Queued triggers of this job can start now
+
+        logger.info(f"Job {job.name} (run {run_id}) finished: {run['status']}")
+        return run
+
+    def trigger(self, job_name: str) -> Dict:
+        """Queue a manual run; the leader (in whichever process) picks it up"""
+        if job_name not in self.jobs:
+            raise ValueError(f"Unknown job: {job_name}")
+        run_id = self.store.enqueue(job_name, 'manual')
+        self._wake.set()
+        return self.store.get(run_id)
+
+    # ========================================================================
+    # STATUS
+    # ========================================================================
+
+    def get_status(self, history_limit: int = 20) -> Dict:
+        now = datetime.now()
+        last_started = self.store.last_started()
+        jobs = []
+        for name, job in self.jobs.items():
+            next_run = self._next_run.get(name) if self.is_leader else None
+            latest = self.store.recent(1, job=name)
+            jobs.append({
+                'name': name,
+                'description': job.description,
+                'schedule': job.schedule,
+                'next_run': (next_run or job.next_run_after(now, last_started.get(name))).isoformat(),
+                'last_run': latest[0] if latest else None,
+            })
+
+        return {
+            'mode': settings.SCHEDULER_MODE,
+            'running': self._thread is not None and self._thread.is_alive(),
+            'is_leader': self.is_leader,
+            'leader': self._leader_info(),
+            'jobs': jobs,
+            'recent_runs': self.store.recent(history_limit),
+        }
+
+# ============================================================================
+# WORKER PROCESS
+# ============================================================================
+
+def run_job(job_name: str, run_id: Optional[int] = None, store: Optional[JobRunStore] = None,
+            target: Optional[str] = None) -> Dict:
+    """
+    Execute a job in the current process at reduced priority, recording the
+    run. ``target`` is passed by the leader, whose job table may not be
+    ``DEFAULT_JOBS``.
+    """
+    if target is None:
+        job = {j.name: j for j in DEFAULT_JOBS}.get(job_name)
+        if job is None:
+            raise ValueError(f"Unknown job: {job_name}")
+        target = job.target
+
+    store = store or JobRunStore(str(settings.SCHEDULER_DB_PATH))
+    if hasattr(os, 'nice') and settings.SCHEDULER_JOB_NICENESS:
+        os.nice(settings.SCHEDULER_JOB_NICENESS)
+    if run_id is None:
+        run_id = store.start(job_name, 'cli', os.getpid())
+    else:
+        store.mark_running(run_id, os.getpid())
+
+    try:
+        module_name, function_name = target.split(':')
+        result = getattr(importlib.import_module(module_name), function_name)()
+        if isinstance(result, dict) and result.get('status') == 'failed':
+            store.finish(run_id, RunStatus.FAILED, result=result,
+                         error=result.get('error') or result.get('reason'))
+        else:
+            store.finish(run_id, RunStatus.SUCCESS, result=result)
+    except Exception as e:
+        logger.error(f"Job {job_name} failed: {e}", exc_info=True)
+        store.finish(run_id, RunStatus.FAILED, error=str(e))
+
+    return store.get(run_id)
+
+# ============================================================================
+# GLOBAL SCHEDULER INSTANCE
+# ============================================================================
+
+_scheduler_instance: Optional[JobScheduler] = None
+
+def get_job_scheduler() -> JobScheduler:
+    """Get or create scheduler instance"""
+    global _scheduler_instance
+    if _scheduler_instance is None:
+        _scheduler_instance = JobScheduler()
+    return _scheduler_instance
+
+def start_job_scheduler():
+    """Start the scheduler loop in this process (only the lock holder runs jobs)"""
+    get_job_scheduler().start()
+
+def stop_job_scheduler():
+    """Stop the scheduler loop and release leadership"""
+    if _scheduler_instance is not None:
+        _scheduler_instance.stop()
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="SAIL Bokaro background job scheduler")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("serve", help="Run the scheduler loop in the foreground (default)")
+    run_parser = subparsers.add_parser("run", help="Run one job now in this process")
+    run_parser.add_argument("job")
+    run_parser.add_argument("--target", default=None, help="module:function to run instead of the job's own")
+    run_parser.add_argument("--run-id", type=int, default=None)
+    run_parser.add_argument("--db-path", default=str(settings.SCHEDULER_DB_PATH))
+    trigger_parser = subparsers.add_parser("trigger", help="Queue a job for the current leader")
+    trigger_parser.add_argument("job", choices=[job.name for job in DEFAULT_JOBS])
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=settings.LOG_LEVEL, format=settings.LOG_FORMAT)
+
+    if args.command == "run":
+        run = run_job(args.job, args.run_id, JobRunStore(args.db_path), target=args.target)
+        sys.exit(0 if run['status'] == RunStatus.SUCCESS else 1)
+
+    if args.command == "trigger":
+        print(json.dumps(get_job_scheduler().trigger(args.job), indent=2, default=str))
+        return
+
+    scheduler = get_job_scheduler()
+    done = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: done.set())
+    scheduler.start()
+    done.wait()
+    scheduler.stop()
+
+if __name__ == "__main__":
+    main()
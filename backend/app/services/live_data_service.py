@@ -11,6 +11,8 @@ import json
 import asyncio
 from collections import deque
 
+from ..utils.geo_index import GridSpatialIndex, KNOWN_SITES, CORRIDORS
+
 logger = logging.getLogger(__name__)
 
 class DataSourceType(str, Enum):
@@ -82,6 +84,7 @@ class LiveDataService:
             'events_by_type': {},
             'last_event': None
         }
+        self.vehicle_positions = GridSpatialIndex()
         self._initialize_streams()
     
     def _initialize_streams(self):
@@ -139,7 +142,9 @@ class LiveDataService:
             'fuel_percent': fuel,
             'timestamp': datetime.now().isoformat()
         }
-        return self.ingest_event('vehicle', 'telemetry', data)
+        event = self.ingest_event('vehicle', 'telemetry', data)
+        self.vehicle_positions.upsert(vehicle_id, lat, lon, data)
+        return event
     
     def ingest_order_created(self, order_id: str, tonnage: float, destination: str,
                              urgency: float) -> DataEvent:
@@ -180,12 +185,41 @@ class LiveDataService:
         # Return all events
         return [e.to_dict() for e in list(self.event_history)[-limit:]]
     
+    def get_vehicle_position(self, vehicle_id: str) -> Optional[Dict]:
+        """Get the latest known position of a vehicle"""
+        return self.vehicle_positions.get(vehicle_id)
+    
+    def get_vehicles_nearby(self, lat: Optional[float] = None, lon: Optional[float] = None,
+                            radius_km: float = 10, site: Optional[str] = None,
+                            limit: Optional[int] = None) -> List[Dict]:
+        """Get vehicles within radius_km of a point or a known site, nearest first"""
+        if site is not None:
+            if site.lower() not in KNOWN_SITES:
+                raise ValueError(f"Unknown site '{site}'. Known sites: {sorted(KNOWN_SITES)}")
+            lat, lon = KNOWN_SITES[site.lower()]
+        if lat is None or lon is None:
+            raise ValueError("Provide either a site or both lat and lon")
+        return self.vehicle_positions.nearby(lat, lon, radius_km, limit)
+    
+    def get_vehicles_in_bbox(self, min_lat: Optional[float] = None, min_lon: Optional[float] = None,
+                             max_lat: Optional[float] = None, max_lon: Optional[float] = None,
+                             corridor: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Get vehicles inside a bounding box or a named route corridor"""
+        if corridor is not None:
+            if corridor.lower() not in CORRIDORS:
+                raise ValueError(f"Unknown corridor '{corridor}'. Known corridors: {sorted(CORRIDORS)}")
+            min_lat, min_lon, max_lat, max_lon = CORRIDORS[corridor.lower()]
+        if None in (min_lat, min_lon, max_lat, max_lon):
+            raise ValueError("Provide either a corridor or min_lat, min_lon, max_lat and max_lon")
+        return self.vehicle_positions.within_bbox(min_lat, min_lon, max_lat, max_lon, limit)
+    
     def get_status(self) -> Dict:
         """Get live data service status"""
         return {
             'status': 'running',
             'total_events': self.stats['total_events'],
             'streams_active': len(self.streams),
+            'tracked_vehicles': len(self.vehicle_positions),
             'last_event': self.stats['last_event'],
             'events_by_type': self.stats['events_by_type'],
             'timestamp': datetime.now().isoformat()
@@ -9,6 +9,8 @@ from enum import Enum
 import logging
 import random
 
+from ..utils.history import create_history
+
 logger = logging.getLogger(__name__)
 
 class TaskStatus(str, Enum):
@@ -29,6 +31,8 @@ class ProgressStage(str, Enum):
 
 class ProgressUpdate:
     """Progress update for a task"""
+    __slots__ = ('id', 'task_id', 'stage', 'progress', 'message', 'timestamp', 'duration_seconds')
+    
     def __init__(self, task_id: str, stage: ProgressStage, progress: int, message: str):
         self.id = f"PROG-{int(datetime.now().timestamp() * 1000)}"
         self.task_id = task_id
@@ -51,6 +55,9 @@ class ProgressUpdate:
 
 class OptimizationTask:
     """Optimization task with progress tracking"""
+    __slots__ = ('task_id', 'plan_id', 'orders_count', 'status', 'overall_progress', 'current_stage',
+                 'updates', 'start_time', 'end_time', 'estimated_completion')
+    
     def __init__(self, task_id: str, plan_id: str, orders_count: int):
         self.task_id = task_id
         self.plan_id = plan_id
@@ -116,7 +123,10 @@ class LiveProgressService:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.tasks = {}
-        self.completed_tasks = []
+        # Finished (completed or failed) tasks; status is final when they are stored
+        self.completed_tasks = create_history(
+            'completed_tasks', key=lambda t: t.task_id, indexes={'status': lambda t: t.status}
+        )
     
     def create_task(self, plan_id: str, orders_count: int) -> OptimizationTask:
         """Create a new optimization task"""
@@ -202,11 +212,11 @@ class LiveProgressService:
             return task.to_dict()
         
         # Check completed tasks
-        completed = next((t for t in self.completed_tasks if t.task_id == task_id), None)
+        completed = self.completed_tasks.get(task_id)
         if completed:
             return completed.to_dict()
         
-        return None
+        return self.completed_tasks.find_archived(task_id)
     
     def get_active_tasks(self) -> List[Dict]:
         """Get all active tasks"""
@@ -214,7 +224,7 @@ class LiveProgressService:
     
     def get_completed_tasks(self, limit: int = 50) -> List[Dict]:
         """Get completed tasks"""
-        return [task.to_dict() for task in self.completed_tasks[-limit:]]
+        return [task.to_dict() for task in self.completed_tasks.recent(limit)]
     
     def simulate_optimization_progress(self, plan_id: str, orders_count: int) -> OptimizationTask:
         """Simulate an optimization task with progress updates"""
@@ -258,17 +268,18 @@ class LiveProgressService:
         return {
             'status': 'running',
             'active_tasks': len(self.tasks),
-            'completed_tasks': len(self.completed_tasks),
-            'total_tasks': len(self.tasks) + len(self.completed_tasks),
+            'completed_tasks': self.completed_tasks.total_appended,
+            'total_tasks': len(self.tasks) + self.completed_tasks.total_appended,
+            'history': self.completed_tasks.stats(),
             'timestamp': datetime.now().isoformat()
         }
     
     def get_statistics(self) -> Dict:
         """Get progress statistics"""
         try:
-            all_tasks = list(self.tasks.values()) + self.completed_tasks
+            total_tasks = len(self.tasks) + len(self.completed_tasks)
             
-            if not all_tasks:
+            if not total_tasks:
                 return {
                     'total_tasks': 0,
                     'avg_duration': 0,
@@ -276,16 +287,17 @@ class LiveProgressService:
                     'active_tasks': 0
                 }
             
-            completed = [t for t in all_tasks if t.status == TaskStatus.COMPLETED]
-            failed = [t for t in all_tasks if t.status == TaskStatus.FAILED]
+            # Statistics cover the retained history window
+            completed = self.completed_tasks.recent(status=TaskStatus.COMPLETED)
+            failed_count = self.completed_tasks.count(status=TaskStatus.FAILED)
             
             avg_duration = sum(t.get_duration() for t in completed) / len(completed) if completed else 0
-            success_rate = len(completed) / len(all_tasks) if all_tasks else 0
+            success_rate = len(completed) / total_tasks
             
             return {
-                'total_tasks': len(all_tasks),
+                'total_tasks': total_tasks,
                 'completed_tasks': len(completed),
-                'failed_tasks': len(failed),
+                'failed_tasks': failed_count,
                 'active_tasks': len(self.tasks),
                 'avg_duration_seconds': int(avg_duration),
                 'success_rate': success_rate,
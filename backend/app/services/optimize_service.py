@@ -5,14 +5,19 @@ SIH25208 SAIL Bokaro Steel Plant Logistics Optimization System.
 
 import json
 import logging
+import time
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 from pathlib import Path
 
 from .inference_service import inference_service
+from .result_cache import get_result_cache, model_fingerprint
+from .rollup_store import get_rollup_store
+from ..optimizer.decomposition import DecompositionSolver
 from ..optimizer.solver import RakeFormationOptimizer
 from ..config import settings
 from ..utils import app_logger
+from ..utils.metrics import metrics_collector
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +28,21 @@ class OptimizeService:
         """Initialize optimization service."""
         self.optimizer = RakeFormationOptimizer(
             time_limit_seconds=settings.OPTIMIZER_TIME_LIMIT,
-            random_seed=settings.OPTIMIZER_RANDOM_SEED
+            random_seed=settings.OPTIMIZER_RANDOM_SEED,
+            anytime=settings.OPTIMIZER_LNS_ENABLED,
+            lns_order_threshold=settings.OPTIMIZER_LNS_ORDER_THRESHOLD,
+        )
+        self.decomposer = DecompositionSolver(
+            time_limit_seconds=settings.OPTIMIZER_TIME_LIMIT,
+            random_seed=settings.OPTIMIZER_RANDOM_SEED,
+            max_partition_orders=settings.MAX_ORDERS_PER_REQUEST,
+            max_workers=settings.OPTIMIZER_DECOMPOSITION_WORKERS or None,
+            optimizer_factory=lambda limit, seed: RakeFormationOptimizer(
+                time_limit_seconds=limit,
+                random_seed=seed,
+                anytime=settings.OPTIMIZER_LNS_ENABLED,
+                lns_order_threshold=settings.OPTIMIZER_LNS_ORDER_THRESHOLD,
+            ),
         )
         self.logs_dir = Path(settings.LOGS_DIR) / "optimize_runs"
         self.logs_dir.mkdir(parents=True, exist_ok=True)
@@ -154,35 +173,100 @@ class OptimizeService:
         
         return cost_params
     
-    def run_optimizer(self, optimizer_input: Dict[str, Any]) -> Dict[str, Any]:
+    def plan(self, request_json: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        ML inference and optimization for a request, served from the result
+        cache when the same order book was planned before.
+        
+        The cache key covers the normalized request, the loaded model
+        versions, the solver parameters and the planning date (rake
+        availability is predicted per day). Fallback plans (greedy, or LNS
+        standing in for a failed full model), and decomposed plans with a
+        fallback subproblem, are not cached. The
+        returned solution carries a ``cache`` entry saying whether it was a
+        hit and from which tier.
+        
+        Args:
+            request_json: Request JSON with orders, inventory, available resources
+        
+        Returns:
+            Optimized dispatch plan
+        """
+        def solve() -> Dict[str, Any]:
+            return self.run_optimizer(self.build_optimizer_input(request_json))
+        
+        if not settings.RESULT_CACHE_ENABLED:
+            solution = solve()
+            solution['cache'] = {'hit': False, 'tier': None, 'key': None}
+            return solution
+        
+        context = {
+            'models': model_fingerprint(),
+            'time_limit_seconds': self.optimizer.time_limit_seconds,
+            'random_seed': self.optimizer.random_seed,
+            'date': datetime.utcnow().strftime('%Y-%m-%d'),
+        }
+        # A fallback may come from a timeout under load; let the next request retry the solver
+        solution, cache_info = get_result_cache().get_or_compute(
+            'dispatch', request_json, solve, context,
+            cacheable=lambda s: not s.get('summary', {}).get('fallback', False),
+        )
+        if cache_info['hit']:
+            app_logger.info(f"Optimizer result served from {cache_info['tier']} cache ({cache_info['key'][:12]})")
+        solution['cache'] = cache_info
+        return solution
+    
+    def run_optimizer(
+        self,
+        optimizer_input: Dict[str, Any],
+        on_improvement: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
         """
         Run the OR-Tools optimizer.
         
         Args:
             optimizer_input: Input JSON with orders and ML predictions
+            on_improvement: Called with each new incumbent of the anytime (LNS)
+                search; with decomposition, of each subproblem's search
         
         Returns:
             Optimized dispatch plan
         """
         run_id = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+        started = time.perf_counter()
         
         try:
             app_logger.info(f"Running optimizer (run_id={run_id})...")
             
-            # Solve
-            solution = self.optimizer.solve(optimizer_input)
+            # Solve; order books too large for one CP-SAT model are decomposed
+            num_orders = len(optimizer_input.get('orders', []))
+            if settings.OPTIMIZER_DECOMPOSITION_ENABLED and num_orders > settings.MAX_ORDERS_PER_REQUEST:
+                solution = self.decomposer.solve(optimizer_input, on_improvement=on_improvement)
+            else:
+                solution = self.optimizer.solve(optimizer_input, on_improvement=on_improvement)
+            solve_seconds = time.perf_counter() - started
             
             # Log run
             self._log_optimization_run(run_id, optimizer_input, solution)
+            self._record_rollups(solution)
             
             app_logger.info(f"Optimization complete. Status: {solution.get('solver_status')}")
+            metrics_collector.record_optimizer_run(True, solution.get('solver_status', ''), solve_seconds)
             
             return solution
         
         except Exception as e:
+            metrics_collector.record_optimizer_run(False, 'ERROR', time.perf_counter() - started)
             app_logger.error(f"Optimization error: {str(e)}")
             raise
     
+    def _record_rollups(self, solution: Dict[str, Any]) -> None:
+        """Add the planned rakes and trucks to the reporting rollups."""
+        try:
+            get_rollup_store().record_optimizer_run(solution)
+        except Exception as e:
+            app_logger.warning(f"Could not update optimizer rollups: {e}")
+    
     def _log_optimization_run(
         self,
         run_id: str,
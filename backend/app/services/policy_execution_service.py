@@ -8,6 +8,8 @@ from typing import Dict, List, Any, Optional, Callable
 from enum import Enum
 import logging
 
+from ..utils.history import create_history
+
 logger = logging.getLogger(__name__)
 
 class PolicyType(str, Enum):
@@ -86,6 +88,8 @@ class Policy:
 
 class PolicyExecution:
     """Policy execution record"""
+    __slots__ = ('id', 'policy_id', 'data', 'result', 'timestamp', 'status')
+    
     def __init__(self, policy_id: str, data: Dict, result: str):
         self.id = f"EXEC-{int(datetime.now().timestamp() * 1000)}"
         self.policy_id = policy_id
@@ -110,7 +114,7 @@ class PolicyExecutionService:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.policies = {}
-        self.executions = []
+        self.executions = create_history('policy_executions', indexes={'policy_id': lambda e: e.policy_id})
         self.action_handlers = {}
         self._initialize_default_policies()
     
@@ -270,12 +274,8 @@ class PolicyExecutionService:
     
     def get_executions(self, policy_id: Optional[str] = None, limit: int = 100) -> List[Dict]:
         """Get policy executions"""
-        executions = self.executions
-        
-        if policy_id:
-            executions = [e for e in executions if e.policy_id == policy_id]
-        
-        return [e.to_dict() for e in executions[-limit:]]
+        executions = self.executions.recent(limit, policy_id=policy_id or None)
+        return [e.to_dict() for e in executions]
     
     def get_status(self) -> Dict:
         """Get policy execution service status"""
@@ -283,6 +283,7 @@ class PolicyExecutionService:
             'status': 'running',
             'total_policies': len(self.policies),
             'enabled_policies': len([p for p in self.policies.values() if p.enabled]),
-            'total_executions': len(self.executions),
+            'total_executions': self.executions.total_appended,
+            'history': self.executions.stats(),
             'timestamp': datetime.now().isoformat()
         }
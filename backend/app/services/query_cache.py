@@ -0,0 +1,279 @@
+"""
+Query Cache
+Read-through cache of hot database lookups.
+
+Lookups such as the latest inventory of a stockyard or the congestion of a
+route are read on nearly every planning and dashboard request but change
+only when dispatches are inserted or materialized views are refreshed. Each
+lookup belongs to a namespace with its own TTL; results are kept in an
+in-process LRU and, when a shared path is configured, in a SQLite file all
+workers read and write.
+
+Invalidation bumps the namespace's generation in the shared file as well as
+dropping the entries, so other workers notice it (within
+``sync_seconds``) and drop their in-process copies. Shared entries are
+pickled to keep dates and decimals intact; the file must stay local to
+the server.
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+import copy
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+
+from ..config import settings
+from ..utils.metrics import metrics_collector
+
+logger = logging.getLogger(__name__)
+
+
+# Returned by ``lookup`` on a miss; None is a cacheable result
+MISS = object()
+
+
+def default_ttls() -> Dict[str, float]:
+    """TTL in seconds of each cached lookup"""
+    return {
+        'inventory': settings.DB_CACHE_INVENTORY_TTL_SECONDS,
+        'forecast_summary': settings.DB_CACHE_FORECAST_SUMMARY_TTL_SECONDS,
+        'route_congestion': settings.DB_CACHE_ROUTE_CONGESTION_TTL_SECONDS,
+        'rake_arrivals': settings.DB_CACHE_RAKE_ARRIVALS_TTL_SECONDS,
+    }
+
+
+class QueryCache:
+    """
+    LRU of ``max_entries`` query results, optionally over a SQLite file
+    shared by workers. Entries expire after their namespace's TTL.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value BLOB NOT NULL,
+            generation INTEGER NOT NULL,
+            expires_at REAL NOT NULL,
+            PRIMARY KEY (namespace, key)
+        );
+        CREATE INDEX IF NOT EXISTS idx_entries_expires ON entries (expires_at);
+        CREATE TABLE IF NOT EXISTS generations (
+            namespace TEXT PRIMARY KEY,
+            generation INTEGER NOT NULL
+        );
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[Dict[str, float]] = None,
+        max_entries: Optional[int] = None,
+        shared_path: Optional[str] = None,
+        sync_seconds: Optional[float] = None,
+        enabled: Optional[bool] = None,
+    ):
+        self.ttl_seconds = ttl_seconds or default_ttls()
+        self.max_entries = max_entries or settings.DB_CACHE_MAX_ENTRIES
+        self.sync_seconds = settings.DB_CACHE_SYNC_SECONDS if sync_seconds is None else sync_seconds
+        self.enabled = settings.DB_CACHE_ENABLED if enabled is None else enabled
+        self._memory: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._epochs: Dict[str, int] = {}  # Local invalidation counts, to drop loads that raced one
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+        shared_path = settings.DB_CACHE_SHARED_PATH if shared_path is None else shared_path
+        self.shared_path = shared_path or None
+        self._conn = None
+        if self.shared_path:
+            if self.shared_path != ":memory:":
+                Path(self.shared_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.shared_path, timeout=30, check_same_thread=False)
+            if self.shared_path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(self._SCHEMA)
+
+    @staticmethod
+    def key(params: Iterable[Hashable]) -> str:
+        """Cache key of a lookup's (already defaulted) parameters"""
+        return repr(tuple(params))
+
+    def _count(self, namespace: str, event: str) -> None:
+        counts = self._stats.setdefault(namespace, {})
+        counts[event] = counts.get(event, 0) + 1
+
+    # ========================================================================
+    # LOOKUP
+    # ========================================================================
+
+    def _sync_generations(self, now: float) -> None:
+        """Drop in-process entries of namespaces another process invalidated"""
+        if self._conn is None or now - self._synced_at < self.sync_seconds:
+            return
+        self._synced_at = now
+        shared = dict(self._conn.execute("SELECT namespace, generation FROM generations").fetchall())
+        stale = {ns for ns, generation in shared.items() if generation != self._generations.get(ns, 0)}
+        if stale:
+            for entry_key in [k for k in self._memory if k[0] in stale]:
+                del self._memory[entry_key]
+        self._generations = shared
+
+    def lookup(self, namespace: str, key: str) -> Any:
+        """Cached value, or ``MISS``"""
+        if not self.enabled:
+            return MISS
+        now = time.time()
+        with self._lock:
+            self._sync_generations(now)
+            entry = self._memory.get((namespace, key))
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end((namespace, key))
+                    self._count(namespace, 'memory_hits')
+                    metrics_collector.inc('db_cache_lookups_total', namespace=namespace, result='hit')
+                    return copy.deepcopy(value)
+                del self._memory[(namespace, key)]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, generation, expires_at FROM entries WHERE namespace = ? AND key = ?",
+                    (namespace, key)
+                ).fetchone()
+                if row is not None and row[2] > now and row[1] == self._generations.get(namespace, 0):
+                    value = pickle.loads(row[0])
+                    self._remember(namespace, key, row[2], value)
+                    self._count(namespace, 'shared_hits')
+                    metrics_collector.inc('db_cache_lookups_total', namespace=namespace, result='hit')
+                    return copy.deepcopy(value)
+
+            self._count(namespace, 'misses')
+            metrics_collector.inc('db_cache_lookups_total', namespace=namespace, result='miss')
+            return MISS
+
+    def epoch(self, namespace: str) -> int:
+        return self._epochs.get(namespace, 0)
+
+    def store(self, namespace: str, key: str, value: Any, epoch: Optional[int] = None) -> None:
+        """Cache ``value``; skipped if the namespace was invalidated since ``epoch``"""
+        if not self.enabled:
+            return
+        now = time.time()
+        expires_at = now + self.ttl_seconds.get(namespace, 60.0)
+        value = copy.deepcopy(value)
+        with self._lock:
+            if epoch is not None and epoch != self.epoch(namespace):
+                return
+            self._remember(namespace, key, expires_at, value)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO entries (namespace, key, value, generation, expires_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (namespace, key, pickle.dumps(value), self._generations.get(namespace, 0), expires_at)
+                    )
+                    self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+            self._count(namespace, 'stores')
+
+    def _remember(self, namespace: str, key: str, expires_at: float, value: Any) -> None:
+        self._memory[(namespace, key)] = (expires_at, value)
+        self._memory.move_to_end((namespace, key))
+        while len(self._memory) > self.max_entries:
+            evicted = self._memory.popitem(last=False)[0]
+            self._count(evicted[0], 'evictions')
+
+    def get_or_load(self, namespace: str, params: Iterable[Hashable], load: Callable[[], Any]) -> Any:
+        """
+        Cached result of the lookup with these parameters, calling
+        ``load()`` on a miss. Exceptions from ``load`` are not cached.
+        """
+        key = self.key(params)
+        epoch = self.epoch(namespace)
+        value = self.lookup(namespace, key)
+        if value is MISS:
+            value = load()
+            self.store(namespace, key, value, epoch)
+        return value
+
+    async def get_or_load_async(
+        self, namespace: str, params: Iterable[Hashable], load: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """``get_or_load`` for a coroutine loader"""
+        key = self.key(params)
+        epoch = self.epoch(namespace)
+        value = self.lookup(namespace, key)
+        if value is MISS:
+            value = await load()
+            self.store(namespace, key, value, epoch)
+        return value
+
+    # ========================================================================
+    # MAINTENANCE
+    # ========================================================================
+
+    def invalidate(self, namespaces: Optional[Iterable[str]] = None) -> None:
+        """Drop the entries of ``namespaces`` (every namespace by default) in all workers"""
+        with self._lock:
+            if namespaces is None:
+                namespaces = set(self.ttl_seconds) | {ns for ns, _ in self._memory}
+            namespaces = set(namespaces)
+            for entry_key in [k for k in self._memory if k[0] in namespaces]:
+                del self._memory[entry_key]
+            if self._conn is not None:
+                with self._conn:
+                    for namespace in namespaces:
+                        self._conn.execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+                        self._conn.execute(
+                            "INSERT INTO generations (namespace, generation) VALUES (?, 1) "
+                            "ON CONFLICT(namespace) DO UPDATE SET generation = generation + 1",
+                            (namespace,)
+                        )
+                self._synced_at = 0.0
+                self._sync_generations(time.time())
+            for namespace in namespaces:
+                self._epochs[namespace] = self.epoch(namespace) + 1
+                self._count(namespace, 'invalidations')
+        logger.info(f"Query cache invalidated: {', '.join(sorted(namespaces))}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rates and counters per namespace"""
+        with self._lock:
+            namespaces = {}
+            for namespace in sorted(set(self.ttl_seconds) | set(self._stats)):
+                counts = dict.fromkeys(
+                    ('memory_hits', 'shared_hits', 'misses', 'stores', 'evictions', 'invalidations'), 0
+                )
+                counts.update(self._stats.get(namespace, {}))
+                hits = counts['memory_hits'] + counts['shared_hits']
+                lookups = hits + counts['misses']
+                counts['hit_rate'] = hits / lookups if lookups else None
+                counts['ttl_seconds'] = self.ttl_seconds.get(namespace)
+                counts['memory_entries'] = sum(1 for ns, _ in self._memory if ns == namespace)
+                namespaces[namespace] = counts
+
+        hits = sum(n['memory_hits'] + n['shared_hits'] for n in namespaces.values())
+        lookups = hits + sum(n['misses'] for n in namespaces.values())
+        return {
+            'enabled': self.enabled,
+            'shared': self.shared_path,
+            'max_entries': self.max_entries,
+            'hit_rate': hits / lookups if lookups else None,
+            'namespaces': namespaces,
+        }
+
+
+_query_cache: Optional[QueryCache] = None
+_query_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> QueryCache:
+    global _query_cache
+    with _query_cache_lock:
+        if _query_cache is None:
+            _query_cache = QueryCache()
+        return _query_cache
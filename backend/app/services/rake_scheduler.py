@@ -1,16 +1,18 @@
 """
-Automated Daily Rake Formation Scheduler
+Automated Daily Rake Formation Planning
 Feature 5: Automated daily planning
+
+The jobs at the bottom of this module are run by app.services.job_scheduler.
 """
 
 import logging
 import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
 import os
 
+from ..config import settings
+
 logger = logging.getLogger(__name__)
 
 # ============================================================================
@@ -33,8 +35,8 @@ TRAINING_CONFIG = {
 class PlanHistoryManager:
     """Manages rake formation plan versions and history"""
     
-    def __init__(self, history_file: str = "backend/logs/plan_history.json"):
-        self.history_file = history_file
+    def __init__(self, history_file: Optional[str] = None):
+        self.history_file = history_file or str(settings.LOGS_DIR / "plan_history.json")
         self.history: List[Dict] = []
         self.load_history()
     
@@ -256,118 +258,39 @@ class AutomatedRakePlanner:
             # This would send email/SMS notification
 
 # ============================================================================
-# SCHEDULER
-# ============================================================================
-
-class RakeFormationScheduler:
-    """Manages the automated rake formation scheduler"""
-    
-    def __init__(self):
-        self.scheduler = BackgroundScheduler()
-        self.planner = AutomatedRakePlanner()
-        self.is_running = False
-    
-    def start(self):
-        """Start the scheduler"""
-        if self.is_running:
-            logger.warning("Scheduler already running")
-            return
-        
-        try:
-            # Parse planning time
-            hours, minutes = map(int, TRAINING_CONFIG['DAILY_PLANNING_TIME'].split(':'))
-            
-            # Add job
-            self.scheduler.add_job(
-                self.planner.generate_daily_plan,
-                CronTrigger(hour=hours, minute=minutes),
-                id='daily_rake_planning',
-                name='Daily Rake Formation Planning',
-                replace_existing=True,
-            )
-            
-            # Add performance check job (every hour)
-            self.scheduler.add_job(
-                self._check_performance,
-                CronTrigger(minute=0),
-                id='performance_check',
-                name='Performance Check',
-                replace_existing=True,
-            )
-            
-            self.scheduler.start()
-            self.is_running = True
-            
-            logger.info(f"✓ Rake Formation Scheduler started successfully")
-            logger.info(f"✓ Scheduled daily planning at {TRAINING_CONFIG['DAILY_PLANNING_TIME']}")
-            logger.info(f"✓ Scheduled hourly performance checks")
-            
-        except Exception as e:
-            logger.error(f"Failed to start scheduler: {e}")
-    
-    def stop(self):
-        """Stop the scheduler"""
-        if not self.is_running:
-            logger.warning("Scheduler not running")
-            return
-        
-        try:
-            self.scheduler.shutdown()
-            self.is_running = False
-            logger.info("Rake Formation Scheduler stopped")
-        except Exception as e:
-            logger.error(f"Error stopping scheduler: {e}")
-    
-    def trigger_now(self) -> Dict:
-        """Manually trigger planning immediately"""
-        logger.info("Manual trigger: Starting rake formation planning")
-        return self.planner.generate_daily_plan()
-    
-    def get_status(self) -> Dict:
-        """Get scheduler status"""
-        return {
-            "running": self.is_running,
-            "nextRunTime": str(self.scheduler.get_job('daily_rake_planning').next_run_time) if self.is_running else None,
-            "lastPlanTime": self.planner.last_plan_time.isoformat() if self.planner.last_plan_time else None,
-            "statistics": self.planner.history_manager.get_statistics(),
-        }
-    
-    def get_history(self) -> Dict:
-        """Get planning history"""
-        return {
-            "history": self.planner.history_manager.history,
-            "statistics": self.planner.history_manager.get_statistics(),
-        }
-    
-    def _check_performance(self):
-        """Check performance and trigger retraining if needed"""
-        logger.info("Checking rake formation system performance...")
-        
-        stats = self.planner.history_manager.get_statistics()
-        
-        if stats.get("successRate", 0) < TRAINING_CONFIG['MIN_ACCURACY_THRESHOLD'] * 100:
-            logger.warning(f"Success rate {stats['successRate']}% below threshold")
-            # Could trigger retraining here
-
-# ============================================================================
-# GLOBAL SCHEDULER INSTANCE
+# SCHEDULED JOBS
 # ============================================================================
 
-_scheduler_instance: Optional[RakeFormationScheduler] = None
+_planner_instance: Optional[AutomatedRakePlanner] = None
 
-def get_scheduler() -> RakeFormationScheduler:
-    """Get or create scheduler instance"""
-    global _scheduler_instance
-    if _scheduler_instance is None:
-        _scheduler_instance = RakeFormationScheduler()
-    return _scheduler_instance
+def get_planner() -> AutomatedRakePlanner:
+    """Get or create planner instance"""
+    global _planner_instance
+    if _planner_instance is None:
+        _planner_instance = AutomatedRakePlanner()
+    return _planner_instance
 
-def start_scheduler():
-    """Start the scheduler"""
-    scheduler = get_scheduler()
-    scheduler.start()
+def run_planning_job() -> Dict:
+    """Daily planning job, executed by the job scheduler's worker process"""
+    plan = get_planner().generate_daily_plan()
+    return {
+        "status": plan.get("status", "success"),
+        "planId": plan.get("planId"),
+        "totalCost": plan.get("totalCost"),
+        "error": plan.get("error"),
+    }
 
-def stop_scheduler():
-    """Stop the scheduler"""
-    scheduler = get_scheduler()
-    scheduler.stop()
+def run_performance_check_job() -> Dict:
+    """Check planning success rate against the configured threshold"""
+    logger.info("Checking rake formation system performance...")
+    
+    planner = get_planner()
+    planner.history_manager.load_history()
+    stats = planner.history_manager.get_statistics()
+    threshold = TRAINING_CONFIG['MIN_ACCURACY_THRESHOLD'] * 100
+    below_threshold = bool(stats) and stats["successRate"] < threshold
+    
+    if below_threshold:
+        logger.warning(f"Success rate {stats['successRate']}% below threshold")
+    
+    return {"status": "success", "belowThreshold": below_threshold, "statistics": stats}
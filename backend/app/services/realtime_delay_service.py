@@ -4,13 +4,26 @@ Real-time shipment tracking and delay prediction
 """
 
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterable
 from enum import Enum
+from pathlib import Path
+import json
 import logging
 import random
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from ..config import settings
 
 logger = logging.getLogger(__name__)
 
+# Shipments within this many hours of their expected delivery are at risk
+# (equivalent to a delay probability of 1 - remaining/12 above 0.5)
+AT_RISK_WINDOW_HOURS = 6
+
 class ShipmentStatus(str, Enum):
     PENDING = "pending"
     DISPATCHED = "dispatched"
@@ -19,31 +32,6 @@ class ShipmentStatus(str, Enum):
     DELIVERED = "delivered"
     CANCELLED = "cancelled"
 
-class DelayAlert:
-    """Delay alert object"""
-    def __init__(self, shipment_id: str, predicted_delay_hours: float, 
-                 confidence: float, reason: str):
-        self.id = f"DELAY-{int(datetime.now().timestamp() * 1000)}"
-        self.shipment_id = shipment_id
-        self.predicted_delay_hours = predicted_delay_hours
-        self.confidence = confidence
-        self.reason = reason
-        self.created_at = datetime.now()
-        self.status = "active"
-        self.mitigations = []
-    
-    def to_dict(self) -> Dict:
-        return {
-            'id': self.id,
-            'shipment_id': self.shipment_id,
-            'predicted_delay_hours': self.predicted_delay_hours,
-            'confidence': self.confidence,
-            'reason': self.reason,
-            'created_at': self.created_at.isoformat(),
-            'status': self.status,
-            'mitigations': self.mitigations
-        }
-
 class ShipmentTracking:
     """Shipment tracking object"""
     def __init__(self, shipment_id: str, origin: str, destination: str,
@@ -60,50 +48,6 @@ class ShipmentTracking:
         self.current_lon = 85.2871
         self.created_at = datetime.now()
         self.last_update = datetime.now()
-        self.delay_alerts = []
-    
-    def update_location(self, lat: float, lon: float, location_name: str):
-        """Update shipment location"""
-        self.current_lat = lat
-        self.current_lon = lon
-        self.current_location = location_name
-        self.last_update = datetime.now()
-    
-    def check_delay(self) -> Optional[DelayAlert]:
-        """Check if shipment is delayed"""
-        if self.status == ShipmentStatus.DELIVERED:
-            return None
-        
-        current_time = datetime.now()
-        time_remaining = (self.expected_delivery - current_time).total_seconds() / 3600
-        
-        if time_remaining < 0:
-            # Already delayed
-            delay_hours = abs(time_remaining)
-            alert = DelayAlert(
-                self.id,
-                delay_hours,
-                0.95,
-                "Shipment is already delayed"
-            )
-            self.delay_alerts.append(alert)
-            self.status = ShipmentStatus.DELAYED
-            return alert
-        elif time_remaining < 12:
-            # Potential delay
-            delay_probability = 1 - (time_remaining / 12)
-            if delay_probability > 0.5:
-                predicted_delay = random.uniform(2, 8)
-                alert = DelayAlert(
-                    self.id,
-                    predicted_delay,
-                    delay_probability,
-                    "High risk of delay detected"
-                )
-                self.delay_alerts.append(alert)
-                return alert
-        
-        return None
     
     def to_dict(self) -> Dict:
         return {
@@ -118,19 +62,261 @@ class ShipmentTracking:
             'current_lat': self.current_lat,
             'current_lon': self.current_lon,
             'created_at': self.created_at.isoformat(),
-            'last_update': self.last_update.isoformat(),
-            'delay_alerts': [a.to_dict() for a in self.delay_alerts]
+            'last_update': self.last_update.isoformat()
+        }
+
+class ShipmentStore:
+    """
+    SQLite-backed shipment table.
+    Timestamps are stored as epoch seconds and (status, expected_delivery) is
+    indexed, so status filters and the delay sweep never scan the whole table.
+    """
+    
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS shipments (
+            id TEXT PRIMARY KEY,
+            origin TEXT,
+            destination TEXT,
+            expected_delivery REAL NOT NULL,
+            actual_delivery REAL,
+            tonnage REAL,
+            status TEXT NOT NULL,
+            at_risk INTEGER NOT NULL DEFAULT 0,
+            current_location TEXT,
+            current_lat REAL,
+            current_lon REAL,
+            created_at REAL,
+            last_update REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_shipments_status_due
+            ON shipments (status, expected_delivery);
+        -- Entries end in the rowid, so this serves "WHERE status = ? ORDER BY rowid" without a sort
+        CREATE INDEX IF NOT EXISTS idx_shipments_status
+            ON shipments (status);
+        CREATE TABLE IF NOT EXISTS delay_alerts (
+            id TEXT PRIMARY KEY,
+            shipment_id TEXT NOT NULL,
+            predicted_delay_hours REAL,
+            confidence REAL,
+            reason TEXT,
+            created_at REAL,
+            status TEXT,
+            mitigations TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_delay_alerts_shipment
+            ON delay_alerts (shipment_id);
+    """
+    
+    _COLUMNS = ('id', 'origin', 'destination', 'expected_delivery', 'actual_delivery', 'tonnage',
+                'status', 'at_risk', 'current_location', 'current_lat', 'current_lon',
+                'created_at', 'last_update')
+    
+    # Statuses the sweep still has to watch
+    ACTIVE_STATUSES = (ShipmentStatus.PENDING.value, ShipmentStatus.DISPATCHED.value,
+                       ShipmentStatus.IN_TRANSIT.value)
+    
+    def __init__(self, path: str = ":memory:"):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self._SCHEMA)
+    
+    def upsert_many(self, shipments: Iterable[ShipmentTracking]):
+        """Insert or replace shipments in one transaction"""
+        rows = [(
+            s.id, s.origin, s.destination, s.expected_delivery.timestamp(),
+            s.actual_delivery.timestamp() if s.actual_delivery else None, s.tonnage,
+            ShipmentStatus(s.status).value, 0, s.current_location, s.current_lat, s.current_lon,
+            s.created_at.timestamp(), s.last_update.timestamp()
+        ) for s in shipments]
+        placeholders = ", ".join("?" for _ in self._COLUMNS)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO shipments ({', '.join(self._COLUMNS)}) VALUES ({placeholders})",
+                rows
+            )
+    
+    def update(self, shipment_id: str, **fields) -> bool:
+        """Update columns of one shipment, returning False when it does not exist"""
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"UPDATE shipments SET {assignments} WHERE id = ?",
+                (*fields.values(), shipment_id)
+            )
+        return cursor.rowcount > 0
+    
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM shipments").fetchone()[0]
+    
+    def count_by_status(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM shipments GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+    
+    def count_alerts(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM delay_alerts").fetchone()[0]
+    
+    def get(self, shipment_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM shipments WHERE id = ?", (shipment_id,)).fetchone()
+            return self._to_dicts([row])[0] if row else None
+    
+    def list_shipments(self, status: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """Most recently inserted shipments, optionally filtered by status via idx_shipments_status"""
+        with self._lock:
+            if status:
+                rows = self._conn.execute(
+                    "SELECT * FROM shipments WHERE status = ? ORDER BY rowid DESC LIMIT ?", (status, limit)
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT * FROM shipments ORDER BY rowid DESC LIMIT ?", (limit,)
+                ).fetchall()
+            return self._to_dicts(rows[::-1])
+    
+    def recent_alerts(self, limit: int = 100) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM delay_alerts ORDER BY rowid DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._alert_to_dict(r) for r in rows[::-1]]
+    
+    def sweep(self, now: Optional[float] = None) -> Dict[str, List[Dict]]:
+        """
+        Flag delayed and at-risk shipments in one pass.
+        Candidates come from one indexed range query per active status; the
+        classification runs on NumPy arrays and all updates/alerts are written
+        in a single transaction. Alerts are raised only on state transitions.
+        """
+        now = time.time() if now is None else now
+        horizon = now + AT_RISK_WINDOW_HOURS * 3600
+        placeholders = ", ".join("?" for _ in self.ACTIVE_STATUSES)
+        
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                f"SELECT id, expected_delivery, at_risk FROM shipments "
+                f"WHERE status IN ({placeholders}) AND expected_delivery < ?",
+                (*self.ACTIVE_STATUSES, horizon)
+            ).fetchall()
+            if not rows:
+                return {'delayed': [], 'at_risk': []}
+            
+            ids = np.array([r[0] for r in rows], dtype=object)
+            expected = np.fromiter((r[1] for r in rows), dtype=float, count=len(rows))
+            flagged = np.fromiter((r[2] for r in rows), dtype=bool, count=len(rows))
+            
+            remaining_hours = (expected - now) / 3600
+            delayed = remaining_hours < 0
+            at_risk = ~delayed & ~flagged
+            
+            alerts = []
+            created_ms = int(now * 1000)
+            for shipment_id, hours in zip(ids[delayed], remaining_hours[delayed]):
+                alerts.append((f"DELAY-{created_ms}-{shipment_id}", shipment_id, float(-hours), 0.95,
+                               "Shipment is already delayed", now, "active", "[]"))
+            probabilities = 1 - remaining_hours[at_risk] / 12
+            for shipment_id, probability in zip(ids[at_risk], probabilities):
+                alerts.append((f"DELAY-{created_ms}-{shipment_id}", shipment_id, random.uniform(2, 8),
+                               float(probability), "High risk of delay detected", now, "active", "[]"))
+            
+            self._conn.executemany(
+                "UPDATE shipments SET status = ?, at_risk = 1 WHERE id = ?",
+                [(ShipmentStatus.DELAYED.value, i) for i in ids[delayed]]
+            )
+            self._conn.executemany(
+                "UPDATE shipments SET at_risk = 1 WHERE id = ?", [(i,) for i in ids[at_risk]]
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO delay_alerts VALUES (?, ?, ?, ?, ?, ?, ?, ?)", alerts
+            )
+        
+        delayed_count = int(delayed.sum())
+        return {
+            'delayed': [self._alert_tuple_to_dict(a) for a in alerts[:delayed_count]],
+            'at_risk': [self._alert_tuple_to_dict(a) for a in alerts[delayed_count:]],
+        }
+    
+    def _to_dicts(self, rows: List[sqlite3.Row]) -> List[Dict]:
+        """Build API dicts, loading attached alerts by indexed lookup (caller holds the lock)"""
+        if not rows:
+            return []
+        ids = [r['id'] for r in rows]
+        alerts_by_shipment: Dict[str, List[Dict]] = {}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            alert_rows = self._conn.execute(
+                f"SELECT * FROM delay_alerts WHERE shipment_id IN ({', '.join('?' for _ in chunk)}) "
+                f"ORDER BY rowid", chunk
+            ).fetchall()
+            for a in alert_rows:
+                alerts_by_shipment.setdefault(a['shipment_id'], []).append(self._alert_to_dict(a))
+        
+        return [{
+            'id': r['id'],
+            'origin': r['origin'],
+            'destination': r['destination'],
+            'expected_delivery': _iso(r['expected_delivery']),
+            'actual_delivery': _iso(r['actual_delivery']),
+            'tonnage': r['tonnage'],
+            'status': r['status'],
+            'at_risk': bool(r['at_risk']),
+            'current_location': r['current_location'],
+            'current_lat': r['current_lat'],
+            'current_lon': r['current_lon'],
+            'created_at': _iso(r['created_at']),
+            'last_update': _iso(r['last_update']),
+            'delay_alerts': alerts_by_shipment.get(r['id'], [])
+        } for r in rows]
+    
+    @staticmethod
+    def _alert_to_dict(row: sqlite3.Row) -> Dict:
+        return {
+            'id': row['id'],
+            'shipment_id': row['shipment_id'],
+            'predicted_delay_hours': row['predicted_delay_hours'],
+            'confidence': row['confidence'],
+            'reason': row['reason'],
+            'created_at': _iso(row['created_at']),
+            'status': row['status'],
+            'mitigations': json.loads(row['mitigations'] or "[]")
+        }
+    
+    @staticmethod
+    def _alert_tuple_to_dict(alert: tuple) -> Dict:
+        alert_id, shipment_id, hours, confidence, reason, created_at, status, mitigations = alert
+        return {
+            'id': alert_id,
+            'shipment_id': shipment_id,
+            'predicted_delay_hours': hours,
+            'confidence': confidence,
+            'reason': reason,
+            'created_at': _iso(created_at),
+            'status': status,
+            'mitigations': json.loads(mitigations)
         }
 
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp).isoformat() if timestamp is not None else None
+
 class RealtimeDelayService:
     """Service for real-time delay updates"""
     
-    def __init__(self):
+    def __init__(self, store_path: Optional[str] = None,
+                 sweep_interval_seconds: Optional[float] = None):
         self.logger = logging.getLogger(__name__)
-        self.shipments = {}
-        self.delay_alerts = []
-        self.alert_history = []
-        self._initialize_shipments()
+        self.store = ShipmentStore(str(store_path or settings.SHIPMENT_STORE_PATH))
+        self.sweep_interval_seconds = (settings.DELAY_SWEEP_INTERVAL_SECONDS
+                                       if sweep_interval_seconds is None else sweep_interval_seconds)
+        self._last_sweep = 0.0
+        if self.store.count() == 0:
+            self._initialize_shipments()
     
     def _initialize_shipments(self):
         """Initialize with sample shipments"""
@@ -140,6 +326,7 @@ class RealtimeDelayService:
             ('Bokaro', 'Patna', 25.5941, 85.1376),
         ]
         
+        samples = []
         for i, (origin, dest, lat, lon) in enumerate(routes):
             shipment_id = f"SHIP-{2024001 + i}"
             expected_delivery = datetime.now() + timedelta(days=random.randint(3, 7))
@@ -154,28 +341,55 @@ class RealtimeDelayService:
             tracking.status = ShipmentStatus.IN_TRANSIT
             tracking.current_lat = lat + random.uniform(-0.5, 0.5)
             tracking.current_lon = lon + random.uniform(-0.5, 0.5)
-            
-            self.shipments[shipment_id] = tracking
+            samples.append(tracking)
+        
+        self.store.upsert_many(samples)
+    
+    def add_shipments(self, shipments: List[ShipmentTracking]) -> int:
+        """Register (or replace) shipments in bulk"""
+        self.store.upsert_many(shipments)
+        return len(shipments)
+    
+    def sweep_delays(self) -> Dict:
+        """Run the delay sweep over all active shipments"""
+        result = self.store.sweep()
+        self._last_sweep = time.monotonic()
+        if result['delayed'] or result['at_risk']:
+            self.logger.info(
+                f"Delay sweep flagged {len(result['delayed'])} delayed, {len(result['at_risk'])} at-risk shipments"
+            )
+        return {
+            'newly_delayed': len(result['delayed']),
+            'newly_at_risk': len(result['at_risk']),
+            'alerts': result['delayed'] + result['at_risk'],
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def _maybe_sweep(self):
+        """Sweep when the last one is older than the configured interval"""
+        if time.monotonic() - self._last_sweep >= self.sweep_interval_seconds:
+            self.sweep_delays()
     
     def track_shipment(self, shipment_id: str, lat: float, lon: float,
                       location_name: str) -> Dict:
         """Track shipment location"""
         try:
-            if shipment_id not in self.shipments:
+            updated = self.store.update(
+                shipment_id,
+                current_lat=lat,
+                current_lon=lon,
+                current_location=location_name,
+                last_update=time.time()
+            )
+            if not updated:
                 raise ValueError(f"Shipment {shipment_id} not found")
             
-            shipment = self.shipments[shipment_id]
-            shipment.update_location(lat, lon, location_name)
-            
             # Check for delays
-            delay_alert = shipment.check_delay()
-            if delay_alert:
-                self.delay_alerts.append(delay_alert)
-                self.alert_history.append(delay_alert)
+            self._maybe_sweep()
             
             self.logger.info(f"✓ Updated location for {shipment_id}: {location_name}")
             
-            return shipment.to_dict()
+            return self.store.get(shipment_id)
         
         except Exception as e:
             self.logger.error(f"Error tracking shipment: {e}")
@@ -184,16 +398,17 @@ class RealtimeDelayService:
     def mark_delivered(self, shipment_id: str) -> Dict:
         """Mark shipment as delivered"""
         try:
-            if shipment_id not in self.shipments:
+            updated = self.store.update(
+                shipment_id,
+                status=ShipmentStatus.DELIVERED.value,
+                actual_delivery=time.time()
+            )
+            if not updated:
                 raise ValueError(f"Shipment {shipment_id} not found")
             
-            shipment = self.shipments[shipment_id]
-            shipment.status = ShipmentStatus.DELIVERED
-            shipment.actual_delivery = datetime.now()
-            
             self.logger.info(f"✓ Marked {shipment_id} as delivered")
             
-            return shipment.to_dict()
+            return self.store.get(shipment_id)
         
         except Exception as e:
             self.logger.error(f"Error marking delivered: {e}")
@@ -201,34 +416,29 @@ class RealtimeDelayService:
     
     def get_shipment(self, shipment_id: str) -> Optional[Dict]:
         """Get shipment details"""
-        shipment = self.shipments.get(shipment_id)
-        if shipment:
-            return shipment.to_dict()
-        return None
+        return self.store.get(shipment_id)
     
     def get_all_shipments(self, status: Optional[str] = None, limit: int = 100) -> List[Dict]:
         """Get all shipments"""
-        shipments = list(self.shipments.values())
-        
-        if status:
-            shipments = [s for s in shipments if s.status == status]
-        
-        return [s.to_dict() for s in shipments[-limit:]]
+        self._maybe_sweep()
+        return self.store.list_shipments(status, limit)
     
-    def get_delayed_shipments(self) -> List[Dict]:
+    def get_delayed_shipments(self, limit: int = 1000) -> List[Dict]:
         """Get all delayed shipments"""
-        delayed = [s for s in self.shipments.values() if s.status == ShipmentStatus.DELAYED]
-        return [s.to_dict() for s in delayed]
+        self._maybe_sweep()
+        return self.store.list_shipments(ShipmentStatus.DELAYED.value, limit)
     
     def get_delay_alerts(self, limit: int = 100) -> List[Dict]:
         """Get delay alerts"""
-        return [a.to_dict() for a in self.alert_history[-limit:]]
+        return self.store.recent_alerts(limit)
     
     def get_status(self) -> Dict:
         """Get realtime delay service status"""
-        total_shipments = len(self.shipments)
-        delayed_count = len([s for s in self.shipments.values() if s.status == ShipmentStatus.DELAYED])
-        delivered_count = len([s for s in self.shipments.values() if s.status == ShipmentStatus.DELIVERED])
+        self._maybe_sweep()
+        counts = self.store.count_by_status()
+        total_shipments = sum(counts.values())
+        delayed_count = counts.get(ShipmentStatus.DELAYED.value, 0)
+        delivered_count = counts.get(ShipmentStatus.DELIVERED.value, 0)
         
         return {
             'status': 'running',
@@ -236,6 +446,6 @@ class RealtimeDelayService:
             'in_transit': total_shipments - delayed_count - delivered_count,
             'delayed_shipments': delayed_count,
             'delivered_shipments': delivered_count,
-            'total_alerts': len(self.alert_history),
+            'total_alerts': self.store.count_alerts(),
             'timestamp': datetime.now().isoformat()
         }
@@ -0,0 +1,249 @@
+"""
+Result Cache
+Content-addressed cache for optimizer results.
+
+Keys are SHA-256 hashes of a canonical form of the request: dict keys
+sorted, floats rounded, lists of records (orders, vehicles) sorted so
+resubmitting the same order book in another order hits, and volatile fields
+such as timestamps dropped. The fingerprint of the loaded models and the
+solver parameters are hashed in as well, so a retrained model or a new time
+limit never serves an old plan.
+
+Results live in an in-memory LRU in front of a SQLite tier with a TTL; the
+disk tier is shared by all workers and survives restarts. Cached values are
+stored as JSON, so every hit returns a fresh copy callers may modify.
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+VOLATILE_KEYS = frozenset({'timestamp', 'generated_at', 'created_at', 'request_id'})
+
+
+def canonicalize(value: Any, precision: Optional[int] = None) -> Any:
+    """Order-independent, rounded form of a JSON-like value"""
+    precision = settings.RESULT_CACHE_PRECISION if precision is None else precision
+    if isinstance(value, dict):
+        return {
+            str(k): canonicalize(v, precision)
+            for k, v in sorted(value.items(), key=lambda item: str(item[0]))
+            if k not in VOLATILE_KEYS
+        }
+    if isinstance(value, (list, tuple)):
+        items = [canonicalize(v, precision) for v in value]
+        if items and all(isinstance(v, dict) for v in items):
+            # Records: their order carries no meaning
+            items.sort(key=lambda v: json.dumps(v, sort_keys=True, default=str))
+        return items
+    if isinstance(value, float):
+        rounded = round(value, precision)
+        return int(rounded) if rounded.is_integer() else rounded
+    if isinstance(value, (str, int, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def cache_key(namespace: str, payload: Any, context: Optional[Dict[str, Any]] = None) -> str:
+    """SHA-256 of the canonical payload and context (model fingerprint, solver parameters)"""
+    document = json.dumps(
+        [namespace, canonicalize(payload), canonicalize(context or {})],
+        sort_keys=True, separators=(',', ':'), default=str,
+    )
+    return hashlib.sha256(document.encode('utf-8')).hexdigest()
+
+
+def model_fingerprint() -> str:
+    """Hash of the model files on disk and of the registry's loaded versions"""
+    from ..utils.model_registry import model_registry
+
+    parts = []
+    models_dir = Path(settings.MODELS_DIR)
+    if models_dir.exists():
+        for path in sorted(models_dir.glob("*.pkl")):
+            stat = path.stat()
+            parts.append((path.name, stat.st_mtime_ns, stat.st_size))
+    parts.append(sorted(model_registry.versions.items()))
+    parts.append(sorted(model_registry.load_times.items()))
+    return hashlib.sha256(json.dumps(parts, default=str).encode('utf-8')).hexdigest()[:16]
+
+
+class ResultCache:
+    """
+    Two-tier cache of JSON-serializable results: an LRU of
+    ``max_entries`` in memory over a SQLite table. Entries expire
+    ``ttl_seconds`` after they were computed, in both tiers.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS results (
+            key TEXT PRIMARY KEY,
+            namespace TEXT NOT NULL,
+            value TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_results_expires ON results (expires_at);
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = ":memory:",
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+    ):
+        self.max_entries = max_entries or settings.RESULT_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds or settings.RESULT_CACHE_TTL_SECONDS
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(
+            ('memory_hits', 'disk_hits', 'misses', 'stores', 'evictions', 'expired', 'invalidations'), 0
+        )
+
+        self.path = path
+        self._conn = None
+        if path:
+            if path != ":memory:":
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(self._SCHEMA)
+
+    # ========================================================================
+    # LOOKUP
+    # ========================================================================
+
+    def get(self, key: str) -> Tuple[Optional[Any], Optional[str]]:
+        """(value, tier) of a live entry, tier being "memory" or "disk"; (None, None) on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, text = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats['memory_hits'] += 1
+                    return json.loads(text), 'memory'
+                del self._memory[key]
+                self._stats['expired'] += 1
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    text, expires_at = row
+                    if expires_at > now:
+                        self._remember(key, expires_at, text)
+                        self._stats['disk_hits'] += 1
+                        return json.loads(text), 'disk'
+                    with self._conn:
+                        self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                    self._stats['expired'] += 1
+
+            self._stats['misses'] += 1
+            return None, None
+
+    def put(self, key: str, value: Any, namespace: str = "") -> None:
+        text = json.dumps(value, default=str)
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._remember(key, expires_at, text)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO results (key, namespace, value, created_at, expires_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (key, namespace, text, now, expires_at)
+                    )
+                    self._conn.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+            self._stats['stores'] += 1
+
+    def _remember(self, key: str, expires_at: float, text: str) -> None:
+        self._memory[key] = (expires_at, text)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def get_or_compute(
+        self,
+        namespace: str,
+        payload: Any,
+        compute: Callable[[], Any],
+        context: Optional[Dict[str, Any]] = None,
+        cacheable: Callable[[Any], bool] = lambda value: True,
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """
+        Cached result of ``compute()`` for this payload and context, plus
+        ``{'hit', 'tier', 'key'}`` describing where it came from. Failures
+        of ``compute``, and results ``cacheable`` rejects, are not stored.
+        """
+        key = cache_key(namespace, payload, context)
+        value, tier = self.get(key)
+        if tier is not None:
+            return value, {'hit': True, 'tier': tier, 'key': key}
+        value = compute()
+        if cacheable(value):
+            self.put(key, value, namespace)
+        return value, {'hit': False, 'tier': None, 'key': key}
+
+    # ========================================================================
+    # MAINTENANCE
+    # ========================================================================
+
+    def invalidate(self, namespace: Optional[str] = None) -> int:
+        """Drop every entry (or those of one namespace); returns the disk rows removed"""
+        with self._lock:
+            removed = 0
+            if self._conn is not None:
+                with self._conn:
+                    if namespace is None:
+                        removed = self._conn.execute("DELETE FROM results").rowcount
+                    else:
+                        removed = self._conn.execute(
+                            "DELETE FROM results WHERE namespace = ?", (namespace,)
+                        ).rowcount
+            # Memory entries do not record their namespace; clearing them all is cheap
+            self._memory.clear()
+            self._stats['invalidations'] += 1
+        logger.info(f"Result cache invalidated ({namespace or 'all namespaces'}, {removed} stored results)")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+            stats['disk_entries'] = (
+                self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] if self._conn else 0
+            )
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else None
+        stats['max_entries'] = self.max_entries
+        stats['ttl_seconds'] = self.ttl_seconds
+        return stats
+
+
+_result_cache: Optional[ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = ResultCache(str(settings.RESULT_CACHE_DB_PATH))
+        return _result_cache
@@ -0,0 +1,277 @@
+"""
+Rollup Store
+Incrementally maintained dispatch and optimizer aggregates for reporting.
+
+Every dispatch insert and every optimizer run adds its figures to hourly,
+daily and monthly buckets keyed by route (destination), material and
+transport mode. Reports and KPIs then sum a handful of buckets instead of
+rescanning dispatch history, so their cost grows with the reporting period,
+not with the number of dispatches.
+
+Run-level counters (optimizer runs, solver time, fallbacks) have no route,
+material or mode and are stored under the "*" dimension values.
+
+Dispatches arrive through db.on_dispatch_inserted, registered when this
+module is imported.
+"""
+
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import logging
+import sqlite3
+import threading
+
+from .. import db
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+GRAINS = {
+    'hourly': '%Y-%m-%dT%H',
+    'daily': '%Y-%m-%d',
+    'monthly': '%Y-%m',
+}
+
+ALL = "*"
+
+METRICS = (
+    # Dispatches (db.on_dispatch_inserted)
+    'dispatches',
+    'dispatched_tonnes',
+    'dispatch_cost',
+    'delay_hours',
+    'on_time_dispatches',
+    # Optimizer plans (OptimizeService.run_optimizer)
+    'planned_rakes',
+    'planned_trucks',
+    'planned_wagons',
+    'planned_tonnes',
+    'planned_rail_tonnes',
+    'planned_cost',
+    # Run-level counters, stored under ALL
+    'optimizer_runs',
+    'fallback_runs',
+    'solver_seconds',
+)
+
+
+def bucket_key(grain: str, when: datetime) -> str:
+    return when.strftime(GRAINS[grain])
+
+
+def _event_time(value: Any) -> datetime:
+    """Datetime of an event; dates fall in their first hour, missing values are now."""
+    if value is None:
+        return datetime.now()
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    return datetime.fromisoformat(str(value))
+
+
+def _normalize_mode(mode: Any) -> str:
+    mode = str(mode or 'unknown').strip().lower()
+    return {'rake': 'rail', 'train': 'rail', 'truck': 'road'}.get(mode, mode)
+
+
+class RollupStore:
+    """
+    SQLite table of additive aggregates, one row per
+    (grain, bucket, route, material, mode). Updates are upserts that add to the
+    stored counters, so concurrent API workers can record into the same file.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS rollups (
+            grain TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            route TEXT NOT NULL,
+            material TEXT NOT NULL,
+            mode TEXT NOT NULL,
+            {metrics},
+            PRIMARY KEY (grain, bucket, route, material, mode)
+        );
+    """.format(metrics=",\n            ".join(f"{m} REAL NOT NULL DEFAULT 0" for m in METRICS))
+
+    _UPSERT = """
+        INSERT INTO rollups (grain, bucket, route, material, mode, {columns})
+        VALUES (?, ?, ?, ?, ?, {placeholders})
+        ON CONFLICT (grain, bucket, route, material, mode) DO UPDATE SET {updates}
+    """.format(
+        columns=", ".join(METRICS),
+        placeholders=", ".join("?" for _ in METRICS),
+        updates=", ".join(f"{m} = {m} + excluded.{m}" for m in METRICS),
+    )
+
+    def __init__(self, path: str = ":memory:"):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self._SCHEMA)
+
+    # ========================================================================
+    # RECORDING
+    # ========================================================================
+
+    def record_dispatch(self, dispatch_data: Dict[str, Any]):
+        """Fold one dispatch_history row (as passed to db.insert_dispatch_record) into the rollups"""
+        delay = float(dispatch_data.get('estimated_delay_hours') or 0.0)
+        self._upsert([(
+            _event_time(dispatch_data.get('dispatch_date')),
+            str(dispatch_data.get('destination') or 'unknown'),
+            str(dispatch_data.get('material_type') or dispatch_data.get('material') or 'unknown'),
+            _normalize_mode(dispatch_data.get('transport_mode')),
+            {
+                'dispatches': 1,
+                'dispatched_tonnes': float(dispatch_data.get('tonnes_dispatched') or 0.0),
+                'dispatch_cost': float(dispatch_data.get('estimated_cost') or 0.0),
+                'delay_hours': delay,
+                'on_time_dispatches': 1 if delay <= settings.ROLLUP_ON_TIME_DELAY_HOURS else 0,
+            },
+        )])
+
+    def record_optimizer_run(self, solution: Dict[str, Any], when: Optional[datetime] = None):
+        """Fold the rakes and trucks of an optimizer solution into the rollups"""
+        when = when or datetime.now()
+        rows = [(when, ALL, ALL, ALL, {
+            'optimizer_runs': 1,
+            'fallback_runs': 1 if solution.get('solver_status') == 'GREEDY_FALLBACK' else 0,
+            'solver_seconds': float(solution.get('solver_time_seconds') or 0.0),
+        })]
+        for mode, key, count_metric in (('rail', 'rakes', 'planned_rakes'), ('road', 'trucks', 'planned_trucks')):
+            for item in solution.get(key, []):
+                metrics = {
+                    count_metric: 1,
+                    'planned_tonnes': float(item.get('tonnes') or 0.0),
+                    'planned_cost': float(item.get('estimated_cost') or 0.0),
+                }
+                if mode == 'rail':
+                    metrics['planned_wagons'] = float(item.get('wagons') or 0.0)
+                    metrics['planned_rail_tonnes'] = metrics['planned_tonnes']
+                rows.append((
+                    when,
+                    str(item.get('destination') or 'unknown'),
+                    str(item.get('material_type') or 'unknown'),
+                    mode,
+                    metrics,
+                ))
+        self._upsert(rows)
+
+    def _upsert(self, rows: Iterable[Tuple[datetime, str, str, str, Dict[str, float]]]):
+        params = []
+        for when, route, material, mode, metrics in rows:
+            values = [float(metrics.get(m, 0.0)) for m in METRICS]
+            for grain in GRAINS:
+                params.append((grain, bucket_key(grain, when), route, material, mode, *values))
+        with self._lock, self._conn:
+            self._conn.executemany(self._UPSERT, params)
+
+    # ========================================================================
+    # QUERIES
+    # ========================================================================
+
+    def summarize(self, grain: str, start: datetime, end: datetime) -> Dict[str, Any]:
+        """
+        Totals and per-route/material/mode breakdowns over the buckets of
+        ``grain`` from ``start`` to ``end`` inclusive.
+        """
+        first, last = bucket_key(grain, start), bucket_key(grain, end)
+        sums = ", ".join(f"SUM({m}) AS {m}" for m in METRICS)
+        with self._lock:
+            totals = self._conn.execute(
+                f"SELECT COUNT(DISTINCT bucket) AS buckets, {sums} FROM rollups "
+                "WHERE grain = ? AND bucket BETWEEN ? AND ?",
+                (grain, first, last)
+            ).fetchone()
+            breakdowns = {}
+            for dimension in ('route', 'material', 'mode'):
+                rows = self._conn.execute(
+                    f"SELECT {dimension} AS key, {sums} FROM rollups "
+                    f"WHERE grain = ? AND bucket BETWEEN ? AND ? AND {dimension} != ? "
+                    f"GROUP BY {dimension} ORDER BY {dimension}",
+                    (grain, first, last, ALL)
+                ).fetchall()
+                breakdowns[dimension] = {row['key']: self._metrics(row) for row in rows}
+
+        summary = self._metrics(totals)
+        summary.update({
+            'grain': grain,
+            'from': first,
+            'to': last,
+            'buckets': totals['buckets'],
+            'by_route': breakdowns['route'],
+            'by_material': breakdowns['material'],
+            'by_mode': breakdowns['mode'],
+        })
+        return summary
+
+    def series(self, grain: str, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """Per-bucket totals from ``start`` to ``end``, oldest first"""
+        sums = ", ".join(f"SUM({m}) AS {m}" for m in METRICS)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT bucket, {sums} FROM rollups WHERE grain = ? AND bucket BETWEEN ? AND ? "
+                "GROUP BY bucket ORDER BY bucket",
+                (grain, bucket_key(grain, start), bucket_key(grain, end))
+            ).fetchall()
+        return [dict(self._metrics(row), bucket=row['bucket']) for row in rows]
+
+    @staticmethod
+    def _metrics(row: sqlite3.Row) -> Dict[str, Any]:
+        values = {m: row[m] or 0.0 for m in METRICS}
+        for m in ('dispatches', 'on_time_dispatches', 'planned_rakes', 'planned_trucks',
+                  'planned_wagons', 'optimizer_runs', 'fallback_runs'):
+            values[m] = int(values[m])
+        values.update(derived_kpis(values))
+        return values
+
+
+def derived_kpis(totals: Dict[str, float]) -> Dict[str, Optional[float]]:
+    """Ratios computed from summed counters; None when the denominator is empty"""
+    dispatches = totals.get('dispatches', 0)
+    tonnes = totals.get('dispatched_tonnes', 0.0)
+    wagons = totals.get('planned_wagons', 0)
+    planned_tonnes = totals.get('planned_tonnes', 0.0)
+    return {
+        'on_time_rate': totals['on_time_dispatches'] / dispatches if dispatches else None,
+        'avg_delay_hours': totals['delay_hours'] / dispatches if dispatches else None,
+        'cost_per_tonne': totals['dispatch_cost'] / tonnes if tonnes else None,
+        'planned_cost_per_tonne': totals['planned_cost'] / planned_tonnes if planned_tonnes else None,
+        'avg_solver_seconds': (
+            totals['solver_seconds'] / totals['optimizer_runs'] if totals.get('optimizer_runs') else None
+        ),
+        'wagon_utilization': (
+            totals['planned_rail_tonnes'] / (wagons * settings.WAGON_CAPACITY_TONNES) if wagons else None
+        ),
+    }
+
+
+def month_bounds(year: int, month: int) -> Tuple[datetime, datetime]:
+    start = datetime(year, month, 1)
+    next_month = datetime(year + month // 12, month % 12 + 1, 1)
+    return start, next_month - timedelta(days=1)
+
+
+_rollup_store: Optional[RollupStore] = None
+_rollup_store_lock = threading.Lock()
+
+
+def get_rollup_store() -> RollupStore:
+    global _rollup_store
+    with _rollup_store_lock:
+        if _rollup_store is None:
+            _rollup_store = RollupStore(str(settings.ROLLUP_DB_PATH))
+        return _rollup_store
+
+
+@db.on_dispatch_inserted
+def _record_dispatch(dispatch_data: Dict[str, Any]) -> None:
+    get_rollup_store().record_dispatch(dispatch_data)
@@ -0,0 +1,325 @@
+"""
+SAP Delta Sync
+Concurrent, watermark-based pulls from an SAP gateway into a local store.
+
+Each entity feed is read as
+``GET {base_url}{path}?changed_since=<iso>&$orderby=changed_at&$top=<n>&$skip=<k>``
+returning ``{"results": [...]}`` ordered by ``changed_at``, where
+``changed_since`` is inclusive. A page shorter than ``$top`` ends the feed.
+
+Pages are keyset-paged on ``changed_at``: every request starts at the last
+timestamp seen and skips only the records already read at exactly that
+timestamp, so records updated mid-sync are never skipped the way plain
+offset paging would skip them. After each page its records are bulk-upserted
+and the entity's high-water mark moves to the newest ``changed_at`` stored,
+so an interrupted sync resumes where it stopped and the next sync pulls
+only what changed since.
+
+All entity feeds run concurrently over one pooled ``httpx.AsyncClient``, so
+a full sync takes as long as the slowest delta rather than the sum of all
+pulls. Transport errors, timeouts, 429 and 5xx responses are retried with
+exponential backoff.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+import httpx
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SyncEntity:
+    """One SAP entity feed"""
+    name: str          # Result key, e.g. "purchase_orders"
+    entity_type: str   # SAPEntityType value stored with each record
+    path: str          # Gateway path of the feed
+    key: str           # Business key field of a record
+
+
+ENTITIES = (
+    SyncEntity('purchase_orders', 'purchase_order', '/purchase-orders', 'po_number'),
+    SyncEntity('sales_orders', 'sales_order', '/sales-orders', 'so_number'),
+    SyncEntity('inventory_items', 'inventory', '/inventory', 'material_code'),
+    SyncEntity('suppliers', 'supplier', '/suppliers', 'supplier_code'),
+)
+
+CHANGED_FIELD = 'changed_at'
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class SAPSyncError(Exception):
+    """An entity feed failed after all retries"""
+
+
+# ============================================================================
+# LOCAL STORE
+# ============================================================================
+
+class SAPSyncStore:
+    """
+    SQLite copy of synced SAP records, one row per (entity_type, entity_id),
+    plus the high-water mark of every entity feed.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sap_records (
+            entity_type TEXT NOT NULL,
+            entity_id TEXT NOT NULL,
+            changed_at TEXT,
+            data TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            synced_at TEXT NOT NULL,
+            PRIMARY KEY (entity_type, entity_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_sap_records_synced ON sap_records (synced_at);
+        CREATE INDEX IF NOT EXISTS idx_sap_records_entity_id ON sap_records (entity_id);
+
+        CREATE TABLE IF NOT EXISTS sap_watermarks (
+            entity_type TEXT PRIMARY KEY,
+            watermark TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+    """
+
+    _UPSERT = """
+        INSERT INTO sap_records (entity_type, entity_id, changed_at, data, created_at, synced_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (entity_type, entity_id) DO UPDATE SET
+            changed_at = excluded.changed_at,
+            data = excluded.data,
+            synced_at = excluded.synced_at
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self._SCHEMA)
+
+    def upsert_many(
+        self,
+        entity_type: str,
+        key: str,
+        records: Iterable[Dict[str, Any]],
+        watermark: Optional[str] = None,
+    ) -> int:
+        """Insert or update records by business key; with ``watermark``, the
+        entity's high-water mark moves in the same transaction."""
+        now = datetime.now().isoformat()
+        params = [
+            (entity_type, str(r[key]), r.get(CHANGED_FIELD), json.dumps(r, default=str), now, now)
+            for r in records
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(self._UPSERT, params)
+            if watermark is not None:
+                self._conn.execute(
+                    "INSERT INTO sap_watermarks (entity_type, watermark, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT (entity_type) DO UPDATE SET "
+                    "watermark = MAX(watermark, excluded.watermark), updated_at = excluded.updated_at",
+                    (entity_type, watermark, now)
+                )
+        return len(params)
+
+    def get_watermark(self, entity_type: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT watermark FROM sap_watermarks WHERE entity_type = ?", (entity_type,)
+            ).fetchone()
+        return row['watermark'] if row else None
+
+    def watermarks(self) -> Dict[str, str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT entity_type, watermark FROM sap_watermarks").fetchall()
+        return {row['entity_type']: row['watermark'] for row in rows}
+
+    def get(self, entity_id: str, entity_type: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        query = "SELECT * FROM sap_records WHERE entity_id = ?"
+        params: Tuple[Any, ...] = (entity_id,)
+        if entity_type:
+            query += " AND entity_type = ?"
+            params += (entity_type,)
+        with self._lock:
+            row = self._conn.execute(query + " ORDER BY synced_at DESC LIMIT 1", params).fetchone()
+        return self._record(row) if row else None
+
+    def recent(self, entity_type: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recently synced records, oldest first"""
+        query = "SELECT * FROM sap_records"
+        params: Tuple[Any, ...] = ()
+        if entity_type:
+            query += " WHERE entity_type = ?"
+            params = (entity_type,)
+        with self._lock:
+            rows = self._conn.execute(
+                query + " ORDER BY synced_at DESC, rowid DESC LIMIT ?", params + (limit,)
+            ).fetchall()
+        return [self._record(row) for row in reversed(rows)]
+
+    def count(self, entity_type: Optional[str] = None) -> int:
+        query = "SELECT COUNT(*) FROM sap_records"
+        params: Tuple[Any, ...] = ()
+        if entity_type:
+            query += " WHERE entity_type = ?"
+            params = (entity_type,)
+        with self._lock:
+            return self._conn.execute(query, params).fetchone()[0]
+
+    @staticmethod
+    def _record(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            'id': f"{row['entity_type']}:{row['entity_id']}",
+            'entity_type': row['entity_type'],
+            'entity_id': row['entity_id'],
+            'data': json.loads(row['data']),
+            'changed_at': row['changed_at'],
+            'created_at': row['created_at'],
+            'status': 'synced',
+            'last_sync': row['synced_at'],
+        }
+
+
+# ============================================================================
+# SYNC ENGINE
+# ============================================================================
+
+class SAPSyncEngine:
+    """Pulls the deltas of all entity feeds concurrently into a SAPSyncStore"""
+
+    def __init__(
+        self,
+        store: SAPSyncStore,
+        base_url: str,
+        auth: Optional[Tuple[str, str]] = None,
+        page_size: Optional[int] = None,
+        max_connections: Optional[int] = None,
+        timeout_seconds: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        backoff_seconds: Optional[float] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.store = store
+        self.base_url = base_url.rstrip('/')
+        self.auth = auth
+        self.page_size = page_size or settings.SAP_PAGE_SIZE
+        self.max_connections = max_connections or settings.SAP_MAX_CONNECTIONS
+        self.timeout_seconds = timeout_seconds or settings.SAP_TIMEOUT_SECONDS
+        self.max_retries = settings.SAP_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_seconds = (
+            settings.SAP_RETRY_BACKOFF_SECONDS if backoff_seconds is None else backoff_seconds
+        )
+        self._transport = transport
+
+    async def sync(self, entities: Iterable[SyncEntity] = ENTITIES) -> Dict[str, Dict[str, Any]]:
+        """
+        Sync every entity concurrently. Returns per-entity stats keyed by
+        entity name; a failed entity reports its ``error`` without stopping
+        the others.
+        """
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+        )
+        async with httpx.AsyncClient(
+            base_url=self.base_url,
+            auth=self.auth,
+            limits=limits,
+            timeout=self.timeout_seconds,
+            transport=self._transport,
+        ) as client:
+            entities = list(entities)
+            results = await asyncio.gather(*(self._sync_entity(client, e) for e in entities))
+        return {entity.name: result for entity, result in zip(entities, results)}
+
+    async def _sync_entity(self, client: httpx.AsyncClient, entity: SyncEntity) -> Dict[str, Any]:
+        started = time.perf_counter()
+        since = self.store.get_watermark(entity.entity_type)
+        stats: Dict[str, Any] = {
+            'fetched': 0,
+            'upserted': 0,
+            'pages': 0,
+            'retries': 0,
+            'watermark_from': since,
+            'watermark': since,
+            'error': None,
+        }
+
+        cursor, skip = since, 0
+        try:
+            while True:
+                params: Dict[str, Any] = {'$orderby': CHANGED_FIELD, '$top': self.page_size, '$skip': skip}
+                if cursor:
+                    params['changed_since'] = cursor
+                records = await self._get_page(client, entity.path, params, stats)
+                stats['pages'] += 1
+                stats['fetched'] += len(records)
+
+                newest = max((r[CHANGED_FIELD] for r in records if r.get(CHANGED_FIELD)), default=None)
+                if records:
+                    stats['upserted'] += await asyncio.to_thread(
+                        self.store.upsert_many, entity.entity_type, entity.key, records, newest
+                    )
+                if newest:
+                    stats['watermark'] = max(newest, stats['watermark'] or newest)
+
+                if len(records) < self.page_size:
+                    break
+                if newest is None or newest == cursor:
+                    # The whole page shares the cursor timestamp (or has none): page by offset
+                    skip += len(records)
+                else:
+                    # Restart at the newest timestamp, skipping the records already read there
+                    skip = sum(1 for r in records if r.get(CHANGED_FIELD) == newest)
+                    cursor = newest
+        except Exception as e:
+            logger.error(f"SAP sync of {entity.name} failed: {e}")
+            stats['error'] = str(e)
+
+        stats['seconds'] = round(time.perf_counter() - started, 4)
+        return stats
+
+    async def _get_page(
+        self,
+        client: httpx.AsyncClient,
+        path: str,
+        params: Dict[str, Any],
+        stats: Dict[str, Any],
+    ) -> List[Dict[str, Any]]:
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                response = await client.get(path, params=params)
+                if response.status_code not in RETRY_STATUS:
+                    response.raise_for_status()
+                    return response.json()['results']
+                error = f"HTTP {response.status_code} from {path}"
+                retry_after = response.headers.get('Retry-After')
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__} on {path}: {e}"
+
+            if attempt == self.max_retries:
+                raise SAPSyncError(f"{error} after {self.max_retries} retries")
+            stats['retries'] += 1
+            delay = self.backoff_seconds * (2 ** attempt)
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            logger.warning(f"{error}; retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
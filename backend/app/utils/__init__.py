@@ -12,12 +12,17 @@ from .validators import (
     validate_delay_hours,
     validate_distance_km,
 )
-from .file_io import (
-    read_csv_file,
-    validate_csv_columns,
-    save_temp_csv,
-    get_file_info,
-)
+
+# file_io pulls in pandas; import it only when one of its helpers is used
+_FILE_IO_EXPORTS = ('read_csv_file', 'validate_csv_columns', 'save_temp_csv', 'get_file_info')
+
+
+def __getattr__(name):
+    if name in _FILE_IO_EXPORTS:
+        from . import file_io
+        return getattr(file_io, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     'setup_logger',
@@ -0,0 +1,155 @@
+"""
+Geospatial grid index for latest-known object positions.
+SIH25208 SAIL Bokaro Steel Plant Logistics Optimization System.
+"""
+
+import math
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = 111.32
+
+# Approximate coordinates of the plant and main destination yards
+KNOWN_SITES: Dict[str, Tuple[float, float]] = {
+    'bokaro': (23.6693, 86.1511),
+    'dhanbad': (23.7957, 86.4304),
+    'kolkata': (22.5726, 88.3639),
+    'haldia': (22.0667, 88.0698),
+    'durgapur': (23.5204, 87.3119),
+    'ranchi': (23.3441, 85.3096),
+    'patna': (25.5941, 85.1376),
+}
+
+
+def _corridor(origin: str, destination: str, margin_deg: float = 0.25) -> Tuple[float, float, float, float]:
+    """Bounding box (min_lat, min_lon, max_lat, max_lon) spanning two sites."""
+    (lat1, lon1), (lat2, lon2) = KNOWN_SITES[origin], KNOWN_SITES[destination]
+    return (min(lat1, lat2) - margin_deg, min(lon1, lon2) - margin_deg,
+            max(lat1, lat2) + margin_deg, max(lon1, lon2) + margin_deg)
+
+
+# Route corridors from the plant, keyed like the route names used elsewhere
+CORRIDORS: Dict[str, Tuple[float, float, float, float]] = {
+    f"bokaro-{site}": _corridor('bokaro', site) for site in KNOWN_SITES if site != 'bokaro'
+}
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in kilometres."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class GridSpatialIndex:
+    """Latest position per object, bucketed into a fixed lat/lon grid.
+
+    Updates move an object between cells in O(1); radius and bounding-box
+    queries only visit the cells overlapping the query area and then apply an
+    exact distance/containment check to those candidates.
+    """
+
+    def __init__(self, cell_size_deg: float = 0.05):
+        self.cell_size_deg = cell_size_deg
+        self._positions: Dict[str, Tuple[float, float, Tuple[int, int], Any]] = {}
+        self._cells: Dict[Tuple[int, int], set] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_size_deg), math.floor(lon / self.cell_size_deg))
+
+    def upsert(self, object_id: str, lat: float, lon: float, payload: Any = None) -> None:
+        """Record the latest position (and payload) of an object."""
+        cell = self._cell(lat, lon)
+        with self._lock:
+            previous = self._positions.get(object_id)
+            if previous is not None and previous[2] != cell:
+                self._discard(object_id, previous[2])
+            self._cells[cell].add(object_id)
+            self._positions[object_id] = (lat, lon, cell, payload)
+
+    def remove(self, object_id: str) -> bool:
+        """Forget an object; returns False if it was not indexed."""
+        with self._lock:
+            previous = self._positions.pop(object_id, None)
+            if previous is None:
+                return False
+            self._discard(object_id, previous[2])
+            return True
+
+    def get(self, object_id: str) -> Optional[Dict[str, Any]]:
+        """Latest position of one object."""
+        position = self._positions.get(object_id)
+        if position is None:
+            return None
+        return self._to_dict(object_id, position)
+
+    def nearby(self, lat: float, lon: float, radius_km: float,
+               limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Objects within ``radius_km`` of a point, nearest first."""
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        dlon = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 1e-6))
+
+        results = []
+        with self._lock:
+            for object_id, position in self._candidates(lat - dlat, lon - dlon, lat + dlat, lon + dlon):
+                distance = haversine_km(lat, lon, position[0], position[1])
+                if distance <= radius_km:
+                    results.append((distance, object_id, position))
+
+        results.sort(key=lambda r: r[0])
+        if limit is not None:
+            results = results[:limit]
+        return [dict(self._to_dict(object_id, position), distance_km=round(distance, 3))
+                for distance, object_id, position in results]
+
+    def within_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+                    limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Objects inside an axis-aligned lat/lon bounding box."""
+        results = []
+        with self._lock:
+            for object_id, position in self._candidates(min_lat, min_lon, max_lat, max_lon):
+                if min_lat <= position[0] <= max_lat and min_lon <= position[1] <= max_lon:
+                    results.append(self._to_dict(object_id, position))
+                    if limit is not None and len(results) >= limit:
+                        break
+        return results
+
+    def _candidates(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float):
+        """Yield (id, position) for every object in cells overlapping the box."""
+        min_row, min_col = self._cell(min_lat, min_lon)
+        max_row, max_col = self._cell(max_lat, max_lon)
+
+        # Sparse grids: walking the occupied cells is cheaper than the box
+        if (max_row - min_row + 1) * (max_col - min_col + 1) > len(self._cells):
+            cells = [c for c in self._cells if min_row <= c[0] <= max_row and min_col <= c[1] <= max_col]
+        else:
+            cells = [(row, col) for row in range(min_row, max_row + 1)
+                     for col in range(min_col, max_col + 1) if (row, col) in self._cells]
+
+        for cell in cells:
+            for object_id in self._cells[cell]:
+                yield object_id, self._positions[object_id]
+
+    def _discard(self, object_id: str, cell: Tuple[int, int]) -> None:
+        members = self._cells.get(cell)
+        if members is not None:
+            members.discard(object_id)
+            if not members:
+                del self._cells[cell]
+
+    @staticmethod
+    def _to_dict(object_id: str, position: Tuple[float, float, Tuple[int, int], Any]) -> Dict[str, Any]:
+        lat, lon, _, payload = position
+        result = {'id': object_id, 'latitude': lat, 'longitude': lon}
+        if isinstance(payload, dict):
+            result.update(payload)
+        elif payload is not None:
+            result['payload'] = payload
+        return result
@@ -0,0 +1,276 @@
+"""
+Bounded in-memory histories with secondary indexes and optional spill to disk.
+SIH25208 SAIL Bokaro Steel Plant Logistics Optimization System.
+"""
+
+import json
+import sqlite3
+import threading
+from collections import deque
+from datetime import date, datetime
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from ..config import settings
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _record_dict(record: Any) -> Dict[str, Any]:
+    return record.to_dict() if hasattr(record, 'to_dict') else dict(record)
+
+
+# ============================================================================
+# SPILL TARGETS
+# ============================================================================
+
+class JsonlSpill:
+    """Appends evicted records as JSON lines; lookups scan the file."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def write(self, key: str, record: Any) -> None:
+        line = json.dumps({'key': key, 'record': _record_dict(record)}, default=_json_default)
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+    def find(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.path.exists():
+            return None
+        found = None
+        with self._lock, open(self.path, encoding='utf-8') as f:
+            for line in f:
+                entry = json.loads(line)
+                if entry['key'] == key:
+                    found = entry['record']
+        return found
+
+
+class SqliteSpill:
+    """Keeps evicted records in a SQLite table keyed by record id."""
+
+    def __init__(self, path: Path, table: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL, record TEXT NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_key ON {table} (key)")
+
+    def write(self, key: str, record: Any) -> None:
+        payload = json.dumps(_record_dict(record), default=_json_default)
+        with self._lock, self._conn:
+            self._conn.execute(f"INSERT INTO {self.table} (key, record) VALUES (?, ?)", (key, payload))
+
+    def find(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT record FROM {self.table} WHERE key = ? ORDER BY seq DESC LIMIT 1", (key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+# ============================================================================
+# RING BUFFER
+# ============================================================================
+
+class HistoryBuffer:
+    """Fixed-capacity ring buffer of records, oldest evicted first.
+
+    ``key`` extracts the record id and each entry of ``indexes`` a field to
+    filter on. Every index maps a field value to the sequence numbers of the
+    records holding it, oldest first, so the newest matches of a value are
+    read from the right without scanning the buffer; an evicted record is
+    always the oldest of its index entries and leaves from the left.
+    Indexed fields must not change after a record is appended.
+
+    With a ``spill`` target, evicted records are written to it and
+    :meth:`find_archived` can still return them by id.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        key: Callable[[Any], str] = lambda record: record.id,
+        indexes: Optional[Dict[str, Callable[[Any], Any]]] = None,
+        spill: Optional[Any] = None,
+    ):
+        if capacity <= 0:
+            raise ValueError("History capacity must be positive")
+        self.capacity = capacity
+        self.spill = spill
+        self._key = key
+        self._index_fns = dict(indexes or {})
+        self._slots: List[Any] = [None] * capacity
+        self._next_seq = 0
+        self._by_key: Dict[str, int] = {}
+        self._indexes: Dict[str, Dict[Any, Deque[int]]] = {name: {} for name in self._index_fns}
+        self._spilled = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return min(self._next_seq, self.capacity)
+
+    def __iter__(self) -> Iterator[Any]:
+        """Records oldest to newest (a snapshot, safe to mutate the buffer while iterating)"""
+        return iter(self.recent())
+
+    def __getitem__(self, position: int) -> Any:
+        """Record by position, oldest first; negative positions count from the newest"""
+        with self._lock:
+            size = len(self)
+            if position < 0:
+                position += size
+            if not 0 <= position < size:
+                raise IndexError("history index out of range")
+            return self._slots[(self._next_seq - size + position) % self.capacity]
+
+    @property
+    def total_appended(self) -> int:
+        return self._next_seq
+
+    @property
+    def spilled(self) -> int:
+        return self._spilled
+
+    def append(self, record: Any) -> None:
+        with self._lock:
+            seq = self._next_seq
+            if seq >= self.capacity:
+                self._evict(seq - self.capacity)
+
+            self._slots[seq % self.capacity] = record
+            self._by_key[self._key(record)] = seq
+            for name, fn in self._index_fns.items():
+                self._indexes[name].setdefault(fn(record), deque()).append(seq)
+            self._next_seq = seq + 1
+
+    def extend(self, records) -> None:
+        for record in records:
+            self.append(record)
+
+    def _evict(self, seq: int) -> None:
+        record = self._slots[seq % self.capacity]
+        key = self._key(record)
+        if self._by_key.get(key) == seq:
+            del self._by_key[key]
+        for name, fn in self._index_fns.items():
+            value = fn(record)
+            entries = self._indexes[name][value]
+            entries.popleft()
+            if not entries:
+                del self._indexes[name][value]
+        self._slots[seq % self.capacity] = None
+        if self.spill is not None:
+            self.spill.write(key, record)
+            self._spilled += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        """Newest in-memory record with this id"""
+        with self._lock:
+            seq = self._by_key.get(key)
+            return self._slots[seq % self.capacity] if seq is not None else None
+
+    def find_archived(self, key: str) -> Optional[Dict[str, Any]]:
+        """Record with this id as a dict, from memory or the spill target"""
+        record = self.get(key)
+        if record is not None:
+            return _record_dict(record)
+        return self.spill.find(key) if self.spill is not None else None
+
+    def recent(self, limit: Optional[int] = None, **filters: Any) -> List[Any]:
+        """Newest ``limit`` records matching indexed ``filters``, oldest first.
+
+        ``None`` filter values are ignored. Without filters this is a slice of
+        the ring; with filters it walks the shortest matching index from the
+        newest end and stops after ``limit`` matches.
+        """
+        filters = {name: value for name, value in filters.items() if value is not None}
+        unknown = set(filters) - set(self._index_fns)
+        if unknown:
+            raise ValueError(f"History has no index on {sorted(unknown)}")
+
+        with self._lock:
+            if not filters:
+                size = len(self)
+                take = size if limit is None else max(0, min(limit, size))
+                first = self._next_seq - take
+                return [self._slots[seq % self.capacity] for seq in range(first, self._next_seq)]
+
+            candidates = [self._indexes[name].get(value) for name, value in filters.items()]
+            if any(c is None for c in candidates):
+                return []
+            shortest = min(candidates, key=len)
+            others = [(self._index_fns[name], value) for name, value in filters.items()]
+
+            matches = []
+            for seq in reversed(shortest):
+                record = self._slots[seq % self.capacity]
+                if all(fn(record) == value for fn, value in others):
+                    matches.append(record)
+                    if limit is not None and len(matches) >= limit:
+                        break
+            matches.reverse()
+            return matches
+
+    def count(self, **filters: Any) -> int:
+        """Number of in-memory records matching indexed ``filters``"""
+        filters = {name: value for name, value in filters.items() if value is not None}
+        if not filters:
+            return len(self)
+        if len(filters) == 1:
+            (name, value), = filters.items()
+            if name not in self._index_fns:
+                raise ValueError(f"History has no index on {name}")
+            with self._lock:
+                return len(self._indexes[name].get(value, ()))
+        return len(self.recent(**filters))
+
+    def counts(self, index: str) -> Dict[Any, int]:
+        """In-memory record count per value of an indexed field"""
+        if index not in self._index_fns:
+            raise ValueError(f"History has no index on {index}")
+        with self._lock:
+            return {value: len(seqs) for value, seqs in self._indexes[index].items()}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'capacity': self.capacity,
+            'size': len(self),
+            'total_appended': self.total_appended,
+            'evicted': max(0, self.total_appended - self.capacity),
+            'spilled': self.spilled,
+        }
+
+
+def create_history(
+    name: str,
+    key: Callable[[Any], str] = lambda record: record.id,
+    indexes: Optional[Dict[str, Callable[[Any], Any]]] = None,
+    capacity: Optional[int] = None,
+) -> HistoryBuffer:
+    """History configured from settings: HISTORY_CAPACITY and HISTORY_SPILL
+    ("" to drop evicted records, "sqlite" or "jsonl" to keep them under
+    HISTORY_SPILL_DIR)."""
+    spill = None
+    if settings.HISTORY_SPILL == 'sqlite':
+        spill = SqliteSpill(settings.HISTORY_SPILL_DIR / "history.db", name)
+    elif settings.HISTORY_SPILL == 'jsonl':
+        spill = JsonlSpill(settings.HISTORY_SPILL_DIR / f"{name}.jsonl")
+    elif settings.HISTORY_SPILL:
+        raise ValueError(f"Unknown HISTORY_SPILL {settings.HISTORY_SPILL!r}")
+    return HistoryBuffer(capacity or settings.HISTORY_CAPACITY, key=key, indexes=indexes, spill=spill)
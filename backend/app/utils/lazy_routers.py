@@ -0,0 +1,123 @@
+"""
+Lazy router registry.
+SIH25208 SAIL Bokaro Steel Plant Logistics Optimization System.
+
+Router modules pull in OR-Tools, scikit-learn, Prophet and the unpickled
+models at import time. The registry records each router module with its URL
+prefix and only imports it (and includes its ``router``) when the first request
+under that prefix arrives, so a worker that only serves /optimize never pays
+for the forecasting stack.
+"""
+
+import asyncio
+import importlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI
+
+from .logger import app_logger
+
+
+class LazyRouterRegistry:
+    """Router modules grouped by URL prefix, imported on first use.
+
+    Modules sharing a prefix (the /predict routers, the two /optimize routers)
+    are loaded together, in registration order, so route precedence matches the
+    eager ``include_router`` order.
+    """
+
+    def __init__(self, app: FastAPI, package: str = "app.routers"):
+        self.app = app
+        self.package = package
+        self._groups: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._loaded: Dict[str, Dict[str, Any]] = {}
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def register(self, module_name: str, prefix: str) -> None:
+        """Register ``<package>.<module_name>``, whose router is mounted at ``prefix``."""
+        self._groups.setdefault(prefix.rstrip("/"), []).append(module_name)
+
+    def prefix_for(self, path: str) -> Optional[str]:
+        """Registered prefix owning ``path`` that has not been loaded yet."""
+        for prefix in self._groups:
+            if (path == prefix or path.startswith(prefix + "/")) and prefix not in self._loaded:
+                return prefix
+        return None
+
+    def is_loaded(self, prefix: str) -> bool:
+        return prefix in self._loaded
+
+    def load(self, prefix: str) -> None:
+        """Import every module of a prefix group and include its router."""
+        with self._lock:
+            if prefix in self._loaded:
+                return
+
+            modules_before = len(sys.modules)
+            start = time.perf_counter()
+            imported = []
+            try:
+                for module_name in self._groups[prefix]:
+                    module_start = time.perf_counter()
+                    module = importlib.import_module(f"{self.package}.{module_name}")
+                    imported.append((module_name, module, time.perf_counter() - module_start))
+            except Exception as e:
+                self._errors[prefix] = f"{type(e).__name__}: {e}"
+                app_logger.error(f"Failed to load routers for {prefix}: {e}")
+                raise
+
+            for _, module, _ in imported:
+                self.app.include_router(module.router)
+            self.app.openapi_schema = None
+
+            elapsed = time.perf_counter() - start
+            self._errors.pop(prefix, None)
+            self._loaded[prefix] = {
+                "import_seconds": round(elapsed, 4),
+                "module_import_seconds": {name: round(seconds, 4) for name, _, seconds in imported},
+                "new_modules_imported": len(sys.modules) - modules_before,
+                "loaded_at": time.time(),
+            }
+            app_logger.info(f"Loaded routers for {prefix} in {elapsed * 1000:.0f} ms")
+
+    def load_all(self) -> None:
+        for prefix in self._groups:
+            self.load(prefix)
+
+    def report(self) -> Dict[str, Any]:
+        """Per-prefix load state and import cost."""
+        groups = []
+        for prefix, modules in self._groups.items():
+            entry = {"prefix": prefix, "modules": modules, "loaded": prefix in self._loaded}
+            entry.update(self._loaded.get(prefix, {}))
+            if prefix in self._errors:
+                entry["error"] = self._errors[prefix]
+            groups.append(entry)
+
+        return {
+            "total_groups": len(self._groups),
+            "loaded_groups": len(self._loaded),
+            "total_import_seconds": round(sum(g["import_seconds"] for g in self._loaded.values()), 4),
+            "groups": groups,
+        }
+
+
+class LazyRouterMiddleware:
+    """ASGI middleware that loads a prefix group before the request is routed."""
+
+    def __init__(self, app, registry: LazyRouterRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket"):
+            prefix = self.registry.prefix_for(scope["path"])
+            if prefix is not None:
+                # Import off the event loop so requests to loaded routers keep flowing
+                await asyncio.get_running_loop().run_in_executor(None, self.registry.load, prefix)
+        await self.app(scope, receive, send)
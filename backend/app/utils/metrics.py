@@ -1,40 +1,292 @@
 """
 Metrics collection - Prometheus-compatible metrics.
 SIH25208 SAIL Bokaro Steel Plant Logistics Optimization System.
+
+Latencies go into fixed-bucket histograms, so memory per series is constant
+no matter how many requests are served, and p50/p99 are estimated from the
+buckets the way Prometheus' histogram_quantile does.
+
+With METRICS_MULTIPROC_DIR set, every process keeps its values in its own
+memory-mapped file in that directory and the exposition sums the files of
+all processes, so any uvicorn worker can answer a scrape for the whole
+server. Counters and histograms of workers that exited keep counting;
+gauges are only summed over live workers, so a dead worker's pool
+connections are not reported forever. Empty the directory when the server
+is (re)started.
 """
 
+import json
+import mmap
+import os
+import re
+import struct
+import threading
 import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Any
-from collections import defaultdict
-import json
+from functools import wraps
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..config import settings
+
+# Seconds; spans fast API calls to slow reports
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Seconds; CP-SAT runs are bounded by their time limits
+SOLVER_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+UNMATCHED_ENDPOINT = "<unmatched>"
+
+# PlainTextResponse appends "; charset=utf-8" itself
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+# ============================================================================
+# VALUE STORES
+# ============================================================================
+
+class _LocalValues:
+    """Values of this process only, kept in a dict"""
 
-class MetricsCollector:
-    """Simple metrics collector for monitoring."""
-    
     def __init__(self):
+        self._values: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, key: str, amount: float) -> None:
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set(self, key: str, value: float) -> None:
+        with self._lock:
+            self._values[key] = value
+
+    def set_max(self, key: str, value: float) -> None:
+        with self._lock:
+            if value > self._values.get(key, float('-inf')):
+                self._values[key] = value
+
+    def collect(self) -> List[Tuple[bool, Dict[str, float]]]:
+        """(process alive, value map) pairs to aggregate, one per process"""
+        with self._lock:
+            return [(True, dict(self._values))]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class _MmapValues(_LocalValues):
+    """
+    Values of this process in a memory-mapped file, readable by the other
+    workers. The file is a used-size header followed by entries of
+    (uint32 key length, key, padding to 8 bytes, float64 value); a value is
+    updated in place with one aligned 8-byte write.
+    """
+
+    _INITIAL_SIZE = 64 * 1024
+
+    def __init__(self, directory: Path):
+        super().__init__()
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._pid = None
+        self._open()
+
+    def _open(self) -> None:
+        self._pid = os.getpid()
+        self.path = self.directory / f"metrics_{self._pid}.db"
+        self._file = open(self.path, 'a+b')
+        if os.path.getsize(self.path) == 0:
+            self._file.truncate(self._INITIAL_SIZE)
+        self._mm = mmap.mmap(self._file.fileno(), 0)
+        self._used = struct.unpack_from('Q', self._mm, 0)[0] or 8
+        self._positions = {key: pos for key, pos, _ in _read_entries(self._mm, self._used)}
+        self._values = {key: value for key, _, value in _read_entries(self._mm, self._used)}
+
+    def _position(self, key: str) -> int:
+        if os.getpid() != self._pid:
+            # Forked after the file was opened: start this process' own file
+            self._open()
+        pos = self._positions.get(key)
+        if pos is None:
+            encoded = key.encode('utf-8')
+            padded = 4 + len(encoded) + (-(4 + len(encoded)) % 8)
+            needed = self._used + padded + 8
+            if needed > len(self._mm):
+                size = len(self._mm)
+                while size < needed:
+                    size *= 2
+                self._mm.close()
+                self._file.truncate(size)
+                self._mm = mmap.mmap(self._file.fileno(), 0)
+            struct.pack_into(f'I{len(encoded)}s', self._mm, self._used, len(encoded), encoded)
+            pos = self._used + padded
+            struct.pack_into('d', self._mm, pos, 0.0)
+            self._used = needed
+            struct.pack_into('Q', self._mm, 0, self._used)
+            self._positions[key] = pos
+        return pos
+
+    def _write(self, key: str, value: float) -> None:
+        struct.pack_into('d', self._mm, self._position(key), value)
+        self._values[key] = value
+
+    def inc(self, key: str, amount: float) -> None:
+        with self._lock:
+            self._write(key, self._values.get(key, 0.0) + amount)
+
+    def set(self, key: str, value: float) -> None:
+        with self._lock:
+            self._write(key, value)
+
+    def set_max(self, key: str, value: float) -> None:
+        with self._lock:
+            if value > self._values.get(key, float('-inf')):
+                self._write(key, value)
+
+    def collect(self) -> List[Tuple[bool, Dict[str, float]]]:
+        maps = []
+        for path in sorted(self.directory.glob("metrics_*.db")):
+            pid = path.stem.split('_', 1)[1]
+            try:
+                data = path.read_bytes()
+            except OSError:
+                continue
+            if len(data) < 8:
+                continue
+            used = min(struct.unpack_from('Q', data, 0)[0], len(data))
+            alive = _pid_alive(int(pid)) if pid.isdigit() else False
+            maps.append((alive, {key: value for key, _, value in _read_entries(data, used)}))
+        return maps
+
+    def clear(self) -> None:
+        with self._lock:
+            for pos in self._positions.values():
+                struct.pack_into('d', self._mm, pos, 0.0)
+            self._values = dict.fromkeys(self._positions, 0.0)
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_entries(buffer, used: int) -> Iterator[Tuple[str, int, float]]:
+    pos = 8
+    while pos + 4 <= used:
+        length = struct.unpack_from('I', buffer, pos)[0]
+        key = bytes(buffer[pos + 4:pos + 4 + length]).decode('utf-8')
+        pos += 4 + length + (-(4 + length) % 8)
+        if pos + 8 > used:
+            break
+        yield key, pos, struct.unpack_from('d', buffer, pos)[0]
+        pos += 8
+
+
+# ============================================================================
+# COLLECTOR
+# ============================================================================
+
+class _Metric:
+    __slots__ = ('name', 'kind', 'help', 'buckets')
+
+    def __init__(self, name: str, kind: str, help: str, buckets: Tuple[float, ...] = ()):
+        self.name = name
+        self.kind = kind  # counter | gauge | max | histogram
+        self.help = help
+        self.buckets = buckets
+
+
+class MetricsCollector:
+    """Counters, gauges and fixed-bucket histograms for monitoring."""
+
+    METRICS = (
+        _Metric('http_requests_total', 'counter', 'HTTP requests by route template and status'),
+        _Metric('http_request_duration_seconds', 'histogram', 'HTTP request latency', LATENCY_BUCKETS),
+        _Metric('http_request_duration_max_seconds', 'max', 'Slowest HTTP request'),
+        _Metric('optimizer_runs_total', 'counter', 'Optimizer runs by result and solver status'),
+        _Metric('optimizer_solve_seconds', 'histogram', 'Optimizer solve time', SOLVER_BUCKETS),
+        _Metric('model_inference_seconds', 'histogram', 'ML model inference time', LATENCY_BUCKETS),
+        _Metric('db_query_seconds', 'histogram', 'Database query time', LATENCY_BUCKETS),
+        _Metric('db_pool_connections', 'gauge', 'Database pool connections by engine and state'),
+        _Metric('db_cache_lookups_total', 'counter', 'Query cache lookups by namespace and result'),
+        _Metric('model_loaded', 'max', 'Whether a model loaded (1) or fell back to a mock (0)'),
+    )
+
+    def __init__(self, multiproc_dir: Optional[str] = None):
         """Initialize metrics collector."""
-        self.request_count = defaultdict(int)
-        self.request_latencies = defaultdict(list)
-        self.optimizer_runs = 0
-        self.optimizer_successes = 0
-        self.optimizer_failures = 0
+        multiproc_dir = settings.METRICS_MULTIPROC_DIR if multiproc_dir is None else multiproc_dir
+        self.multiprocess = bool(multiproc_dir)
+        self._values = _MmapValues(Path(multiproc_dir)) if multiproc_dir else _LocalValues()
+        self._metrics = {m.name: m for m in self.METRICS}
         self.model_load_status = {}
         self.start_time = datetime.utcnow()
-    
-    def record_request(self, endpoint: str, latency_ms: float, status_code: int) -> None:
+
+    # ========================================================================
+    # RECORDING
+    # ========================================================================
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, Any], suffix: str = "") -> str:
+        return json.dumps([name, suffix, sorted((k, str(v)) for k, v in labels.items())])
+
+    def inc(self, name: str, amount: float = 1.0, **labels) -> None:
+        self._values.inc(self._key(name, labels), amount)
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        if self._metrics[name].kind == 'max':
+            self._values.set_max(self._key(name, labels), value)
+        else:
+            self._values.set(self._key(name, labels), value)
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Add one observation to a histogram"""
+        buckets = self._metrics[name].buckets
+        index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+        le = repr(float(buckets[index])) if index < len(buckets) else "+Inf"
+        self._values.inc(self._key(name, labels, f"bucket:{le}"), 1.0)
+        self._values.inc(self._key(name, labels, "sum"), value)
+        self._values.inc(self._key(name, labels, "count"), 1.0)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Observe the duration of the ``with`` block, also when it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def timed(self, name: str, **labels):
+        """Decorator form of :meth:`timer`"""
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record_request(self, endpoint: str, latency_ms: float, status_code: int, method: str = "") -> None:
         """Record a request metric."""
-        self.request_count[endpoint] += 1
-        self.request_latencies[endpoint].append(latency_ms)
-    
-    def record_optimizer_run(self, success: bool) -> None:
+        self.inc('http_requests_total', endpoint=endpoint, method=method, status=status_code)
+        self.observe('http_request_duration_seconds', latency_ms / 1000.0, endpoint=endpoint, method=method)
+        self.set_gauge('http_request_duration_max_seconds', latency_ms / 1000.0, endpoint=endpoint, method=method)
+
+    def record_optimizer_run(self, success: bool, solver_status: str = "", solve_seconds: Optional[float] = None) -> None:
         """Record optimizer run result."""
-        self.optimizer_runs += 1
-        if success:
-            self.optimizer_successes += 1
-        else:
-            self.optimizer_failures += 1
-    
+        result = 'success' if success else 'failure'
+        self.inc('optimizer_runs_total', result=result, solver_status=solver_status or result.upper())
+        if solve_seconds is not None:
+            self.observe('optimizer_solve_seconds', solve_seconds, solver_status=solver_status or result.upper())
+
     def set_model_status(self, model_name: str, loaded: bool, error: str = None) -> None:
         """Set model load status."""
         self.model_load_status[model_name] = {
@@ -42,72 +294,281 @@ class MetricsCollector:
             'error': error,
             'timestamp': datetime.utcnow().isoformat()
         }
-    
+        self._values.set(self._key('model_loaded', {'model': model_name}), 1.0 if loaded else 0.0)
+
+    # ========================================================================
+    # AGGREGATION
+    # ========================================================================
+
+    def _aggregate(self) -> Dict[str, Dict[Tuple, Dict[str, float]]]:
+        """metric name -> label tuple -> suffix -> value, summed (or maxed) over processes"""
+        result: Dict[str, Dict[Tuple, Dict[str, float]]] = {}
+        for alive, values in self._values.collect():
+            for key, value in values.items():
+                name, suffix, labels = json.loads(key)
+                metric = self._metrics.get(name)
+                if metric is None or (metric.kind == 'gauge' and not alive):
+                    continue
+                series = result.setdefault(name, {}).setdefault(tuple(map(tuple, labels)), {})
+                if metric.kind == 'max':
+                    series[suffix] = max(series.get(suffix, value), value)
+                else:
+                    series[suffix] = series.get(suffix, 0.0) + value
+        return result
+
+    def _cumulative(self, metric: _Metric, series: Dict[str, float]) -> List[Tuple[str, float]]:
+        bounds = [repr(float(b)) for b in metric.buckets] + ["+Inf"]
+        total, cumulative = 0.0, []
+        for le in bounds:
+            total += series.get(f"bucket:{le}", 0.0)
+            cumulative.append((le, total))
+        return cumulative
+
+    def _quantile(self, metric: _Metric, series: Dict[str, float], q: float) -> Optional[float]:
+        """Linear interpolation within the bucket holding the q-th observation"""
+        count = series.get('count', 0.0)
+        if not count:
+            return None
+        rank = q * count
+        lower, below = 0.0, 0.0
+        for le, cumulative in self._cumulative(metric, series):
+            if cumulative >= rank:
+                if le == "+Inf":
+                    return lower
+                upper = float(le)
+                in_bucket = cumulative - below
+                return lower + (upper - lower) * ((rank - below) / in_bucket if in_bucket else 1.0)
+            lower, below = float(le), cumulative
+        return lower
+
+    def _summary(self, name: str, series: Dict[str, float], scale: float = 1.0) -> Dict[str, Any]:
+        metric = self._metrics[name]
+        count = series.get('count', 0.0)
+        p50, p99 = self._quantile(metric, series, 0.5), self._quantile(metric, series, 0.99)
+        return {
+            'count': int(count),
+            'avg': series.get('sum', 0.0) / count * scale if count else None,
+            'p50': p50 * scale if p50 is not None else None,
+            'p99': p99 * scale if p99 is not None else None,
+        }
+
     def get_metrics(self) -> Dict[str, Any]:
         """Get all metrics as dictionary."""
+        data = self._aggregate()
+
+        runs = data.get('optimizer_runs_total', {})
+        successes = sum(s[''] for labels, s in runs.items() if ('result', 'success') in labels)
+        failures = sum(s[''] for labels, s in runs.items() if ('result', 'failure') in labels)
+        total_runs = int(successes + failures)
+
         metrics = {
             'timestamp': datetime.utcnow().isoformat(),
             'uptime_seconds': (datetime.utcnow() - self.start_time).total_seconds(),
+            'multiprocess': self.multiprocess,
             'requests': {},
             'optimizer': {
-                'total_runs': self.optimizer_runs,
-                'successes': self.optimizer_successes,
-                'failures': self.optimizer_failures,
+                'total_runs': total_runs,
+                'successes': int(successes),
+                'failures': int(failures),
                 'success_rate': (
-                    self.optimizer_successes / max(1, self.optimizer_runs)
-                ) * 100
+                    successes / max(1, total_runs)
+                ) * 100,
+                'by_status': {
+                    dict(labels)['solver_status']: int(s['']) for labels, s in runs.items()
+                },
+                'solve_seconds': {
+                    dict(labels)['solver_status']: self._summary('optimizer_solve_seconds', s)
+                    for labels, s in data.get('optimizer_solve_seconds', {}).items()
+                },
+            },
+            'models': self.model_load_status,
+            'model_inference_ms': {
+                dict(labels)['model']: self._summary('model_inference_seconds', s, 1000.0)
+                for labels, s in data.get('model_inference_seconds', {}).items()
+            },
+            'db_query_ms': {
+                '{operation} {table}'.format(**dict(labels)): self._summary('db_query_seconds', s, 1000.0)
+                for labels, s in data.get('db_query_seconds', {}).items()
             },
-            'models': self.model_load_status
         }
-        
+
         # Add request metrics
-        for endpoint, latencies in self.request_latencies.items():
-            if latencies:
-                sorted_latencies = sorted(latencies)
-                metrics['requests'][endpoint] = {
-                    'count': self.request_count[endpoint],
-                    'avg_latency_ms': sum(latencies) / len(latencies),
-                    'p50_latency_ms': sorted_latencies[len(sorted_latencies) // 2],
-                    'p99_latency_ms': sorted_latencies[int(len(sorted_latencies) * 0.99)],
-                    'max_latency_ms': max(latencies)
-                }
-        
+        maxima = data.get('http_request_duration_max_seconds', {})
+        for labels, series in data.get('http_request_duration_seconds', {}).items():
+            label_map = dict(labels)
+            endpoint = f"{label_map['method']} {label_map['endpoint']}".strip()
+            summary = self._summary('http_request_duration_seconds', series, 1000.0)
+            max_ms = maxima.get(labels, {}).get('', 0.0) * 1000.0
+            # Bucket interpolation can overshoot the slowest request seen
+            metrics['requests'][endpoint] = {
+                'count': summary['count'],
+                'avg_latency_ms': summary['avg'],
+                'p50_latency_ms': min(summary['p50'], max_ms) if summary['p50'] is not None else None,
+                'p99_latency_ms': min(summary['p99'], max_ms) if summary['p99'] is not None else None,
+                'max_latency_ms': max_ms,
+            }
+
         return metrics
-    
+
     def get_prometheus_metrics(self) -> str:
         """Get metrics in Prometheus text format."""
+        data = self._aggregate()
         lines = []
-        
-        # Request counts
-        for endpoint, count in self.request_count.items():
-            lines.append(f'request_count{{endpoint="{endpoint}"}} {count}')
-        
-        # Request latencies
-        for endpoint, latencies in self.request_latencies.items():
-            if latencies:
-                avg = sum(latencies) / len(latencies)
-                lines.append(f'request_latency_ms{{endpoint="{endpoint}",quantile="avg"}} {avg:.2f}')
-        
-        # Optimizer metrics
-        lines.append(f'optimizer_total_runs {self.optimizer_runs}')
-        lines.append(f'optimizer_successes {self.optimizer_successes}')
-        lines.append(f'optimizer_failures {self.optimizer_failures}')
-        
-        # Model status
-        for model_name, status in self.model_load_status.items():
-            loaded = 1 if status['loaded'] else 0
-            lines.append(f'model_loaded{{model="{model_name}"}} {loaded}')
-        
-        return '\n'.join(lines)
-    
+
+        def render(name: str, labels: Tuple, value: float, extra: Tuple = ()) -> str:
+            pairs = list(labels) + list(extra)
+            label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+            return f"{name}{{{label_text}}} {value:g}" if pairs else f"{name} {value:g}"
+
+        for metric in self.METRICS:
+            series_by_labels = data.get(metric.name)
+            if not series_by_labels:
+                continue
+            kind = 'gauge' if metric.kind == 'max' else metric.kind
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {kind}")
+            for labels, series in sorted(series_by_labels.items()):
+                if metric.kind == 'histogram':
+                    for le, cumulative in self._cumulative(metric, series):
+                        lines.append(render(f"{metric.name}_bucket", labels, cumulative, (('le', le),)))
+                    lines.append(render(f"{metric.name}_sum", labels, series.get('sum', 0.0)))
+                    lines.append(render(f"{metric.name}_count", labels, series.get('count', 0.0)))
+                else:
+                    lines.append(render(metric.name, labels, series.get('', 0.0)))
+
+        lines.append("# HELP process_uptime_seconds Seconds since this worker started")
+        lines.append("# TYPE process_uptime_seconds gauge")
+        lines.append(f"process_uptime_seconds {(datetime.utcnow() - self.start_time).total_seconds():g}")
+
+        return '\n'.join(lines) + '\n'
+
     def reset(self) -> None:
-        """Reset metrics."""
-        self.request_count.clear()
-        self.request_latencies.clear()
-        self.optimizer_runs = 0
-        self.optimizer_successes = 0
-        self.optimizer_failures = 0
+        """Reset metrics (of this process)."""
+        self._values.clear()
         self.start_time = datetime.utcnow()
 
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# ============================================================================
+# INSTRUMENTATION
+# ============================================================================
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request. Requests are labelled with
+    their route template (``/api/items/{item_id}``), so path parameters do
+    not create new series; requests matching no route share one label.
+    """
+
+    def __init__(self, app, collector: Optional[MetricsCollector] = None):
+        self.app = app
+        self.collector = collector or metrics_collector
+        self._templates: Dict[Any, str] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.collector.record_request(
+                self._template(scope),
+                (time.perf_counter() - started) * 1000.0,
+                status_code,
+                method=scope.get("method", ""),
+            )
+
+    def _template(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ENDPOINT
+        template = self._templates.get(endpoint)
+        if template is None:
+            app = scope.get("app")
+            routes = getattr(getattr(app, "router", None), "routes", [])
+            template = next(
+                (route.path for route in routes if getattr(route, "endpoint", None) is endpoint),
+                UNMATCHED_ENDPOINT,
+            )
+            self._templates[endpoint] = template
+        return template
+
+
+_SQL_TARGET = re.compile(r"\b(?:FROM|INTO|UPDATE|JOIN)\s+([\w.\"]+)", re.IGNORECASE)
+
+
+def _statement_labels(statement: str) -> Dict[str, str]:
+    words = statement.lstrip().split(None, 1)
+    operation = words[0].upper() if words else "UNKNOWN"
+    target = _SQL_TARGET.search(statement)
+    return {'operation': operation, 'table': target.group(1).strip('"') if target else ""}
+
+
+def pool_stats(pool) -> Dict[str, int]:
+    """Size and connection counts of a SQLAlchemy pool; empty for pools that keep none"""
+    if not hasattr(pool, 'checkedout'):
+        return {}
+    return {
+        'size': pool.size(),
+        'checked_in': pool.checkedin(),
+        'checked_out': pool.checkedout(),
+        'overflow': max(pool.overflow(), 0),
+    }
+
+
+def instrument_engine(engine, collector: Optional[MetricsCollector] = None, name: str = "sync") -> None:
+    """Time every statement run on a SQLAlchemy engine, by operation and table,
+    and track its pool's connections as gauges labelled with ``name``"""
+    from sqlalchemy import event
+
+    collector = collector or metrics_collector
+
+    def _pool_gauges(returning: int = 0):
+        stats = pool_stats(engine.pool)
+        if stats:
+            # A checkin event fires before the pool takes the connection back
+            stats['checked_out'] -= returning
+            stats['checked_in'] += returning
+        for state, count in stats.items():
+            collector.set_gauge('db_pool_connections', count, engine=name, state=state)
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        _pool_gauges()
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        _pool_gauges(returning=1)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['_query_started'].pop()
+        collector.observe('db_query_seconds', time.perf_counter() - started, **_statement_labels(statement))
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        stack = context.connection.info.get('_query_started') if context.connection is not None else None
+        if stack:
+            stack.pop()
+
+
 # Global metrics instance
 metrics_collector = MetricsCollector()
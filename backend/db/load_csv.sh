@@ -85,6 +85,26 @@ load_csv "route_congestion" "$CSV_DIR/route_congestion.csv"
 load_csv "truck_transport" "$CSV_DIR/truck_transport.csv"
 load_csv "material_production" "$CSV_DIR/material_production.csv"
 
+echo ""
+echo "=========================================="
+echo "Partitioning Loaded Months"
+echo "=========================================="
+
+# Rows of months without a partition went to the DEFAULT partitions; creating
+# those months moves them into monthly partitions
+psql -h "$DB_HOST" -p "$DB_PORT" -U "$DB_USER" -d "$DB_NAME" <<EOF
+SELECT create_monthly_partitions('rake_arrivals', (SELECT MIN(arrival_time)::DATE FROM rake_arrivals), (SELECT MAX(arrival_time)::DATE FROM rake_arrivals));
+SELECT create_monthly_partitions('lp_throughput', (SELECT MIN(ts)::DATE FROM lp_throughput), (SELECT MAX(ts)::DATE FROM lp_throughput));
+SELECT create_monthly_partitions('route_congestion', (SELECT MIN(date) FROM route_congestion), (SELECT MAX(date) FROM route_congestion));
+ANALYZE rake_arrivals, lp_throughput, route_congestion;
+EOF
+
+if [ $? -eq 0 ]; then
+  print_status "Monthly partitions created"
+else
+  print_error "Failed to create monthly partitions"
+fi
+
 echo ""
 echo "=========================================="
 echo "Refreshing Materialized Views"
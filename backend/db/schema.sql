@@ -3,8 +3,16 @@
 -- SIH25208 - Smart India Hackathon 2025
 -- ============================================================================
 
--- Enable TimescaleDB extension
-CREATE EXTENSION IF NOT EXISTS timescaledb CASCADE;
+-- Telemetry tables (rake_arrivals, lp_throughput, route_congestion,
+-- dispatch_history) are range-partitioned by month on their time column.
+-- Time ranges are served by partition pruning plus BRIN indexes, which stay
+-- a few pages per partition however many years accumulate. Rows outside
+-- the existing months land in a DEFAULT partition until
+-- create_monthly_partitions() creates their month; archive_old_partitions()
+-- detaches expired months into the archive schema. Both are run daily by
+-- the partition_maintenance job.
+
+CREATE SCHEMA IF NOT EXISTS archive;
 
 -- ============================================================================
 -- ORDERS TABLE
@@ -46,7 +54,7 @@ CREATE INDEX idx_inventory_as_of ON inventory(as_of DESC);
 CREATE UNIQUE INDEX idx_inventory_unique ON inventory(stockyard, material_type, as_of);
 
 -- ============================================================================
--- RAKE_ARRIVALS TABLE (Time-Series)
+-- RAKE_ARRIVALS TABLE (Time-Series, partitioned by month)
 -- ============================================================================
 CREATE TABLE IF NOT EXISTS rake_arrivals (
     rake_id VARCHAR(50) NOT NULL,
@@ -57,20 +65,15 @@ CREATE TABLE IF NOT EXISTS rake_arrivals (
     status VARCHAR(20) NOT NULL DEFAULT 'ARRIVED',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     PRIMARY KEY (rake_id, arrival_time)
-);
+) PARTITION BY RANGE (arrival_time);
 
-CREATE INDEX idx_rake_arrivals_yard ON rake_arrivals(yard);
-CREATE INDEX idx_rake_arrivals_arrival_time ON rake_arrivals(arrival_time DESC);
+CREATE TABLE IF NOT EXISTS rake_arrivals_default PARTITION OF rake_arrivals DEFAULT;
 
--- Convert to TimescaleDB hypertable
-SELECT create_hypertable(
-    'rake_arrivals',
-    'arrival_time',
-    if_not_exists => TRUE
-);
+CREATE INDEX idx_rake_arrivals_yard ON rake_arrivals(yard, arrival_time);
+CREATE INDEX idx_rake_arrivals_arrival_time ON rake_arrivals USING BRIN (arrival_time) WITH (pages_per_range = 32);
 
 -- ============================================================================
--- LP_THROUGHPUT TABLE (Time-Series)
+-- LP_THROUGHPUT TABLE (Time-Series, partitioned by month)
 -- ============================================================================
 CREATE TABLE IF NOT EXISTS lp_throughput (
     loading_point VARCHAR(50) NOT NULL,
@@ -79,20 +82,14 @@ CREATE TABLE IF NOT EXISTS lp_throughput (
     utilization_percent DECIMAL(5, 2) NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     PRIMARY KEY (loading_point, ts)
-);
+) PARTITION BY RANGE (ts);
 
-CREATE INDEX idx_lp_throughput_loading_point ON lp_throughput(loading_point);
-CREATE INDEX idx_lp_throughput_ts ON lp_throughput(ts DESC);
+CREATE TABLE IF NOT EXISTS lp_throughput_default PARTITION OF lp_throughput DEFAULT;
 
--- Convert to TimescaleDB hypertable
-SELECT create_hypertable(
-    'lp_throughput',
-    'ts',
-    if_not_exists => TRUE
-);
+CREATE INDEX idx_lp_throughput_ts ON lp_throughput USING BRIN (ts) WITH (pages_per_range = 32);
 
 -- ============================================================================
--- ROUTE_CONGESTION TABLE
+-- ROUTE_CONGESTION TABLE (partitioned by month)
 -- ============================================================================
 CREATE TABLE IF NOT EXISTS route_congestion (
     route_id VARCHAR(100) NOT NULL,
@@ -102,16 +99,18 @@ CREATE TABLE IF NOT EXISTS route_congestion (
     traffic_factor DECIMAL(3, 2) NOT NULL DEFAULT 1.0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     PRIMARY KEY (route_id, date)
-);
+) PARTITION BY RANGE (date);
 
-CREATE INDEX idx_route_congestion_route_id ON route_congestion(route_id);
-CREATE INDEX idx_route_congestion_date ON route_congestion(date DESC);
+CREATE TABLE IF NOT EXISTS route_congestion_default PARTITION OF route_congestion DEFAULT;
+
+CREATE INDEX idx_route_congestion_date ON route_congestion USING BRIN (date) WITH (pages_per_range = 32);
 
 -- ============================================================================
--- DISPATCH_HISTORY TABLE
+-- DISPATCH_HISTORY TABLE (partitioned by month)
 -- ============================================================================
+-- The primary key includes the partition key, as partitioned tables require
 CREATE TABLE IF NOT EXISTS dispatch_history (
-    dispatch_id SERIAL PRIMARY KEY,
+    dispatch_id SERIAL,
     dispatch_date DATE NOT NULL,
     rake_id VARCHAR(50),
     truck_id VARCHAR(50),
@@ -123,14 +122,89 @@ CREATE TABLE IF NOT EXISTS dispatch_history (
     transport_mode VARCHAR(20) NOT NULL,
     status VARCHAR(20) NOT NULL DEFAULT 'PLANNED',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (dispatch_id, dispatch_date)
+) PARTITION BY RANGE (dispatch_date);
+
+CREATE TABLE IF NOT EXISTS dispatch_history_default PARTITION OF dispatch_history DEFAULT;
 
-CREATE INDEX idx_dispatch_history_dispatch_date ON dispatch_history(dispatch_date DESC);
+CREATE INDEX idx_dispatch_history_dispatch_date ON dispatch_history USING BRIN (dispatch_date) WITH (pages_per_range = 32);
 CREATE INDEX idx_dispatch_history_rake_id ON dispatch_history(rake_id);
 CREATE INDEX idx_dispatch_history_truck_id ON dispatch_history(truck_id);
 CREATE INDEX idx_dispatch_history_status ON dispatch_history(status);
 
+-- ============================================================================
+-- PARTITION MAINTENANCE
+-- ============================================================================
+-- Create the monthly partitions of parent covering from_date..to_date.
+-- Rows already in the DEFAULT partition for a new month are moved into it.
+-- Returns the number of partitions created.
+CREATE OR REPLACE FUNCTION create_monthly_partitions(parent TEXT, from_date DATE, to_date DATE)
+RETURNS INT AS $$
+DECLARE
+    month_start DATE := date_trunc('month', from_date)::DATE;
+    month_end DATE;
+    partition_name TEXT;
+    partition_key TEXT;
+    created INT := 0;
+BEGIN
+    SELECT a.attname INTO partition_key
+    FROM pg_partitioned_table pt
+    JOIN pg_attribute a ON a.attrelid = pt.partrelid AND a.attnum = pt.partattrs[0]
+    WHERE pt.partrelid = parent::REGCLASS;
+
+    WHILE month_start <= to_date LOOP
+        month_end := (month_start + INTERVAL '1 month')::DATE;
+        partition_name := format('%s_p%s', parent, to_char(month_start, 'YYYYMM'));
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                           partition_name, parent);
+            EXECUTE format('WITH moved AS (DELETE FROM %I WHERE %I >= %L AND %I < %L RETURNING *) '
+                           'INSERT INTO %I SELECT * FROM moved',
+                           parent || '_default', partition_key, month_start, partition_key, month_end,
+                           partition_name);
+            EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                           parent, partition_name, month_start, month_end);
+            created := created + 1;
+        END IF;
+        month_start := month_end;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Detach the monthly partitions of parent that ended more than keep_months
+-- whole months ago and move them to the archive schema. Returns their names.
+CREATE OR REPLACE FUNCTION archive_old_partitions(parent TEXT, keep_months INT)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', CURRENT_DATE) - make_interval(months => keep_months))::DATE;
+    partition RECORD;
+BEGIN
+    FOR partition IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = parent::REGCLASS
+            AND c.relname ~ ('^' || parent || '_p[0-9]{6}$')
+            AND to_date(right(c.relname, 6), 'YYYYMM') < cutoff
+        ORDER BY c.relname
+    LOOP
+        EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', parent, partition.relname);
+        EXECUTE format('ALTER TABLE %I SET SCHEMA archive', partition.relname);
+        RETURN NEXT partition.relname;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Two years of history and the next three months
+SELECT parent, create_monthly_partitions(
+    parent,
+    (CURRENT_DATE - INTERVAL '24 months')::DATE,
+    (CURRENT_DATE + INTERVAL '3 months')::DATE
+)
+FROM unnest(ARRAY['rake_arrivals', 'lp_throughput', 'route_congestion', 'dispatch_history']) AS parent;
+
 -- ============================================================================
 -- TRUCK_TRANSPORT TABLE
 -- ============================================================================
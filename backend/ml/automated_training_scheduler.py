@@ -3,6 +3,9 @@ Automated ML Model Training Scheduler
 Trains all 17 ML models daily at specified time
 Monitors model performance and retrains on demand
 
+Scheduling itself lives in app.services.job_scheduler, which runs the jobs
+below in a separate low-priority process on a single elected leader.
+
 Features:
 - Daily automated training at 2 AM (configurable)
 - Performance monitoring and alerts
@@ -12,27 +15,17 @@ Features:
 """
 
 import logging
-import asyncio
 import json
 from datetime import datetime, time, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional
-import threading
-import schedule
 import pickle
 import hashlib
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('backend/ml/logs/training_scheduler.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
+ML_DIR = Path(__file__).parent
+
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
@@ -44,9 +37,9 @@ TRAINING_CONFIG = {
     'MAX_RETRAIN_ATTEMPTS': 3,
     'MODEL_VERSIONING': True,
     'BACKUP_MODELS': True,
-    'MODELS_DIR': Path('backend/ml/models'),
-    'LOGS_DIR': Path('backend/ml/logs'),
-    'HISTORY_FILE': Path('backend/ml/logs/training_history.json'),
+    'MODELS_DIR': ML_DIR / 'models',
+    'LOGS_DIR': ML_DIR / 'logs',
+    'HISTORY_FILE': ML_DIR / 'logs' / 'training_history.json',
 }
 
 # Ensure directories exist
@@ -75,6 +68,10 @@ class TrainingHistoryManager:
                 return {'trainings': [], 'model_versions': {}}
         return {'trainings': [], 'model_versions': {}}
     
+    def reload(self):
+        """Re-read history written by the training worker process"""
+        self.history = self._load_history()
+    
     def _save_history(self):
         """Save training history to file"""
         try:
@@ -302,107 +299,47 @@ class AutomatedModelTrainer:
         }
 
 # ============================================================================
-# SCHEDULER
-# ============================================================================
-
-class TrainingScheduler:
-    """Manages training schedule"""
-    
-    def __init__(self):
-        self.trainer = AutomatedModelTrainer()
-        self.scheduler = schedule.Scheduler()
-        self._setup_schedule()
-    
-    def _setup_schedule(self):
-        """Setup training schedule"""
-        training_time = TRAINING_CONFIG['DAILY_TRAINING_TIME']
-        
-        # Schedule daily training
-        self.scheduler.every().day.at(training_time).do(self._daily_training_job)
-        logger.info(f"✓ Scheduled daily training at {training_time}")
-        
-        # Schedule performance checks every hour
-        self.scheduler.every().hour.do(self._performance_check_job)
-        logger.info("✓ Scheduled hourly performance checks")
-    
-    def _daily_training_job(self):
-        """Daily training job"""
-        logger.info("🔄 Starting scheduled daily training...")
-        result = self.trainer.train_all_models()
-        
-        if result['status'] == 'success':
-            logger.info("✅ Daily training completed successfully")
-        else:
-            logger.error(f"❌ Daily training failed: {result.get('error')}")
-    
-    def _performance_check_job(self):
-        """Performance check job"""
-        check_result = self.trainer.check_model_performance()
-        
-        if check_result['needs_retraining']:
-            logger.warning(f"⚠️  Performance check triggered retraining: {check_result['reason']}")
-            self.trainer.train_all_models()
-    
-    def start(self):
-        """Start the scheduler in a background thread"""
-        def run_scheduler():
-            logger.info("🚀 Training scheduler started")
-            while True:
-                self.scheduler.run_pending()
-                asyncio.sleep(60)  # Check every minute
-        
-        thread = threading.Thread(target=run_scheduler, daemon=True)
-        thread.start()
-        logger.info("✓ Scheduler running in background thread")
-    
-    def get_status(self) -> Dict:
-        """Get scheduler status"""
-        return {
-            'scheduler_active': True,
-            'training_time': TRAINING_CONFIG['DAILY_TRAINING_TIME'],
-            'trainer_status': self.trainer.get_training_status(),
-            'next_run': str(self.scheduler.next_run) if self.scheduler.jobs else None,
-        }
-
-# ============================================================================
-# GLOBAL SCHEDULER INSTANCE
+# SCHEDULED JOBS
 # ============================================================================
 
-_scheduler_instance = None
-
-def get_scheduler() -> TrainingScheduler:
-    """Get or create scheduler instance"""
-    global _scheduler_instance
-    if _scheduler_instance is None:
-        _scheduler_instance = TrainingScheduler()
-    return _scheduler_instance
+_trainer_instance: Optional[AutomatedModelTrainer] = None
 
-def start_scheduler():
-    """Start the training scheduler"""
-    scheduler = get_scheduler()
-    scheduler.start()
+def get_trainer() -> AutomatedModelTrainer:
+    """Get or create trainer instance"""
+    global _trainer_instance
+    if _trainer_instance is None:
+        _trainer_instance = AutomatedModelTrainer()
+    return _trainer_instance
 
-# ============================================================================
-# MANUAL TRAINING ENDPOINT
-# ============================================================================
+def run_training_job() -> Dict:
+    """Nightly training job, executed by the job scheduler's worker process"""
+    result = get_trainer().train_all_models()
+    # The per-model details are already in the training history file
+    return {key: value for key, value in result.items() if key != 'model_details'}
 
-def trigger_manual_training() -> Dict:
-    """Manually trigger training"""
-    scheduler = get_scheduler()
-    logger.info("📌 Manual training triggered")
-    return scheduler.trainer.train_all_models()
+def run_performance_check_job() -> Dict:
+    """Hourly performance check; retrains in the same worker process if needed"""
+    check_result = get_trainer().check_model_performance()
+    
+    if check_result['needs_retraining']:
+        logger.warning(f"⚠️  Performance check triggered retraining: {check_result['reason']}")
+        check_result['training'] = run_training_job()
+    
+    return check_result
 
-def get_scheduler_status() -> Dict:
-    """Get scheduler status"""
-    scheduler = get_scheduler()
-    return scheduler.get_status()
+def get_training_status() -> Dict:
+    """Get trainer status from the shared training history"""
+    trainer = get_trainer()
+    trainer.history_manager.reload()
+    return trainer.get_training_status()
 
 def get_training_history() -> Dict:
     """Get training history"""
-    scheduler = get_scheduler()
+    trainer = get_trainer()
+    trainer.history_manager.reload()
     return {
-        'history': scheduler.trainer.history_manager.history,
-        'stats': scheduler.trainer.history_manager.get_training_stats(),
+        'history': trainer.history_manager.history,
+        'stats': trainer.history_manager.get_training_stats(),
     }
 
 # ============================================================================
@@ -410,12 +347,13 @@ def get_training_history() -> Dict:
 # ============================================================================
 
 if __name__ == '__main__':
-    logger.info("Starting ML Training Scheduler...")
-    start_scheduler()
-    
-    # Keep running
-    try:
-        while True:
-            asyncio.sleep(1)
-    except KeyboardInterrupt:
-        logger.info("Scheduler stopped")
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(TRAINING_CONFIG['LOGS_DIR'] / 'training_scheduler.log'),
+            logging.StreamHandler()
+        ]
+    )
+    logger.info("Running ML training once...")
+    print(json.dumps(run_training_job(), indent=2, default=str))
@@ -7,10 +7,86 @@ import logging
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple
-from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# ============================================================================
+# LOOKUP TABLES
+# ============================================================================
+
+ROUTE_RISKS = {
+    'bokaro-dhanbad': 85,
+    'bokaro-hatia': 35,
+    'bokaro-kolkata': 12,
+    'bokaro-patna': 8,
+    'bokaro-ranchi': 10,
+    'bokaro-durgapur': 15,
+    'bokaro-haldia': 25,
+}
+
+ROUTE_DISTANCES = {
+    'bokaro-dhanbad': 85,
+    'bokaro-hatia': 120,
+    'bokaro-kolkata': 180,
+    'bokaro-patna': 150,
+    'bokaro-ranchi': 95,
+    'bokaro-durgapur': 110,
+    'bokaro-haldia': 220,
+}
+
+MATERIAL_RISKS = {
+    'cr_coils': 15,
+    'hr_coils': 22,
+    'plates': 28,
+    'wire_rods': 18,
+    'tmt_bars': 20,
+    'pig_iron': 32,
+    'billets': 19,
+}
+
+MATERIAL_COSTS = {
+    'cr_coils': 5200,
+    'hr_coils': 3500,
+    'plates': 4200,
+    'wire_rods': 2800,
+    'tmt_bars': 3100,
+    'pig_iron': 2500,
+    'billets': 3400,
+}
+
+WEATHER_RISKS = {
+    'clear': 0,
+    'rainy': 10,
+    'foggy': 15,
+    'stormy': 25,
+}
+
+TRAFFIC_RISKS = {
+    'low': 5,
+    'medium': 15,
+    'high': 25,
+    'very-high': 35,
+}
+
+SEVERITY_SCORES = {
+    'low': 25,
+    'medium': 50,
+    'high': 75,
+    'critical': 100,
+}
+
+TONNAGE_BINS = [25, 50, 75]
+TONNAGE_CATEGORIES = ['light', 'medium', 'heavy', 'very_heavy']
+
+# Weights of the component risks in total_risk
+RISK_WEIGHTS = {
+    'route_risk': 0.4,
+    'material_risk': 0.3,
+    'weather_risk': 0.2,
+    'traffic_risk': 0.1,
+}
+
+
 class FeatureEngineer:
     """Feature engineering for ML models"""
     
@@ -23,75 +99,114 @@ class FeatureEngineer:
     # ========================================================================
     
     def extract_dispatch_features(self, dispatch_data: Dict) -> Dict:
-        """Extract features from dispatch data"""
-        features = {}
+        """
+        Extract features from dispatch data: the one-row case of
+        extract_dispatch_features_batch, so training and inference features
+        cannot drift apart. Numeric features are floats.
+        """
+        return self.extract_dispatch_features_batch(pd.DataFrame([dispatch_data])).to_dict('records')[0]
+    
+    def extract_decision_features(self, decision_data: Dict) -> Dict:
+        """
+        Extract features from decision data: the one-row case of
+        extract_decision_features_batch. Numeric features are floats and
+        missing or None values take their defaults (complexity 50).
+        """
+        return self.extract_decision_features_batch(pd.DataFrame([decision_data])).to_dict('records')[0]
+    
+    # ========================================================================
+    # BATCH FEATURE EXTRACTION
+    # ========================================================================
+    
+    def extract_dispatch_features_batch(self, dispatch_df: pd.DataFrame) -> pd.DataFrame:
+        """Extract dispatch features for every row of a DataFrame.
+
+        Categorical columns are mapped through precomputed lookup arrays and
+        dates/times are parsed with vectorized pandas operations, so the cost
+        is dominated by a handful of array passes rather than per-row Python.
+        Numeric features are floats; missing or None numbers take their
+        defaults.
+        """
+        df = dispatch_df
+        features = pd.DataFrame(index=df.index)
         
         # Route features
-        features['route_risk'] = self._get_route_risk(dispatch_data.get('route'))
-        features['route_distance'] = self._get_route_distance(dispatch_data.get('route'))
+        route = _column(df, 'route')
+        features['route_risk'] = _lookup(route, ROUTE_RISKS, 50)
+        features['route_distance'] = _lookup(route, ROUTE_DISTANCES, 100)
         
         # Material features
-        features['material_risk'] = self._get_material_risk(dispatch_data.get('material'))
-        features['material_cost'] = self._get_material_cost(dispatch_data.get('material'))
+        material = _column(df, 'material')
+        features['material_risk'] = _lookup(material, MATERIAL_RISKS, 20)
+        features['material_cost'] = _lookup(material, MATERIAL_COSTS, 3500)
         
         # Tonnage features
-        tonnage = dispatch_data.get('tonnage', 0)
+        tonnage = _numeric_column(df, 'tonnage', 0)
         features['tonnage'] = tonnage
-        features['tonnage_category'] = self._categorize_tonnage(tonnage)
+        features['tonnage_category'] = np.asarray(TONNAGE_CATEGORIES, dtype=object)[
+            np.searchsorted(TONNAGE_BINS, tonnage.to_numpy(), side='right')
+        ]
         
         # Time features
-        features['day_of_week'] = self._get_day_of_week(dispatch_data.get('date'))
-        features['is_weekend'] = self._is_weekend(dispatch_data.get('date'))
-        features['hour_of_day'] = self._get_hour_of_day(dispatch_data.get('dispatch_time'))
+        day_of_week = self._get_day_of_week_batch(_column(df, 'date'))
+        features['day_of_week'] = day_of_week
+        features['is_weekend'] = (day_of_week >= 5).astype(int)
+        features['hour_of_day'] = self._get_hour_of_day_batch(_column(df, 'dispatch_time'))
         
         # Weather features
-        features['weather_risk'] = self._get_weather_risk(dispatch_data.get('weather'))
+        features['weather_risk'] = _lookup(_column(df, 'weather'), WEATHER_RISKS, 5)
         
         # Traffic features
-        features['traffic_risk'] = self._get_traffic_risk(dispatch_data.get('traffic_level'))
+        features['traffic_risk'] = _lookup(_column(df, 'traffic_level'), TRAFFIC_RISKS, 15)
         
         # Vehicle features
-        features['vehicle_age'] = self._estimate_vehicle_age(dispatch_data.get('vehicle'))
+        features['vehicle_age'] = _map_unique(_column(df, 'vehicle'), self._estimate_vehicle_age)
         
         # Driver features
-        features['driver_experience'] = self._estimate_driver_experience(dispatch_data.get('driver'))
+        features['driver_experience'] = _map_unique(_column(df, 'driver'), self._estimate_driver_experience)
         
         # Derived features
-        features['total_risk'] = self._calculate_total_risk(features)
-        features['cost_per_km'] = self._calculate_cost_per_km(
-            dispatch_data.get('total_cost', 0),
-            features['route_distance']
+        features['total_risk'] = np.minimum(
+            100, sum(features[name] * weight for name, weight in RISK_WEIGHTS.items())
         )
+        features['cost_per_km'] = _numeric_column(df, 'total_cost', 0) / np.maximum(1, features['route_distance'])
         
         return features
     
-    def extract_decision_features(self, decision_data: Dict) -> Dict:
-        """Extract features from decision data"""
-        features = {}
+    def extract_decision_features_batch(self, decision_df: pd.DataFrame) -> pd.DataFrame:
+        """Extract decision features for every row of a DataFrame"""
+        df = decision_df
+        features = pd.DataFrame(index=df.index)
         
         # Scenario features
-        features['scenario_complexity'] = decision_data.get('complexity', 50)
-        features['scenario_severity'] = self._severity_to_numeric(decision_data.get('severity'))
+        features['scenario_complexity'] = _numeric_column(df, 'complexity', 50)
+        features['scenario_severity'] = _lookup(_column(df, 'severity'), SEVERITY_SCORES, 50)
         
         # Decision features
-        num_decisions = len(decision_data.get('decisions', []))
-        features['num_decisions'] = num_decisions
-        features['decision_diversity'] = self._calculate_decision_diversity(decision_data.get('decisions', []))
+        decisions = _column(df, 'decisions').map(lambda d: d if isinstance(d, (list, tuple)) else [])
+        features['num_decisions'] = decisions.str.len().astype(int)
+        features['decision_diversity'] = np.array(
+            [self._calculate_decision_diversity(d) for d in decisions], dtype=float
+        )
         
         # Outcome features
-        features['outcome_success'] = 1 if decision_data.get('outcome') == 'Success' else 0
+        features['outcome_success'] = (_column(df, 'outcome') == 'Success').astype(int)
         
         # Impact features
-        features['cost_impact'] = decision_data.get('cost_impact', 0)
-        features['time_impact'] = decision_data.get('time_impact', 0)
-        features['satisfaction_impact'] = decision_data.get('satisfaction_impact', 0)
+        features['cost_impact'] = _numeric_column(df, 'cost_impact', 0)
+        features['time_impact'] = _numeric_column(df, 'time_impact', 0)
+        features['satisfaction_impact'] = _numeric_column(df, 'satisfaction_impact', 0)
         
         # Risk features
-        features['risk_mitigated'] = decision_data.get('risk_mitigated', 0)
+        features['risk_mitigated'] = _numeric_column(df, 'risk_mitigated', 0)
         
         # Derived features
-        features['total_impact'] = self._calculate_total_impact(features)
-        features['decision_effectiveness'] = self._calculate_decision_effectiveness(features)
+        total_impact = (features['cost_impact'].abs() + features['time_impact'].abs() +
+                        features['satisfaction_impact'].abs())
+        features['total_impact'] = total_impact
+        features['decision_effectiveness'] = np.where(
+            features['outcome_success'] == 1, total_impact * 1.5, np.maximum(0, total_impact * 0.5)
+        )
         
         return features
     
@@ -170,144 +285,21 @@ class FeatureEngineer:
         
         return derived
     
-    # ========================================================================
-    # HELPER METHODS - ROUTE FEATURES
-    # ========================================================================
-    
-    def _get_route_risk(self, route: str) -> float:
-        """Get risk score for route"""
-        route_risks = {
-            'bokaro-dhanbad': 85,
-            'bokaro-hatia': 35,
-            'bokaro-kolkata': 12,
-            'bokaro-patna': 8,
-            'bokaro-ranchi': 10,
-            'bokaro-durgapur': 15,
-            'bokaro-haldia': 25,
-        }
-        return route_risks.get(route, 50)
-    
-    def _get_route_distance(self, route: str) -> float:
-        """Get distance for route"""
-        route_distances = {
-            'bokaro-dhanbad': 85,
-            'bokaro-hatia': 120,
-            'bokaro-kolkata': 180,
-            'bokaro-patna': 150,
-            'bokaro-ranchi': 95,
-            'bokaro-durgapur': 110,
-            'bokaro-haldia': 220,
-        }
-        return route_distances.get(route, 100)
-    
-    # ========================================================================
-    # HELPER METHODS - MATERIAL FEATURES
-    # ========================================================================
-    
-    def _get_material_risk(self, material: str) -> float:
-        """Get risk score for material"""
-        material_risks = {
-            'cr_coils': 15,
-            'hr_coils': 22,
-            'plates': 28,
-            'wire_rods': 18,
-            'tmt_bars': 20,
-            'pig_iron': 32,
-            'billets': 19,
-        }
-        return material_risks.get(material, 20)
-    
-    def _get_material_cost(self, material: str) -> float:
-        """Get cost for material"""
-        material_costs = {
-            'cr_coils': 5200,
-            'hr_coils': 3500,
-            'plates': 4200,
-            'wire_rods': 2800,
-            'tmt_bars': 3100,
-            'pig_iron': 2500,
-            'billets': 3400,
-        }
-        return material_costs.get(material, 3500)
-    
-    # ========================================================================
-    # HELPER METHODS - WEATHER & TRAFFIC
-    # ========================================================================
-    
-    def _get_weather_risk(self, weather: str) -> float:
-        """Get risk for weather condition"""
-        weather_risks = {
-            'clear': 0,
-            'rainy': 10,
-            'foggy': 15,
-            'stormy': 25,
-        }
-        return weather_risks.get(weather, 5)
-    
-    def _get_traffic_risk(self, traffic_level: str) -> float:
-        """Get risk for traffic level"""
-        traffic_risks = {
-            'low': 5,
-            'medium': 15,
-            'high': 25,
-            'very-high': 35,
-        }
-        return traffic_risks.get(traffic_level, 15)
-    
     # ========================================================================
     # HELPER METHODS - TIME FEATURES
     # ========================================================================
     
-    def _get_day_of_week(self, date_str: str) -> int:
-        """Get day of week (0-6)"""
-        try:
-            if isinstance(date_str, str):
-                date = datetime.fromisoformat(date_str)
-            else:
-                date = date_str
-            return date.weekday()
-        except:
-            return 0
-    
-    def _is_weekend(self, date_str: str) -> int:
-        """Check if date is weekend"""
-        day = self._get_day_of_week(date_str)
-        return 1 if day >= 5 else 0
+    def _get_day_of_week_batch(self, dates: pd.Series) -> np.ndarray:
+        """Vectorized day of week (0-6), 0 for unparseable dates"""
+        codes, uniques = _factorize(dates)
+        parsed = pd.to_datetime(uniques, errors='coerce', format='ISO8601')
+        return parsed.dt.weekday.fillna(0).astype(int).to_numpy()[codes]
     
-    def _get_hour_of_day(self, time_str: str) -> int:
-        """Get hour of day"""
-        try:
-            if time_str:
-                hour = int(time_str.split(':')[0])
-                return hour
-        except:
-            pass
-        return 12
-    
-    # ========================================================================
-    # HELPER METHODS - CATEGORICAL
-    # ========================================================================
-    
-    def _categorize_tonnage(self, tonnage: float) -> str:
-        """Categorize tonnage"""
-        if tonnage < 25:
-            return 'light'
-        elif tonnage < 50:
-            return 'medium'
-        elif tonnage < 75:
-            return 'heavy'
-        else:
-            return 'very_heavy'
-    
-    def _severity_to_numeric(self, severity: str) -> float:
-        """Convert severity to numeric"""
-        severity_map = {
-            'low': 25,
-            'medium': 50,
-            'high': 75,
-            'critical': 100,
-        }
-        return severity_map.get(severity, 50)
+    def _get_hour_of_day_batch(self, times: pd.Series) -> np.ndarray:
+        """Vectorized hour of day from 'HH:MM[:SS]' strings, 12 when missing"""
+        codes, uniques = _factorize(times)
+        hour = uniques.str.extract(r'^\s*([+-]?\d+)\s*(?::|$)', expand=False)
+        return pd.to_numeric(hour, errors='coerce').fillna(12).astype(int).to_numpy()[codes]
     
     # ========================================================================
     # HELPER METHODS - ESTIMATES
@@ -335,40 +327,51 @@ class FeatureEngineer:
     # HELPER METHODS - CALCULATIONS
     # ========================================================================
     
-    def _calculate_total_risk(self, features: Dict) -> float:
-        """Calculate total risk from components"""
-        route_risk = features.get('route_risk', 0)
-        material_risk = features.get('material_risk', 0)
-        weather_risk = features.get('weather_risk', 0)
-        traffic_risk = features.get('traffic_risk', 0)
-        
-        # Weighted average
-        total = (route_risk * 0.4 + material_risk * 0.3 + 
-                weather_risk * 0.2 + traffic_risk * 0.1)
-        return min(100, total)
-    
-    def _calculate_cost_per_km(self, total_cost: float, distance: float) -> float:
-        """Calculate cost per km"""
-        return total_cost / max(1, distance)
-    
     def _calculate_decision_diversity(self, decisions: List) -> float:
         """Calculate diversity of decisions"""
         if not decisions:
             return 0
         unique_decisions = len(set(decisions))
         return (unique_decisions / len(decisions)) * 100
-    
-    def _calculate_total_impact(self, features: Dict) -> float:
-        """Calculate total impact"""
-        cost_impact = abs(features.get('cost_impact', 0))
-        time_impact = abs(features.get('time_impact', 0))
-        satisfaction_impact = abs(features.get('satisfaction_impact', 0))
-        
-        return cost_impact + time_impact + satisfaction_impact
-    
-    def _calculate_decision_effectiveness(self, features: Dict) -> float:
-        """Calculate decision effectiveness"""
-        if features.get('outcome_success', 0):
-            return features.get('total_impact', 0) * 1.5
-        else:
-            return max(0, features.get('total_impact', 0) * 0.5)
+
+
+# ============================================================================
+# VECTORIZED HELPERS
+# ============================================================================
+
+def _column(df: pd.DataFrame, name: str) -> pd.Series:
+    """Return column ``name`` as an object Series, all-None when absent"""
+    if name in df.columns:
+        return df[name].astype(object)
+    return pd.Series(None, index=df.index, dtype=object)
+
+
+def _numeric_column(df: pd.DataFrame, name: str, default: float) -> pd.Series:
+    """Return column ``name`` as floats with missing values set to ``default``"""
+    if name not in df.columns:
+        return pd.Series(float(default), index=df.index)
+    return pd.to_numeric(df[name], errors='coerce').fillna(default).astype(float)
+
+
+def _lookup(values: pd.Series, table: Dict, default: float) -> np.ndarray:
+    """Map values through ``table`` using categorical codes.
+
+    Unknown values get code -1, which indexes the trailing ``default`` slot of
+    the lookup array.
+    """
+    codes = pd.Categorical(values, categories=list(table)).codes
+    lookup = np.array(list(table.values()) + [default], dtype=float)
+    return lookup[codes]
+
+
+def _factorize(values: pd.Series) -> Tuple[np.ndarray, pd.Series]:
+    """Factorize ``values`` so parsing runs once per distinct value"""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    return codes, pd.Series(uniques, dtype=object)
+
+
+def _map_unique(values: pd.Series, func) -> np.ndarray:
+    """Apply a scalar ``func`` once per distinct value and broadcast back"""
+    codes, uniques = _factorize(values)
+    lookup = np.array([func(u) for u in uniques], dtype=float)
+    return lookup[codes] if len(lookup) else np.empty(0, dtype=float)
@@ -191,6 +191,22 @@ def create_tables(engine):
         CREATE INDEX IF NOT EXISTS idx_historical_dispatches_material 
         ON historical_dispatches(material);
         """,
+        
+        # Keyset pagination order of the /api/database list endpoints
+        """
+        CREATE INDEX IF NOT EXISTS idx_historical_shipments_date_id
+        ON historical_shipments(date DESC, id DESC);
+        """,
+        
+        """
+        CREATE INDEX IF NOT EXISTS idx_historical_decisions_date_id
+        ON historical_decisions(date DESC, id DESC);
+        """,
+        
+        """
+        CREATE INDEX IF NOT EXISTS idx_historical_dispatches_date_id
+        ON historical_dispatches(date DESC, id DESC);
+        """,
     ]
     
     try:
@@ -299,6 +299,35 @@ class ModelServer:
             self.logger.error(f"Error detecting anomaly: {str(e)}")
             return {"status": "error", "message": str(e)}
     
+    # ========================================================================
+    # BATCH PREDICTION
+    # ========================================================================
+    
+    def batch_predict(self, model_name: str, inputs: Any) -> Dict:
+        """Score a whole batch with one feature matrix and one model call.
+
+        Batch predictions are not stored row by row; callers that need an
+        audit trail should persist the returned list themselves.
+        """
+        try:
+            success, result = self.trainer.batch_predict(model_name, inputs)
+            
+            if success:
+                return {
+                    "status": "success",
+                    "model": model_name,
+                    "count": len(result),
+                    "predictions": [r['prediction'] for r in result],
+                    "confidence": [r['confidence'] for r in result],
+                    "timestamp": result[0]['timestamp'] if result else datetime.utcnow().isoformat()
+                }
+            else:
+                return {"status": "error", "message": result.get('error')}
+        
+        except Exception as e:
+            self.logger.error(f"Error in batch prediction: {str(e)}")
+            return {"status": "error", "message": str(e)}
+    
     # ========================================================================
     # HELPER METHODS
     # ========================================================================
@@ -106,6 +106,18 @@ class ModelTrainer:
     
     def predict(self, model_name: str, input_data: Dict) -> Tuple[bool, Any]:
         """Make prediction using trained model"""
+        success, result = self.batch_predict(model_name, [input_data])
+        if not success:
+            return False, result
+        return True, result[0]
+    
+    def batch_predict(self, model_name: str, inputs: Any) -> Tuple[bool, Any]:
+        """Make batch predictions with one transform and one predict call.
+
+        ``inputs`` may be a list of dicts, a DataFrame, a dict of columns, an
+        Arrow table/record batch (anything with ``to_pandas``) or a 2-D NumPy
+        array whose columns are already in the model's feature order.
+        """
         try:
             if model_name not in self.models:
                 return False, {"error": f"Model {model_name} not found"}
@@ -116,41 +128,38 @@ class ModelTrainer:
             features = model_info['features']
             
             # Prepare input
-            X = self._prepare_prediction_input(input_data, features)
+            X = self._prepare_batch_input(inputs, features)
             
             if X is None:
                 return False, {"error": "Invalid input data"}
+            if len(X) == 0:
+                return True, []
             
             # Scale
-            X_scaled = scaler.transform(X)
+            X_scaled = scaler.transform(pd.DataFrame(X, columns=features))
             
             # Predict
-            prediction = model.predict(X_scaled)[0]
+            predictions = model.predict(X_scaled)
             
             # Get confidence (feature importance weighted)
-            confidence = self._calculate_confidence(model, X_scaled)
-            
-            return True, {
-                'prediction': float(prediction),
-                'confidence': float(confidence),
-                'model': model_name,
-                'timestamp': datetime.utcnow().isoformat()
-            }
+            confidences = self._calculate_confidence_batch(model, X_scaled)
+            
+            timestamp = datetime.utcnow().isoformat()
+            return True, [
+                {
+                    'prediction': prediction,
+                    'confidence': confidence,
+                    'model': model_name,
+                    'timestamp': timestamp
+                }
+                for prediction, confidence in zip(predictions.astype(float).tolist(),
+                                                  confidences.tolist())
+            ]
         
         except Exception as e:
-            self.logger.error(f"Error making prediction with {model_name}: {str(e)}")
+            self.logger.error(f"Error making batch prediction with {model_name}: {str(e)}")
             return False, {"error": str(e)}
     
-    def batch_predict(self, model_name: str, input_data_list: list) -> Tuple[bool, list]:
-        """Make batch predictions"""
-        predictions = []
-        for input_data in input_data_list:
-            success, result = self.predict(model_name, input_data)
-            if success:
-                predictions.append(result)
-        
-        return len(predictions) > 0, predictions
-    
     # ========================================================================
     # MODEL VERSIONING
     # ========================================================================
@@ -251,13 +260,27 @@ class ModelTrainer:
     
     def _prepare_prediction_input(self, input_data: Dict, features: list) -> pd.DataFrame:
         """Prepare input for prediction"""
+        X = self._prepare_batch_input([input_data], features)
+        return None if X is None else pd.DataFrame(X, columns=features)
+    
+    def _prepare_batch_input(self, inputs: Any, features: list) -> np.ndarray:
+        """Assemble a float feature matrix in model feature order"""
         try:
-            # Create dataframe with required features
-            data = {}
-            for feature in features:
-                data[feature] = [input_data.get(feature, 0)]
-            
-            return pd.DataFrame(data)
+            if isinstance(inputs, np.ndarray):
+                X = np.atleast_2d(inputs).astype(float, copy=False)
+                if X.shape[1] != len(features):
+                    raise ValueError(f"Expected {len(features)} feature columns, got {X.shape[1]}")
+                return X
+            
+            if hasattr(inputs, 'to_pandas'):
+                inputs = inputs.to_pandas()
+            if not isinstance(inputs, pd.DataFrame):
+                inputs = pd.DataFrame(list(inputs) if not isinstance(inputs, dict) else inputs)
+            
+            # Missing features and non-numeric values default to 0
+            frame = inputs.reindex(columns=features)
+            frame = frame.apply(pd.to_numeric, errors='coerce').fillna(0)
+            return frame.to_numpy(dtype=float)
         
         except Exception as e:
             self.logger.error(f"Error preparing prediction input: {str(e)}")
@@ -288,13 +311,17 @@ class ModelTrainer:
     
     def _calculate_confidence(self, model, X_scaled) -> float:
         """Calculate prediction confidence"""
+        return float(self._calculate_confidence_batch(model, X_scaled)[0])
+    
+    def _calculate_confidence_batch(self, model, X_scaled) -> np.ndarray:
+        """Calculate prediction confidence for every row"""
+        confidence = 75.0
         try:
             if hasattr(model, 'feature_importances_'):
-                importances = model.feature_importances_
-                return float(np.mean(importances) * 100)
-            return 75.0
-        except:
-            return 75.0
+                confidence = float(np.mean(model.feature_importances_) * 100)
+        except Exception:
+            pass
+        return np.full(len(X_scaled), confidence)
     
     def _save_model_to_db(self, model_name: str, model, scaler, metrics):
         """Save model info to database"""
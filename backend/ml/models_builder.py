@@ -4,7 +4,8 @@ Each model is specialized for one task and learns from historical data
 """
 
 import logging
-import pickle
+import time
+import joblib
 import numpy as np
 import pandas as pd
 from datetime import datetime
@@ -17,6 +18,27 @@ from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
 
+# (results group, results key, model name, target column, model kind)
+MODEL_BUILD_PLAN = [
+    ("prediction_models", "delay_prediction", "delay_prediction_model", "delay_days", "regression"),
+    ("prediction_models", "cost_prediction", "cost_prediction_model", "total_cost", "regression"),
+    ("prediction_models", "demand_forecasting", "demand_forecasting_model", "tonnage", "regression"),
+    ("prediction_models", "quality_prediction", "quality_prediction_model", "quality_score", "regression"),
+    ("prediction_models", "fuel_consumption", "fuel_consumption_model", "fuel_consumed", "regression"),
+    ("optimization_models", "route_optimization", "route_optimization_model", "route", "classification"),
+    ("optimization_models", "cost_optimization", "cost_optimization_model", "cost_optimization", "regression"),
+    ("optimization_models", "time_optimization", "time_optimization_model", "actual_days", "regression"),
+    ("optimization_models", "vehicle_allocation", "vehicle_allocation_model", "vehicle", "classification"),
+    ("optimization_models", "material_recommendation", "material_recommendation_model", "material", "classification"),
+    ("risk_decision_models", "risk_assessment", "risk_assessment_model", "risk_score", "regression"),
+    ("risk_decision_models", "decision_support", "decision_support_model", "complexity", "regression"),
+    ("risk_decision_models", "anomaly_detection", "anomaly_detection_model", "delay_days", "anomaly"),
+    ("risk_decision_models", "supplier_performance", "supplier_performance_model", "satisfaction", "regression"),
+    ("advanced_models", "scenario_analysis", "scenario_analysis_model", "actual_days", "regression"),
+    ("advanced_models", "predictive_maintenance", "predictive_maintenance_model", "fuel_consumed", "regression"),
+    ("advanced_models", "customer_satisfaction", "customer_satisfaction_model", "satisfaction", "regression"),
+]
+
 class MLModelsBuilder:
     """Build and manage all 17 ML models"""
     
@@ -426,8 +448,12 @@ class MLModelsBuilder:
     # BUILD ALL MODELS
     # ========================================================================
     
-    def build_all_models(self, training_data: pd.DataFrame) -> Dict:
-        """Build all 17 ML models"""
+    def build_all_models(self, training_data: pd.DataFrame, n_jobs: int = -1) -> Dict:
+        """
+        Build all 17 ML models
+        The numeric feature matrix is prepared once and the fits in
+        MODEL_BUILD_PLAN run concurrently on a joblib process pool.
+        """
         results = {
             "prediction_models": {},
             "optimization_models": {},
@@ -439,118 +465,64 @@ class MLModelsBuilder:
             "timestamp": datetime.utcnow().isoformat()
         }
         
-        # Group 1: Prediction Models
         self.logger.info("\n" + "="*60)
-        self.logger.info("BUILDING GROUP 1: PREDICTION MODELS (5 models)")
+        self.logger.info(f"BUILDING ALL {len(MODEL_BUILD_PLAN)} ML MODELS (n_jobs={n_jobs})")
         self.logger.info("="*60)
         
-        success, metrics = self.build_delay_prediction_model(training_data)
-        results["prediction_models"]["delay_prediction"] = {"success": success, "metrics": metrics}
-        results["successful_models"] += success
-        results["total_models"] += 1
-        
-        success, metrics = self.build_cost_prediction_model(training_data)
-        results["prediction_models"]["cost_prediction"] = {"success": success, "metrics": metrics}
-        results["successful_models"] += success
-        results["total_models"] += 1
-        
-        success, metrics = self.build_demand_forecasting_model(training_data)
-        results["prediction_models"]["demand_forecasting"] = {"success": success, "metrics": metrics}
-        results["successful_models"] += success
-        results["total_models"] += 1
-        
-        success, metrics = self.build_quality_prediction_model(training_data)
-        results["prediction_models"]["quality_prediction"] = {"success": success, "metrics": metrics}
-        results["successful_models"] += success
-        results["total_models"] += 1
-        
-        success, metrics = self.build_fuel_consumption_model(training_data)
-        results["prediction_models"]["fuel_consumption"] = {"success": success, "metrics": metrics}
-        results["successful_models"] += success
-        results["total_models"] += 1
-        
-        # Group 2: Optimization Models
-        self.logger.info("\n" + "="*60)
-        self.logger.info("BUILDING GROUP 2: OPTIMIZATION MODELS (5 models)")
-        self.logger.info("="*60)
-        
-        success, metrics = self.build_route_optimization_model(training_data)
-        results["optimization_models"]["route_optimization"] = {"success": success, "metrics": metrics}
-        results["successful_models"] += success
-        results["total_models"] += 1
-        
-        success, metrics = self.build_cost_optimization_model(training_data)
-        results["optimization_models"]["cost_optimization"] = {"success": success, "metrics": metrics}
-        results["successful_models"] += success
-        results["total_models"] += 1
-        
-        success, metrics = self.build_time_optimization_model(training_data)
-        results["optimization_models"]["time_optimization"] = {"success": success, "metrics": metrics}
-        results["successful_models"] += success
-        results["total_models"] += 1
-        
-        success, metrics = self.build_vehicle_allocation_model(training_data)
-        results["optimization_models"]["vehicle_allocation"] = {"success": success, "metrics": metrics}
-        results["successful_models"] += success
-        results["total_models"] += 1
-        
-        success, metrics = self.build_material_recommendation_model(training_data)
-        results["optimization_models"]["material_recommendation"] = {"success": success, "metrics": metrics}
-        results["successful_models"] += success
-        results["total_models"] += 1
-        
-        # Group 3: Risk & Decision Models
-        self.logger.info("\n" + "="*60)
-        self.logger.info("BUILDING GROUP 3: RISK & DECISION MODELS (4 models)")
-        self.logger.info("="*60)
-        
-        success, metrics = self.build_risk_assessment_model(training_data)
-        results["risk_decision_models"]["risk_assessment"] = {"success": success, "metrics": metrics}
-        results["successful_models"] += success
-        results["total_models"] += 1
-        
-        success, metrics = self.build_decision_support_model(training_data)
-        results["risk_decision_models"]["decision_support"] = {"success": success, "metrics": metrics}
-        results["successful_models"] += success
-        results["total_models"] += 1
-        
-        success, metrics = self.build_anomaly_detection_model(training_data)
-        results["risk_decision_models"]["anomaly_detection"] = {"success": success, "metrics": metrics}
-        results["successful_models"] += success
-        results["total_models"] += 1
-        
-        success, metrics = self.build_supplier_performance_model(training_data)
-        results["risk_decision_models"]["supplier_performance"] = {"success": success, "metrics": metrics}
-        results["successful_models"] += success
-        results["total_models"] += 1
-        
-        # Group 4: Advanced Models
-        self.logger.info("\n" + "="*60)
-        self.logger.info("BUILDING GROUP 4: ADVANCED MODELS (3 models)")
-        self.logger.info("="*60)
-        
-        success, metrics = self.build_scenario_analysis_model(training_data)
-        results["advanced_models"]["scenario_analysis"] = {"success": success, "metrics": metrics}
-        results["successful_models"] += success
-        results["total_models"] += 1
-        
-        success, metrics = self.build_predictive_maintenance_model(training_data)
-        results["advanced_models"]["predictive_maintenance"] = {"success": success, "metrics": metrics}
-        results["successful_models"] += success
-        results["total_models"] += 1
-        
-        success, metrics = self.build_customer_satisfaction_model(training_data)
-        results["advanced_models"]["customer_satisfaction"] = {"success": success, "metrics": metrics}
-        results["successful_models"] += success
-        results["total_models"] += 1
+        started = time.perf_counter()
+        
+        # Prepare the numeric matrix once; each task selects its rows/columns
+        numeric = training_data.select_dtypes(include=[np.number])
+        X_all = numeric.to_numpy(dtype=float)
+        columns = list(numeric.columns)
+        
+        tasks = []
+        for group, key, model_name, target, kind in MODEL_BUILD_PLAN:
+            if target not in training_data.columns:
+                tasks.append(None)
+                continue
+            target_values = training_data[target]
+            rows = target_values.notna().to_numpy()
+            feature_idx = np.array([i for i, c in enumerate(columns) if c != target], dtype=int)
+            tasks.append((kind, rows, feature_idx, target_values[rows].to_numpy()))
+        
+        outcomes = joblib.Parallel(n_jobs=n_jobs)(
+            joblib.delayed(_fit_model)(kind, X_all, rows, feature_idx, y)
+            for kind, rows, feature_idx, y in (t for t in tasks if t is not None)
+        )
+        outcomes = iter(outcomes)
+        
+        for (group, key, model_name, target, kind), task in zip(MODEL_BUILD_PLAN, tasks):
+            if task is None:
+                success, metrics, wall_time = False, {"error": "Insufficient data"}, 0.0
+            else:
+                outcome = next(outcomes)
+                success, metrics, wall_time = outcome['success'], outcome['metrics'], outcome['wall_time']
+                if success:
+                    self.models[model_name] = outcome['model']
+                    if outcome['scaler'] is not None:
+                        self.scalers[model_name] = outcome['scaler']
+                    if outcome['encoder'] is not None:
+                        self.encoders[target] = outcome['encoder']
+            
+            if success:
+                self.logger.info(f"✓ {model_name} trained in {wall_time:.2f}s")
+            else:
+                self.logger.error(f"✗ {model_name} failed: {metrics.get('error')}")
+            
+            results[group][key] = {"success": success, "metrics": metrics, "wall_time_seconds": wall_time}
+            results["successful_models"] += success
+            results["total_models"] += 1
         
         results["failed_models"] = results["total_models"] - results["successful_models"]
+        results["total_wall_time_seconds"] = time.perf_counter() - started
         
         # Summary
         self.logger.info("\n" + "="*60)
         self.logger.info("✓ ALL 17 ML MODELS BUILT!")
         self.logger.info(f"✓ Successful: {results['successful_models']}/{results['total_models']}")
         self.logger.info(f"✗ Failed: {results['failed_models']}/{results['total_models']}")
+        self.logger.info(f"⏱ Wall time: {results['total_wall_time_seconds']:.2f}s")
         self.logger.info("="*60)
         
         return results
@@ -599,63 +571,111 @@ class MLModelsBuilder:
     def _train_regression_model(self, X: pd.DataFrame, y: pd.Series, 
                                model_name: str) -> Tuple[Any, Dict]:
         """Train regression model"""
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        scaler = StandardScaler()
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_test_scaled = scaler.transform(X_test)
-        
-        model = GradientBoostingRegressor(n_estimators=100, learning_rate=0.1, max_depth=5, random_state=42)
-        model.fit(X_train_scaled, y_train)
-        
-        y_pred = model.predict(X_test_scaled)
-        
-        metrics = {
-            'mse': float(mean_squared_error(y_test, y_pred)),
-            'rmse': float(np.sqrt(mean_squared_error(y_test, y_pred))),
-            'mae': float(mean_absolute_error(y_test, y_pred)),
-            'r2_score': float(r2_score(y_test, y_pred))
-        }
-        
+        model, scaler, metrics = _fit_regression(X, y)
         self.scalers[model_name] = scaler
-        
         return model, metrics
     
     def _train_classification_model(self, X: pd.DataFrame, y: np.ndarray, 
                                    model_name: str) -> Tuple[Any, Dict]:
         """Train classification model"""
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        scaler = StandardScaler()
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_test_scaled = scaler.transform(X_test)
-        
-        model = RandomForestClassifier(n_estimators=100, max_depth=10, random_state=42)
-        model.fit(X_train_scaled, y_train)
-        
-        y_pred = model.predict(X_test_scaled)
-        
-        metrics = {
-            'accuracy': float(accuracy_score(y_test, y_pred))
-        }
-        
+        model, scaler, metrics = _fit_classification(X, y)
         self.scalers[model_name] = scaler
-        
         return model, metrics
     
-    def save_all_models(self, directory: str = "models") -> bool:
-        """Save all trained models"""
+    def save_all_models(self, directory: str = "models", n_jobs: int = -1, compress: int = 3) -> bool:
+        """Save all trained models as compressed joblib files, in parallel"""
         try:
             import os
             os.makedirs(directory, exist_ok=True)
             
-            for model_name, model in self.models.items():
-                filepath = f"{directory}/{model_name}.pkl"
-                with open(filepath, 'wb') as f:
-                    pickle.dump(model, f)
+            def _dump(model_name, model):
+                joblib.dump(model, f"{directory}/{model_name}.pkl", compress=compress)
+                return model_name
+            
+            saved = joblib.Parallel(n_jobs=n_jobs, prefer="threads")(
+                joblib.delayed(_dump)(model_name, model) for model_name, model in self.models.items()
+            )
+            for model_name in saved:
                 self.logger.info(f"✓ Saved {model_name}")
             
             return True
         except Exception as e:
             self.logger.error(f"Error saving models: {str(e)}")
             return False
+
+
+# ============================================================================
+# MODEL FITTING (module level so joblib workers can pickle them)
+# ============================================================================
+
+def _fit_regression(X, y) -> Tuple[Any, StandardScaler, Dict]:
+    """Fit a scaled GradientBoostingRegressor and score it on a held-out split"""
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+    
+    model = GradientBoostingRegressor(n_estimators=100, learning_rate=0.1, max_depth=5, random_state=42)
+    model.fit(X_train_scaled, y_train)
+    
+    y_pred = model.predict(X_test_scaled)
+    
+    metrics = {
+        'mse': float(mean_squared_error(y_test, y_pred)),
+        'rmse': float(np.sqrt(mean_squared_error(y_test, y_pred))),
+        'mae': float(mean_absolute_error(y_test, y_pred)),
+        'r2_score': float(r2_score(y_test, y_pred))
+    }
+    
+    return model, scaler, metrics
+
+
+def _fit_classification(X, y) -> Tuple[Any, StandardScaler, Dict]:
+    """Fit a scaled RandomForestClassifier and score it on a held-out split"""
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+    
+    model = RandomForestClassifier(n_estimators=100, max_depth=10, random_state=42)
+    model.fit(X_train_scaled, y_train)
+    
+    y_pred = model.predict(X_test_scaled)
+    
+    metrics = {
+        'accuracy': float(accuracy_score(y_test, y_pred))
+    }
+    
+    return model, scaler, metrics
+
+
+def _fit_model(kind: str, X_all: np.ndarray, rows: np.ndarray, feature_idx: np.ndarray,
+               y: np.ndarray) -> Dict:
+    """Fit one MODEL_BUILD_PLAN entry on its slice of the shared matrix"""
+    started = time.perf_counter()
+    outcome = {'success': False, 'model': None, 'scaler': None, 'encoder': None}
+    try:
+        if len(y) < 10:
+            raise ValueError("Insufficient data")
+        X = X_all[np.ix_(rows, feature_idx)]
+        
+        if kind == "regression":
+            model, scaler, metrics = _fit_regression(X, y)
+        elif kind == "classification":
+            encoder = LabelEncoder()
+            y = encoder.fit_transform(y)
+            model, scaler, metrics = _fit_classification(X, y)
+            outcome['encoder'] = encoder
+        else:
+            model = IsolationForest(contamination=0.1, random_state=42)
+            model.fit(X)
+            scaler, metrics = None, {"status": "trained"}
+        
+        outcome.update(success=True, model=model, scaler=scaler, metrics=metrics)
+    except Exception as e:
+        outcome['metrics'] = {"error": str(e)}
+    
+    outcome['wall_time'] = time.perf_counter() - started
+    return outcome
@@ -0,0 +1,220 @@
+"""Fast heuristic loading for a fixed rake.
+
+First-fit decreasing places products into concrete slots (priority class
+first, heaviest first within a class), then a local search repeatedly tries
+to load products that were left out:
+
+- insert: a slot has room after earlier moves;
+- replace: take out a less valuable loaded product whose slot can then hold
+  the candidate, and re-insert the displaced product elsewhere if it fits;
+- swap: exchange two loaded products between slots so the slot the
+  candidate fits gains enough free weight.
+
+Every move strictly increases the CP-SAT objective (loaded weight weighted
+by ``10 + priority``), so the search always terminates. The result is a
+feasible plan in milliseconds; :func:`scenario1_opt.optimize_loading` uses it
+directly (``mode="heuristic"``) or as a CP-SAT solution hint
+(``mode="hybrid"``).
+"""
+
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+_EPS = 1e-9
+
+
+class _LoadingState:
+    """Concrete slot loads of one rake, indexed wagon-major."""
+
+    def __init__(
+        self,
+        weights: np.ndarray,
+        fits: np.ndarray,
+        caps: np.ndarray,
+        num_wagons: int,
+        payload_limit_t: float,
+    ):
+        per_wagon = len(caps)
+        self.weights = weights
+        self.per_wagon = per_wagon
+        self.all_fits = np.tile(fits, (1, num_wagons))  # (products, concrete slots)
+        self.slot_remaining = np.tile(caps, num_wagons).astype(float)
+        self.slot_wagon = np.repeat(np.arange(num_wagons), per_wagon)
+        self.wagon_remaining = np.full(num_wagons, float(payload_limit_t))
+        self.slot_of = np.full(len(weights), -1, dtype=np.int64)
+
+    def room(self, p_idx: int) -> np.ndarray:
+        w = self.weights[p_idx] - _EPS
+        return (
+            self.all_fits[p_idx]
+            & (self.slot_remaining >= w)
+            & (self.wagon_remaining[self.slot_wagon] >= w)
+        )
+
+    def insert(self, p_idx: int) -> bool:
+        ok = self.room(p_idx)
+        if not ok.any():
+            return False
+        self.put(p_idx, int(np.argmax(ok)))
+        return True
+
+    def put(self, p_idx: int, slot: int) -> None:
+        self.slot_remaining[slot] -= self.weights[p_idx]
+        self.wagon_remaining[self.slot_wagon[slot]] -= self.weights[p_idx]
+        self.slot_of[p_idx] = slot
+
+    def take(self, p_idx: int) -> int:
+        slot = int(self.slot_of[p_idx])
+        self.slot_remaining[slot] += self.weights[p_idx]
+        self.wagon_remaining[self.slot_wagon[slot]] += self.weights[p_idx]
+        self.slot_of[p_idx] = -1
+        return slot
+
+    def placements(self) -> List[Tuple[int, int, int]]:
+        return [
+            (int(p), int(s // self.per_wagon), int(s % self.per_wagon))
+            for p, s in enumerate(self.slot_of) if s >= 0
+        ]
+
+
+def heuristic_placements(
+    weights: np.ndarray,
+    priorities: np.ndarray,
+    fits: np.ndarray,
+    caps: np.ndarray,
+    num_wagons: int,
+    payload_limit_t: float,
+    initial: Optional[List[Tuple[int, int, int]]] = None,
+    max_rounds: int = 20,
+) -> List[Tuple[int, int, int]]:
+    """First-fit decreasing followed by insert/replace/swap local search.
+
+    Arguments are the arrays ``optimize_loading`` builds: product weights and
+    priorities, the (products, slot specs) fit mask with weight already
+    checked, slot capacities of one wagon, the wagon count and the wagon
+    payload limit. Returns ``(product, wagon, slot)`` placements.
+
+    ``initial`` placements (assumed feasible) replace the first-fit start, so
+    another method's plan can be improved by the local search.
+    """
+
+    state = _LoadingState(weights, fits, caps, num_wagons, payload_limit_t)
+    if num_wagons == 0 or len(caps) == 0:
+        return []
+
+    value = weights * (10 + priorities)
+    if initial is not None:
+        for p_idx, w_idx, s_idx in initial:
+            state.put(p_idx, w_idx * len(caps) + s_idx)
+    for p_idx in np.lexsort((-weights, -priorities)):
+        if state.slot_of[p_idx] < 0:
+            state.insert(int(p_idx))
+
+    for _ in range(max_rounds):
+        improved = False
+        failed_keys = set()
+        for u in np.argsort(-value, kind="stable"):
+            u = int(u)
+            if state.slot_of[u] >= 0:
+                continue
+            # Identical products fail identically within a round
+            key = (weights[u], priorities[u], fits[u].tobytes())
+            if key in failed_keys:
+                continue
+            if state.insert(u) or _replace(state, value, u) or _swap(state, u):
+                improved = True
+            else:
+                failed_keys.add(key)
+        if not improved:
+            break
+
+    return state.placements()
+
+
+def _replace(state: _LoadingState, value: np.ndarray, u: int) -> bool:
+    """Swap ``u`` in for the least valuable loaded product it can displace."""
+
+    loaded = np.flatnonzero(state.slot_of >= 0)
+    if loaded.size == 0:
+        return False
+    slots = state.slot_of[loaded]
+    w_u = state.weights[u] - _EPS
+    ok = (
+        (value[loaded] < value[u])
+        & state.all_fits[u, slots]
+        & (state.slot_remaining[slots] + state.weights[loaded] >= w_u)
+        & (state.wagon_remaining[state.slot_wagon[slots]] + state.weights[loaded] >= w_u)
+    )
+    if not ok.any():
+        return False
+
+    candidates = loaded[ok]
+    out = int(candidates[np.argmin(value[candidates])])
+    slot = state.take(out)
+    state.put(u, slot)
+    state.insert(out)
+    return True
+
+
+def _swap(state: _LoadingState, u: int) -> bool:
+    """Exchange loaded products a (slot A) and b (slot B) so ``u`` fits in A.
+
+    Moving the heavier ``a`` out of A and the lighter ``b`` in frees
+    ``w_a - w_b`` in A, which B must be able to absorb.
+    """
+
+    loaded = np.flatnonzero(state.slot_of >= 0)
+    if loaded.size < 2:
+        return False
+
+    weights = state.weights
+    slots = state.slot_of[loaded]
+    wagons = state.slot_wagon[slots]
+    w_u = weights[u] - _EPS
+
+    # Only products sitting in a slot u fits are worth moving out
+    a_mask = state.all_fits[u, slots]
+    if not a_mask.any():
+        return False
+    a = loaded[a_mask]
+    a_slots, a_wagons = slots[a_mask], wagons[a_mask]
+
+    delta = weights[a][:, None] - weights[loaded][None, :]  # (a, b)
+    same_wagon = a_wagons[:, None] == wagons[None, :]
+    ok = (
+        (delta > _EPS)
+        & (a_slots[:, None] != slots[None, :])
+        & (state.slot_remaining[a_slots][:, None] + delta >= w_u)
+        & (state.slot_remaining[slots][None, :] >= delta - _EPS)
+        & state.all_fits[a][:, slots]
+        & state.all_fits[loaded][:, a_slots].T
+    )
+    a_wagon_room = state.wagon_remaining[a_wagons][:, None]
+    ok &= np.where(
+        same_wagon,
+        a_wagon_room >= w_u,
+        (a_wagon_room + delta >= w_u) & (state.wagon_remaining[wagons][None, :] >= delta - _EPS),
+    )
+    if not ok.any():
+        return False
+
+    i, j = np.unravel_index(int(np.argmax(ok)), ok.shape)
+    p_a, p_b = int(a[i]), int(loaded[j])
+    slot_a, slot_b = state.take(p_a), state.take(p_b)
+    state.put(p_a, slot_b)
+    state.put(p_b, slot_a)
+    state.put(u, slot_a)
+    return True
+
+
+def placement_value(weights: np.ndarray, priorities: np.ndarray, placements: List[Tuple[int, int, int]]) -> float:
+    """CP-SAT objective value of a set of placements (unscaled)."""
+
+    if not placements:
+        return 0.0
+    idx = np.array([p for p, _, _ in placements], dtype=np.int64)
+    return float((weights[idx] * (10 + priorities[idx])).sum())
@@ -9,7 +9,7 @@ similar.
 """
 
 from dataclasses import dataclass
-from typing import List, Sequence
+from typing import List, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
@@ -61,6 +61,14 @@ class TemplateSelectorModel:
         pred = self.model.predict(X)
         return str(pred[0])
 
+    def rank_template_ids(self, products: Sequence[Product]) -> List[Tuple[str, float]]:
+        """Return ``(template_id, probability)`` pairs, most likely first."""
+
+        X = build_feature_row(products)[None, :]
+        proba = self.model.predict_proba(X)[0]
+        order = np.argsort(-proba, kind="stable")
+        return [(str(self.model.classes_[i]), float(proba[i])) for i in order]
+
 
 def train_template_selector(df: pd.DataFrame) -> TemplateSelectorModel:
     """Train a RandomForest classifier from a labelled dataset.
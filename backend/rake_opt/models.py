@@ -56,20 +56,20 @@ class RakeTemplate(BaseModel):
         slots_raw = self.wagon_params.get("slots", [])
         slots: List[Slot] = [Slot(**s) for s in slots_raw]
 
-        wagons: List[Wagon] = []
-        for idx in range(1, self.num_wagons + 1):
-            wagons.append(
-                Wagon(
-                    id=f"{self.wagon_type}_{idx}",
-                    wagon_type=self.wagon_type,
-                    payload_limit_t=float(self.wagon_params["payload_limit_t"]),
-                    length_m=float(self.wagon_params["length_m"]),
-                    width_m=float(self.wagon_params["width_m"]),
-                    height_m=float(self.wagon_params["height_m"]),
-                    slots=slots,
-                )
-            )
-        return wagons
+        first = Wagon(
+            id=f"{self.wagon_type}_1",
+            wagon_type=self.wagon_type,
+            payload_limit_t=float(self.wagon_params["payload_limit_t"]),
+            length_m=float(self.wagon_params["length_m"]),
+            width_m=float(self.wagon_params["width_m"]),
+            height_m=float(self.wagon_params["height_m"]),
+            slots=slots,
+        )
+        # Wagons are identical apart from the ID: validate once, copy the rest
+        return [first] + [
+            first.model_copy(update={"id": f"{self.wagon_type}_{idx}"})
+            for idx in range(2, self.num_wagons + 1)
+        ]
 
 
 class LoadAssignment(BaseModel):
@@ -1,24 +1,56 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Dict, List, Optional, Sequence, Tuple
 
+import numpy as np
 from ortools.sat.python import cp_model
 
-from .models import Product, RakeTemplate, RakePlan, LoadAssignment, Wagon
+from .heuristic import heuristic_placements, placement_value
+from .models import Product, RakeTemplate, RakePlan, LoadAssignment, Slot, Wagon
 
 
 _WEIGHT_SCALE = 1000  # tonnes -> scaled integer units
 
+# Up to this many feasible (product, slot) pairs the exact per-item model is
+# small enough to solve directly; beyond it the type-aggregated model is used.
+ITEMWISE_MAX_PAIRS = 2000
+
+# (product index, wagon index, slot index within the wagon)
+Placement = Tuple[int, int, int]
+
+MODES = ("exact", "heuristic", "hybrid")
+
 
 def _scale_tonnes(x: float) -> int:
     return int(round(x * _WEIGHT_SCALE))
 
 
+def _product_arrays(products: Sequence[Product]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Weights, (length, width, height) and priorities; missing dimensions become 0."""
+
+    weights = np.array([p.weight_t for p in products], dtype=float)
+    dims = np.array(
+        [[p.length_m or 0.0, p.width_m or 0.0, p.height_m or 0.0] for p in products],
+        dtype=float,
+    )
+    priorities = np.array([int(p.priority) for p in products], dtype=np.int64)
+    return weights, dims, priorities
+
+
+def _slot_arrays(slots: Sequence[Slot]) -> Tuple[np.ndarray, np.ndarray]:
+    caps = np.array([s.max_weight_t for s in slots], dtype=float)
+    dims = np.array([[s.max_length_m, s.max_width_m, s.max_height_m] for s in slots], dtype=float)
+    return caps, dims
+
+
 def optimize_loading(
     products: List[Product],
     rake_template: RakeTemplate,
     allow_unassigned: bool = True,
     max_time_sec: float = 10.0,
+    num_workers: int = 8,
+    formulation: str = "auto",
+    mode: str = "exact",
 ) -> RakePlan:
     """Optimise loading of a fixed rake.
 
@@ -29,10 +61,30 @@ def optimize_loading(
     - Slot-level and wagon-level weight limits are enforced.
     - Basic dimensional checks are enforced by only allowing assignments
       where the product fits inside the slot bounding box.
+
+    ``num_workers`` is the CP-SAT search worker count; callers solving
+    several rakes at once split their budget through it.
+
+    ``formulation`` selects the model: ``"itemwise"`` has one Boolean per
+    feasible (product, slot) pair and is exact; ``"compact"`` groups
+    identical products and identical slots into types with integer counts
+    and then packs the chosen products into concrete slots; ``"auto"``
+    (default) uses the item-wise model while it has at most
+    :data:`ITEMWISE_MAX_PAIRS` pairs.
+
+    ``mode`` chooses the engine: ``"exact"`` (default) solves with CP-SAT
+    only; ``"heuristic"`` returns the first-fit-decreasing + local search
+    plan from :mod:`heuristic` without calling CP-SAT; ``"hybrid"`` gives
+    that plan to CP-SAT as a solution hint and keeps whichever is better,
+    so it still returns a plan when CP-SAT finds nothing in time.
     """
 
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}; expected one of {', '.join(MODES)}")
+
+    wagons: List[Wagon] = rake_template.instantiate_rake()
+
     if not products:
-        wagons = rake_template.instantiate_rake()
         return RakePlan(
             rake_template_id=rake_template.id,
             wagons=wagons,
@@ -42,144 +94,348 @@ def optimize_loading(
             unassigned_products=[],
         )
 
-    wagons: List[Wagon] = rake_template.instantiate_rake()
+    # Every wagon of a template shares one slot layout
+    slot_specs: List[Slot] = list(wagons[0].slots) if wagons else []
+    weights, p_dims, priorities = _product_arrays(products)
+    caps, s_dims = _slot_arrays(slot_specs)
 
-    # Flatten slots: each entry keeps wagon and slot index
-    slot_index = []  # (wagon_idx, slot_idx)
-    for w_idx, wagon in enumerate(wagons):
-        for s_idx, _ in enumerate(wagon.slots):
-            slot_index.append((w_idx, s_idx))
+    # (products, slot specs) geometric fit
+    fits_dims = (p_dims[:, None, :] <= s_dims[None, :, :]).all(axis=2)
 
-    model = cp_model.CpModel()
+    if not allow_unassigned:
+        no_fit = np.flatnonzero(~fits_dims.any(axis=1))
+        if no_fit.size:
+            raise ValueError(
+                f"Product {products[no_fit[0]].id} cannot fit in any slot of rake template {rake_template.id} "
+                "with allow_unassigned=False."
+            )
 
-    # Create assignment vars only where product fits the slot geometrically
-    x = {}  # (p_idx, loc_idx) -> bool var
-    prod_slot_list = [[] for _ in range(len(products))]
+    # A product heavier than the slot can never go in it
+    fits = fits_dims & (weights[:, None] <= caps[None, :] + 1e-9)
+    payload_limit_t = wagons[0].payload_limit_t if wagons else 0.0
+
+    hint: Optional[List[Placement]] = None
+    if mode != "exact":
+        hint = heuristic_placements(weights, priorities, fits, caps, len(wagons), payload_limit_t)
+        complete = len(hint) == len(products)
+        if mode == "heuristic":
+            if not (allow_unassigned or complete):
+                raise RuntimeError(
+                    f"Heuristic could not load every product on rake template {rake_template.id}"
+                )
+            return _build_plan(products, rake_template, wagons, slot_specs, hint)
 
-    for p_idx, p in enumerate(products):
-        for loc_idx, (w_idx, s_idx) in enumerate(slot_index):
-            wagon = wagons[w_idx]
-            slot = wagon.slots[s_idx]
+    if formulation == "auto":
+        formulation = "itemwise" if int(fits.sum()) * len(wagons) <= ITEMWISE_MAX_PAIRS else "compact"
 
-            fits = True
-            if p.length_m is not None and p.length_m > slot.max_length_m:
-                fits = False
-            if p.width_m is not None and p.width_m > slot.max_width_m:
-                fits = False
-            if p.height_m is not None and p.height_m > slot.max_height_m:
-                fits = False
+    placements: Optional[List[Placement]] = None
+    if formulation == "compact":
+        placements = _solve_compact(
+            weights, priorities, fits, caps, len(wagons), payload_limit_t,
+            allow_unassigned, max_time_sec, num_workers, hint,
+        )
+        if placements is None and not allow_unassigned:
+            # Packing the aggregated solution left products out; the exact model decides
+            formulation = "itemwise"
+    if formulation == "itemwise":
+        placements = _solve_itemwise(
+            weights, priorities, fits, caps, len(wagons), payload_limit_t,
+            allow_unassigned, max_time_sec, num_workers, hint,
+        )
 
-            if not fits:
-                continue
+    if hint is not None and (allow_unassigned or complete):
+        # Keep the heuristic plan when CP-SAT timed out or packed worse
+        if placements is None or placement_value(weights, priorities, hint) > placement_value(
+            weights, priorities, placements
+        ):
+            placements = hint
+    if placements is None:
+        raise RuntimeError(f"No feasible loading plan found for rake template {rake_template.id}")
 
-            var = model.NewBoolVar(f"x_p{p_idx}_l{loc_idx}")
-            x[(p_idx, loc_idx)] = var
-            prod_slot_list[p_idx].append(var)
+    return _build_plan(products, rake_template, wagons, slot_specs, placements)
 
-        if not prod_slot_list[p_idx] and not allow_unassigned:
-            raise ValueError(
-                f"Product {p.id} cannot fit in any slot of rake template {rake_template.id} "
-                "with allow_unassigned=False."
-            )
 
-    # Product assignment constraints
-    for p_idx, vars_for_p in enumerate(prod_slot_list):
-        if not vars_for_p:
-            # No feasible slot: simply remains unassigned if allowed
-            continue
+# ============================================================================
+# ITEM-WISE MODEL
+# ============================================================================
+
+def _solve_itemwise(
+    weights: np.ndarray,
+    priorities: np.ndarray,
+    fits: np.ndarray,
+    caps: np.ndarray,
+    num_wagons: int,
+    payload_limit_t: float,
+    allow_unassigned: bool,
+    max_time_sec: float,
+    num_workers: int,
+    hint: Optional[List[Placement]] = None,
+) -> Optional[List[Placement]]:
+    """One Boolean per feasible (product, wagon, slot); exact."""
+
+    model = cp_model.CpModel()
+    weight_int = [_scale_tonnes(w) for w in weights]
+    spec_pairs = np.argwhere(fits)  # (product, slot spec), product-major
+
+    x: Dict[Placement, cp_model.IntVar] = {}
+    by_product: List[list] = [[] for _ in range(len(weights))]
+    by_slot: Dict[Tuple[int, int], list] = {}
+    by_wagon: List[list] = [[] for _ in range(num_wagons)]
+
+    for p_idx, s_idx in spec_pairs:
+        p_idx, s_idx = int(p_idx), int(s_idx)
+        for w_idx in range(num_wagons):
+            var = model.NewBoolVar(f"x_p{p_idx}_w{w_idx}_s{s_idx}")
+            x[(p_idx, w_idx, s_idx)] = var
+            by_product[p_idx].append(var)
+            by_slot.setdefault((w_idx, s_idx), []).append((weight_int[p_idx], var))
+            by_wagon[w_idx].append((weight_int[p_idx], var))
+
+    for p_idx, vars_for_p in enumerate(by_product):
         if allow_unassigned:
-            model.Add(sum(vars_for_p) <= 1)
+            if vars_for_p:
+                model.Add(sum(vars_for_p) <= 1)
+        elif not vars_for_p:
+            # Fits geometrically but is heavier than every slot
+            return None
         else:
             model.Add(sum(vars_for_p) == 1)
 
-    # Slot weight capacities
-    for loc_idx, (w_idx, s_idx) in enumerate(slot_index):
-        wagon = wagons[w_idx]
-        slot = wagon.slots[s_idx]
-        cap_int = _scale_tonnes(slot.max_weight_t)
-        terms = []
-        for p_idx, p in enumerate(products):
-            var = x.get((p_idx, loc_idx))
-            if var is None:
-                continue
-            terms.append(_scale_tonnes(p.weight_t) * var)
-        if terms:
-            model.Add(sum(terms) <= cap_int)
-
-    # Wagon-level capacities
-    for w_idx, wagon in enumerate(wagons):
-        cap_int = _scale_tonnes(wagon.payload_limit_t)
-        terms = []
-        for loc_idx, (ww_idx, s_idx) in enumerate(slot_index):
-            if ww_idx != w_idx:
-                continue
-            for p_idx, p in enumerate(products):
-                var = x.get((p_idx, loc_idx))
-                if var is None:
-                    continue
-                terms.append(_scale_tonnes(p.weight_t) * var)
-        if terms:
-            model.Add(sum(terms) <= cap_int)
-
-    # Product loaded indicator
-    loaded = []  # one per product
-    for p_idx, vars_for_p in enumerate(prod_slot_list):
-        if not vars_for_p:
-            loaded.append(None)
-            continue
-        y = model.NewBoolVar(f"loaded_p{p_idx}")
-        # y == OR(vars_for_p)
-        model.AddMaxEquality(y, vars_for_p)
-        loaded.append(y)
-
-    # Objective: maximise total loaded weight with priority multiplier
-    objective_terms = []
-    for p_idx, p in enumerate(products):
-        y = loaded[p_idx]
-        if y is None:
-            continue
-        weight_int = _scale_tonnes(p.weight_t)
-        # Priority scale: base 10 + priority (>=1) so that priority matters but
-        # weight still dominates.
-        coeff = weight_int * (10 + int(p.priority))
-        objective_terms.append(coeff * y)
+    for (_, s_idx), terms in by_slot.items():
+        model.Add(sum(w * v for w, v in terms) <= _scale_tonnes(caps[s_idx]))
+
+    # Wagon limit only binds when the slots together can exceed it
+    if caps.sum() > payload_limit_t:
+        wagon_cap = _scale_tonnes(payload_limit_t)
+        for terms in by_wagon:
+            if terms:
+                model.Add(sum(w * v for w, v in terms) <= wagon_cap)
+
+    # Each product is loaded at most once, so the per-pair coefficient equals
+    # weight * (10 + priority) on the product's loaded indicator.
+    if x:
+        model.Maximize(sum(
+            weight_int[p_idx] * (10 + int(priorities[p_idx])) * var for (p_idx, _, _), var in x.items()
+        ))
+
+    if hint is not None:
+        hinted = set(hint)
+        for key, var in x.items():
+            model.AddHint(var, int(key in hinted))
+
+    solver = _solver(max_time_sec, num_workers)
+    status = solver.Solve(model)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None
+
+    return [key for key, var in x.items() if solver.BooleanValue(var)]
+
+
+# ============================================================================
+# COMPACT (TYPE-AGGREGATED) MODEL
+# ============================================================================
+
+def _solve_compact(
+    weights: np.ndarray,
+    priorities: np.ndarray,
+    fits: np.ndarray,
+    caps: np.ndarray,
+    num_wagons: int,
+    payload_limit_t: float,
+    allow_unassigned: bool,
+    max_time_sec: float,
+    num_workers: int,
+    hint: Optional[List[Placement]] = None,
+) -> Optional[List[Placement]]:
+    """Integer counts per (product type, slot type), then disaggregation.
+
+    Products with identical weight, fit pattern and priority form a type;
+    slots with identical limits form a type. Capacity is aggregated per slot
+    type, tightened with cardinality cuts (at most one product heavier than
+    half a slot per slot, two heavier than a third), and the chosen counts
+    are packed into concrete slots first-fit decreasing. Returns None when
+    ``allow_unassigned`` is False and the packing, repaired by the
+    :mod:`heuristic` local search, could not place everything.
+    """
 
-    if objective_terms:
-        model.Maximize(sum(objective_terms))
+    # Slot types: identical capacity and identical fit column
+    slot_keys = np.column_stack([caps, fits.T.astype(float)])
+    slot_types, slot_type_of = np.unique(slot_keys, axis=0, return_inverse=True)
+    slot_type_of = slot_type_of.ravel()
+    per_wagon = np.bincount(slot_type_of, minlength=len(slot_types))
+    type_caps = slot_types[:, 0]
+    type_fits = slot_types[:, 1:].T.astype(bool)  # (products, slot types)
+
+    # Product types: identical weight, priority and fit row
+    product_keys = np.column_stack([weights, priorities, type_fits.astype(float)])
+    product_types, product_type_of = np.unique(product_keys, axis=0, return_inverse=True)
+    product_type_of = product_type_of.ravel()
+    counts = np.bincount(product_type_of, minlength=len(product_types))
+    type_weights = product_types[:, 0]
+    type_priorities = product_types[:, 1].astype(int)
+    pt_fits = product_types[:, 2:].astype(bool)  # (product types, slot types)
 
-    solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = float(max_time_sec)
-    solver.parameters.num_search_workers = 8
+    model = cp_model.CpModel()
+    n: Dict[Tuple[int, int], cp_model.IntVar] = {}
+    for t, s in np.argwhere(pt_fits):
+        t, s = int(t), int(s)
+        slots_of_type = int(per_wagon[s]) * num_wagons
+        per_slot = int(type_caps[s] // type_weights[t]) if type_weights[t] > 0 else int(counts[t])
+        upper = min(int(counts[t]), slots_of_type * max(per_slot, 0))
+        if upper > 0:
+            n[(t, s)] = model.NewIntVar(0, upper, f"n_t{t}_s{s}")
+
+    for t in range(len(product_types)):
+        vars_for_t = [n[(t, s)] for s in range(len(slot_types)) if (t, s) in n]
+        if allow_unassigned:
+            if vars_for_t:
+                model.Add(sum(vars_for_t) <= int(counts[t]))
+        elif not vars_for_t:
+            return None
+        else:
+            model.Add(sum(vars_for_t) == int(counts[t]))
 
+    weight_int = [_scale_tonnes(w) for w in type_weights]
+    for s in range(len(slot_types)):
+        slots_of_type = int(per_wagon[s]) * num_wagons
+        terms = [(t, var) for (t, ss), var in n.items() if ss == s]
+        if not terms:
+            continue
+        model.Add(sum(weight_int[t] * var for t, var in terms) <= slots_of_type * _scale_tonnes(type_caps[s]))
+        halves = [var for t, var in terms if type_weights[t] > type_caps[s] / 2]
+        if halves:
+            model.Add(sum(halves) <= slots_of_type)
+        thirds = [var for t, var in terms if type_weights[t] > type_caps[s] / 3]
+        if thirds:
+            model.Add(sum(thirds) <= 2 * slots_of_type)
+
+    if caps.sum() > payload_limit_t and n:
+        model.Add(sum(weight_int[t] * var for (t, _), var in n.items())
+                  <= num_wagons * _scale_tonnes(payload_limit_t))
+
+    if n:
+        model.Maximize(sum(weight_int[t] * (10 + int(type_priorities[t])) * var for (t, _), var in n.items()))
+
+    if hint is not None:
+        hinted_counts: Dict[Tuple[int, int], int] = {}
+        for p_idx, _, s_idx in hint:
+            key = (int(product_type_of[p_idx]), int(slot_type_of[s_idx]))
+            hinted_counts[key] = hinted_counts.get(key, 0) + 1
+        for key, var in n.items():
+            model.AddHint(var, hinted_counts.get(key, 0))
+
+    solver = _solver(max_time_sec, num_workers)
     status = solver.Solve(model)
     if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-        raise RuntimeError(f"No feasible loading plan found for rake template {rake_template.id}")
+        return None
+
+    # Disaggregate: hand out concrete products of each type to slot types
+    members = [list(np.flatnonzero(product_type_of == t)) for t in range(len(product_types))]
+    wanted: List[Tuple[int, int]] = []  # (product index, slot type)
+    for (t, s), var in n.items():
+        for _ in range(solver.Value(var)):
+            wanted.append((members[t].pop(0), s))
+
+    placements, _ = _pack(weights, priorities, fits, caps, slot_type_of, num_wagons,
+                          payload_limit_t, wanted)
+    # Repair packing losses (products the counts chose but no slot could take)
+    placements = heuristic_placements(weights, priorities, fits, caps, num_wagons, payload_limit_t,
+                                      initial=placements)
+    if len(placements) < len(weights) and not allow_unassigned:
+        return None
+    return placements
+
+
+def _pack(
+    weights: np.ndarray,
+    priorities: np.ndarray,
+    fits: np.ndarray,
+    caps: np.ndarray,
+    slot_type_of: np.ndarray,
+    num_wagons: int,
+    payload_limit_t: float,
+    wanted: List[Tuple[int, int]],
+) -> Tuple[List[Placement], List[int]]:
+    """First-fit decreasing of the chosen products, then fill with the rest.
+
+    Chosen products go to a slot of their assigned type when possible and to
+    any fitting slot otherwise; leftover capacity is then offered to the
+    products the aggregated model did not choose, most valuable first.
+    """
 
-    # Extract assignments
+    per_wagon = len(caps)
+    slot_remaining = np.tile(caps, num_wagons).astype(float)  # wagon-major
+    slot_type = np.tile(slot_type_of, num_wagons)
+    slot_spec = np.tile(np.arange(per_wagon), num_wagons)
+    slot_wagon = np.repeat(np.arange(num_wagons), per_wagon)
+    wagon_remaining = np.full(num_wagons, float(payload_limit_t))
+    all_fits = np.tile(fits, (1, num_wagons))  # (products, concrete slots)
+
+    placements: List[Placement] = []
+    placed = np.zeros(len(weights), dtype=bool)
+
+    def place(p_idx: int, allowed: np.ndarray) -> bool:
+        w = weights[p_idx] - 1e-9
+        ok = allowed & (slot_remaining >= w) & (wagon_remaining[slot_wagon] >= w)
+        if not ok.any():
+            return False
+        slot = int(np.argmax(ok))
+        slot_remaining[slot] -= weights[p_idx]
+        wagon_remaining[slot_wagon[slot]] -= weights[p_idx]
+        placements.append((p_idx, int(slot_wagon[slot]), int(slot_spec[slot])))
+        placed[p_idx] = True
+        return True
+
+    unplaced: List[int] = []
+    for p_idx, s_type in sorted(wanted, key=lambda item: -weights[item[0]]):
+        if not (place(p_idx, all_fits[p_idx] & (slot_type == s_type)) or place(p_idx, all_fits[p_idx])):
+            unplaced.append(p_idx)
+
+    for p_idx in np.argsort(-(weights * (10 + priorities)), kind="stable"):
+        if not placed[p_idx]:
+            place(int(p_idx), all_fits[p_idx])
+
+    return placements, [p for p in unplaced if not placed[p]]
+
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def _solver(max_time_sec: float, num_workers: int) -> cp_model.CpSolver:
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = float(max_time_sec)
+    solver.parameters.num_search_workers = max(1, int(num_workers))
+    return solver
+
+
+def _build_plan(
+    products: List[Product],
+    rake_template: RakeTemplate,
+    wagons: List[Wagon],
+    slot_specs: List[Slot],
+    placements: List[Placement],
+) -> RakePlan:
     assignments: List[LoadAssignment] = []
-    assigned_weight_t = 0.0
     assigned_products = set()
+    assigned_weight_t = 0.0
 
-    for (p_idx, loc_idx), var in x.items():
-        if solver.BooleanValue(var):
-            w_idx, s_idx = slot_index[loc_idx]
-            wagon = wagons[w_idx]
-            slot = wagon.slots[s_idx]
-            p = products[p_idx]
-            assignments.append(
-                LoadAssignment(
-                    product_id=p.id,
-                    wagon_id=wagon.id,
-                    slot_id=slot.id,
-                )
+    for p_idx, w_idx, s_idx in sorted(placements):
+        p = products[p_idx]
+        assignments.append(
+            LoadAssignment(
+                product_id=p.id,
+                wagon_id=wagons[w_idx].id,
+                slot_id=slot_specs[s_idx].id,
             )
-            assigned_weight_t += p.weight_t
-            assigned_products.add(p.id)
+        )
+        assigned_weight_t += p.weight_t
+        assigned_products.add(p_idx)
 
     total_capacity_t = sum(w.payload_limit_t for w in wagons)
     utilization_pct = (assigned_weight_t / total_capacity_t * 100.0) if total_capacity_t > 0 else 0.0
 
-    unassigned_products = [p.id for p in products if p.id not in assigned_products]
+    unassigned_products = [p.id for i, p in enumerate(products) if i not in assigned_products]
 
     return RakePlan(
         rake_template_id=rake_template.id,
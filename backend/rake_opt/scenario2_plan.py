@@ -1,49 +1,215 @@
 from __future__ import annotations
 
-from typing import Iterable, List, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
 
 from .config import DEFAULT_TEMPLATES
 from .models import Product, RakeTemplate, RakePlan
 from .scenario1_opt import optimize_loading
 
+if TYPE_CHECKING:
+    from .ml_selector import TemplateSelectorModel
 
-def choose_best_rake(
+
+def plan_score(plan: RakePlan) -> float:
+    """Score: primarily total loaded tonnes, secondarily utilisation."""
+
+    return plan.total_loaded_t * 100.0 + plan.utilization_pct
+
+
+def _fit_mask(products: List[Product], template: RakeTemplate) -> np.ndarray:
+    """Boolean mask of products that fit at least one slot of the template."""
+
+    slots = template.wagon_params.get("slots", [])
+    if not slots:
+        return np.zeros(len(products), dtype=bool)
+
+    # Missing dimensions never constrain, matching optimize_loading
+    dims = np.array(
+        [[p.weight_t, p.length_m or 0.0, p.width_m or 0.0, p.height_m or 0.0] for p in products],
+        dtype=float,
+    )
+    limits = np.array(
+        [[s["max_weight_t"], s["max_length_m"], s["max_width_m"], s["max_height_m"]] for s in slots],
+        dtype=float,
+    )
+    # (products, slots, 4) -> fits any slot on every dimension
+    return (dims[:, None, :] <= limits[None, :, :]).all(axis=2).any(axis=1)
+
+
+def score_upper_bound(products: List[Product], template: RakeTemplate) -> Tuple[float, bool]:
+    """Optimistic score for a template and whether every product fits some slot.
+
+    The bound assumes every product that fits a slot gets loaded, capped by
+    the rake payload, so no plan on this template can score higher.
+    """
+
+    if not products:
+        return 0.0, True
+
+    fits = _fit_mask(products, template)
+    weights = np.array([p.weight_t for p in products], dtype=float)
+    capacity_t = template.num_wagons * float(template.wagon_params["payload_limit_t"])
+
+    loadable_t = min(float(weights[fits].sum()), capacity_t)
+    utilization = min(loadable_t / capacity_t * 100.0, 100.0) if capacity_t > 0 else 0.0
+    return loadable_t * 100.0 + utilization, bool(fits.all())
+
+
+@dataclass
+class TemplateSearchResult:
+    plan: RakePlan
+    template: RakeTemplate
+    score: float
+    evaluated: List[str] = field(default_factory=list)
+    pruned: List[str] = field(default_factory=list)
+    filtered_by_selector: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+
+
+def search_templates(
     products: List[Product],
     candidate_templates: Optional[Iterable[RakeTemplate]] = None,
     allow_unassigned: bool = True,
-) -> Tuple[RakePlan, RakeTemplate]:
-    """Select the best rake template and loading plan for a given product set.
+    selector: Optional["TemplateSelectorModel"] = None,
+    top_k: Optional[int] = None,
+    max_parallel: Optional[int] = None,
+    total_workers: int = 8,
+    max_time_sec: float = 10.0,
+    mode: str = "exact",
+) -> TemplateSearchResult:
+    """Evaluate candidate templates concurrently and keep the best plan.
+
+    - With a ``selector``, candidates are ordered by its predicted
+      probabilities and only the ``top_k`` most likely are solved.
+    - Without one, candidates are tried best upper bound first so a strong
+      incumbent appears early.
+    - Before a template is solved its score upper bound is compared with
+      the incumbent; templates that cannot win are pruned.
+    - Up to ``max_parallel`` (default 2) solves run at once, sharing
+      ``total_workers`` CP-SAT search workers between them. Keeping this
+      below the candidate count leaves room for pruning.
 
-    This function currently performs a small search over candidate rake
-    templates by calling :func:`optimize_loading` for each.
+    - ``mode`` is passed to :func:`optimize_loading`; ``"heuristic"``
+      scores every template in milliseconds without CP-SAT.
 
-    Later, an ML model from ``ml_selector.py`` can be plugged in to narrow the
-    set of templates to evaluate.
+    Ties go to the template listed first in ``candidate_templates``, as in
+    the original sequential search.
     """
 
     if candidate_templates is None:
         candidate_templates = DEFAULT_TEMPLATES.values()
+    templates = list(candidate_templates)
+    position = {t.id: i for i, t in enumerate(templates)}
+    bounds = {t.id: score_upper_bound(products, t) for t in templates}
+
+    filtered: List[str] = []
+    if selector is not None:
+        probability = dict(selector.rank_template_ids(products))
+        templates.sort(key=lambda t: (-probability.get(t.id, 0.0), position[t.id]))
+        if top_k is not None:
+            filtered = [t.id for t in templates[top_k:]]
+            templates = templates[:top_k]
+    else:
+        templates.sort(key=lambda t: (-bounds[t.id][0], position[t.id]))
+
+    failed: Dict[str, str] = {}
+    # All-or-nothing loading needs every product to fit somewhere
+    if not allow_unassigned:
+        for t in [t for t in templates if not bounds[t.id][1]]:
+            failed[t.id] = "Some products fit no slot"
+            templates.remove(t)
 
-    best_plan: Optional[RakePlan] = None
-    best_template: Optional[RakeTemplate] = None
-    best_score: float = float("-inf")
+    parallel = max(1, min(max_parallel or 2, len(templates) or 1))
+    workers_per_solve = max(1, total_workers // parallel)
 
-    for template in candidate_templates:
-        try:
-            plan = optimize_loading(products, template, allow_unassigned=allow_unassigned)
-        except Exception:
-            # Skip infeasible templates
-            continue
+    best: Optional[Tuple[float, int, RakePlan, RakeTemplate]] = None
+    evaluated: List[str] = []
+    pruned: List[str] = []
 
-        # Score: primarily total loaded tonnes, secondarily utilisation.
-        score = plan.total_loaded_t * 100.0 + plan.utilization_pct
+    def cannot_win(template: RakeTemplate) -> bool:
+        if best is None:
+            return False
+        bound = bounds[template.id][0]
+        return bound < best[0] or (bound == best[0] and position[template.id] > best[1])
 
-        if score > best_score:
-            best_score = score
-            best_plan = plan
-            best_template = template
+    queue = list(templates)
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        pending = {}
+        while queue or pending:
+            while queue and len(pending) < parallel:
+                template = queue.pop(0)
+                if cannot_win(template):
+                    pruned.append(template.id)
+                    continue
+                future = executor.submit(
+                    optimize_loading, products, template,
+                    allow_unassigned=allow_unassigned,
+                    max_time_sec=max_time_sec,
+                    num_workers=workers_per_solve,
+                    mode=mode,
+                )
+                pending[future] = template
 
-    if best_plan is None or best_template is None:
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                template = pending.pop(future)
+                evaluated.append(template.id)
+                try:
+                    plan = future.result()
+                except Exception as e:
+                    # Skip infeasible templates
+                    failed[template.id] = str(e)
+                    continue
+
+                score = plan_score(plan)
+                candidate = (score, position[template.id], plan, template)
+                if best is None or score > best[0] or (score == best[0] and candidate[1] < best[1]):
+                    best = candidate
+
+    if best is None:
         raise RuntimeError("No feasible rake template found for the given products")
 
-    return best_plan, best_template
+    return TemplateSearchResult(
+        plan=best[2],
+        template=best[3],
+        score=best[0],
+        evaluated=evaluated,
+        pruned=pruned,
+        filtered_by_selector=filtered,
+        failed=failed,
+    )
+
+
+def choose_best_rake(
+    products: List[Product],
+    candidate_templates: Optional[Iterable[RakeTemplate]] = None,
+    allow_unassigned: bool = True,
+    selector: Optional["TemplateSelectorModel"] = None,
+    top_k: Optional[int] = None,
+    max_parallel: Optional[int] = None,
+    mode: str = "exact",
+) -> Tuple[RakePlan, RakeTemplate]:
+    """Select the best rake template and loading plan for a given product set.
+
+    Candidate templates are solved with :func:`optimize_loading` through
+    :func:`search_templates`; pass a trained ``selector`` from
+    ``ml_selector.py`` with ``top_k`` to only solve the most likely templates.
+    """
+
+    result = search_templates(
+        products,
+        candidate_templates=candidate_templates,
+        allow_unassigned=allow_unassigned,
+        selector=selector,
+        top_k=top_k,
+        max_parallel=max_parallel,
+        mode=mode,
+    )
+    return result.plan, result.template
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import math
+
+import pytest
+
+from rake_opt import scenario1_opt
+from rake_opt.models import Product, RakeTemplate
+from rake_opt.scenario1_opt import optimize_loading
+
+
+def _template(slot_caps, payload_limit_t: float, num_wagons: int = 1) -> RakeTemplate:
+  return RakeTemplate(
+    id="TEST_HEURISTIC",
+    wagon_type="BOXN",
+    num_wagons=num_wagons,
+    wagon_params={
+      "payload_limit_t": payload_limit_t,
+      "length_m": 12.0,
+      "width_m": 2.8,
+      "height_m": 2.8,
+      "slots": [
+        {"id": f"s{i}", "max_weight_t": cap, "max_length_m": 6.0, "max_width_m": 2.8, "max_height_m": 2.8}
+        for i, cap in enumerate(slot_caps)
+      ],
+    },
+  )
+
+
+def _coil(pid: str, weight_t: float, priority: int = 1) -> Product:
+  return Product(id=pid, type="HR_COIL", weight_t=weight_t, length_m=4.0, width_m=2.0, height_m=1.5, priority=priority)
+
+
+def _slot_loads(plan, products):
+  weights = {p.id: p.weight_t for p in products}
+  loads = {}
+  for a in plan.assignments:
+    loads[(a.wagon_id, a.slot_id)] = loads.get((a.wagon_id, a.slot_id), 0.0) + weights[a.product_id]
+  return loads
+
+
+def test_local_search_swaps_to_fit_product_first_fit_missed() -> None:
+  # First-fit decreasing puts 20 in s0 and 18 in s1, leaving no room for 12;
+  # swapping 20 and 18 frees s0 for it.
+  template = _template([30.0, 20.0], payload_limit_t=60.0)
+  products = [_coil("A", 20.0), _coil("B", 18.0), _coil("C", 12.0)]
+
+  plan = optimize_loading(products, template, mode="heuristic")
+
+  assert plan.unassigned_products == []
+  assert math.isclose(plan.total_loaded_t, 50.0)
+  caps = {s.id: s.max_weight_t for s in plan.wagons[0].slots}
+  assert all(load <= caps[slot] + 1e-6 for (_, slot), load in _slot_loads(plan, products).items())
+
+
+def test_local_search_replaces_lower_priority_product() -> None:
+  template = _template([20.0], payload_limit_t=20.0)
+  products = [_coil("LOW", 20.0, priority=1), _coil("HIGH", 15.0, priority=5)]
+
+  plan = optimize_loading(products, template, mode="heuristic")
+
+  # 15 * (10 + 5) beats 20 * (10 + 1)
+  assert [a.product_id for a in plan.assignments] == ["HIGH"]
+
+
+def test_heuristic_matches_exact_and_respects_limits() -> None:
+  template = _template([30.0, 30.0], payload_limit_t=55.0, num_wagons=3)
+  products = [
+    _coil(f"C{i}", w, priority=1 + i % 3)
+    for i, w in enumerate([12.0, 12.0, 12.0, 9.0, 9.0, 9.0, 9.0, 18.0, 18.0, 7.5, 25.0, 14.0])
+  ]
+
+  heuristic = optimize_loading(products, template, mode="heuristic")
+  exact = optimize_loading(products, template, mode="exact", max_time_sec=5.0)
+  hybrid = optimize_loading(products, template, mode="hybrid", max_time_sec=5.0)
+
+  wagon_loads = {}
+  for (wagon, _), load in _slot_loads(heuristic, products).items():
+    wagon_loads[wagon] = wagon_loads.get(wagon, 0.0) + load
+  assert all(load <= 55.0 + 1e-6 for load in wagon_loads.values())
+  assert heuristic.total_loaded_t <= exact.total_loaded_t + 1e-6
+  assert math.isclose(hybrid.total_loaded_t, exact.total_loaded_t)
+
+
+def test_hybrid_falls_back_to_heuristic_when_solver_finds_nothing(monkeypatch) -> None:
+  monkeypatch.setattr(scenario1_opt, "_solve_itemwise", lambda *args, **kwargs: None)
+  template = _template([30.0, 30.0], payload_limit_t=60.0)
+  products = [_coil("A", 20.0), _coil("B", 25.0)]
+
+  with pytest.raises(RuntimeError):
+    optimize_loading(products, template, mode="exact")
+
+  plan = optimize_loading(products, template, mode="hybrid")
+  assert math.isclose(plan.total_loaded_t, 45.0)
+
+
+def test_unknown_mode_is_rejected() -> None:
+  with pytest.raises(ValueError):
+    optimize_loading([_coil("A", 10.0)], _template([30.0], payload_limit_t=30.0), mode="greedy")
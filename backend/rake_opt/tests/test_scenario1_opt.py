@@ -72,3 +72,48 @@ def test_optimize_loading_assigns_each_product_at_most_once(small_template: Rake
     seen.add(key)
 
   assert {a.product_id for a in plan.assignments} == {"P1", "P2"}
+
+
+def _check_limits(plan, products) -> None:
+  weights = {p.id: p.weight_t for p in products}
+  slot_caps = {s.id: s.max_weight_t for s in plan.wagons[0].slots}
+  slot_load = {}
+  wagon_load = {}
+  for a in plan.assignments:
+    slot_load[(a.wagon_id, a.slot_id)] = slot_load.get((a.wagon_id, a.slot_id), 0.0) + weights[a.product_id]
+    wagon_load[a.wagon_id] = wagon_load.get(a.wagon_id, 0.0) + weights[a.product_id]
+  assert all(load <= slot_caps[slot_id] + 1e-6 for (_, slot_id), load in slot_load.items())
+  assert all(load <= plan.wagons[0].payload_limit_t + 1e-6 for load in wagon_load.values())
+  assert len({a.product_id for a in plan.assignments}) == len(plan.assignments)
+
+
+def test_compact_formulation_matches_itemwise(small_template: RakeTemplate) -> None:
+  products = [
+    Product(id=f"C{i}", type="HR_COIL", weight_t=w, length_m=4.0, width_m=2.0, height_m=1.5, priority=1 + i % 3)
+    for i, w in enumerate([12.0, 12.0, 12.0, 9.0, 9.0, 9.0, 9.0, 18.0, 18.0, 7.5])
+  ]
+
+  exact = optimize_loading(products, small_template, formulation="itemwise", max_time_sec=5.0)
+  compact = optimize_loading(products, small_template, formulation="compact", max_time_sec=5.0)
+
+  _check_limits(compact, products)
+  assert math.isclose(compact.total_loaded_t, exact.total_loaded_t)
+
+
+def test_compact_formulation_full_rake() -> None:
+  from rake_opt.config import DEFAULT_TEMPLATES
+
+  template = DEFAULT_TEMPLATES["BOXN_RAKE_41"]
+  specs = [(18.5, 4.0), (12.0, 3.5), (9.5, 3.0), (7.2, 2.5)]
+  products = [
+    Product(id=f"P{i}", type="HR_COIL", weight_t=specs[i % 4][0], length_m=specs[i % 4][1],
+            width_m=1.8, height_m=1.8, priority=1 + i % 3)
+    for i in range(400)
+  ]
+
+  plan = optimize_loading(products, template, max_time_sec=5.0)
+
+  _check_limits(plan, products)
+  assert len(plan.assignments) + len(plan.unassigned_products) == len(products)
+  # The 41 x 58t payload is the binding limit; packing should come close to it
+  assert plan.total_loaded_t >= 0.97 * 41 * 58.0
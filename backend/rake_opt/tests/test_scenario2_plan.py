@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from rake_opt.models import Product, RakeTemplate
-from rake_opt.scenario2_plan import choose_best_rake
+from rake_opt.scenario2_plan import choose_best_rake, search_templates
 
 
 def _make_template(template_id: str, payload_per_wagon: float, num_wagons: int) -> RakeTemplate:
@@ -42,3 +42,66 @@ def test_choose_best_rake_picks_higher_utilisation_template() -> None:
 
   # The lighter rake (80t) should be preferred due to better utilisation
   assert template.id == "RAKE_LIGHT"
+
+
+class _FixedRanking:
+  """Stand-in for TemplateSelectorModel with a fixed ranking."""
+
+  def __init__(self, ranking):
+    self.ranking = ranking
+
+  def rank_template_ids(self, products):
+    return self.ranking
+
+
+def _coils(n: int, weight_t: float = 20.0):
+  return [
+    Product(id=f"P{i}", type="HR_COIL", weight_t=weight_t, length_m=5.0, width_m=2.0, height_m=1.5)
+    for i in range(n)
+  ]
+
+
+def test_search_prunes_templates_that_cannot_beat_incumbent() -> None:
+  # Every template can carry all 60t; the tightest one is solved first and
+  # the looser ones cannot beat its utilisation.
+  templates = [
+    _make_template("RAKE_XL", payload_per_wagon=100.0, num_wagons=3),
+    _make_template("RAKE_L", payload_per_wagon=100.0, num_wagons=2),
+    _make_template("RAKE_LIGHT", payload_per_wagon=40.0, num_wagons=2),
+  ]
+
+  result = search_templates(_coils(3), candidate_templates=templates, max_parallel=1)
+
+  assert result.template.id == "RAKE_LIGHT"
+  assert result.evaluated == ["RAKE_LIGHT"]
+  assert set(result.pruned) == {"RAKE_XL", "RAKE_L"}
+
+
+def test_search_matches_sequential_choice_when_parallel() -> None:
+  templates = [
+    _make_template("RAKE_HEAVY", payload_per_wagon=100.0, num_wagons=1),
+    _make_template("RAKE_LIGHT", payload_per_wagon=40.0, num_wagons=2),
+    _make_template("RAKE_SMALL", payload_per_wagon=30.0, num_wagons=1),
+  ]
+  products = _coils(3)
+
+  parallel = search_templates(products, candidate_templates=templates, max_parallel=3)
+  sequential = search_templates(products, candidate_templates=templates, max_parallel=1)
+
+  assert parallel.template.id == sequential.template.id == "RAKE_LIGHT"
+  assert parallel.score == sequential.score
+
+
+def test_selector_top_k_limits_solved_templates() -> None:
+  templates = [
+    _make_template("RAKE_HEAVY", payload_per_wagon=100.0, num_wagons=1),
+    _make_template("RAKE_LIGHT", payload_per_wagon=40.0, num_wagons=2),
+  ]
+  selector = _FixedRanking([("RAKE_HEAVY", 0.8), ("RAKE_LIGHT", 0.2)])
+
+  plan, template = choose_best_rake(_coils(3), candidate_templates=templates, selector=selector, top_k=1)
+  result = search_templates(_coils(3), candidate_templates=templates, selector=selector, top_k=1)
+
+  assert template.id == "RAKE_HEAVY"
+  assert plan.total_loaded_t == 60.0
+  assert result.filtered_by_selector == ["RAKE_LIGHT"]
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+"""
+Decomposition Solver Benchmark
+- quality gap: small random order books planned by the monolithic
+  RakeFormationOptimizer and by the DecompositionSolver
+- scale: one large order book planned by decomposition within the budget
+
+Usage (from backend/):
+    python scripts/benchmark_decomposition.py [--instances 5] [--orders 80] [--large-orders 5000]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.config import settings
+from app.optimizer.decomposition import DecompositionSolver, quality_gap_report
+
+
+def random_order_book(num_orders, rng):
+    return [
+        {
+            "order_id": f"ORD{i:05d}",
+            "quantity_tonnes": rng.choice([150, 400, 800, 1500, 2500, 3600, 5000]),
+            "destination": rng.choice(settings.DESTINATIONS),
+            "material_type": rng.choice(settings.MATERIALS),
+            "loading_point": rng.choice(settings.LOADING_POINTS),
+            "priority": rng.choice(settings.PRIORITIES),
+            "due_date": f"2024-01-{rng.randint(10, 28)}",
+        }
+        for i in range(num_orders)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the decomposition solver")
+    parser.add_argument("--instances", type=int, default=5, help="Small instances for the quality gap")
+    parser.add_argument("--orders", type=int, default=80, help="Orders per small instance")
+    parser.add_argument("--large-orders", type=int, default=5000)
+    parser.add_argument("--time-limit", type=float, default=settings.OPTIMIZER_TIME_LIMIT)
+    parser.add_argument("--partition-orders", type=int, default=settings.MAX_ORDERS_PER_REQUEST)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    instances = [
+        {"orders": random_order_book(args.orders, rng), "available_rakes": 8, "available_trucks": 40}
+        for _ in range(args.instances)
+    ]
+    report = quality_gap_report(
+        instances, time_limit_seconds=args.time_limit, max_partition_orders=args.partition_orders
+    )
+
+    solver = DecompositionSolver(time_limit_seconds=args.time_limit, max_partition_orders=args.partition_orders)
+    large = {
+        "orders": random_order_book(args.large_orders, rng),
+        "available_rakes": max(8, args.large_orders // 40),
+        "available_trucks": max(40, args.large_orders // 5),
+    }
+    start = time.perf_counter()
+    plan = solver.solve(large)
+    elapsed = time.perf_counter() - start
+    decomposition = plan["decomposition"]
+    report["large"] = {
+        "orders": args.large_orders,
+        "seconds": round(elapsed, 3),
+        "within_budget": elapsed <= args.time_limit,
+        "summary": plan["summary"],
+        **{k: v for k, v in decomposition.items() if k != "subproblems"},
+    }
+    print(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
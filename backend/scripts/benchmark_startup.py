@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+"""
+API Cold Start Benchmark
+Measures the time from launching uvicorn to the first healthy response from /,
+with lazy router loading (default) and, for comparison, eager loading.
+
+Usage (from backend/):
+    python scripts/benchmark_startup.py [--runs 5] [--eager] [--first-hit /optimize/...]
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url: str, timeout: float) -> float:
+    """Poll ``url`` until it answers 200; returns the monotonic time it did."""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f"{url} not healthy after {timeout}s")
+
+
+def run_once(lazy: bool, first_hit: str, timeout: float) -> dict:
+    port = free_port()
+    env = dict(os.environ, LAZY_ROUTERS="true" if lazy else "false", SCHEDULER_MODE="disabled")
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=str(BACKEND_DIR), env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        base = f"http://127.0.0.1:{port}"
+        healthy = wait_for(f"{base}/", timeout)
+        result = {"cold_start_seconds": round(healthy - started, 3)}
+
+        if first_hit:
+            hit_started = time.perf_counter()
+            try:
+                urllib.request.urlopen(f"{base}{first_hit}", timeout=timeout).close()
+            except urllib.error.HTTPError:
+                pass  # Any response means the router is loaded
+            result["first_hit_seconds"] = round(time.perf_counter() - hit_started, 3)
+
+        with urllib.request.urlopen(f"{base}/api/import-times", timeout=5) as response:
+            report = json.load(response)["data"]
+        result["main_import_seconds"] = report["main_import_seconds"]
+        result["loaded_groups"] = report["loaded_groups"]
+        return result
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API cold start")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--eager", action="store_true", help="Also measure with LAZY_ROUTERS=false")
+    parser.add_argument("--first-hit", default="/meta/health",
+                        help="Path requested right after startup to time a lazy router load")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    modes = [True, False] if args.eager else [True]
+    summary = {}
+    for lazy in modes:
+        label = "lazy" if lazy else "eager"
+        runs = [run_once(lazy, args.first_hit, args.timeout) for _ in range(args.runs)]
+        cold = [r["cold_start_seconds"] for r in runs]
+        summary[label] = {
+            "runs": runs,
+            "cold_start_median_seconds": statistics.median(cold),
+            "cold_start_max_seconds": max(cold),
+        }
+        if args.first_hit:
+            summary[label]["first_hit_median_seconds"] = statistics.median(r["first_hit_seconds"] for r in runs)
+        print(f"{label:>5}: cold start median {summary[label]['cold_start_median_seconds']:.3f}s "
+              f"(max {summary[label]['cold_start_max_seconds']:.3f}s)")
+
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
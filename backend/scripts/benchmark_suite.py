@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+
+"""
+Performance Benchmark Suite
+Times the hot paths on seeded synthetic workloads at several scales and
+guards against regressions with JSON baselines:
+- optimizer.solve: RakeFormationOptimizer.solve
+- optimizer.allocate_days: rake_optimizer._allocate_orders_to_days_cp
+- rake_opt.optimize_loading: rake_opt loading of one rake template
+- monte_carlo.run_simulation: MonteCarloEngine.run_simulation
+- models.predict: every models_loader prediction helper
+- decision_support.generate_decision: POST /api/decision-support/generate-decision
+- blockchain.mine: shipment creation and block mining of blockchain_service
+
+Every case rebuilds its workload from --seed, so two runs time the same
+work. Each result holds the timing samples and their statistics plus a few
+facts about the output (plan cost, utilization) that show when a change
+made a path faster by doing something different. Baselines are only
+comparable on the machine that recorded them; the environment is stored
+with every run and compare warns when it differs.
+
+Usage (from backend/):
+    python scripts/benchmark_suite.py run [--scales small medium large] [--only optimizer.]
+                                          [--repeat 5] [--output run.json] [--baseline base.json]
+    python scripts/benchmark_suite.py compare base.json run.json [--threshold 0.2] [--stat median]
+
+compare (and run --baseline) exits with status 1 when a case got slower
+than the baseline by more than --threshold, or fails where it used to pass.
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = SCRIPTS_DIR.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from app.config import settings
+from benchmark_decomposition import random_order_book
+
+SCALES = ("small", "medium", "large")
+STATS = ("min", "median", "mean")
+
+# A workload is a zero-argument callable returning facts about its output
+Workload = Callable[[], Dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    setup: Callable[[str, int], Workload]
+    description: str = ""
+
+
+CASES: Dict[str, Case] = {}
+
+
+def benchmark(name: str, description: str = ""):
+    """Register ``setup(scale, seed) -> workload`` as a benchmark case"""
+    def register(setup):
+        CASES[name] = Case(name, setup, description)
+        return setup
+    return register
+
+
+# ============================================================================
+# CASES
+# ============================================================================
+
+@benchmark("optimizer.solve", "RakeFormationOptimizer.solve on a random order book")
+def optimizer_solve(scale: str, seed: int) -> Workload:
+    from app.optimizer.solver import RakeFormationOptimizer
+
+    num_orders = {"small": 10, "medium": 30, "large": 60}[scale]
+    request = {
+        "orders": random_order_book(num_orders, random.Random(seed)),
+        "available_rakes": max(5, num_orders // 8),
+        "available_trucks": max(20, num_orders),
+    }
+
+    def run():
+        optimizer = RakeFormationOptimizer(time_limit_seconds=10, random_seed=seed)
+        plan = optimizer.solve(copy.deepcopy(request))
+        summary = plan.get("summary", {})
+        return {"orders": num_orders, "total_cost": summary.get("total_cost"),
+                "total_tonnage": summary.get("total_tonnage")}
+    return run
+
+
+@benchmark("optimizer.allocate_days", "CP-SAT allocation of orders to days of the horizon")
+def optimizer_allocate_days(scale: str, seed: int) -> Workload:
+    from app.services.rake_optimizer import _allocate_orders_to_days_cp
+
+    num_orders = {"small": 20, "medium": 100, "large": 300}[scale]
+    orders = random_order_book(num_orders, random.Random(seed))
+
+    def run():
+        days = _allocate_orders_to_days_cp(orders, date(2024, 1, 10), 7, 5, 20)
+        return {"orders": num_orders, "orders_per_day": [len(day) for day in days]}
+    return run
+
+
+@benchmark("rake_opt.optimize_loading", "Loading of one rake template with CP-SAT")
+def rake_opt_optimize_loading(scale: str, seed: int) -> Workload:
+    from rake_opt.config import DEFAULT_TEMPLATES
+    from rake_opt.scenario1_opt import optimize_loading
+    from rake_opt.synthetic_data import random_product_set
+
+    num_products = {"small": 10, "medium": 40, "large": 80}[scale]
+    products = random_product_set(num_products, num_products, rng=np.random.default_rng(seed))
+    template = next(iter(DEFAULT_TEMPLATES.values()))
+
+    def run():
+        plan = optimize_loading(products, template, max_time_sec=10.0)
+        return {"products": num_products, "utilization_pct": round(plan.utilization_pct, 3)}
+    return run
+
+
+@benchmark("monte_carlo.run_simulation", "MonteCarloEngine.run_simulation")
+def monte_carlo_run_simulation(scale: str, seed: int) -> Workload:
+    from app.routers.monte_carlo import MonteCarloEngine, SimulationRequest
+
+    num_scenarios = {"small": 200, "medium": 2000, "large": 10000}[scale]
+    rng = random.Random(seed)
+    destinations = settings.DESTINATIONS
+    request = SimulationRequest(
+        materials=[{"id": f"M{i}", "name": m, "quantity": rng.randint(500, 5000)}
+                   for i, m in enumerate(settings.MATERIALS)],
+        orders=[{"id": f"O{i}", "material_id": f"M{rng.randrange(len(settings.MATERIALS))}",
+                 "quantity": rng.randint(50, 800), "destination": rng.choice(destinations),
+                 "sla_hours": rng.choice([24, 48, 72])} for i in range(40)],
+        routes=[{"id": f"R{i}", "destination": d, "base_delay": rng.uniform(2, 12)}
+                for i, d in enumerate(destinations)],
+        equipment=[{"id": f"E{i}", "type": "loader"} for i in range(10)],
+        budget=5_000_000,
+        num_scenarios=num_scenarios,
+    )
+
+    def run():
+        np.random.seed(seed)
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = MonteCarloEngine(request).run_simulation()
+        return {"scenarios": num_scenarios, "average_cost": round(result.average_cost, 3)}
+    return run
+
+
+@benchmark("models.predict", "models_loader prediction helpers, one call of each per input")
+def models_predict(scale: str, seed: int) -> Workload:
+    from app import models_loader as ml
+
+    num_inputs = {"small": 20, "medium": 200, "large": 1000}[scale]
+    rng = random.Random(seed)
+    inputs = [
+        {
+            "material": rng.choice(settings.MATERIALS),
+            "destination": rng.choice(settings.DESTINATIONS),
+            "route": f"Bokaro-{rng.choice(settings.DESTINATIONS)}",
+            "tonnes": rng.uniform(50, 3000),
+            "priority": rng.choice(settings.PRIORITIES),
+            "loading_point": rng.choice(settings.LOADING_POINTS),
+            "date": (date(2024, 1, 1) + timedelta(days=rng.randrange(365))).isoformat(),
+        }
+        for _ in range(num_inputs)
+    ]
+    mock_models = sum(
+        isinstance(ml.models_loader.get_model(name), ml.MockModel)
+        for name in ml.models_loader.get_loaded_models()
+    )
+
+    def run():
+        for x in inputs:
+            ml.predict_demand(x["material"], x["destination"], x["tonnes"], x["priority"])
+            ml.predict_rake_availability(x["date"], x["destination"], x["material"])
+            ml.predict_delay(x["route"], x["tonnes"], x["material"], "clear")
+            ml.predict_throughput(x["loading_point"], x["material"], 3, "A")
+            ml.predict_cost(x["route"], x["tonnes"], 2.0, x["material"])
+            ml.predict_transport_mode(x["tonnes"], 300.0, x["priority"], x["destination"], x["material"])
+        return {"inputs": num_inputs, "mock_models": mock_models}
+    return run
+
+
+@benchmark("decision_support.generate_decision", "POST /api/decision-support/generate-decision")
+def decision_support_generate_decision(scale: str, seed: int) -> Workload:
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    num_orders = {"small": 10, "medium": 100, "large": 500}[scale]
+    rng = random.Random(seed)
+    materials = settings.MATERIALS
+    stockyards = [
+        {
+            "stockyardId": f"SY{i}", "name": f"Stockyard {i}", "location": "Bokaro",
+            "coordinates": {"lat": 23.6 + i / 10, "lng": 86.1 + i / 10},
+            "materials": [{"materialId": m, "materialName": m, "quantity": 100 * num_orders} for m in materials],
+            "capacity": 1000 * num_orders,
+        }
+        for i in range(3)
+    ]
+    request = {
+        "orders": [
+            {"orderId": f"O{i}", "materialId": (m := rng.choice(materials)), "materialName": m,
+             "quantity": rng.randint(10, 60), "destination": rng.choice(settings.DESTINATIONS),
+             "requiredDate": (date(2024, 1, 10) + timedelta(days=rng.randrange(14))).isoformat(),
+             "priority": rng.choice(["low", "medium", "high"])}
+            for i in range(num_orders)
+        ],
+        "stockyards": stockyards,
+        "loadingPoints": [
+            {"pointId": f"LP{i}", "stockyardId": sy["stockyardId"], "name": f"LP{i}", "capacity": 100 * num_orders}
+            for i, sy in enumerate(stockyards)
+        ],
+        "routes": [
+            {"routeId": f"R{sy['stockyardId']}-{d}", "fromLocation": sy["stockyardId"], "toLocation": d,
+             "distance": rng.randint(100, 600), "estimatedTime": rng.randint(6, 36), "cost": rng.randint(200, 900)}
+            for sy in stockyards for d in settings.DESTINATIONS
+        ],
+    }
+    client = TestClient(app)
+
+    def run():
+        response = client.post("/api/decision-support/generate-decision", json=request)
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+        return {"orders": num_orders, "confidence": response.json().get("confidence")}
+    return run
+
+
+@benchmark("blockchain.mine", "Create shipments and mine them into a block")
+def blockchain_mine(scale: str, seed: int) -> Workload:
+    from app.services.blockchain_service import BlockchainService
+
+    num_shipments = {"small": 50, "medium": 500, "large": 5000}[scale]
+    rng = random.Random(seed)
+    shipments = [
+        ("Bokaro", rng.choice(settings.DESTINATIONS), rng.choice(settings.MATERIALS), rng.uniform(50, 3000))
+        for _ in range(num_shipments)
+    ]
+
+    def run():
+        service = BlockchainService()
+        for shipment in shipments:
+            service.create_shipment(*shipment)
+        result = service.mine_block()
+        return {"shipments": num_shipments, "mined": result.get("status") == "success"}
+    return run
+
+
+# ============================================================================
+# RUNNING
+# ============================================================================
+
+def environment() -> Dict[str, Any]:
+    """Where a run was taken; timings are only comparable within one environment"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit,
+    }
+
+
+def time_case(case: Case, scale: str, seed: int, repeat: int, warmup: int) -> Dict[str, Any]:
+    """Timing samples and statistics of one case at one scale; failures are recorded, not raised"""
+    try:
+        workload = case.setup(scale, seed)
+        for _ in range(warmup):
+            workload()
+        samples, info = [], {}
+        for _ in range(repeat):
+            start = time.perf_counter()
+            info = workload()
+            samples.append(time.perf_counter() - start)
+    except Exception as e:
+        return {"case": case.name, "scale": scale, "error": f"{type(e).__name__}: {e}"}
+
+    return {
+        "case": case.name,
+        "scale": scale,
+        "samples": [round(s, 6) for s in samples],
+        "min": round(min(samples), 6),
+        "median": round(statistics.median(samples), 6),
+        "mean": round(statistics.fmean(samples), 6),
+        "stdev": round(statistics.stdev(samples), 6) if len(samples) > 1 else 0.0,
+        "info": info,
+    }
+
+
+def run_suite(
+    scales: List[str], only: Optional[List[str]] = None, seed: int = 7, repeat: int = 5, warmup: int = 1
+) -> Dict[str, Any]:
+    """Run every selected case at every scale"""
+    cases = [c for name, c in CASES.items() if not only or any(name.startswith(p) for p in only)]
+    results = []
+    for case in cases:
+        for scale in scales:
+            result = time_case(case, scale, seed, repeat, warmup)
+            results.append(result)
+            if "error" in result:
+                print(f"{case.name:<36} {scale:<7} ERROR {result['error']}", file=sys.stderr)
+            else:
+                print(f"{case.name:<36} {scale:<7} median {result['median']:.4f}s "
+                      f"(min {result['min']:.4f}s, stdev {result['stdev']:.4f}s)", file=sys.stderr)
+    return {
+        "taken_at": datetime.utcnow().isoformat(),
+        "seed": seed,
+        "repeat": repeat,
+        "warmup": warmup,
+        "environment": environment(),
+        "results": results,
+    }
+
+
+# ============================================================================
+# COMPARISON
+# ============================================================================
+
+def compare_runs(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = 0.2,
+    stat: str = "median",
+    min_delta_seconds: float = 0.005,
+) -> Dict[str, Any]:
+    """
+    Per-case change of ``stat`` from ``baseline`` to ``current``. A case
+    regressed when it is more than ``threshold`` (a fraction) and
+    ``min_delta_seconds`` slower, or fails where the baseline passed.
+    """
+    base = {(r["case"], r["scale"]): r for r in baseline["results"]}
+    rows, regressions = [], []
+    for result in current["results"]:
+        key = (result["case"], result["scale"])
+        row = {"case": key[0], "scale": key[1]}
+        before = base.get(key)
+        if before is None:
+            row["verdict"] = "new"
+        elif "error" in result:
+            row["verdict"] = "still failing" if "error" in before else "regression"
+            row["error"] = result["error"]
+        elif "error" in before:
+            row["verdict"] = "fixed"
+        else:
+            row["baseline"], row["current"] = before[stat], result[stat]
+            row["change"] = (result[stat] - before[stat]) / before[stat] if before[stat] else 0.0
+            if row["change"] > threshold and result[stat] - before[stat] > min_delta_seconds:
+                row["verdict"] = "regression"
+            elif row["change"] < -threshold and before[stat] - result[stat] > min_delta_seconds:
+                row["verdict"] = "improvement"
+            else:
+                row["verdict"] = "unchanged"
+        if row["verdict"] == "regression":
+            regressions.append(row)
+        rows.append(row)
+
+    warnings = []
+    base_env, current_env = baseline.get("environment", {}), current.get("environment", {})
+    for field in ("python", "machine", "cpu_count"):
+        if base_env.get(field) != current_env.get(field):
+            warnings.append(f"{field} differs: {base_env.get(field)} -> {current_env.get(field)}")
+    if baseline.get("seed") != current.get("seed"):
+        warnings.append(f"seed differs: {baseline.get('seed')} -> {current.get('seed')}")
+
+    return {"stat": stat, "threshold": threshold, "rows": rows, "regressions": regressions, "warnings": warnings}
+
+
+def print_comparison(report: Dict[str, Any]) -> None:
+    for warning in report["warnings"]:
+        print(f"warning: {warning}")
+    for row in report["rows"]:
+        if "change" in row:
+            detail = f"{row['baseline']:.4f}s -> {row['current']:.4f}s ({row['change']:+.1%})"
+        else:
+            detail = row.get("error", "")
+        print(f"{row['case']:<36} {row['scale']:<7} {row['verdict']:<13} {detail}")
+    print(f"{len(report['regressions'])} regression(s) beyond {report['threshold']:.0%} on {report['stat']}")
+
+
+def write_json(path: Path, data: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2, default=str))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the optimizer, simulation, inference and decision paths")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the suite and write the results as JSON")
+    run_parser.add_argument("--scales", nargs="+", choices=SCALES, default=["small", "medium"])
+    run_parser.add_argument("--only", nargs="+", help="Case name prefixes, e.g. optimizer. models.predict")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--warmup", type=int, default=1)
+    run_parser.add_argument("--seed", type=int, default=7)
+    run_parser.add_argument("--output", type=Path,
+                            help="Results file (default: logs/benchmarks/run-<timestamp>.json)")
+    run_parser.add_argument("--baseline", type=Path, help="Compare against this baseline after running")
+    run_parser.add_argument("--threshold", type=float, default=0.2)
+    run_parser.add_argument("--verbose", action="store_true", help="Keep INFO logging of the benchmarked code")
+
+    compare_parser = commands.add_parser("compare", help="Compare a run against a baseline")
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("current", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown as a fraction")
+    compare_parser.add_argument("--stat", choices=STATS, default="median")
+    compare_parser.add_argument("--min-delta", type=float, default=0.005,
+                                help="Slowdowns under this many seconds are noise")
+
+    commands.add_parser("list", help="List the benchmark cases")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for case in CASES.values():
+            print(f"{case.name:<36} {case.description}")
+        return
+
+    if args.command == "compare":
+        report = compare_runs(
+            json.loads(args.baseline.read_text()), json.loads(args.current.read_text()),
+            threshold=args.threshold, stat=args.stat, min_delta_seconds=args.min_delta,
+        )
+        print_comparison(report)
+        sys.exit(1 if report["regressions"] else 0)
+
+    if not args.verbose:
+        logging.disable(logging.INFO)
+    run = run_suite(args.scales, args.only, seed=args.seed, repeat=args.repeat, warmup=args.warmup)
+    output = args.output or settings.LOGS_DIR / "benchmarks" / f"run-{datetime.now():%Y%m%d-%H%M%S}.json"
+    write_json(output, run)
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        report = compare_runs(json.loads(args.baseline.read_text()), run, threshold=args.threshold)
+        print_comparison(report)
+        sys.exit(1 if report["regressions"] else 0)
+
+
+if __name__ == "__main__":
+    main()
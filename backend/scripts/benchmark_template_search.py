@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+"""
+Rake Template Search Benchmark
+Compares total latency of rake_opt template selection:
+- sequential: every template solved one after another (previous behaviour)
+- parallel: concurrent solves with upper-bound pruning
+- selector: parallel search over the top-k templates ranked by a
+  TemplateSelectorModel trained on synthetic data
+
+Usage (from backend/):
+    python scripts/benchmark_template_search.py [--sets 5] [--top-k 2] [--train-samples 30]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rake_opt.config import DEFAULT_TEMPLATES
+from rake_opt.ml_selector import train_template_selector
+from rake_opt.scenario1_opt import optimize_loading
+from rake_opt.scenario2_plan import plan_score, search_templates
+from rake_opt.synthetic_data import generate_training_dataset, random_product_set
+
+
+def sequential_search(products, max_time_sec):
+    best = None
+    for template in DEFAULT_TEMPLATES.values():
+        try:
+            plan = optimize_loading(products, template, max_time_sec=max_time_sec)
+        except Exception:
+            continue
+        if best is None or plan_score(plan) > best[0]:
+            best = (plan_score(plan), template.id)
+    return best
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rake template search")
+    parser.add_argument("--sets", type=int, default=5, help="Number of random product sets")
+    parser.add_argument("--top-k", type=int, default=2)
+    parser.add_argument("--train-samples", type=int, default=30)
+    parser.add_argument("--max-time", type=float, default=10.0, help="Per-solve CP-SAT time limit")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"Training selector on {args.train_samples} synthetic samples...")
+    selector = train_template_selector(generate_training_dataset(args.train_samples, random_state=args.seed))
+
+    rng = np.random.default_rng(args.seed + 1)
+    rows = []
+    for i in range(args.sets):
+        products = random_product_set(rng=rng)
+        seq_time, seq_best = timed(lambda: sequential_search(products, args.max_time))
+        par_time, par = timed(lambda: search_templates(products, max_time_sec=args.max_time))
+        sel_time, sel = timed(lambda: search_templates(
+            products, selector=selector, top_k=args.top_k, max_time_sec=args.max_time))
+
+        rows.append({
+            "products": len(products),
+            "sequential_s": round(seq_time, 3),
+            "parallel_s": round(par_time, 3),
+            "selector_s": round(sel_time, 3),
+            "sequential_template": seq_best[1],
+            "parallel_template": par.template.id,
+            "selector_template": sel.template.id,
+            "parallel_pruned": par.pruned,
+            "score_gap_selector": round(seq_best[0] - sel.score, 3),
+        })
+        print(f"set {i + 1}: {len(products)} products  sequential {seq_time:.2f}s  "
+              f"parallel {par_time:.2f}s (pruned {len(par.pruned)})  selector {sel_time:.2f}s")
+
+    summary = {
+        key: round(statistics.median(r[key] for r in rows), 3)
+        for key in ("sequential_s", "parallel_s", "selector_s")
+    }
+    summary["parallel_same_template"] = sum(r["parallel_template"] == r["sequential_template"] for r in rows)
+    summary["selector_same_template"] = sum(r["selector_template"] == r["sequential_template"] for r in rows)
+    print(json.dumps({"median": summary, "runs": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+"""
+Shared test setup.
+
+Runtime state (SQLite stores, optimizer run logs, plan history) goes to a
+temporary LOGS_DIR rather than the repository's logs/. It is set before any
+test module imports app.config, and job worker processes inherit it.
+"""
+
+import os
+import shutil
+import tempfile
+
+LOGS_DIR = tempfile.mkdtemp(prefix="sail-bokaro-tests-")
+os.environ["LOGS_DIR"] = LOGS_DIR
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(LOGS_DIR, ignore_errors=True)
@@ -2,6 +2,7 @@
 Unit tests for optimization endpoints and services.
 """
 
+import json
 import pytest
 from fastapi.testclient import TestClient
 import sys
@@ -218,6 +219,35 @@ def test_optimize_dispatch_endpoint():
     assert 'trucks' in data['data']
     assert 'summary' in data['data']
 
+def test_optimize_dispatch_stream_endpoint():
+    """Test /optimize/dispatch/stream streams improvements then the plan."""
+    response = client.post(
+        "/optimize/dispatch/stream",
+        json={
+            "orders": [
+                {
+                    "order_id": f"ORD{i:03d}",
+                    "material_type": "HR_Coils",
+                    "quantity_tonnes": 300 + i * 400,
+                    "destination": ["Kolkata", "Patna"][i % 2],
+                    "priority": "HIGH"
+                }
+                for i in range(4)
+            ],
+            "available_rakes": 2,
+            "available_trucks": 10,
+            "inventory": {"HR_Coils": 10000}
+        }
+    )
+    
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[-1]['event'] == 'plan'
+    assert 'summary' in events[-1]['data']
+    objectives = [e['objective'] for e in events if e['event'] == 'improvement']
+    assert objectives == sorted(objectives, reverse=True)
+
 def test_optimize_dispatch_multiple_orders():
     """Test /optimize/dispatch with multiple orders."""
     response = client.post(
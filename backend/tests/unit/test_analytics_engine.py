@@ -0,0 +1,193 @@
+"""
+Unit tests for the DuckDB analytics snapshot engine
+"""
+
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app import db, db_async
+from app.services import analytics_engine
+from app.services.analytics_engine import DUCKDB_AVAILABLE, AnalyticsEngine
+from app.services.job_scheduler import DEFAULT_JOBS
+
+requires_duckdb = pytest.mark.skipif(not DUCKDB_AVAILABLE, reason="duckdb not installed")
+
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    """SQLite history tables returning real timestamps, as PostgreSQL would"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'history.db'}",
+        connect_args={'detect_types': sqlite3.PARSE_DECLTYPES}
+    )
+    today = datetime.now()
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE historical_shipments (
+                id INTEGER PRIMARY KEY, date TIMESTAMP, route TEXT, material TEXT, tonnage REAL,
+                delay_days REAL, cost_per_tonne REAL, risk_score REAL, status TEXT,
+                thickness TEXT, width TEXT, length TEXT
+            )
+        """))
+        conn.execute(text("""
+            CREATE TABLE historical_dispatches (
+                id INTEGER PRIMARY KEY, date TIMESTAMP, route TEXT, quality_score REAL,
+                satisfaction_score REAL, delay_days REAL
+            )
+        """))
+        conn.execute(text("""
+            INSERT INTO historical_shipments
+                (date, route, material, tonnage, delay_days, cost_per_tonne, risk_score, status,
+                 thickness, width, length)
+            VALUES (:date, :route, :material, :tonnage, :delay, 300, 20, :status, :thickness, '1500mm', 'coil')
+        """), [
+            {'date': today - timedelta(days=i), 'route': ['bokaro-patna', 'bokaro-ranchi'][i % 2],
+             'material': ['plates', 'hr_coils', 'cr_coils'][i % 3], 'tonnage': 10 + i, 'delay': i % 4,
+             'status': 'on-time' if i % 3 else 'delayed', 'thickness': ['3mm', '12mm'][i % 2]}
+            for i in range(40)
+        ])
+        conn.execute(text("""
+            INSERT INTO historical_dispatches (date, route, quality_score, satisfaction_score, delay_days)
+            VALUES (:date, :route, :quality, 4, :delay)
+        """), [
+            {'date': today - timedelta(days=i), 'route': ['bokaro-patna', 'bokaro-ranchi'][i % 2],
+             'quality': 80 + i % 5, 'delay': i % 2}
+            for i in range(20)
+        ])
+    monkeypatch.setattr(db, 'engine', engine)
+    monkeypatch.setattr(db_async, 'async_engine', None)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def snapshots(history, tmp_path, monkeypatch):
+    engine = AnalyticsEngine(
+        snapshot_dir=tmp_path / "analytics", max_staleness_seconds=60, chunk_rows=7, enabled=True
+    )
+    monkeypatch.setattr(analytics_engine, '_analytics_engine', engine)
+    return engine
+
+
+@pytest.fixture
+def client(snapshots):
+    from app.main import app
+
+    return TestClient(app)
+
+
+@requires_duckdb
+class TestSnapshots:
+    """Test publishing and pruning of Parquet snapshots"""
+
+    def test_snapshot_copies_tables_in_chunks_and_publishes(self, snapshots):
+        """Test every row reaches the snapshot and the manifest makes it fresh"""
+        assert not snapshots.is_fresh(analytics_engine.SNAPSHOT_TABLES)
+        manifest = snapshots.take_snapshot()
+
+        assert manifest['tables']['historical_shipments']['rows'] == 40
+        assert manifest['tables']['historical_dispatches']['rows'] == 20
+        assert snapshots.is_fresh(analytics_engine.SNAPSHOT_TABLES)
+        assert not list(snapshots.snapshot_dir.glob(".*.tmp"))
+
+    def test_column_types_come_from_the_source_table(self, snapshots, history, client):
+        """Test columns that are NULL throughout the first chunk keep their floats and strings"""
+        with history.begin() as conn:
+            conn.execute(text("UPDATE historical_shipments SET risk_score = NULL, thickness = NULL WHERE id <= 7"))
+            conn.execute(text("UPDATE historical_shipments SET risk_score = 20.5 WHERE id > 7"))
+        from_database = client.get("/api/database/shipments/summary").json()['data']
+
+        snapshots.take_snapshot()
+        from_snapshot = client.get("/api/database/shipments/summary").json()['data']
+
+        assert from_snapshot['source'] == 'snapshot'
+        assert from_snapshot['summary']['avg_risk'] == pytest.approx(20.5)
+        assert from_snapshot['summary']['avg_risk'] == pytest.approx(from_database['summary']['avg_risk'])
+
+    def test_old_snapshots_are_pruned(self, snapshots):
+        """Test only the newest snapshots are kept on disk"""
+        for _ in range(3):
+            latest = snapshots.take_snapshot()
+        kept = sorted(p.name for p in snapshots.snapshot_dir.iterdir() if p.is_dir())
+        assert len(kept) == snapshots.keep
+        assert kept[-1] == latest['snapshot_id']
+
+
+@requires_duckdb
+class TestSnapshotRouting:
+    """Test the database router serves analytics from fresh snapshots"""
+
+    def test_snapshot_answers_match_the_database(self, client, snapshots):
+        """Test each analytics endpoint gives the same figures from the snapshot as from the database"""
+        endpoints = ("/api/database/shipments/summary", "/api/database/analytics/materials",
+                     "/api/database/analytics/routes")
+        from_database = {url: client.get(url).json()['data'] for url in endpoints}
+        snapshots.take_snapshot()
+        from_snapshot = {url: client.get(url).json()['data'] for url in endpoints}
+
+        for url in endpoints:
+            assert from_database[url].pop('source') == 'database'
+            assert from_snapshot[url].pop('source') == 'snapshot'
+            assert _same(from_snapshot[url], from_database[url])
+
+    def test_one_shipment_scan_serves_every_endpoint(self, client, snapshots, monkeypatch):
+        """Test the GROUPING SETS rollup is computed once per snapshot for all endpoints"""
+        snapshots.take_snapshot()
+        queries = []
+        query = snapshots._query
+
+        def counted(sql, table, params):
+            queries.append(table)
+            return query(sql, table, params)
+
+        monkeypatch.setattr(snapshots, '_query', counted)
+
+        for url in ("/api/database/shipments/summary", "/api/database/analytics/materials",
+                    "/api/database/analytics/routes", "/api/database/shipments/summary"):
+            assert client.get(url).json()['data']['source'] == 'snapshot'
+        assert queries.count('historical_shipments') == 1
+
+    def test_stale_snapshot_falls_back_to_the_database(self, client, snapshots):
+        """Test a snapshot older than the staleness bound is not served"""
+        snapshots.take_snapshot()
+        snapshots.max_staleness_seconds = 0
+        assert client.get("/api/database/analytics/routes").json()['data']['source'] == 'database'
+
+
+class TestWithoutSnapshot:
+    """Test behaviour before any snapshot exists"""
+
+    def test_analytics_are_served_by_the_database(self, client):
+        """Test endpoints answer from the database until a snapshot is published"""
+        data = client.get("/api/database/analytics/materials").json()['data']
+        assert data['source'] == 'database'
+        assert sum(row['total_shipments'] for row in data['materials']) == 30
+
+    def test_snapshot_job_is_scheduled(self):
+        """Test the snapshot job is registered with the scheduler"""
+        job = {j.name: j for j in DEFAULT_JOBS}['analytics_snapshot']
+        assert job.target == "app.services.analytics_engine:run_snapshot_job"
+        assert job.interval_seconds
+
+
+def _same(left, right):
+    """Deep comparison of response data, ignoring row order and float rounding"""
+    if isinstance(left, dict):
+        return left.keys() == right.keys() and all(_same(left[k], right[k]) for k in left)
+    if isinstance(left, list):
+        def key(row):
+            return sorted((k, str(v)) for k, v in row.items() if not isinstance(v, float))
+
+        pairs = zip(sorted(left, key=key), sorted(right, key=key))
+        return len(left) == len(right) and all(_same(a, b) for a, b in pairs)
+    if isinstance(left, float) or isinstance(right, float):
+        return left == pytest.approx(right)
+    return left == right
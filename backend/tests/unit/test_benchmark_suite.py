@@ -0,0 +1,85 @@
+"""
+Unit tests for the performance benchmark suite
+"""
+
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(BACKEND_DIR / "scripts"))
+
+import benchmark_suite
+
+
+def _run(**medians):
+    return {
+        "seed": 7,
+        "environment": {"python": "3.11", "machine": "x86_64", "cpu_count": 8},
+        "results": [
+            {"case": case, "scale": "small", "error": "boom"} if median is None
+            else {"case": case, "scale": "small", "median": median}
+            for case, median in medians.items()
+        ],
+    }
+
+
+class TestCompare:
+    """Test regression detection against a baseline"""
+
+    def test_slowdowns_beyond_the_threshold_regress(self):
+        """Test only slowdowns over both the relative threshold and the noise floor count"""
+        baseline = _run(solve=1.0, predict=0.001, mine=0.5)
+        current = _run(solve=1.3, predict=0.002, mine=0.3)
+        report = benchmark_suite.compare_runs(baseline, current, threshold=0.2)
+
+        verdicts = {row["case"]: row["verdict"] for row in report["rows"]}
+        assert verdicts == {"solve": "regression", "predict": "unchanged", "mine": "improvement"}
+        assert [row["case"] for row in report["regressions"]] == ["solve"]
+        assert report["warnings"] == []
+
+    def test_new_failures_regress_and_fixed_cases_do_not(self):
+        """Test a case failing only in the current run is a regression"""
+        report = benchmark_suite.compare_runs(
+            _run(broken=0.1, flaky=None, legacy=None), _run(broken=None, flaky=0.1, legacy=None)
+        )
+        verdicts = {row["case"]: row["verdict"] for row in report["rows"]}
+        assert verdicts == {"broken": "regression", "flaky": "fixed", "legacy": "still failing"}
+
+    def test_environment_changes_are_flagged(self):
+        """Test runs from another machine are compared with a warning"""
+        current = _run(solve=1.0)
+        current["environment"]["cpu_count"] = 2
+        report = benchmark_suite.compare_runs(_run(solve=1.0), current)
+        assert report["warnings"] == ["cpu_count differs: 8 -> 2"]
+
+
+class TestRun:
+    """Test running cases on seeded workloads"""
+
+    def test_cases_cover_the_hot_paths(self):
+        """Test every benchmarked path is registered"""
+        assert set(benchmark_suite.CASES) >= {
+            "optimizer.solve", "optimizer.allocate_days", "rake_opt.optimize_loading",
+            "monte_carlo.run_simulation", "models.predict", "decision_support.generate_decision",
+            "blockchain.mine",
+        }
+
+    def test_run_records_samples_and_output_facts(self):
+        """Test a run times each repeat and keeps facts about the workload output"""
+        run = benchmark_suite.run_suite(["small"], only=["blockchain."], repeat=3, warmup=0)
+        [result] = run["results"]
+
+        assert result["case"] == "blockchain.mine"
+        assert len(result["samples"]) == 3
+        assert result["min"] <= result["median"] <= max(result["samples"])
+        assert result["info"] == {"shipments": 50, "mined": True}
+        assert run["environment"]["cpu_count"]
+
+    def test_decision_support_case_runs(self):
+        """Test the decision support workload is answered instead of failing"""
+        run = benchmark_suite.run_suite(["small"], only=["decision_support."], repeat=1, warmup=0)
+        [result] = run["results"]
+
+        assert "error" not in result
+        assert result["info"]["orders"] == 10
@@ -0,0 +1,178 @@
+"""
+Unit tests for the async database access layer and the database router
+"""
+
+import asyncio
+import csv
+import io
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app import db, db_async
+from app.utils.metrics import MetricsCollector, instrument_engine
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path, monkeypatch):
+    """A file SQLite database with shipments, served through the thread fallback"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'history.db'}")
+    today = datetime.now()
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE historical_shipments (
+                id INTEGER PRIMARY KEY, date TIMESTAMP, route TEXT, material TEXT, tonnage REAL,
+                delay_days REAL, cost_per_tonne REAL, risk_score REAL, status TEXT
+            )
+        """))
+        conn.execute(text("""
+            INSERT INTO historical_shipments
+                (date, route, material, tonnage, delay_days, cost_per_tonne, risk_score, status)
+            VALUES (:date, :route, :material, 50, :delay, 300, 20, :status)
+        """), [
+            {'date': today - timedelta(days=i), 'route': route, 'material': material,
+             'delay': i % 3, 'status': 'on-time' if i % 2 else 'delayed'}
+            for i, (route, material) in enumerate(
+                [('bokaro-patna', 'plates')] * 3 + [('bokaro-ranchi', 'hr_coils')] * 2
+            )
+        ] + [{'date': today - timedelta(days=90), 'route': 'bokaro-patna', 'material': 'plates',
+              'delay': 9, 'status': 'delayed'}])
+    monkeypatch.setattr(db, 'engine', engine)
+    monkeypatch.setattr(db_async, 'async_engine', None)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def client(sqlite_engine):
+    from app.main import app
+
+    return TestClient(app)
+
+
+class TestAsyncAccessLayer:
+    """Test statement caching, execution and pool status"""
+
+    def test_select_recent_is_cached_per_filter_combination(self):
+        """Test the same filters reuse one statement and each filter is bound"""
+        statement = db_async.select_recent('historical_dispatches', ('route', 'status'))
+        assert db_async.select_recent('historical_dispatches', ('route', 'status')) is statement
+        assert 'route = :route AND status = :status' in statement.text
+        assert db_async.select_recent('historical_dispatches') is not statement
+
+    def test_async_url_selects_async_drivers(self):
+        """Test PostgreSQL maps to asyncpg with a statement cache and SQLite to aiosqlite"""
+        url = db_async.async_url('postgresql://u:p@localhost:5432/sihdb')
+        assert url.drivername == 'postgresql+asyncpg'
+        assert url.query['prepared_statement_cache_size'] == str(db_async.DB_STATEMENT_CACHE_SIZE)
+        assert db_async.async_url('sqlite:///local.db').drivername == 'sqlite+aiosqlite'
+
+    def test_fetch_all_runs_on_the_sync_engine_without_a_driver(self, sqlite_engine):
+        """Test filtered selects run in a worker thread when no async engine exists"""
+        params = {'start_date': datetime.now() - timedelta(days=30), 'limit': 2, 'route': 'bokaro-patna'}
+        rows = asyncio.run(db_async.fetch_all(db_async.select_recent('historical_shipments', ('route',)), params))
+        assert [row['route'] for row in rows] == ['bokaro-patna', 'bokaro-patna']
+        assert rows[0]['date'] > rows[1]['date']
+
+    def test_pool_gauges_track_checked_out_connections(self, sqlite_engine):
+        """Test pool checkouts and checkins are reflected in the gauges"""
+        collector = MetricsCollector(multiproc_dir="")
+        instrument_engine(sqlite_engine, collector, name="test")
+        with sqlite_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            text_metrics = collector.get_prometheus_metrics()
+            assert 'db_pool_connections{engine="test",state="checked_out"} 1' in text_metrics
+        assert 'db_pool_connections{engine="test",state="checked_out"} 0' in collector.get_prometheus_metrics()
+        assert db_async.pool_status()['driver'] == 'thread'
+
+
+class TestDatabaseRouter:
+    """Test the database endpoints over the async layer"""
+
+    def test_summary_queries_run_concurrently(self, client, monkeypatch):
+        """Test the three summary queries overlap instead of running back to back"""
+        client.get("/api/database/shipments/summary")  # Load the router outside the timing
+        execute_sync = db_async._execute_sync
+
+        def slow_execute(*args):
+            time.sleep(0.3)
+            return execute_sync(*args)
+
+        monkeypatch.setattr(db_async, '_execute_sync', slow_execute)
+        started = time.perf_counter()
+        body = client.get("/api/database/shipments/summary").json()
+        elapsed = time.perf_counter() - started
+
+        assert body['status'] == 'success'
+        assert body['data']['summary']['total_shipments'] == 5
+        assert body['data']['summary']['on_time_percentage'] == 40.0
+        assert {r['route']: r['count'] for r in body['data']['routes']} == {'bokaro-patna': 3, 'bokaro-ranchi': 2}
+        assert elapsed < 0.8
+
+
+class TestPaginationAndExport:
+    """Test keyset pages and streamed exports of the record lists"""
+
+    def test_pages_walk_every_record_once(self, client, sqlite_engine):
+        """Test following next_cursor visits each record once, newest first, even across equal dates"""
+        with sqlite_engine.begin() as conn:
+            conn.execute(text("""
+                INSERT INTO historical_shipments (date, route, material, tonnage, status)
+                SELECT date, route, material, tonnage, status FROM historical_shipments WHERE id <= 2
+            """))
+
+        pages, cursor = [], None
+        while True:
+            params = {'limit': 2, **({'cursor': cursor} if cursor else {})}
+            data = client.get("/api/database/shipments", params=params).json()['data']
+            pages.append(data['items'])
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
+
+        rows = [row for page in pages for row in page]
+        assert [len(page) for page in pages] == [2, 2, 2, 1]
+        assert len({row['id'] for row in rows}) == 7
+        keys = [(row['date'], row['id']) for row in rows]
+        assert keys == sorted(keys, reverse=True)
+
+    def test_invalid_cursor_is_rejected(self, client):
+        """Test a token that was not issued by the API is a client error"""
+        response = client.get("/api/database/shipments", params={'cursor': 'not-a-cursor'})
+        assert response.status_code == 400
+
+    def test_exports_stream_every_record_in_batches(self, client, monkeypatch):
+        """Test NDJSON and CSV exports hold every matching record regardless of limit"""
+        monkeypatch.setattr(db_async, 'DB_STREAM_BATCH_ROWS', 2)
+
+        response = client.get("/api/database/shipments", params={'format': 'ndjson', 'limit': 1})
+        assert response.headers['content-type'].startswith('application/x-ndjson')
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert len(rows) == 5
+
+        response = client.get(
+            "/api/database/shipments", params={'format': 'csv', 'route': 'bokaro-patna'}
+        )
+        lines = list(csv.reader(io.StringIO(response.text)))
+        assert lines[0][:3] == ['id', 'date', 'route']
+        assert [line[2] for line in lines[1:]] == ['bokaro-patna'] * 3
+
+    def test_closing_a_stream_early_releases_the_reader(self, sqlite_engine):
+        """Test abandoning an export stops the worker thread instead of leaving it blocked"""
+        statement = db_async.select_recent('historical_shipments', limit=False)
+
+        async def first_batch():
+            stream = db_async.stream_rows(statement, {'start_date': datetime(2000, 1, 1)}, batch_size=1)
+            batch = await stream.__anext__()
+            await asyncio.wait_for(stream.aclose(), timeout=5)
+            return batch
+
+        assert len(asyncio.run(first_batch())) == 1
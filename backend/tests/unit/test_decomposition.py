@@ -0,0 +1,148 @@
+"""
+Unit tests for the decomposition solver
+"""
+
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.optimizer.decomposition import (
+    RAKE_CAPACITY_TONNES,
+    TRUCK_CAPACITY_TONNES,
+    DecompositionSolver,
+    allocate,
+    partition_orders,
+    quality_gap_report,
+)
+
+
+def order_book(num_orders, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            'order_id': f'ORD{i:05d}',
+            'quantity_tonnes': rng.choice([120, 650, 1800, 3200, 5200]),
+            'destination': rng.choice(['Kolkata', 'Patna', 'Ranchi', 'Durgapur', 'Haldia']),
+            'material_type': rng.choice(['HR_Coils', 'Plates', 'TMT_Bars']),
+            'loading_point': rng.choice(['LP1', 'LP2', 'LP3']),
+            'priority': rng.choice(['HIGH', 'MEDIUM', 'LOW']),
+            'due_date': f'2024-01-{rng.randint(10, 28)}',
+        }
+        for i in range(num_orders)
+    ]
+
+
+class IdleOptimizer:
+    """Subproblem optimizer that plans nothing, leaving the whole fleet to the master step"""
+
+    def __init__(self, time_limit_seconds, random_seed):
+        self.time_limit_seconds = time_limit_seconds
+
+    def solve(self, input_json, on_improvement=None):
+        return {'rakes': [], 'trucks': [], 'solver_status': 'OPTIMAL'}
+
+
+class ReportingOptimizer(IdleOptimizer):
+    """Subproblem optimizer reporting one improvement; Ranchi orders fall back"""
+
+    def solve(self, input_json, on_improvement=None):
+        on_improvement({'objective': 1.0})
+        fallback = input_json['orders'][0]['destination'] == 'Ranchi'
+        return {'rakes': [], 'trucks': [], 'summary': {'fallback': fallback}, 'solver_status': 'LNS'}
+
+
+class TestPartitioning:
+    """Test order partitioning and fleet allocation"""
+
+    def test_partitions_by_loading_point_destination_material(self):
+        """Test every partition holds one key and oversized groups are chunked by due date"""
+        orders = order_book(600)
+        partitions = partition_orders(orders, max_partition_orders=10)
+
+        assert sum(len(p.orders) for p in partitions) == 600
+        assert all(len(p.orders) <= 10 for p in partitions)
+        for p in partitions:
+            assert {(o['loading_point'], o['destination'], o['material_type']) for o in p.orders} == {p.key}
+            assert [o['due_date'] for o in p.orders] == sorted(o['due_date'] for o in p.orders)
+            assert [orders[i] for i in p.indexes] == p.orders
+
+    def test_allocate_is_proportional_and_exact(self):
+        """Test largest-remainder allocation hands out exactly the fleet"""
+        assert allocate(10, [1, 1, 2]) in ([3, 2, 5], [2, 3, 5])
+        assert sum(allocate(7, [0.3, 5, 2.2, 9])) == 7
+        assert allocate(5, [0, 0]) == [0, 0]
+
+
+class TestDecompositionSolver:
+    """Test decomposed plans of large order books"""
+
+    def test_large_order_book_respects_fleet_and_capacity(self):
+        """Test a 2,000-order book plans within the shared fleet and vehicle capacities"""
+        solver = DecompositionSolver(time_limit_seconds=2, max_partition_orders=50, max_workers=4)
+        plan = solver.solve({'orders': order_book(2000), 'available_rakes': 40, 'available_trucks': 300})
+
+        assert plan['solver_status'] == 'DECOMPOSED'
+        assert plan['summary']['total_rakes'] <= 40
+        assert plan['summary']['total_trucks'] <= 300
+        assert len({r['rake_id'] for r in plan['rakes']}) == len(plan['rakes'])
+        assert len({t['truck_id'] for t in plan['trucks']}) == len(plan['trucks'])
+        assert all(r['tonnes'] <= RAKE_CAPACITY_TONNES for r in plan['rakes'])
+        assert all(t['tonnes'] <= TRUCK_CAPACITY_TONNES for t in plan['trucks'])
+        assert plan['decomposition']['partitions'] >= 45
+        assert len(plan['decomposition']['subproblems']) == plan['decomposition']['partitions']
+
+    def test_master_reallocates_unused_fleet_to_urgent_demand(self):
+        """Test rakes and trucks left unused by subproblems serve the most urgent partitions"""
+        orders = [
+            {'order_id': 'A', 'quantity_tonnes': 2000, 'destination': 'Patna', 'material_type': 'Plates',
+             'priority': 'LOW', 'due_date': '2024-01-20'},
+            {'order_id': 'B', 'quantity_tonnes': 1000, 'destination': 'Ranchi', 'material_type': 'Plates',
+             'priority': 'HIGH', 'due_date': '2024-01-25'},
+        ]
+        solver = DecompositionSolver(optimizer_factory=IdleOptimizer)
+        plan = solver.solve({'orders': orders, 'available_rakes': 1, 'available_trucks': 2})
+
+        assert [r['destination'] for r in plan['rakes']] == ['Ranchi']
+        assert plan['rakes'][0]['tonnes'] == 1000
+        assert [t['destination'] for t in plan['trucks']] == ['Patna', 'Patna']
+        assert plan['decomposition']['reallocated_rakes'] == 1
+        assert plan['decomposition']['unserved_tonnes'] == 2000 - 2 * TRUCK_CAPACITY_TONNES
+
+    def test_improvements_and_fallbacks_of_subproblems(self):
+        """Test subproblem improvements are tagged with their partition and a fallback marks the plan"""
+        orders = [
+            {'order_id': 'A', 'quantity_tonnes': 2000, 'destination': 'Patna', 'material_type': 'Plates',
+             'priority': 'LOW', 'due_date': '2024-01-20'},
+            {'order_id': 'B', 'quantity_tonnes': 1000, 'destination': 'Ranchi', 'material_type': 'Plates',
+             'priority': 'HIGH', 'due_date': '2024-01-25'},
+        ]
+        events = []
+        solver = DecompositionSolver(optimizer_factory=ReportingOptimizer, max_workers=1)
+        plan = solver.solve({'orders': orders, 'available_rakes': 1, 'available_trucks': 2},
+                            on_improvement=events.append)
+
+        assert sorted(e['partition'].split('/')[1] for e in events) == ['Patna', 'Ranchi']
+        assert all(e['objective'] == 1.0 for e in events)
+        assert plan['summary']['fallback'] is True
+
+        plan = DecompositionSolver(optimizer_factory=IdleOptimizer).solve(
+            {'orders': orders[:1], 'available_rakes': 1, 'available_trucks': 2}
+        )
+        assert plan['summary']['fallback'] is False
+
+    def test_quality_gap_report(self):
+        """Test the report compares both solves on every instance"""
+        instances = [
+            {'orders': order_book(40, seed), 'available_rakes': 6, 'available_trucks': 20}
+            for seed in range(2)
+        ]
+        report = quality_gap_report(instances, time_limit_seconds=1, max_partition_orders=20)
+
+        assert report['instances'] == 2
+        for run in report['runs']:
+            assert run['monolithic']['total_tonnage'] > 0
+            assert run['decomposed']['total_tonnage'] > 0
+            assert run['cost_per_tonne_gap_pct'] is not None
+        assert report['coverage_gap_pct']['worst'] == min(r['coverage_gap_pct'] for r in report['runs'])
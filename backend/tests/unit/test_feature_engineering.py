@@ -0,0 +1,90 @@
+"""
+Unit tests for ML feature engineering.
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from ml.feature_engineering import FeatureEngineer
+
+
+DISPATCHES = [
+    {
+        'route': 'bokaro-haldia', 'material': 'hr_coils', 'tonnage': 60,
+        'date': '2024-01-13', 'dispatch_time': '08:30', 'weather': 'rainy',
+        'traffic_level': 'high', 'vehicle': 'TRK-17', 'driver': 'Ravi',
+        'total_cost': 44000,
+    },
+    {'route': 'unknown', 'date': 'not-a-date', 'dispatch_time': '', 'vehicle': 'X'},
+]
+
+
+class TestFeatureEngineer:
+    """Tests for FeatureEngineer."""
+
+    def test_dispatch_features_single_record(self):
+        """Test lookups, time parsing and derived features."""
+        features = FeatureEngineer().extract_dispatch_features(DISPATCHES[0])
+
+        assert features['route_risk'] == 25
+        assert features['route_distance'] == 220
+        assert features['tonnage_category'] == 'heavy'
+        assert features['day_of_week'] == 5
+        assert features['is_weekend'] == 1
+        assert features['hour_of_day'] == 8
+        assert features['vehicle_age'] == 3
+        assert features['driver_experience'] == (sum(ord(c) for c in 'Ravi') % 12) + 3
+        assert features['total_risk'] == 25 * 0.4 + 22 * 0.3 + 10 * 0.2 + 25 * 0.1
+        assert features['cost_per_km'] == 200
+
+    def test_dispatch_features_defaults(self):
+        """Test defaults for unknown and missing values."""
+        features = FeatureEngineer().extract_dispatch_features(DISPATCHES[1])
+
+        assert features['route_risk'] == 50
+        assert features['material_cost'] == 3500
+        assert features['tonnage'] == 0
+        assert features['day_of_week'] == 0
+        assert features['hour_of_day'] == 12
+        assert features['vehicle_age'] == 3
+        assert features['driver_experience'] == 7
+
+    def test_batch_matches_single_records(self):
+        """Test batch extraction agrees with the per-record path."""
+        engineer = FeatureEngineer()
+        batch = engineer.extract_dispatch_features_batch(pd.DataFrame(DISPATCHES))
+
+        assert list(batch.index) == [0, 1]
+        for i, record in enumerate(DISPATCHES):
+            assert batch.iloc[i].to_dict() == engineer.extract_dispatch_features(record)
+
+    def test_decision_features_batch(self):
+        """Test decision feature extraction."""
+        decisions = pd.DataFrame([
+            {'severity': 'high', 'decisions': ['a', 'b', 'a'], 'outcome': 'Success',
+             'cost_impact': -5, 'time_impact': 3},
+            {'severity': 'critical', 'outcome': 'Failure', 'cost_impact': 4},
+        ])
+        features = FeatureEngineer().extract_decision_features_batch(decisions)
+
+        assert features['scenario_severity'].tolist() == [75, 100]
+        assert features['num_decisions'].tolist() == [3, 0]
+        assert features['total_impact'].tolist() == [8, 4]
+        assert features['decision_effectiveness'].tolist() == [12, 2]
+
+    def test_single_records_are_one_row_batches(self):
+        """Test the per-record path returns floats and applies defaults to None, like the batch."""
+        engineer = FeatureEngineer()
+        dispatch = engineer.extract_dispatch_features({'tonnage': 30, 'total_cost': 1000})
+        decision = engineer.extract_decision_features({'complexity': None, 'cost_impact': 4})
+
+        assert dispatch['tonnage'] == 30.0 and isinstance(dispatch['tonnage'], float)
+        assert dispatch['tonnage_category'] == 'medium'
+        assert decision['scenario_complexity'] == 50
+        assert decision == engineer.extract_decision_features_batch(
+            pd.DataFrame([{'complexity': None, 'cost_impact': 4}])
+        ).iloc[0].to_dict()
@@ -0,0 +1,48 @@
+"""
+Unit tests for the geospatial grid index.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.utils.geo_index import GridSpatialIndex, KNOWN_SITES, haversine_km
+
+
+class TestGridSpatialIndex:
+    """Tests for GridSpatialIndex."""
+
+    def test_nearby_sorted_and_exact(self):
+        """Test radius queries return only objects inside the radius, nearest first."""
+        index = GridSpatialIndex(cell_size_deg=0.05)
+        lat, lon = KNOWN_SITES['haldia']
+        index.upsert('near', lat + 0.01, lon)
+        index.upsert('nearer', lat + 0.001, lon)
+        index.upsert('far', lat + 0.5, lon)
+
+        results = index.nearby(lat, lon, radius_km=5)
+
+        assert [r['id'] for r in results] == ['nearer', 'near']
+        assert results[1]['distance_km'] == round(haversine_km(lat, lon, lat + 0.01, lon), 3)
+
+    def test_upsert_moves_between_cells(self):
+        """Test the latest position replaces the previous one."""
+        index = GridSpatialIndex(cell_size_deg=0.05)
+        index.upsert('rake-1', 23.67, 86.15, {'speed_kmh': 0})
+        index.upsert('rake-1', 22.07, 88.07, {'speed_kmh': 40})
+
+        assert len(index) == 1
+        assert index.nearby(23.67, 86.15, radius_km=10) == []
+        assert index.get('rake-1')['speed_kmh'] == 40
+
+    def test_bbox_and_remove(self):
+        """Test bounding-box queries and removal."""
+        index = GridSpatialIndex()
+        index.upsert('inside', 22.5, 88.0)
+        index.upsert('outside', 25.0, 85.0)
+
+        assert [r['id'] for r in index.within_bbox(22.0, 87.5, 23.0, 88.5)] == ['inside']
+        assert index.remove('inside')
+        assert index.within_bbox(22.0, 87.5, 23.0, 88.5) == []
+        assert not index.remove('inside')
@@ -0,0 +1,104 @@
+"""
+Unit tests for the global material x destination demand forecaster
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.services.global_forecast_service import GlobalDemandForecaster, GlobalForecastService
+
+
+def seasonal_series(series_count=40, days=500, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(days)[None, :]
+    level = rng.uniform(50, 300, (series_count, 1))
+    values = level * (1 + 0.25 * np.sin(2 * np.pi * t / 7) + 0.2 * np.sin(2 * np.pi * t / 365.25))
+    values += rng.normal(0, 5, (series_count, days))
+    return values, pd.date_range('2023-01-01', periods=days, freq='D')
+
+
+class TestGlobalDemandForecaster:
+    """Test the pooled direct multi-horizon ridge model"""
+
+    def test_forecasts_seasonal_series_on_holdout(self):
+        """Test a 14-day holdout of weekly-seasonal series is forecast closely"""
+        values, dates = seasonal_series()
+        model = GlobalDemandForecaster(horizon=14).fit(values[:, :-14], dates[:-14])
+        forecast, lower, upper = model.predict()
+
+        assert forecast.shape == lower.shape == upper.shape == (40, 14)
+        actual = values[:, -14:]
+        assert np.abs(forecast - actual).mean() / actual.mean() < 0.1
+        assert np.all(lower <= forecast) and np.all(forecast <= upper)
+        assert np.all(lower >= 0)
+
+    def test_short_history_is_rejected(self):
+        """Test history shorter than the lag window plus horizon raises"""
+        values, dates = seasonal_series(days=40)
+        with pytest.raises(ValueError):
+            GlobalDemandForecaster(horizon=30).fit(values, dates)
+
+
+class TestGlobalForecastService:
+    """Test material roll-ups of the destination series"""
+
+    @pytest.fixture
+    def orders_csv(self, tmp_path):
+        rng = np.random.default_rng(1)
+        dates = pd.date_range('2023-01-01', periods=200, freq='D')
+        rows = [
+            {'order_date': d.strftime('%Y-%m-%d'), 'material_type': m, 'destination': dest,
+             'quantity_tonnes': float(rng.uniform(50, 150))}
+            for d in dates for m in ('HR_Coils', 'Plates') for dest in ('Patna', 'Ranchi')
+            if rng.random() < 0.8
+        ]
+        path = tmp_path / "customer_orders.csv"
+        pd.DataFrame(rows).to_csv(path, index=False)
+        return path
+
+    def test_forecast_all_rolls_up_destinations(self, orders_csv):
+        """Test each material's forecast is the sum of its destination forecasts"""
+        service = GlobalForecastService(orders_path=orders_csv)
+        result = service.forecast_all(periods=10)
+
+        assert result['total_series'] == 4
+        assert [f['material'] for f in result['forecasts']] == ['HR_Coils', 'Plates']
+        for material in result['forecasts']:
+            assert len(material['forecasts']) == 10
+            assert material['forecasts'][0]['date'] == '2023-07-20'
+            by_destination = np.array([d['predicted_demand'] for d in material['by_destination']])
+            totals = [f['predicted_demand'] for f in material['forecasts']]
+            np.testing.assert_allclose(by_destination.sum(axis=0), totals, atol=0.01)
+
+    def test_model_is_reused_until_history_changes(self, orders_csv):
+        """Test the fitted model is cached per horizon"""
+        service = GlobalForecastService(orders_path=orders_csv)
+        service.forecast_all(periods=10)
+        model = service._model(10)[0]
+        service.forecast_all(periods=10, materials=['Plates'])
+        assert service._model(10)[0] is model
+
+
+class TestAllMaterialsEndpoint:
+    """Test the selectable backend of /forecast/demand/all-materials"""
+
+    def test_global_backend(self):
+        """Test backend=global serves forecasts and unknown backends are rejected"""
+        from app.main import app
+
+        client = TestClient(app)
+        response = client.get("/forecast/demand/all-materials", params={'periods': 7, 'backend': 'global'})
+        assert response.status_code == 200
+        data = response.json()['data']
+        assert data['backend'] == 'global'
+        assert all(len(f['forecasts']) == 7 for f in data['forecasts'])
+
+        response = client.get("/forecast/demand/all-materials", params={'backend': 'arima'})
+        assert response.status_code == 400
@@ -0,0 +1,113 @@
+"""
+Unit tests for the bounded history buffer and the services using it.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.services.auto_alerts_service import Alert, AlertSeverity, AlertType, AutoAlertsService
+from app.services.live_progress_service import LiveProgressService, TaskStatus
+from app.utils.history import HistoryBuffer, JsonlSpill, SqliteSpill
+
+
+class Record:
+    __slots__ = ('id', 'kind', 'level')
+
+    def __init__(self, id, kind, level):
+        self.id = id
+        self.kind = kind
+        self.level = level
+
+    def to_dict(self):
+        return {'id': self.id, 'kind': self.kind, 'level': self.level}
+
+
+def filled(capacity=5, count=8, spill=None):
+    history = HistoryBuffer(capacity, indexes={'kind': lambda r: r.kind, 'level': lambda r: r.level}, spill=spill)
+    for i in range(count):
+        history.append(Record(f"R{i}", 'even' if i % 2 == 0 else 'odd', i % 3))
+    return history
+
+
+class TestHistoryBuffer:
+    """Tests for HistoryBuffer."""
+
+    def test_keeps_newest_records_in_order(self):
+        """Test the ring evicts the oldest records first."""
+        history = filled()
+
+        assert len(history) == 5
+        assert [r.id for r in history] == ["R3", "R4", "R5", "R6", "R7"]
+        assert [r.id for r in history.recent(2)] == ["R6", "R7"]
+        assert history[-1].id == "R7" and history[0].id == "R3"
+        assert history.get("R2") is None
+        assert history.get("R4").kind == "even"
+        assert history.stats()["evicted"] == 3
+
+    def test_indexes_follow_evictions(self):
+        """Test indexed filters only see retained records."""
+        history = filled()
+
+        assert [r.id for r in history.recent(kind='even')] == ["R4", "R6"]
+        assert [r.id for r in history.recent(1, kind='odd')] == ["R7"]
+        assert [r.id for r in history.recent(kind='odd', level=2)] == ["R5"]
+        assert history.count(kind='odd') == 3
+        assert history.recent(kind='missing') == []
+        # None means "no filter"
+        assert len(history.recent(kind=None)) == 5
+
+    def test_unindexed_filter_rejected(self):
+        """Test filtering on a field without an index raises."""
+        with pytest.raises(ValueError):
+            filled().recent(status='active')
+
+    @pytest.mark.parametrize("spill_type", ["sqlite", "jsonl"])
+    def test_spill_keeps_evicted_records(self, tmp_path, spill_type):
+        """Test evicted records can still be found by id in the spill target."""
+        spill = (SqliteSpill(tmp_path / "history.db", "records") if spill_type == "sqlite"
+                 else JsonlSpill(tmp_path / "records.jsonl"))
+        history = filled(spill=spill)
+
+        assert history.spilled == 3
+        assert history.find_archived("R1") == {'id': "R1", 'kind': 'odd', 'level': 1}
+        assert history.find_archived("R6")["kind"] == "even"
+        assert history.find_archived("R99") is None
+
+
+class TestServiceHistories:
+    """Tests for services adopting HistoryBuffer."""
+
+    def test_alerts_are_bounded_and_filterable(self):
+        """Test alert history stays bounded and supports severity/plan lookups."""
+        service = AutoAlertsService()
+        service.alerts_history = HistoryBuffer(
+            3, indexes={'severity': lambda a: a.severity, 'plan_id': lambda a: a.plan_id}
+        )
+        for i in range(5):
+            alert = Alert(AlertType.DELAY_RISK, AlertSeverity.HIGH if i % 2 else AlertSeverity.LOW,
+                          "late", f"PLAN-{i}", [])
+            alert.id = f"ALERT-{i}"
+            service.alerts_history.append(alert)
+
+        assert [a['id'] for a in service.get_alerts(severity=AlertSeverity.HIGH)] == ["ALERT-3"]
+        assert [a['id'] for a in service.get_alerts(plan_id="PLAN-4")] == ["ALERT-4"]
+        assert service.get_alerts(plan_id="PLAN-0") == []
+        assert service.get_status()['total_alerts'] == 5
+
+    def test_completed_tasks_lookup_and_statistics(self):
+        """Test finished tasks are found by id and counted by status."""
+        service = LiveProgressService()
+        done = service.simulate_optimization_progress("PLAN-1", 10)
+        failed = service.create_task("PLAN-2", 5)
+        failed.task_id = "TASK-FAILED"
+        service.tasks = {"TASK-FAILED": failed}
+        service.fail_task("TASK-FAILED", "solver crashed")
+
+        assert service.get_task(done.task_id)['status'] == TaskStatus.COMPLETED
+        stats = service.get_statistics()
+        assert stats['completed_tasks'] == 1 and stats['failed_tasks'] == 1
+        assert [t['task_id'] for t in service.get_completed_tasks(1)] == ["TASK-FAILED"]
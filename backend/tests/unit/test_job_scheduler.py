@@ -0,0 +1,188 @@
+"""
+Unit tests for the single-leader job scheduler.
+"""
+
+import os
+import subprocess
+import sys
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.services import job_scheduler
+from app.services.job_scheduler import JobRunStore, JobScheduler, ScheduledJob, RunStatus, run_job
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobRunStore(str(tmp_path / "jobs.db"))
+
+
+class TestScheduledJob:
+    """Tests for ScheduledJob.next_run_after."""
+
+    def test_daily(self):
+        """Test daily jobs run at the next occurrence of their time."""
+        job = ScheduledJob(name="nightly", target="os:getcwd", daily_at="02:00")
+
+        assert job.next_run_after(datetime(2024, 1, 1, 1, 30)) == datetime(2024, 1, 1, 2, 0)
+        assert job.next_run_after(datetime(2024, 1, 1, 2, 0)) == datetime(2024, 1, 2, 2, 0)
+
+    def test_interval_counts_from_last_run(self):
+        """Test interval jobs resume from their last recorded run."""
+        job = ScheduledJob(name="hourly", target="os:getcwd", interval_seconds=3600)
+        now = datetime(2024, 1, 1, 12, 0)
+
+        assert job.next_run_after(now) == datetime(2024, 1, 1, 13, 0)
+        assert job.next_run_after(now, datetime(2024, 1, 1, 11, 30)) == datetime(2024, 1, 1, 12, 30)
+
+
+class TestJobScheduler:
+    """Tests for JobScheduler."""
+
+    def test_single_leader(self, store, tmp_path):
+        """Test only one scheduler holds the lock until it releases it."""
+        lock_path = tmp_path / "scheduler.lock"
+        first = JobScheduler(store=store, lock_path=lock_path)
+        second = JobScheduler(store=store, lock_path=lock_path)
+
+        assert first.try_acquire_leadership()
+        if job_scheduler.fcntl is not None:
+            assert not second.try_acquire_leadership()
+        first.release_leadership()
+        assert second.try_acquire_leadership()
+        assert second.get_status()['leader']['pid'] > 0
+        second.release_leadership()
+
+    def test_idle_wait_is_bounded(self, store, tmp_path):
+        """Test the leader sleeps until the next due job, capped by the poll interval."""
+        scheduler = JobScheduler(
+            jobs=[ScheduledJob(name="hourly", target="os:getcwd", interval_seconds=3600)],
+            store=store, lock_path=tmp_path / "scheduler.lock", poll_seconds=30,
+        )
+        assert scheduler.try_acquire_leadership()
+        now = datetime.now()
+
+        assert 0 < scheduler.seconds_until_next_run(now) <= 30
+        assert scheduler.run_pending(now) == []
+        scheduler.release_leadership()
+
+    def test_manual_trigger_runs_in_worker_process(self, store, tmp_path):
+        """Test queued runs are executed out of process and recorded."""
+        scheduler = JobScheduler(
+            jobs=[ScheduledJob(name="probe", target="os:getcwd", interval_seconds=3600)],
+            store=store, lock_path=tmp_path / "scheduler.lock",
+        )
+        assert scheduler.try_acquire_leadership()
+
+        queued = scheduler.trigger("probe")
+        runs = scheduler.run_pending(datetime.now(), wait=True)
+        scheduler.release_leadership()
+
+        assert queued['status'] == RunStatus.QUEUED
+        assert [r['id'] for r in runs] == [queued['id']]
+        assert runs[0]['status'] == RunStatus.SUCCESS
+        assert runs[0]['trigger'] == 'manual'
+        assert runs[0]['duration_seconds'] is not None
+        with pytest.raises(ValueError):
+            scheduler.trigger("missing")
+
+    def test_jobs_run_off_the_scheduling_thread(self, store, tmp_path, monkeypatch):
+        """Test a running job neither blocks run_pending nor starts twice."""
+        release = threading.Event()
+        scheduler = JobScheduler(
+            jobs=[ScheduledJob(name="slow", target="os:getcwd", interval_seconds=3600)],
+            store=store, lock_path=tmp_path / "scheduler.lock",
+        )
+
+        def execute(run_id, job):
+            release.wait(5)
+            store.finish(run_id, RunStatus.SUCCESS)
+
+        monkeypatch.setattr(scheduler, "_execute", execute)
+        assert scheduler.try_acquire_leadership()
+
+        due = datetime.now() + timedelta(hours=1)
+        [started] = scheduler.run_pending(due)
+        assert started['status'] == RunStatus.RUNNING
+        scheduler.trigger("slow")
+        assert scheduler.run_pending(due) == []
+
+        release.set()
+        scheduler._active["slow"].join(5)
+        [manual] = scheduler.run_pending(datetime.now(), wait=True)
+        scheduler.release_leadership()
+
+        assert manual['trigger'] == 'manual'
+        assert [r['status'] for r in store.recent()] == [RunStatus.SUCCESS, RunStatus.SUCCESS]
+
+    def test_released_leader_is_not_reported(self, store, tmp_path):
+        """Test the status stops naming a leader once the lock is released."""
+        lock_path = tmp_path / "scheduler.lock"
+        leader = JobScheduler(store=store, lock_path=lock_path)
+        observer = JobScheduler(store=store, lock_path=lock_path)
+
+        assert leader.try_acquire_leadership()
+        if job_scheduler.fcntl is not None:
+            assert observer.get_status()['leader']['pid'] == os.getpid()
+        leader.release_leadership()
+
+        assert observer.get_status()['leader'] is None
+
+    def test_new_leader_fails_abandoned_runs(self, store, tmp_path):
+        """Test runs whose worker died with the previous leader are closed."""
+        worker = subprocess.Popen([sys.executable, "-c", "pass"])
+        worker.wait()
+        dead = store.start("probe", "schedule", pid=worker.pid)
+        alive = store.start("probe", "cli", pid=os.getpid())
+
+        assert JobScheduler(store=store, lock_path=tmp_path / "scheduler.lock").try_acquire_leadership()
+
+        assert store.get(dead)['status'] == RunStatus.FAILED
+        assert "Abandoned" in store.get(dead)['error']
+        assert store.get(alive)['status'] == RunStatus.RUNNING
+
+    def test_no_leader_without_file_locks(self, store, tmp_path, monkeypatch):
+        """Test API workers do not elect themselves where flock is missing."""
+        monkeypatch.setattr(job_scheduler, "fcntl", None)
+        monkeypatch.setattr(job_scheduler.settings, "SCHEDULER_MODE", "embedded")
+        assert not JobScheduler(store=store, lock_path=tmp_path / "scheduler.lock").try_acquire_leadership()
+
+        monkeypatch.setattr(job_scheduler.settings, "SCHEDULER_MODE", "external")
+        scheduler = JobScheduler(store=store, lock_path=tmp_path / "scheduler.lock")
+        assert scheduler.try_acquire_leadership()
+        scheduler.release_leadership()
+
+
+class TestRunJob:
+    """Tests for the worker-process entry point."""
+
+    def test_records_success_and_failure(self, store, monkeypatch):
+        """Test job results and exceptions end up in the run history."""
+        monkeypatch.setattr(job_scheduler.settings, "SCHEDULER_JOB_NICENESS", 0)
+        monkeypatch.setattr(job_scheduler, "DEFAULT_JOBS", [
+            ScheduledJob(name="ok", target="os:getcwd", interval_seconds=60),
+            ScheduledJob(name="broken", target="os:does_not_exist", interval_seconds=60),
+        ])
+
+        ok = run_job("ok", store=store)
+        broken = run_job("broken", store=store)
+
+        assert ok['status'] == RunStatus.SUCCESS
+        assert ok['result'] == str(Path.cwd())
+        assert broken['status'] == RunStatus.FAILED
+        assert "does_not_exist" in broken['error']
+        assert [r['job'] for r in store.recent()] == ["broken", "ok"]
+        assert [r['trigger'] for r in store.recent()] == ["cli", "cli"]
+
+    def test_late_mark_running_keeps_the_outcome(self, store):
+        """Test a worker that finished before the leader recorded its pid stays finished."""
+        run_id = store.enqueue("probe", "manual")
+        store.finish(run_id, RunStatus.SUCCESS)
+        store.mark_running(run_id, 12345)
+
+        assert store.get(run_id)['status'] == RunStatus.SUCCESS
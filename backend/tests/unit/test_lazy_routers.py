@@ -0,0 +1,88 @@
+"""
+Unit tests for the lazy router registry.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.utils.lazy_routers import LazyRouterRegistry, LazyRouterMiddleware
+
+
+ROUTER_SOURCE = '''
+from fastapi import APIRouter
+
+router = APIRouter(prefix="{prefix}")
+
+@router.get("/ping")
+async def ping():
+    return {{"router": "{name}"}}
+'''
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    package = tmp_path / "lazy_test_routers"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    for name, prefix in [("alpha", "/alpha"), ("alpha_extra", "/alpha"), ("beta", "/beta")]:
+        (package / f"{name}.py").write_text(ROUTER_SOURCE.format(prefix=prefix, name=name))
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    app = FastAPI()
+    registry = LazyRouterRegistry(app, package="lazy_test_routers")
+    registry.register("alpha", "/alpha")
+    registry.register("alpha_extra", "/alpha")
+    registry.register("beta", "/beta")
+    app.add_middleware(LazyRouterMiddleware, registry=registry)
+    yield registry
+    for name in list(sys.modules):
+        if name.startswith("lazy_test_routers"):
+            del sys.modules[name]
+
+
+class TestLazyRouterRegistry:
+    """Tests for LazyRouterRegistry and its middleware."""
+
+    def test_loads_only_requested_prefix(self, registry):
+        """Test a request imports its prefix group and nothing else."""
+        client = TestClient(registry.app)
+
+        response = client.get("/alpha/ping")
+
+        assert response.status_code == 200
+        assert response.json() == {"router": "alpha"}
+        assert registry.is_loaded("/alpha")
+        assert not registry.is_loaded("/beta")
+        assert "lazy_test_routers.beta" not in sys.modules
+
+    def test_prefix_matching_respects_segments(self, registry):
+        """Test /alphabet does not trigger the /alpha group."""
+        assert registry.prefix_for("/alphabet/x") is None
+        assert registry.prefix_for("/alpha") == "/alpha"
+        assert registry.prefix_for("/beta/ping") == "/beta"
+
+    def test_report(self, registry):
+        """Test the report lists load state and per-module import times."""
+        TestClient(registry.app).get("/beta/ping")
+        report = registry.report()
+
+        assert report["total_groups"] == 2
+        assert report["loaded_groups"] == 1
+        beta = next(g for g in report["groups"] if g["prefix"] == "/beta")
+        assert beta["loaded"] and beta["modules"] == ["beta"]
+        assert set(beta["module_import_seconds"]) == {"beta"}
+
+    def test_load_all(self, registry):
+        """Test load_all mounts every group exactly once."""
+        registry.load_all()
+        registry.load_all()
+
+        paths = [route.path for route in registry.app.routes]
+        assert paths.count("/alpha/ping") == 2
+        assert paths.count("/beta/ping") == 1
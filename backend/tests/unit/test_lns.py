@@ -0,0 +1,104 @@
+"""
+Unit tests for the LNS anytime mode of the rake formation optimizer
+"""
+
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.optimizer.lns import LNSOptimizer
+from app.optimizer.solver import RakeFormationOptimizer
+from app.optimizer.utils import RAKE_CAPACITY_TONNES, RAKE_MIN_TONNES, TRUCK_CAPACITY_TONNES
+
+
+def order_book(num_orders, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            'order_id': f'ORD{i:04d}',
+            'quantity_tonnes': rng.choice([120, 650, 1800, 3200, 5200]),
+            'destination': rng.choice(['Kolkata', 'Patna', 'Ranchi', 'Durgapur', 'Haldia']),
+            'material_type': 'HR_Coils',
+            'priority': rng.choice(['HIGH', 'MEDIUM', 'LOW']),
+            'due_date': f'2024-01-{rng.randint(10, 28)}',
+        }
+        for i in range(num_orders)
+    ]
+
+
+def assert_feasible(plan, orders, rakes, trucks):
+    destination = {o['order_id']: o['destination'] for o in orders}
+    assert len(plan['rakes']) <= rakes
+    assert len(plan['trucks']) <= trucks
+    for rake in plan['rakes']:
+        assert RAKE_MIN_TONNES <= rake['tonnes'] <= RAKE_CAPACITY_TONNES
+        assert {destination[order_id] for order_id in rake['order_ids']} == {rake['destination']}
+    for truck in plan['trucks']:
+        assert 0 < truck['tonnes'] <= TRUCK_CAPACITY_TONNES
+
+
+class TestLNSOptimizer:
+    """Test neighborhood search from the greedy plan"""
+
+    def test_small_instance_solved_to_optimality(self):
+        """Test a small instance is re-planned whole and the search stops as optimal"""
+        orders = order_book(6)
+        greedy = RakeFormationOptimizer()._greedy_fallback(orders, 3, 10, {})
+        lns = LNSOptimizer(orders, 3, 10)
+        plan = lns.run(greedy, time_limit_seconds=10)
+
+        assert plan['lns']['stopped'] == 'optimal'
+        assert plan['lns']['best_objective'] <= plan['lns']['initial_objective']
+        assert_feasible(plan, orders, 3, 10)
+
+    def test_improvements_are_streamed_and_monotone(self):
+        """Test every new incumbent is reported and each beats the last"""
+        orders = order_book(200, seed=3)
+        greedy = RakeFormationOptimizer()._greedy_fallback(orders, 20, 80, {})
+        events = []
+        plan = LNSOptimizer(orders, 20, 80, random_seed=1).run(greedy, 3, on_improvement=events.append)
+
+        assert events
+        objectives = [e['objective'] for e in events]
+        assert objectives == sorted(objectives, reverse=True)
+        assert objectives[0] < plan['lns']['initial_objective']
+        assert plan['lns']['best_objective'] == objectives[-1]
+        assert plan['lns']['improvements'] == len(events)
+        assert_feasible(plan, orders, 20, 80)
+
+
+class TestAnytimeSolve:
+    """Test RakeFormationOptimizer.solve in anytime mode"""
+
+    def test_large_instance_goes_to_lns(self):
+        """Test large instances skip the full model and improve on greedy"""
+        optimizer = RakeFormationOptimizer(time_limit_seconds=2, lns_order_threshold=50)
+        solution = optimizer.solve({'orders': order_book(80), 'available_rakes': 10, 'available_trucks': 40})
+
+        assert solution['solver_status'] == 'LNS'
+        assert solution['objective_value'] <= solution['lns']['initial_objective']
+        assert solution['solver_time_seconds'] < 3
+        assert solution['summary']['fallback'] is False
+
+    def test_failed_full_model_is_a_fallback(self, monkeypatch):
+        """Test LNS standing in for a full model that raised is flagged as a fallback"""
+        optimizer = RakeFormationOptimizer(time_limit_seconds=2, lns_order_threshold=50)
+
+        def fail(*args):
+            raise RuntimeError("model build failed")
+
+        monkeypatch.setattr(optimizer, '_build_variables', fail)
+        solution = optimizer.solve({'orders': order_book(10), 'available_rakes': 3, 'available_trucks': 10})
+
+        assert solution['solver_status'] == 'LNS'
+        assert solution['summary']['fallback'] is True
+
+    def test_anytime_off_returns_greedy(self):
+        """Test the plain greedy fallback is kept when anytime mode is off"""
+        optimizer = RakeFormationOptimizer(time_limit_seconds=2, anytime=False, lns_order_threshold=50)
+        solution = optimizer.solve({'orders': order_book(80), 'available_rakes': 10, 'available_trucks': 40})
+
+        assert solution['solver_status'] == 'GREEDY_FALLBACK'
+        assert solution['summary']['fallback'] is True
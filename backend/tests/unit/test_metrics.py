@@ -0,0 +1,126 @@
+"""
+Unit tests for histogram metrics, request timing and multiprocess aggregation.
+"""
+
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+BACKEND_DIR = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.utils.metrics import MetricsCollector, RequestMetricsMiddleware
+
+
+class TestMetricsCollector:
+    """Tests for fixed-bucket histograms."""
+
+    def test_histogram_memory_is_bounded(self):
+        """Test request latencies land in buckets instead of a growing list."""
+        collector = MetricsCollector(multiproc_dir="")
+        for i in range(10000):
+            collector.record_request("/api/items", latency_ms=(i % 100) + 0.5, status_code=200, method="GET")
+
+        stats = collector.get_metrics()['requests']['GET /api/items']
+        assert stats['count'] == 10000
+        assert 25 <= stats['p50_latency_ms'] <= 100
+        assert stats['p99_latency_ms'] <= stats['max_latency_ms'] == 99.5
+        assert len(collector._values.collect()[0][1]) < 40
+
+    def test_prometheus_exposition(self):
+        """Test histograms are exposed cumulatively with sum and count."""
+        collector = MetricsCollector(multiproc_dir="")
+        collector.observe('db_query_seconds', 0.003, operation="SELECT", table="orders")
+        collector.observe('db_query_seconds', 0.2, operation="SELECT", table="orders")
+        collector.record_optimizer_run(True, "OPTIMAL", 1.5)
+        text = collector.get_prometheus_metrics()
+
+        assert '# TYPE db_query_seconds histogram' in text
+        assert 'db_query_seconds_bucket{operation="SELECT",table="orders",le="0.005"} 1' in text
+        assert 'db_query_seconds_bucket{operation="SELECT",table="orders",le="+Inf"} 2' in text
+        assert 'db_query_seconds_count{operation="SELECT",table="orders"} 2' in text
+        assert 'optimizer_runs_total{result="success",solver_status="OPTIMAL"} 1' in text
+        assert collector.get_metrics()['optimizer']['success_rate'] == 100
+
+
+class TestRequestMetricsMiddleware:
+    """Tests for request timing middleware."""
+
+    def test_requests_labelled_by_route_template(self):
+        """Test path parameters do not create new series."""
+        collector = MetricsCollector(multiproc_dir="")
+        app = FastAPI()
+
+        @app.get("/items/{item_id}")
+        async def get_item(item_id: int):
+            return {"id": item_id}
+
+        app.add_middleware(RequestMetricsMiddleware, collector=collector)
+        client = TestClient(app)
+        for i in range(3):
+            client.get(f"/items/{i}")
+        client.get("/missing")
+
+        requests = collector.get_metrics()['requests']
+        assert requests['GET /items/{item_id}']['count'] == 3
+        assert requests['GET <unmatched>']['count'] == 1
+
+
+class TestMultiprocessMetrics:
+    """Tests for metrics shared between worker processes."""
+
+    def test_values_from_all_processes_are_summed(self, tmp_path):
+        """Test a scrape in one process sees counters recorded by another."""
+        worker = textwrap.dedent(f"""
+            import sys
+            sys.path.insert(0, {str(BACKEND_DIR)!r})
+            from app.utils.metrics import MetricsCollector
+            collector = MetricsCollector(multiproc_dir={str(tmp_path)!r})
+            for _ in range(5):
+                collector.record_request("/api", 20.0, 200, method="GET")
+        """)
+        subprocess.run([sys.executable, "-c", worker], check=True)
+
+        collector = MetricsCollector(multiproc_dir=str(tmp_path))
+        collector.record_request("/api", 10.0, 200, method="GET")
+
+        assert len(list(tmp_path.glob("metrics_*.db"))) == 2
+        assert collector.get_metrics()['requests']['GET /api']['count'] == 6
+        assert 'http_requests_total{endpoint="/api",method="GET",status="200"} 6' in collector.get_prometheus_metrics()
+
+    def test_gauges_of_exited_processes_are_dropped(self, tmp_path):
+        """Test a dead worker's pool gauge stops counting while its counters remain."""
+        worker = textwrap.dedent(f"""
+            import sys
+            sys.path.insert(0, {str(BACKEND_DIR)!r})
+            from app.utils.metrics import MetricsCollector
+            collector = MetricsCollector(multiproc_dir={str(tmp_path)!r})
+            collector.set_gauge('db_pool_connections', 4, engine="sync", state="checked_out")
+            collector.record_request("/api", 20.0, 200, method="GET")
+        """)
+        subprocess.run([sys.executable, "-c", worker], check=True)
+
+        collector = MetricsCollector(multiproc_dir=str(tmp_path))
+        collector.set_gauge('db_pool_connections', 1, engine="sync", state="checked_out")
+        text = collector.get_prometheus_metrics()
+
+        assert 'db_pool_connections{engine="sync",state="checked_out"} 1' in text
+        assert 'http_requests_total{endpoint="/api",method="GET",status="200"} 1' in text
+
+
+class TestPrometheusEndpoints:
+    """Tests for the scrape endpoints."""
+
+    def test_content_type_has_a_single_charset(self):
+        """Test both scrape endpoints send the exposition format's exact content type."""
+        from app.main import app
+
+        client = TestClient(app)
+        for path in ("/metrics", "/meta/metrics/prometheus"):
+            response = client.get(path)
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
@@ -0,0 +1,57 @@
+"""
+Unit tests for ML model training and batch prediction.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from ml.model_training import ModelTrainer
+
+
+@pytest.fixture(scope="module")
+def trainer():
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(rng.normal(size=(200, 3)), columns=['a', 'b', 'c'])
+    data['target'] = data['a'] * 2 + data['b']
+
+    trainer = ModelTrainer(db_session=None)
+    success, _ = trainer.train_model('test_model', data, 'target')
+    assert success
+    return trainer
+
+
+class TestBatchPredict:
+    """Tests for ModelTrainer.batch_predict."""
+
+    def test_input_formats_agree(self, trainer):
+        """Test records, DataFrame and NumPy inputs give the same predictions."""
+        records = [{'a': 1.0, 'b': 0.5, 'c': -1.0}, {'a': -2.0, 'b': 0.0}]
+        frame = pd.DataFrame(records)
+        matrix = frame.reindex(columns=['a', 'b', 'c']).fillna(0).to_numpy()
+
+        results = [trainer.batch_predict('test_model', inputs) for inputs in (records, frame, matrix)]
+
+        predictions = [[r['prediction'] for r in result] for _, result in results]
+        assert all(success for success, _ in results)
+        assert predictions[0] == predictions[1] == predictions[2]
+
+    def test_single_predict_matches_batch(self, trainer):
+        """Test predict() is the one-row case of batch_predict()."""
+        success, single = trainer.predict('test_model', {'a': 0.3, 'b': 1.2, 'c': 0.1})
+        _, batch = trainer.batch_predict('test_model', [{'a': 0.3, 'b': 1.2, 'c': 0.1}])
+
+        assert success
+        assert single['prediction'] == batch[0]['prediction']
+        assert single['confidence'] == batch[0]['confidence']
+
+    def test_errors(self, trainer):
+        """Test unknown models and mis-shaped arrays are rejected."""
+        assert trainer.batch_predict('missing', [{}])[0] is False
+        assert trainer.batch_predict('test_model', np.zeros((2, 5)))[0] is False
+        assert trainer.batch_predict('test_model', []) == (True, [])
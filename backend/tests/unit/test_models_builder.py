@@ -0,0 +1,58 @@
+"""
+Unit tests for building, saving and reloading the ML models.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app import models_loader
+from app.models_loader import ModelsLoader
+from ml.models_builder import MLModelsBuilder
+
+
+@pytest.fixture(scope="module")
+def training_data():
+    rng = np.random.default_rng(3)
+    data = pd.DataFrame(rng.normal(size=(80, 3)), columns=['distance', 'load', 'weather'])
+    data['delay_days'] = data['distance'] * 2 + rng.normal(scale=0.1, size=80)
+    data['total_cost'] = data['load'] * 1000 + data['distance'] * 50
+    data['route'] = np.where(data['distance'] > 0, 'bokaro-patna', 'bokaro-ranchi')
+    return data
+
+
+class TestBuildAllModels:
+    """Tests for the parallel build and the compressed joblib files it saves."""
+
+    def test_parallel_build_reloads_like_a_serial_fit(self, training_data, tmp_path, monkeypatch):
+        """Test models fitted on the process pool, saved and reloaded predict like serial fits."""
+        builder = MLModelsBuilder(db_session=None)
+        results = builder.build_all_models(training_data, n_jobs=2)
+        assert results['successful_models'] == 4  # delay, cost, route and anomaly detection
+        assert builder.save_all_models(str(tmp_path), n_jobs=2)
+
+        serial = MLModelsBuilder(db_session=None)
+        assert serial.build_delay_prediction_model(training_data)[0]
+        assert serial.build_cost_prediction_model(training_data)[0]
+        assert serial.build_route_optimization_model(training_data)[0]
+
+        monkeypatch.setattr(models_loader.settings, "MODELS_DIR", tmp_path)
+        monkeypatch.setattr(ModelsLoader, "_instance", None)
+        monkeypatch.setattr(ModelsLoader, "_models", {})
+        loader = ModelsLoader()
+
+        rng = np.random.default_rng(4)
+        for name, model_name in (('delay_regressor', 'delay_prediction_model'),
+                                 ('cost', 'cost_prediction_model'),
+                                 ('mode_classifier', 'route_optimization_model')):
+            reloaded = loader.get_model(name)
+            assert type(reloaded) is type(serial.models[model_name])
+            X = rng.normal(size=(20, reloaded.n_features_in_))
+            np.testing.assert_array_equal(reloaded.predict(X), serial.models[model_name].predict(X))
+
+        assert list(builder.encoders['route'].classes_) == list(serial.encoders['route'].classes_)
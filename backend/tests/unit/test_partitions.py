@@ -0,0 +1,88 @@
+"""
+Unit tests for monthly partition maintenance
+"""
+
+import re
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event
+
+BACKEND_DIR = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app import db
+from app.services.job_scheduler import DEFAULT_JOBS
+
+
+class TestSchema:
+    """Test db/schema.sql partitions the telemetry tables"""
+
+    def test_partitioned_tables_have_brin_and_default_partitions(self):
+        """Test each table is range-partitioned on its key with a BRIN index and a DEFAULT partition"""
+        schema = (BACKEND_DIR / "db" / "schema.sql").read_text()
+        assert 'create_hypertable' not in schema
+        for table, column in db.PARTITIONED_TABLES.items():
+            definition = rf"CREATE TABLE IF NOT EXISTS {table} \([^;]*\) PARTITION BY RANGE \({column}\);"
+            assert re.search(definition, schema)
+            assert f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT;" in schema
+            assert re.search(rf"ON {table} USING BRIN \({column}\)", schema)
+
+
+class TestPartitionMaintenance:
+    """Test the maintenance job against recording stand-ins for the SQL functions"""
+
+    @pytest.fixture
+    def calls(self, monkeypatch):
+        engine = create_engine("sqlite://")
+        calls = {'create': [], 'archive': []}
+
+        @event.listens_for(engine, "connect")
+        def _functions(dbapi_connection, connection_record):
+            def create(parent, from_date, to_date):
+                calls['create'].append((parent, from_date, to_date))
+                return 1
+
+            def archive(parent, keep_months):
+                calls['archive'].append((parent, keep_months))
+                return f"{parent}_p202001"
+
+            dbapi_connection.create_function("create_monthly_partitions", 3, create)
+            dbapi_connection.create_function("archive_old_partitions", 2, archive)
+
+        monkeypatch.setattr(db, 'engine', engine)
+        yield calls
+        engine.dispose()
+
+    def test_add_months_crosses_years(self):
+        """Test month arithmetic lands on the first of the month across year ends"""
+        assert db.add_months(date(2024, 11, 17), 3) == date(2025, 2, 1)
+        assert db.add_months(date(2024, 1, 31), -1) == date(2023, 12, 1)
+
+    def test_job_creates_upcoming_and_archives_expired_partitions(self, calls, monkeypatch):
+        """Test every table gets partitions through the months ahead and expired ones archived"""
+        monkeypatch.setattr(db, 'DB_RETENTION_MONTHS', 12)
+        result = db.run_partition_maintenance()
+
+        assert result['status'] == 'success'
+        assert set(result['created']) == set(db.PARTITIONED_TABLES)
+        assert result['archived']['lp_throughput'] == ['lp_throughput_p202001']
+        today = date.today()
+        expected_end = db.add_months(today, db.DB_PARTITION_MONTHS_AHEAD).isoformat()
+        assert {(from_date, to_date) for _, from_date, to_date in calls['create']} == {
+            (today.replace(day=1).isoformat(), expected_end)
+        }
+        assert {keep for _, keep in calls['archive']} == {12}
+
+    def test_retention_can_be_disabled(self, calls):
+        """Test a retention of 0 months archives nothing"""
+        assert db.archive_old_partitions(keep_months=0) == {}
+        assert calls['archive'] == []
+
+    def test_job_is_scheduled_daily(self):
+        """Test the maintenance job is registered with the scheduler"""
+        job = {j.name: j for j in DEFAULT_JOBS}['partition_maintenance']
+        assert job.target == "app.db:run_partition_maintenance"
+        assert job.daily_at
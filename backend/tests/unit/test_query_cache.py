@@ -0,0 +1,123 @@
+"""
+Unit tests for the read-through query cache
+"""
+
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event, text
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app import db
+from app.services.query_cache import MISS, QueryCache
+
+
+class TestQueryCache:
+    """Test TTLs, the shared tier and invalidation"""
+
+    def test_entries_expire_per_namespace(self):
+        """Test each namespace keeps entries for its own TTL"""
+        cache = QueryCache(ttl_seconds={'fast': 0.05, 'slow': 60}, shared_path="")
+        cache.store('fast', 'k', [1])
+        cache.store('slow', 'k', [2])
+        time.sleep(0.1)
+        assert cache.lookup('fast', 'k') is MISS
+        assert cache.lookup('slow', 'k') == [2]
+
+    def test_none_results_are_cached_and_failures_are_not(self):
+        """Test a missing row is remembered while a failing load is retried"""
+        cache = QueryCache(ttl_seconds={'route_congestion': 60}, shared_path="")
+        loads = []
+
+        def load():
+            loads.append(1)
+            return None
+
+        assert cache.get_or_load('route_congestion', ('R1',), load) is None
+        assert cache.get_or_load('route_congestion', ('R1',), load) is None
+        assert len(loads) == 1
+
+        def failing():
+            raise RuntimeError("database down")
+
+        with pytest.raises(RuntimeError):
+            cache.get_or_load('route_congestion', ('R2',), failing)
+        assert cache.lookup('route_congestion', cache.key(('R2',))) is MISS
+
+    def test_shared_tier_and_invalidation_across_workers(self, tmp_path):
+        """Test workers share entries and drop their copies when another worker invalidates"""
+        path = str(tmp_path / "query_cache.db")
+        worker_a = QueryCache(ttl_seconds={'inventory': 60}, shared_path=path, sync_seconds=0)
+        worker_b = QueryCache(ttl_seconds={'inventory': 60}, shared_path=path, sync_seconds=0)
+
+        worker_a.store('inventory', 'BOKARO', [{'material_type': 'Plates', 'as_of': datetime(2024, 1, 5)}])
+        assert worker_b.lookup('inventory', 'BOKARO')[0]['as_of'] == datetime(2024, 1, 5)
+        assert worker_b.stats()['namespaces']['inventory']['shared_hits'] == 1
+
+        worker_a.invalidate(['inventory'])
+        assert worker_b.lookup('inventory', 'BOKARO') is MISS
+
+    def test_load_racing_an_invalidation_is_not_stored(self):
+        """Test a result read before an invalidation is not cached after it"""
+        cache = QueryCache(ttl_seconds={'inventory': 60}, shared_path="")
+
+        def load():
+            cache.invalidate(['inventory'])
+            return ['stale']
+
+        assert cache.get_or_load('inventory', ('BOKARO',), load) == ['stale']
+        assert cache.lookup('inventory', cache.key(('BOKARO',))) is MISS
+
+
+class TestCachedLookups:
+    """Test db.py lookups read through the cache"""
+
+    @pytest.fixture
+    def sqlite_db(self, tmp_path, monkeypatch):
+        engine = create_engine(f"sqlite:///{tmp_path / 'sihdb.db'}")
+        with engine.begin() as conn:
+            conn.execute(text("""
+                CREATE TABLE mv_latest_inventory (
+                    stockyard TEXT, material_type TEXT, quantity_tonnes REAL, safety_stock_tonnes REAL,
+                    available_tonnes REAL, stock_status TEXT, as_of TEXT
+                )
+            """))
+            conn.execute(text("""
+                INSERT INTO mv_latest_inventory VALUES ('Bokaro', 'Plates', 900, 100, 800, 'OK', '2024-01-05')
+            """))
+            conn.execute(text("""
+                CREATE TABLE dispatch_history (
+                    dispatch_id INTEGER PRIMARY KEY, dispatch_date TEXT, rake_id TEXT, truck_id TEXT,
+                    order_id TEXT, destination TEXT, tonnes_dispatched REAL, estimated_cost REAL,
+                    estimated_delay_hours REAL, transport_mode TEXT, status TEXT
+                )
+            """))
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        cache = QueryCache(shared_path="")
+        monkeypatch.setattr(db, 'engine', engine)
+        monkeypatch.setattr(db, 'get_query_cache', lambda: cache)
+        monkeypatch.setattr(db, '_dispatch_listeners', [])
+        yield statements, cache
+        engine.dispose()
+
+    def test_repeated_lookups_hit_the_cache_until_a_dispatch(self, sqlite_db):
+        """Test one query serves repeated lookups and a dispatch insert forces a reload"""
+        statements, cache = sqlite_db
+        for _ in range(10):
+            assert db.get_latest_inventory('Bokaro')[0]['available_tonnes'] == 800
+        assert sum('mv_latest_inventory' in s for s in statements) == 1
+        assert cache.stats()['namespaces']['inventory']['hit_rate'] == 0.9
+
+        db.insert_dispatch_record({
+            'dispatch_date': '2024-01-06', 'rake_id': 'R1', 'truck_id': None, 'order_id': 'O1',
+            'destination': 'Patna', 'tonnes_dispatched': 100, 'estimated_cost': 1.0,
+            'estimated_delay_hours': 0, 'transport_mode': 'RAIL', 'status': 'PLANNED',
+        })
+        db.get_latest_inventory('Bokaro')
+        assert sum('mv_latest_inventory' in s for s in statements) == 2
@@ -0,0 +1,91 @@
+"""
+Unit tests for the content-addressed optimizer result cache.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.services.result_cache import ResultCache, cache_key
+
+REQUEST = {
+    'orders': [
+        {'order_id': 'O1', 'destination': 'Kolkata', 'quantity_tonnes': 1200.0},
+        {'order_id': 'O2', 'destination': 'Patna', 'quantity_tonnes': 800.00004},
+    ],
+    'available_rakes': 3,
+    'timestamp': '2024-01-01T00:00:00',
+}
+
+
+class TestCacheKey:
+    """Tests for canonical request hashing."""
+
+    def test_equivalent_requests_share_a_key(self):
+        """Test order, float noise and timestamps do not change the key."""
+        resubmitted = {
+            'timestamp': '2024-06-01T12:00:00',
+            'available_rakes': 3,
+            'orders': [
+                {'quantity_tonnes': 800, 'destination': 'Patna', 'order_id': 'O2'},
+                {'order_id': 'O1', 'destination': 'Kolkata', 'quantity_tonnes': 1200},
+            ],
+        }
+        assert cache_key('dispatch', REQUEST) == cache_key('dispatch', resubmitted)
+
+    def test_content_and_context_change_the_key(self):
+        """Test quantities, models and solver parameters are part of the key."""
+        changed = dict(REQUEST, available_rakes=4)
+        assert cache_key('dispatch', REQUEST) != cache_key('dispatch', changed)
+        assert cache_key('dispatch', REQUEST, {'models': 'a'}) != cache_key('dispatch', REQUEST, {'models': 'b'})
+
+
+class TestResultCache:
+    """Tests for the memory and disk tiers."""
+
+    def test_memory_then_disk_tier(self, tmp_path):
+        """Test hits come from memory, and from disk for a new process."""
+        path = str(tmp_path / "cache.db")
+        cache = ResultCache(path, max_entries=4, ttl_seconds=60)
+        calls = []
+        compute = lambda: calls.append(1) or {'solver_status': 'OPTIMAL', 'rakes': [1, 2]}
+
+        first, info = cache.get_or_compute('dispatch', REQUEST, compute)
+        assert info['hit'] is False
+        first['rakes'].append(3)  # Callers get copies
+
+        second, info = cache.get_or_compute('dispatch', REQUEST, compute)
+        assert info['tier'] == 'memory' and second['rakes'] == [1, 2]
+
+        restarted = ResultCache(path, max_entries=4, ttl_seconds=60)
+        _, info = restarted.get_or_compute('dispatch', REQUEST, compute)
+        assert info['tier'] == 'disk'
+        assert len(calls) == 1
+        assert cache.stats()['hit_rate'] == 0.5
+
+    def test_lru_eviction_ttl_and_invalidation(self):
+        """Test bounded memory, expiry and invalidation on model reload."""
+        cache = ResultCache(None, max_entries=2, ttl_seconds=0.05)
+        for i in range(3):
+            cache.put(f"k{i}", i)
+        assert cache.get("k0") == (None, None)
+        assert cache.get("k2") == (2, 'memory')
+        assert cache.stats()['evictions'] == 1
+
+        time.sleep(0.06)
+        assert cache.get("k2") == (None, None)
+
+        cache.put("k3", 3)
+        cache.invalidate()
+        assert cache.get("k3") == (None, None)
+
+    def test_rejected_results_are_not_stored(self):
+        """Test results failing the cacheable check are recomputed."""
+        cache = ResultCache(None)
+        compute = lambda: {'solver_status': 'GREEDY_FALLBACK'}
+        cacheable = lambda s: s['solver_status'] != 'GREEDY_FALLBACK'
+        cache.get_or_compute('dispatch', REQUEST, compute, cacheable=cacheable)
+        _, info = cache.get_or_compute('dispatch', REQUEST, compute, cacheable=cacheable)
+        assert info['hit'] is False
@@ -0,0 +1,157 @@
+"""
+Unit tests for the reporting rollup store and the reports built on it.
+"""
+
+import os
+import subprocess
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app import db
+from app.services import rollup_store
+from app.services.auto_report_service import AutoReportService
+from app.services.rollup_store import RollupStore
+
+
+@pytest.fixture
+def rollups(tmp_path):
+    return RollupStore(str(tmp_path / "rollups.db"))
+
+
+def dispatch(day, destination="Kolkata", mode="RAIL", tonnes=100.0, cost=50000.0, delay=1.0, **extra):
+    record = {
+        "dispatch_date": day,
+        "destination": destination,
+        "transport_mode": mode,
+        "tonnes_dispatched": tonnes,
+        "estimated_cost": cost,
+        "estimated_delay_hours": delay,
+    }
+    record.update(extra)
+    return record
+
+
+SOLUTION = {
+    "rakes": [
+        {"rake_id": "R1", "destination": "Kolkata", "material_type": "HR_COIL", "tonnes": 3150,
+         "wagons": 58, "estimated_cost": 900000},
+    ],
+    "trucks": [
+        {"truck_id": "T1", "destination": "Ranchi", "material_type": "PLATE", "tonnes": 20,
+         "estimated_cost": 15000},
+    ],
+    "solver_status": "OPTIMAL",
+    "solver_time_seconds": 2.5,
+}
+
+
+class TestRollupStore:
+    """Tests for RollupStore recording and summaries."""
+
+    def test_dispatches_roll_up_into_every_grain(self, rollups):
+        """Test a dispatch lands in its hourly, daily and monthly buckets."""
+        rollups.record_dispatch(dispatch(datetime(2024, 3, 5, 14, 20)))
+        rollups.record_dispatch(dispatch(date(2024, 3, 5), destination="Ranchi", mode="road",
+                                         tonnes=20.0, cost=10000.0, delay=5.0))
+
+        day = rollups.summarize("daily", datetime(2024, 3, 5), datetime(2024, 3, 5))
+        assert day["dispatches"] == 2
+        assert day["dispatched_tonnes"] == pytest.approx(120.0)
+        assert day["on_time_rate"] == pytest.approx(0.5)
+        assert day["cost_per_tonne"] == pytest.approx(60000.0 / 120.0)
+        assert set(day["by_route"]) == {"Kolkata", "Ranchi"}
+        assert set(day["by_mode"]) == {"rail", "road"}
+
+        hour = rollups.summarize("hourly", datetime(2024, 3, 5, 14), datetime(2024, 3, 5, 14))
+        assert hour["dispatches"] == 1
+
+        month = rollups.summarize("monthly", datetime(2024, 3, 1), datetime(2024, 3, 1))
+        assert month["dispatches"] == 2
+        assert rollups.summarize("monthly", datetime(2024, 4, 1), datetime(2024, 4, 1))["dispatches"] == 0
+
+    def test_inserted_dispatches_reach_the_store(self, rollups, monkeypatch):
+        """Test the store is fed by the database insert hook it registers."""
+        monkeypatch.setattr(rollup_store, "_rollup_store", rollups)
+        db._notify_dispatch_inserted(dispatch(datetime(2024, 3, 5, 14, 20)))
+
+        assert rollups.summarize("daily", datetime(2024, 3, 5), datetime(2024, 3, 5))["dispatches"] == 1
+
+    def test_api_startup_registers_the_dispatch_listener(self):
+        """Test a fresh API worker feeds the rollups before any lazy router loads."""
+        script = (
+            "import asyncio, sys\n"
+            "from app import db, main\n"
+            "assert not db._dispatch_listeners\n"
+            "asyncio.run(main.startup_event())\n"
+            "sys.exit(0 if db._dispatch_listeners else 1)\n"
+        )
+        env = {**os.environ, "SCHEDULER_MODE": "disabled"}
+        result = subprocess.run([sys.executable, "-c", script], cwd=BACKEND_DIR, env=env,
+                                capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr[-2000:]
+
+    def test_optimizer_runs_record_plans_and_run_counters(self, rollups):
+        """Test optimizer solutions add planned rakes/trucks and one run."""
+        when = datetime(2024, 3, 5, 9)
+        rollups.record_optimizer_run(SOLUTION, when=when)
+        rollups.record_optimizer_run(dict(SOLUTION, solver_status="GREEDY_FALLBACK", solver_time_seconds=0),
+                                     when=when)
+
+        day = rollups.summarize("daily", when, when)
+        assert day["optimizer_runs"] == 2
+        assert day["fallback_runs"] == 1
+        assert day["avg_solver_seconds"] == pytest.approx(1.25)
+        assert day["planned_rakes"] == 2 and day["planned_trucks"] == 2
+        assert day["wagon_utilization"] == pytest.approx(3150 / (58 * 63.0))
+        # Run counters are not attributed to any route
+        assert "*" not in day["by_route"]
+        assert day["by_material"]["HR_COIL"]["planned_tonnes"] == pytest.approx(6300)
+
+    def test_series_is_per_bucket(self, rollups):
+        """Test series returns one entry per populated bucket in order."""
+        for day in (3, 1, 3):
+            rollups.record_dispatch(dispatch(date(2024, 3, day)))
+
+        series = rollups.series("daily", datetime(2024, 3, 1), datetime(2024, 3, 31))
+        assert [(s["bucket"], s["dispatches"]) for s in series] == [("2024-03-01", 1), ("2024-03-03", 2)]
+
+
+class TestRollupReports:
+    """Tests for AutoReportService reports read from rollups."""
+
+    def test_reports_sum_their_period(self, rollups):
+        """Test daily/weekly/monthly reports only count their own buckets."""
+        rollups.record_dispatch(dispatch(date(2024, 3, 4), delay=3.0))   # Monday, late
+        rollups.record_dispatch(dispatch(date(2024, 3, 5)))
+        rollups.record_dispatch(dispatch(date(2024, 3, 12)))             # next week
+        rollups.record_dispatch(dispatch(date(2024, 2, 27), delay=4.0))  # previous week, late
+        rollups.record_optimizer_run(SOLUTION, when=datetime(2024, 3, 5, 8))
+        service = AutoReportService(rollups=rollups)
+
+        daily = service.generate_daily_report(datetime(2024, 3, 5)).data
+        assert daily["dispatch"]["total"] == 1
+        assert daily["optimizations"]["total"] == 1
+        assert len(daily["hourly"]) == 2
+
+        weekly = service.generate_weekly_report(datetime(2024, 3, 4)).data
+        assert weekly["dispatch"]["total"] == 2
+        assert weekly["performance"]["on_time_delivery"] == pytest.approx(0.5)
+        assert weekly["performance"]["improvement_vs_last_week"] == pytest.approx(0.5)
+
+        monthly = service.generate_monthly_report(month=3, year=2024).data
+        assert monthly["dispatch"]["total"] == 3
+        assert monthly["routes"]["Kolkata"]["dispatches"] == 3
+        assert "n/a" not in service.get_report_html(service.reports_history[-1])
+
+    def test_empty_period_reports_zeros(self, rollups):
+        """Test a period without data reports zero counts and no ratios."""
+        report = AutoReportService(rollups=rollups).generate_daily_report(datetime(2024, 1, 1))
+
+        assert report.data["dispatch"]["total"] == 0
+        assert report.data["performance"]["on_time_delivery"] is None
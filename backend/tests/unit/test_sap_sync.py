@@ -0,0 +1,160 @@
+"""
+Unit tests for the SAP delta sync engine against an in-process fake SAP gateway
+"""
+
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.services.sap_connector_service import SAPConnectorService
+from app.services.sap_sync import ENTITIES, SAPSyncEngine, SAPSyncStore
+
+
+class FakeSAP:
+    """Entity feeds served the way the sync engine expects an SAP gateway to serve them"""
+
+    def __init__(self, records_per_entity=10, latency=0.0):
+        self.latency = latency
+        self.fail_next = 0
+        self.requests = []
+        base = datetime(2024, 1, 1)
+        self.records = {
+            entity.path: [
+                {entity.key: f"{entity.entity_type}-{i}", 'quantity': i,
+                 'changed_at': (base + timedelta(minutes=i)).isoformat()}
+                for i in range(records_per_entity)
+            ]
+            for entity in ENTITIES
+        }
+        self.app = FastAPI()
+        self.app.add_api_route("/{feed}", self.feed)
+
+    def touch(self, path, index, when):
+        self.records[path][index] = dict(self.records[path][index], changed_at=when.isoformat())
+
+    async def feed(self, feed: str, request: Request):
+        self.requests.append(str(request.url))
+        await asyncio.sleep(self.latency)
+        if self.fail_next:
+            self.fail_next -= 1
+            return JSONResponse({'error': 'busy'}, status_code=503)
+
+        params = request.query_params
+        since = params.get('changed_since', '')
+        top, skip = int(params['$top']), int(params['$skip'])
+        rows = sorted(
+            (r for r in self.records[f"/{feed}"] if r['changed_at'] >= since),
+            key=lambda r: r['changed_at']
+        )
+        return {'results': rows[skip:skip + top]}
+
+    def engine(self, store, **kwargs):
+        kwargs.setdefault('backoff_seconds', 0)
+        return SAPSyncEngine(
+            store, "http://sap.test", transport=httpx.ASGITransport(app=self.app), **kwargs
+        )
+
+
+class TestSAPSyncEngine:
+    """Test concurrent delta pulls into the local store"""
+
+    def test_initial_sync_pages_all_records(self):
+        """Test every record is stored and the watermark is the newest change"""
+        sap = FakeSAP(records_per_entity=10)
+        store = SAPSyncStore()
+        result = asyncio.run(sap.engine(store, page_size=4).sync())
+
+        for entity in ENTITIES:
+            stats = result[entity.name]
+            assert stats['error'] is None
+            assert stats['fetched'] == 10
+            assert stats['pages'] == 3
+            assert store.count(entity.entity_type) == 10
+            assert stats['watermark'] == sap.records[entity.path][-1]['changed_at']
+
+    def test_second_sync_pulls_only_changes(self):
+        """Test a delta sync only pulls records changed since the watermark"""
+        sap = FakeSAP(records_per_entity=50)
+        store = SAPSyncStore()
+        engine = sap.engine(store, page_size=20)
+        asyncio.run(engine.sync())
+
+        path = ENTITIES[0].path
+        sap.touch(path, 3, datetime(2024, 2, 1))
+        sap.touch(path, 7, datetime(2024, 2, 2))
+        result = asyncio.run(engine.sync())
+
+        # The record at the previous watermark is re-read (changed_since is inclusive)
+        assert result[ENTITIES[0].name]['fetched'] == 3
+        assert all(result[e.name]['fetched'] == 1 for e in ENTITIES[1:])
+        assert store.get(f"{ENTITIES[0].entity_type}-7")['changed_at'] == datetime(2024, 2, 2).isoformat()
+        assert store.count() == 200
+
+    def test_paging_with_tied_timestamps(self):
+        """Test keyset paging does not skip or repeat records sharing a timestamp"""
+        sap = FakeSAP(records_per_entity=9)
+        path = ENTITIES[0].path
+        for i in range(9):
+            sap.touch(path, i, datetime(2024, 3, 1) + timedelta(minutes=i // 4))
+        store = SAPSyncStore()
+        result = asyncio.run(sap.engine(store, page_size=2).sync(ENTITIES[:1]))
+
+        assert result[ENTITIES[0].name]['fetched'] == 9
+        assert store.count() == 9
+
+    def test_retries_with_backoff(self):
+        """Test 5xx responses are retried and exhausted retries report an error"""
+        sap = FakeSAP(records_per_entity=3)
+        sap.fail_next = 2
+        store = SAPSyncStore()
+        result = asyncio.run(sap.engine(store, max_retries=3).sync(ENTITIES[:1]))
+        assert result[ENTITIES[0].name]['retries'] == 2
+        assert result[ENTITIES[0].name]['error'] is None
+
+        sap.fail_next = 10
+        result = asyncio.run(sap.engine(SAPSyncStore(), max_retries=1).sync(ENTITIES[:1]))
+        assert 'HTTP 503' in result[ENTITIES[0].name]['error']
+
+    def test_entities_sync_concurrently(self):
+        """Test a full sync takes about as long as one entity, not the sum"""
+        sap = FakeSAP(records_per_entity=5, latency=0.2)
+        started = time.perf_counter()
+        asyncio.run(sap.engine(SAPSyncStore()).sync())
+        assert time.perf_counter() - started < 0.2 * len(ENTITIES) * 0.75
+
+
+class TestSAPConnectorService:
+    """Test full_sync on top of the local store"""
+
+    def test_full_sync_with_engine(self):
+        """Test full_sync reports per-entity counts from the delta engine"""
+        sap = FakeSAP(records_per_entity=4)
+        store = SAPSyncStore()
+        service = SAPConnectorService(store=store, engine=sap.engine(store))
+        result = service.full_sync()
+
+        assert result['status'] == 'success'
+        assert result['mode'] == 'delta'
+        assert result['purchase_orders'] == 4
+        assert result['total_synced'] == 16
+        assert len(service.get_integrations('supplier')) == 4
+        assert service.get_status()['sync_history_count'] == 1
+
+    def test_full_sync_sample_data(self):
+        """Test the built-in sample data is stored when no gateway is configured"""
+        service = SAPConnectorService(store=SAPSyncStore())
+        result = service.full_sync()
+
+        assert result['mode'] == 'sample'
+        assert result['total_synced'] == 8
+        assert service.get_integration('PO-2024-001')['data']['vendor'] == 'Supplier A'
+        assert service.get_status()['total_integrations'] == 8
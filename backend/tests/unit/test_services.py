@@ -4,12 +4,15 @@ Unit tests for services.
 
 import pytest
 import sys
+from datetime import datetime, timedelta
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from app.services.inference_service import inference_service
 from app.services.optimize_service import optimize_service
+from app.services.realtime_delay_service import RealtimeDelayService, ShipmentTracking, ShipmentStatus
+from app.services.auto_alerts_service import AlertType, AutoAlertsService
 
 class TestInferenceService:
     """Tests for inference service."""
@@ -94,5 +97,153 @@ class TestOptimizeService:
         assert 'cost_parameters' in optimizer_input
         assert len(optimizer_input['ml_predictions']) > 0
 
+    def test_fallback_plans_are_not_cached(self, monkeypatch):
+        """Test an LNS plan standing in for a failed full model is solved again next time."""
+        solves = []
+
+        def run_optimizer(optimizer_input):
+            solves.append(optimizer_input)
+            return {'rakes': [], 'trucks': [], 'summary': {'fallback': True}, 'solver_status': 'LNS'}
+
+        monkeypatch.setattr(optimize_service, 'build_optimizer_input', lambda request: request)
+        monkeypatch.setattr(optimize_service, 'run_optimizer', run_optimizer)
+        request = {'orders': [{'order_id': 'FALLBACK1', 'quantity_tonnes': 500, 'destination': 'Patna'}]}
+
+        first = optimize_service.plan(request)
+        second = optimize_service.plan(request)
+
+        assert len(solves) == 2
+        assert not first['cache']['hit'] and not second['cache']['hit']
+
+class TestRealtimeDelayService:
+    """Tests for the shipment store and delay sweep."""
+    
+    def _service(self, hours_until_due):
+        service = RealtimeDelayService(store_path=":memory:", sweep_interval_seconds=3600)
+        shipments = []
+        for i, hours in enumerate(hours_until_due):
+            tracking = ShipmentTracking(
+                f"T-{i}", 'Bokaro', 'Kolkata', datetime.now() + timedelta(hours=hours), 100
+            )
+            tracking.status = ShipmentStatus.IN_TRANSIT
+            shipments.append(tracking)
+        service.add_shipments(shipments)
+        return service
+    
+    def test_sweep_flags_delayed_and_at_risk(self):
+        """Test one sweep classifies overdue and nearly due shipments."""
+        service = self._service([-5, 2, 48])
+        
+        result = service.sweep_delays()
+        
+        assert result['newly_delayed'] == 1
+        assert result['newly_at_risk'] == 1
+        assert [s['id'] for s in service.get_delayed_shipments()] == ['T-0']
+        assert service.get_shipment('T-1')['at_risk'] is True
+        assert service.get_shipment('T-2')['at_risk'] is False
+    
+    def test_sweep_alerts_only_on_transition(self):
+        """Test repeated sweeps do not duplicate alerts."""
+        service = self._service([-5, 2])
+        
+        service.sweep_delays()
+        second = service.sweep_delays()
+        
+        assert second['newly_delayed'] == 0
+        assert second['newly_at_risk'] == 0
+        assert len(service.get_delay_alerts()) == 2
+    
+    def test_status_filter_and_delivery(self):
+        """Test status-filtered queries and delivery updates."""
+        service = self._service([-5, 24])
+        service.sweep_delays()
+        service.mark_delivered('T-1')
+        
+        status = service.get_status()
+        
+        assert status['delayed_shipments'] == 1
+        assert status['delivered_shipments'] == 1
+        assert [s['id'] for s in service.get_all_shipments(status='delivered')] == ['T-1']
+    
+    def test_status_listing_needs_no_sort(self):
+        """Test the newest-first status listing is read in index order."""
+        service = self._service([1])
+        
+        plan = service.store._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM shipments WHERE status = ? ORDER BY rowid DESC LIMIT ?",
+            ('in_transit', 10)
+        ).fetchall()
+        
+        details = [row[-1] for row in plan]
+        assert any('idx_shipments_status ' in d for d in details)
+        assert not any('TEMP B-TREE' in d for d in details)
+
+
+class TestAutoAlertsService:
+    """Tests for columnar plan analysis in the auto-alerts service."""
+    
+    @staticmethod
+    def _plan(orders=8):
+        due = datetime(2024, 6, 1)
+        return {
+            'id': 'PLAN-W1',
+            'rakes_needed': 2,
+            'allocations': [
+                {'order_id': f'ORD-{i}', 'destination': f'D{i % 3}', 'tonnage': 100.0,
+                 'cost': 4000.0, 'capacity_tonnes': 120.0, 'delay_probability': 0.1,
+                 'due_date': due.isoformat(), 'eta': (due - timedelta(hours=6)).isoformat()}
+                for i in range(orders)
+            ],
+            'predictions': {},
+        }
+    
+    def test_order_predicates_flag_orders(self):
+        """Test per-order checks flag exactly the offending orders."""
+        plan = self._plan()
+        plan['allocations'][1]['delay_probability'] = 0.6
+        plan['allocations'][2]['eta'] = datetime(2024, 6, 2).isoformat()
+        plan['allocations'][3]['cost'] = 9000.0
+        plan['allocations'][4]['tonnage'] = 150.0
+        
+        alerts = {a.type: a for a in AutoAlertsService().analyze_plan(plan)}
+        
+        assert alerts[AlertType.DELAY_RISK].affected_orders == ['ORD-1', 'ORD-2']
+        assert alerts[AlertType.COST_OVERRUN].affected_orders == ['ORD-3']
+        assert alerts[AlertType.CAPACITY_EXCEEDED].affected_orders == ['ORD-4']
+        assert alerts[AlertType.SCHEDULE_CONFLICT].data['order_count'] == 3
+        assert alerts[AlertType.VEHICLE_UNAVAILABLE].data['vehicles_needed'] == 8
+        assert len({a.id for a in alerts.values()}) == len(alerts)
+    
+    def test_unparseable_fields_are_not_flagged(self):
+        """Test malformed dates and numbers count as missing instead of failing the analysis."""
+        plan = self._plan()
+        plan['allocations'][1]['eta'] = 'next tuesday'
+        plan['allocations'][2]['due_date'] = ''
+        plan['allocations'][3]['cost'] = 'TBD'
+        plan['allocations'][4]['tonnage'] = 'n/a'
+        plan['allocations'][5]['cost'] = 9000.0
+        
+        alerts = {a.type: a for a in AutoAlertsService().analyze_plan(plan)}
+        
+        assert AlertType.DELAY_RISK not in alerts
+        assert AlertType.CAPACITY_EXCEEDED not in alerts
+        assert alerts[AlertType.COST_OVERRUN].affected_orders == ['ORD-5']
+    
+    def test_incremental_reports_only_changed_alerts(self):
+        """Test incremental analysis re-checks changed orders and skips unchanged alerts."""
+        service = AutoAlertsService()
+        plan = self._plan()
+        plan['allocations'][1]['delay_probability'] = 0.6
+        first = service.analyze_plan(plan, incremental=True)
+        assert AlertType.DELAY_RISK in {a.type for a in first}
+        
+        assert service.analyze_plan(plan, incremental=True) == []
+        
+        plan['allocations'][1]['delay_probability'] = 0.1
+        plan['allocations'][5]['cost'] = 9000.0
+        changed = service.analyze_plan(plan, incremental=True)
+        assert [(a.type, a.affected_orders) for a in changed] == [(AlertType.COST_OVERRUN, ['ORD-5'])]
+        assert service.get_status()['total_alerts'] == len(first) + 1
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
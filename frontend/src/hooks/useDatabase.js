@@ -24,6 +24,7 @@ export const useDatabase = () => {
       if (filters.material) params.append('material', filters.material)
       if (filters.days) params.append('days', filters.days)
       if (filters.limit) params.append('limit', filters.limit)
+      if (filters.cursor) params.append('cursor', filters.cursor)
 
       const response = await client.get(`/api/database/shipments?${params}`)
       setLoading(false)
@@ -61,6 +62,7 @@ export const useDatabase = () => {
       if (filters.scenario) params.append('scenario', filters.scenario)
       if (filters.days) params.append('days', filters.days)
       if (filters.limit) params.append('limit', filters.limit)
+      if (filters.cursor) params.append('cursor', filters.cursor)
 
       const response = await client.get(`/api/database/decisions?${params}`)
       setLoading(false)
@@ -86,6 +88,7 @@ export const useDatabase = () => {
       if (filters.status) params.append('status', filters.status)
       if (filters.days) params.append('days', filters.days)
       if (filters.limit) params.append('limit', filters.limit)
+      if (filters.cursor) params.append('cursor', filters.cursor)
 
       const response = await client.get(`/api/database/dispatches?${params}`)
       setLoading(false)
@@ -121,7 +124,7 @@ export const useDatabase = () => {
     try {
       const response = await client.get(`/api/database/analytics/materials?days=${days}`)
       setLoading(false)
-      return response.data || []
+      return response.data?.materials || []
     } catch (err) {
       setError(err.message)
       setLoading(false)